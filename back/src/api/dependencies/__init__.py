@@ -17,6 +17,7 @@ from src.services.chat_service import ChatService
 from src.api.helpers.statistics_helpers import StatisticsHelpers
 from src.config.settings import get_settings
 from src.core.exceptions import UnauthorizedException
+from src.core.service_container import services
 from uuid import uuid4, UUID
 import logging
 
@@ -26,13 +27,16 @@ logger = logging.getLogger(__name__)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/users/login", auto_error=False)
 settings = get_settings()
 
-# Instancias de servicios
-document_service = DocumentService()
-user_service = UserService()
-statistics_service = StatisticsService()
-statistics_validation_service = StatisticsValidationService()
-statistics_helpers = StatisticsHelpers()
-chat_service = ChatService()
+# Servicios compartidos: se construyen en el primer uso, no al importar
+# (StatisticsService, por ejemplo, abre el cliente de Supabase)
+services.register("statistics_helpers", StatisticsHelpers)
+
+document_service = services.lazy("document_service")
+user_service = services.lazy("user_service")
+statistics_service = services.lazy("statistics_service")
+statistics_validation_service = services.lazy("statistics_validation_service")
+statistics_helpers = services.lazy("statistics_helpers")
+chat_service = services.lazy("chat_service")
 
 def get_document_service() -> DocumentService:
     """
@@ -41,7 +45,7 @@ def get_document_service() -> DocumentService:
     Returns:
         DocumentService: Servicio para operaciones con documentos
     """
-    return document_service
+    return services.get("document_service")
 
 def get_statistics_service() -> StatisticsService:
     """
@@ -50,7 +54,7 @@ def get_statistics_service() -> StatisticsService:
     Returns:
         StatisticsService: Servicio para operaciones con estadísticas
     """
-    return statistics_service
+    return services.get("statistics_service")
 
 def get_user_service() -> UserService:
     """
@@ -59,7 +63,7 @@ def get_user_service() -> UserService:
     Returns:
         UserService: Servicio para operaciones con usuarios
     """
-    return user_service
+    return services.get("user_service")
 
 def get_chat_service() -> ChatService:
     """
@@ -68,7 +72,7 @@ def get_chat_service() -> ChatService:
     Returns:
         ChatService: Servicio para operaciones con chats
     """
-    return chat_service
+    return services.get("chat_service")
 
 def get_statistics_validation_service() -> StatisticsValidationService:
     """
@@ -77,7 +81,7 @@ def get_statistics_validation_service() -> StatisticsValidationService:
     Returns:
         StatisticsValidationService: Servicio para validaciones de estadísticas
     """
-    return statistics_validation_service
+    return services.get("statistics_validation_service")
 
 def get_statistics_helpers() -> StatisticsHelpers:
     """
@@ -86,7 +90,7 @@ def get_statistics_helpers() -> StatisticsHelpers:
     Returns:
         StatisticsHelpers: Helpers para operaciones complejas de estadísticas
     """
-    return statistics_helpers
+    return services.get("statistics_helpers")
 
 def get_current_user(
     token: Optional[str] = Depends(oauth2_scheme), 
@@ -100,7 +104,7 @@ def get_current_user(
     # Usar token del parámetro de consulta si está disponible y no hay token en el encabezado
     actual_token = token_query or token
     
-    logger.info(f"Token recibido: {actual_token[:10] if actual_token else 'No token'}...")
+    logger.debug("Token recibido: %s...", actual_token[:10] if actual_token else 'No token')
     
     credentials_exception = UnauthorizedException("No autenticado o token inválido")
     
@@ -119,7 +123,7 @@ def get_current_user(
         auth_id = payload.get("sub")
         user_id = payload.get("user_id")
         
-        logger.info(f"Token decodificado correctamente. User ID: {user_id}")
+        logger.debug("Token decodificado correctamente. User ID: %s", user_id)
         
         if not auth_id or not user_id:
             logger.error("Token no contiene auth_id o user_id")
@@ -138,7 +142,7 @@ def get_current_user(
             user.is_admin = True
             user_service.repository.update(user, {"is_admin": True})
             
-        logger.info(f"Usuario encontrado: {user.username}, Admin: {user.is_admin}")
+        logger.debug("Usuario encontrado: %s, Admin: %s", user.username, user.is_admin)
         
         return user
         
@@ -6,8 +6,11 @@ Endpoints limpios y organizados siguiendo el patrón de documents.py:
 - Operaciones complejas en AdminEndpointHelpers
 """
 from fastapi import APIRouter, Depends, Query, Path, Body
+from fastapi.responses import FileResponse, StreamingResponse, PlainTextResponse, Response
 from typing import List, Optional, Dict, Any
+import asyncio
 import logging
+import threading
 
 # Schemas
 from src.models.schemas.document import DocumentResponse
@@ -22,6 +25,15 @@ from src.services.chat_service import ChatService
 from src.services.user_service import UserService
 from src.services.admin_service import AdminService
 from src.services.admin_validation_service import AdminValidationService
+from src.services.export_service import export_service
+from src.services.bulk_operation_service import bulk_job_registry
+from src.services.vector_orphan_sweeper import vector_orphan_sweeper
+from src.services.profiling_service import (
+    loop_lag_monitor, sampling_profiler, memory_snapshots,
+    collapsed_text, render_flamegraph_svg
+)
+from src.core.service_container import services
+from src.core.startup_report import startup_report, current_rss_mb
 
 # Helpers
 from src.api.helpers.admin_helpers import AdminEndpointHelpers
@@ -34,7 +46,7 @@ from src.api.dependencies import (
 
 # Excepciones
 from src.core.exceptions import (
-    ForbiddenException, DatabaseException, ValidationException
+    ForbiddenException, DatabaseException, ValidationException, ConflictException
 )
 
 logger = logging.getLogger(__name__)
@@ -191,6 +203,7 @@ async def bulk_operation(
     operation: str = Path(..., description="Operación a realizar (delete, export)"),
     resource_type: str = Body(..., embed=True),
     resource_ids: List[int] = Body(..., embed=True),
+    format: str = Body("jsonl", embed=True, description="Formato de exportación (jsonl, csv)"),
     admin_user: User = Depends(get_current_user),
     admin_service: AdminService = Depends(get_admin_service)
 ):
@@ -203,8 +216,253 @@ async def bulk_operation(
         resource_type=resource_type,
         resource_ids=resource_ids,
         admin_user=admin_user,
-        admin_service=admin_service
+        admin_service=admin_service,
+        export_format=format
+    )
+
+@router.get("/bulk/jobs/{job_id}", response_model=Dict[str, Any])
+async def get_bulk_job(
+    job_id: str = Path(..., description="ID del trabajo en lote"),
+    admin_user: User = Depends(get_current_user)
+):
+    """
+    Estado e informe de una operación en lote ejecutada en segundo plano.
+    Solo accesible por administradores.
+    """
+    admin_validator.validate_admin_access(admin_user, "ver operaciones en lote")
+    return bulk_job_registry.get(job_id).to_dict()
+
+# ==================== ENDPOINTS DE EXPORTACIÓN ====================
+# Declarados antes de /{resource_type}/{resource_id} para que no los capture
+
+@router.get("/export/jobs", response_model=List[Dict[str, Any]])
+async def list_export_jobs(
+    admin_user: User = Depends(get_current_user)
+):
+    """
+    Lista las exportaciones a fichero con su estado y progreso.
+    Solo accesible por administradores.
+    """
+    admin_validator.validate_admin_access(admin_user, "ver exportaciones")
+    return [job.to_dict() for job in export_service.list_jobs()]
+
+@router.post("/export/jobs/{job_id}/resume", response_model=Dict[str, Any])
+async def resume_export_job(
+    job_id: str = Path(..., description="ID de la exportación"),
+    admin_user: User = Depends(get_current_user)
+):
+    """
+    Reanuda una exportación interrumpida desde su último cursor.
+    Solo accesible por administradores.
+    """
+    admin_validator.validate_admin_access(admin_user, "reanudar exportaciones")
+    return export_service.resume_file_export(job_id).to_dict()
+
+@router.get("/export/jobs/{job_id}", response_model=Dict[str, Any])
+async def get_export_job(
+    job_id: str = Path(..., description="ID de la exportación"),
+    admin_user: User = Depends(get_current_user)
+):
+    """
+    Estado, progreso y cursor de una exportación a fichero.
+    Solo accesible por administradores.
+    """
+    admin_validator.validate_admin_access(admin_user, "ver exportaciones")
+    return export_service.get_job(job_id).to_dict()
+
+@router.get("/export/jobs/{job_id}/download")
+async def download_export_job(
+    job_id: str = Path(..., description="ID de la exportación"),
+    admin_user: User = Depends(get_current_user)
+):
+    """
+    Descarga el fichero de una exportación completada.
+    Solo accesible por administradores.
+    """
+    admin_validator.validate_admin_access(admin_user, "descargar exportaciones")
+    job = export_service.get_job(job_id)
+    if job.status != "completed":
+        raise ValidationException(f"La exportación {job_id} no está completada (estado: {job.status})")
+    return FileResponse(
+        export_service.file_path(job),
+        media_type=export_service.media_type(job.format, job.compress),
+        filename=job.filename
+    )
+
+@router.post("/export/{resource_type}/jobs", response_model=Dict[str, Any])
+async def create_export_job(
+    resource_type: str = Path(..., description="Recurso: users, documents, chats, messages"),
+    format: str = Body("jsonl", embed=True, description="Formato: jsonl, csv"),
+    compress: bool = Body(False, embed=True, description="Comprimir con gzip"),
+    include_content: bool = Body(False, embed=True, description="Incluir el texto de los documentos"),
+    admin_user: User = Depends(get_current_user),
+    admin_service: AdminService = Depends(get_admin_service)
+):
+    """
+    Exporta una tabla completa a un fichero en segundo plano (para
+    exportaciones grandes). Consultar el progreso en /admin/export/jobs/{job_id}.
+    Solo accesible por administradores.
+    """
+    admin_validator.validate_admin_access(admin_user, f"exportar {resource_type}")
+    return admin_service.export_resources(
+        resource_type=resource_type,
+        format=format,
+        filters={"include_content": include_content},
+        compress=compress
+    )
+
+@router.get("/export/{resource_type}")
+async def stream_export(
+    resource_type: str = Path(..., description="Recurso: users, documents, chats, messages"),
+    format: str = Query("jsonl", description="Formato: jsonl, csv"),
+    compress: bool = Query(False, description="Comprimir con gzip"),
+    cursor: int = Query(0, ge=0, description="Último ID recibido (para reanudar)"),
+    include_content: bool = Query(False, description="Incluir el texto de los documentos"),
+    admin_user: User = Depends(get_current_user),
+    admin_service: AdminService = Depends(get_admin_service)
+):
+    """
+    Exporta una tabla completa en streaming (JSONL o CSV, opcionalmente gzip).
+    Las filas salen ordenadas por id; si la descarga se corta, se reanuda
+    pasando como cursor el último id recibido.
+    Solo accesible por administradores.
+    """
+    admin_validator.validate_admin_access(admin_user, f"exportar {resource_type}")
+    chunks = admin_service.stream_export(
+        resource_type=resource_type,
+        format=format,
+        compress=compress,
+        after_id=cursor,
+        include_content=include_content
+    )
+    filename = f"{resource_type}.{export_service.normalize_format(format)}" + (".gz" if compress else "")
+    return StreamingResponse(
+        chunks,
+        media_type=export_service.media_type(format, compress),
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+# ==================== ENDPOINTS DE PROFILING ====================
+# Diagnóstico en producción; declarados antes de /{resource_type}/{resource_id}
+
+@router.get("/profiling/loop-lag", response_model=Dict[str, Any])
+async def get_loop_lag(
+    limit: int = Query(20, ge=1, le=200, description="Bloqueos más recientes a devolver"),
+    admin_user: User = Depends(get_current_user)
+):
+    """
+    Bloqueos del event loop por encima del umbral, con la pila del callback
+    que lo tenía ocupado. Solo accesible por administradores.
+    """
+    admin_validator.validate_admin_access(admin_user, "ver bloqueos del event loop")
+    return {
+        "stats": loop_lag_monitor.get_stats(),
+        "events": loop_lag_monitor.get_events(limit)
+    }
+
+@router.get("/profiling/startup", response_model=Dict[str, Any])
+async def get_startup_report(
+    admin_user: User = Depends(get_current_user)
+):
+    """
+    Arranque del worker que atiende la petición: imports, fases del startup,
+    RSS, módulos pesados ya cargados y servicios construidos hasta ahora.
+    """
+    admin_validator.validate_admin_access(admin_user, "ver el informe de arranque")
+    return {
+        **startup_report.to_dict(),
+        "current_rss_mb": current_rss_mb(),
+        "services": services.report()
+    }
+
+@router.post("/profiling/cpu")
+async def profile_cpu(
+    duration: float = Query(10.0, gt=0, description="Segundos de muestreo"),
+    interval_ms: float = Query(5.0, ge=1, le=1000, description="Milisegundos entre muestras"),
+    format: str = Query("svg", pattern="^(svg|collapsed)$", description="svg (flamegraph) o collapsed"),
+    loop_only: bool = Query(False, description="Muestrear solo el hilo del event loop"),
+    admin_user: User = Depends(get_current_user)
+):
+    """
+    Perfila la CPU del proceso durante `duration` segundos muestreando las
+    pilas de todos los hilos. Devuelve un flamegraph SVG o pilas colapsadas
+    (compatibles con flamegraph.pl y speedscope).
+    Solo accesible por administradores.
+    """
+    admin_validator.validate_admin_access(admin_user, "perfilar la CPU")
+    thread_ids = {threading.get_ident()} if loop_only else None
+    result = await asyncio.to_thread(
+        sampling_profiler.profile, duration, interval_ms / 1000, thread_ids
     )
+    logger.info(f"🔥 Perfil de CPU de {result['duration_seconds']}s ({result['samples']} muestras) por {admin_user.username}")
+    if format == "collapsed":
+        return PlainTextResponse(collapsed_text(result["stacks"]))
+    title = f"CPU {result['duration_seconds']}s cada {interval_ms:g} ms"
+    return Response(render_flamegraph_svg(result["stacks"], title), media_type="image/svg+xml")
+
+@router.post("/profiling/memory/start", response_model=Dict[str, Any])
+async def start_memory_tracing(
+    frames: int = Query(25, ge=1, le=100, description="Marcos guardados por asignación"),
+    admin_user: User = Depends(get_current_user)
+):
+    """
+    Activa tracemalloc. Solo registra asignaciones posteriores y añade coste
+    de memoria y CPU hasta /profiling/memory/stop.
+    """
+    admin_validator.validate_admin_access(admin_user, "activar tracemalloc")
+    return memory_snapshots.start(frames)
+
+@router.post("/profiling/memory/stop", response_model=Dict[str, Any])
+async def stop_memory_tracing(
+    admin_user: User = Depends(get_current_user)
+):
+    """
+    Desactiva tracemalloc y descarta las instantáneas.
+    Solo accesible por administradores.
+    """
+    admin_validator.validate_admin_access(admin_user, "desactivar tracemalloc")
+    return memory_snapshots.stop()
+
+@router.post("/profiling/memory/snapshots", response_model=Dict[str, Any])
+async def take_memory_snapshot(
+    label: Optional[str] = Query(None, max_length=100, description="Etiqueta de la instantánea"),
+    admin_user: User = Depends(get_current_user)
+):
+    """
+    Toma una instantánea de tracemalloc. Solo se conservan las últimas
+    PROFILING_MEMORY_MAX_SNAPSHOTS.
+    """
+    admin_validator.validate_admin_access(admin_user, "tomar instantáneas de memoria")
+    return await asyncio.to_thread(memory_snapshots.take, label)
+
+@router.get("/profiling/memory/snapshots", response_model=Dict[str, Any])
+async def list_memory_snapshots(
+    admin_user: User = Depends(get_current_user)
+):
+    """
+    Estado de tracemalloc e instantáneas conservadas.
+    Solo accesible por administradores.
+    """
+    admin_validator.validate_admin_access(admin_user, "ver instantáneas de memoria")
+    return {
+        "status": memory_snapshots.get_status(),
+        "snapshots": memory_snapshots.list()
+    }
+
+@router.get("/profiling/memory/diff", response_model=Dict[str, Any])
+async def diff_memory_snapshots(
+    from_id: int = Query(..., alias="from", description="Instantánea inicial"),
+    to_id: int = Query(..., alias="to", description="Instantánea final"),
+    group_by: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+    limit: int = Query(20, ge=1, le=200),
+    admin_user: User = Depends(get_current_user)
+):
+    """
+    Mayores crecimientos de memoria entre dos instantáneas, agrupados por
+    línea, fichero o traza completa.
+    """
+    admin_validator.validate_admin_access(admin_user, "comparar instantáneas de memoria")
+    return await asyncio.to_thread(memory_snapshots.diff, from_id, to_id, group_by, limit)
 
 # ==================== ENDPOINTS DE DETALLE ====================
 
@@ -234,41 +492,79 @@ async def get_resource_details(
 
 @router.post("/maintenance/reindex-documents")
 async def reindex_all_documents(
+    resume: bool = Query(True, description="Continuar la última re-indexación interrumpida"),
+    embedding_model: Optional[str] = Query(None, description="Modelo de la versión nueva (por defecto el configurado)"),
     admin_user: User = Depends(get_current_user),
     document_service: DocumentService = Depends(get_document_service)
 ):
     """
-    Re-indexa todos los documentos en ChromaDB.
-    Operación costosa - usar con precaución.
+    Re-indexa todos los documentos en una versión nueva de la colección
+    (documents_v{n}) y la activa al terminar; sirve también para migrar de
+    modelo de embeddings sin cortes. Se ejecuta en segundo plano; el progreso
+    se consulta en /maintenance/reindex-documents/status.
     """
     admin_validator.validate_admin_access(admin_user, "re-indexar documentos")
     
     try:
-        count = document_service.reindex_all_documents()
+        job = document_service.reindex_all_documents(resume=resume, embedding_model=embedding_model)
         return {
-            "message": f"Re-indexación iniciada para {count} documentos",
-            "status": "processing"
+            "message": f"Re-indexación iniciada en la colección {job.target_collection}",
+            "status": "processing",
+            "job": job.to_dict()
         }
+    except ConflictException:
+        raise
     except Exception as e:
         logger.error(f"Error en re-indexación: {str(e)}")
         raise DatabaseException(f"Error al re-indexar: {str(e)}")
 
-@router.post("/maintenance/cleanup")
-async def cleanup_orphaned_resources(
+@router.get("/maintenance/reindex-documents/status", response_model=Dict[str, Any])
+async def get_reindex_status(
     admin_user: User = Depends(get_current_user),
-    admin_service: AdminService = Depends(get_admin_service)
+    document_service: DocumentService = Depends(get_document_service)
+):
+    """
+    Progreso y rendimiento (documentos y chunks por segundo) de la última
+    re-indexación completa. Solo accesible por administradores.
+    """
+    admin_validator.validate_admin_access(admin_user, "ver la re-indexación")
+    return document_service.get_reindex_status().to_dict()
+
+@router.get("/maintenance/vector-collections", response_model=Dict[str, Any])
+async def get_vector_collections(
+    admin_user: User = Depends(get_current_user),
+    document_service: DocumentService = Depends(get_document_service)
+):
+    """
+    Registro de versiones de la colección de documentos: activa, anterior,
+    migración en curso y modelo de cada versión.
+    """
+    admin_validator.validate_admin_access(admin_user, "ver las colecciones vectoriales")
+    return await asyncio.to_thread(document_service.chromadb.get_collection_registry)
+
+@router.post("/maintenance/cleanup", response_model=Dict[str, Any])
+async def cleanup_orphaned_resources(
+    admin_user: User = Depends(get_current_user)
 ):
     """
-    Limpia recursos huérfanos del sistema.
+    Limpia recursos huérfanos del sistema: elimina de ChromaDB los chunks de
+    documentos que ya no existen y rellena/verifica chunk_count.
     Solo accesible por administradores.
     """
     admin_validator.validate_admin_access(admin_user, "limpiar recursos")
     
     try:
-        # TODO: Implementar limpieza real
+        report = await vector_orphan_sweeper.sweep_once()
+        if report.get("skipped"):
+            return {
+                "message": "Limpieza omitida",
+                "status": "skipped",
+                "report": report
+            }
         return {
-            "message": "Limpieza programada",
-            "status": "pending"
+            "message": "Limpieza completada",
+            "status": "completed",
+            "report": report
         }
     except Exception as e:
         logger.error(f"Error en limpieza: {str(e)}")
@@ -9,7 +9,7 @@ from fastapi import APIRouter, Depends, HTTPException
 
 from src.api.dependencies import get_current_user
 from src.models.domain import User
-from src.config.database import get_supabase_client
+from src.services.admin_dashboard_service import AdminDashboardService
 from src.utils.timezone_utils import get_utc_now, ensure_utc
 
 logger = logging.getLogger(__name__)
@@ -19,6 +19,8 @@ router = APIRouter(
     tags=["🛡️ Admin Panel"]
 )
 
+admin_dashboard_service = AdminDashboardService()
+
 @router.get("/dashboard")
 async def get_admin_dashboard(
     current_user: User = Depends(get_current_user)
@@ -37,66 +39,17 @@ async def get_admin_dashboard(
     try:
         logger.info(f"🛡️ Admin {current_user.username} (ID: {current_user.id}) solicitando dashboard")
         
-        # Usar cliente con permisos de servicio para bypasear RLS
-        service_client = get_supabase_client(use_service_role=True)
-        
-        # 1. OBTENER TODOS LOS USUARIOS
-        users_response = service_client.table('users').select('*').execute()
-        all_users = users_response.data if users_response.data else []
-        
-        # Crear diccionario de usuarios para búsquedas rápidas
-        users_dict = {user['id']: user for user in all_users}
-        
-        # Log de usuarios encontrados
-        logger.info(f"👥 Total usuarios en el sistema: {len(all_users)}")
-        usernames = [u.get('username', 'Unknown') for u in all_users]
-        logger.info(f"👥 Usuarios: {usernames}")
-        
-        # 2. OBTENER TODOS LOS DOCUMENTOS
-        docs_response = service_client.table('documents').select('*').order('created_at', desc=True).execute()
-        all_documents = docs_response.data if docs_response.data else []
-        logger.info(f"📄 Total documentos en el sistema: {len(all_documents)}")
-        
-        # 3. OBTENER TODOS LOS CHATS
-        chats_response = service_client.table('chats').select('*').order('created_at', desc=True).execute()
-        all_chats = chats_response.data if chats_response.data else []
-        logger.info(f"💬 Total chats en el sistema: {len(all_chats)}")
+        # 1. OBTENER DATOS AGREGADOS Y LISTAS RECIENTES (consultas en paralelo)
+        data = await admin_dashboard_service.load(current_user.id)
+        statistics = data["statistics"]
+        other_users = data["users"]
+        other_users_documents = data["documents"]
+        other_users_chats = data["chats"]
         
-        # 4. FILTRAR DATOS EXCLUYENDO AL ADMIN ACTUAL
-        # Documentos que no son del admin actual
-        other_users_documents = [
-            doc for doc in all_documents 
-            if doc.get('uploaded_by') != current_user.id
-        ]
+        # Diccionario de usuarios para resolver propietarios
+        users_dict = {user['id']: user for user in other_users}
         
-        # Chats que no son del admin actual  
-        other_users_chats = [
-            chat for chat in all_chats 
-            if chat.get('id_user') != current_user.id
-        ]
-        
-        # Usuarios excluyendo al admin actual
-        other_users = [
-            user for user in all_users
-            if user.get('id') != current_user.id
-        ]
-        
-        logger.info(f"📊 Datos filtrados (excluyendo admin {current_user.username}):")
-        logger.info(f"   - Usuarios: {len(other_users)}")
-        logger.info(f"   - Documentos: {len(other_users_documents)}")
-        logger.info(f"   - Chats: {len(other_users_chats)}")
-        
-        # 5. CALCULAR ESTADÍSTICAS
-        statistics = {
-            "total_users": len(other_users),  # Usuarios sin incluir al admin actual
-            "total_documents": len(other_users_documents),  # Documentos de otros usuarios
-            "active_chats": len(other_users_chats),  # Chats de otros usuarios
-            "total_system_users": len(all_users),  # Total real del sistema
-            "total_system_documents": len(all_documents),  # Total real del sistema
-            "total_system_chats": len(all_chats)  # Total real del sistema
-        }
-        
-        # 6. PREPARAR ACTIVIDAD RECIENTE
+        # 2. PREPARAR ACTIVIDAD RECIENTE
         recent_activities = []
         
         # Agregar documentos recientes (máximo 3)
@@ -130,31 +83,26 @@ async def get_admin_dashboard(
             })
         
         # Ordenar actividades por timestamp
-        recent_activities.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
+        recent_activities.sort(key=lambda x: x.get('timestamp') or '', reverse=True)
         recent_activities = recent_activities[:5]  # Limitar a 5 actividades más recientes
         
-        # 7. PREPARAR LISTA DE USUARIOS CON INFORMACIÓN COMPLETA
+        # 3. PREPARAR LISTA DE USUARIOS CON INFORMACIÓN COMPLETA
         users_list = []
         for user in other_users:
-            created_at = user.get('created_at')
-            logger.info(f"🕒 Usuario {user.get('username')} - created_at: {created_at}")
-            formatted_time = _format_relative_time(created_at)
-            logger.info(f"🕒 Usuario {user.get('username')} - tiempo formateado: {formatted_time}")
-            
             users_list.append({
                 "id": user.get('id'),
                 "username": user.get('username'),
                 "email": user.get('email'),
                 "created_at": user.get('created_at'),
-                "formatted_created": formatted_time,
+                "formatted_created": _format_relative_time(user.get('created_at')),
                 "is_admin": user.get('is_admin', False),
-                "documents_count": len([d for d in all_documents if d.get('uploaded_by') == user.get('id')]),
-                "chats_count": len([c for c in all_chats if c.get('id_user') == user.get('id')])
+                "documents_count": user.get('documents_count', 0),
+                "chats_count": user.get('chats_count', 0)
             })
         
-        # 8. PREPARAR LISTA DE DOCUMENTOS CON INFORMACIÓN DEL PROPIETARIO
+        # 4. PREPARAR LISTA DE DOCUMENTOS CON INFORMACIÓN DEL PROPIETARIO
         documents_list = []
-        for doc in other_users_documents[:20]:  # Limitar a 20 documentos más recientes
+        for doc in other_users_documents:  # Ya limitados a los 20 más recientes
             owner_id = doc.get('uploaded_by')
             owner = users_dict.get(owner_id, {})
             
@@ -175,9 +123,9 @@ async def get_admin_dashboard(
                 "is_shared": doc.get('is_shared', False)
             })
         
-        # 9. PREPARAR LISTA DE CHATS CON INFORMACIÓN DEL USUARIO
+        # 5. PREPARAR LISTA DE CHATS CON INFORMACIÓN DEL USUARIO
         chats_list = []
-        for chat in other_users_chats[:20]:  # Limitar a 20 chats más recientes
+        for chat in other_users_chats:  # Ya limitados a los 20 más recientes
             user_id = chat.get('id_user')
             user = users_dict.get(user_id, {})
             
@@ -193,7 +141,7 @@ async def get_admin_dashboard(
                 }
             })
         
-        # 10. CONSTRUIR RESPUESTA COMPLETA
+        # 6. CONSTRUIR RESPUESTA COMPLETA
         response = {
             "statistics": statistics,
             "recent_activities": recent_activities,
@@ -17,7 +17,7 @@ from src.models.schemas.chat import (
 from src.models.domain import User
 
 # Servicios especializados
-from src.services.chat_service import ChatService
+from src.core.service_container import services
 from src.services.chat_validation_service import ChatValidationService
 from src.services.message_processing_service import MessageProcessingService
 
@@ -40,7 +40,7 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/chats", tags=["chats"])
 
 # Inicializar servicios y helpers
-chat_service = ChatService()
+chat_service = services.lazy("chat_service")
 chat_validator = ChatValidationService()
 chat_helpers = ChatEndpointHelpers()
 
@@ -4,7 +4,6 @@ Endpoints WebSocket para chat en tiempo real
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, Query
 from typing import Optional
 import logging
-import json
 
 from src.core.websocket_manager import websocket_manager
 from src.core.auth import verify_websocket_token
@@ -18,13 +17,16 @@ router = APIRouter()
 async def websocket_endpoint(
     websocket: WebSocket,
     chat_id: int,
-    token: Optional[str] = Query(None)
+    token: Optional[str] = Query(None),
+    encoding: Optional[str] = Query(None)
 ):
     """
     WebSocket endpoint para chat en tiempo real
     
     Protocolo:
     - Cliente envía token como query parameter
+    - Cliente puede pedir frames binarios con ``encoding=msgpack``
+      (el mensaje de bienvenida, siempre JSON, confirma la codificación)
     - Servidor valida token y acepta conexión
     - Cliente puede enviar mensajes tipo:
         - message: Para enviar mensajes de chat
@@ -33,7 +35,9 @@ async def websocket_endpoint(
     - Servidor responde con:
         - stream_start/chunk/end: Para respuestas en streaming
         - error: Para errores
-        - heartbeat: Para mantener conexión
+        - heartbeat: Enviado por el servidor cada WEBSOCKET_HEARTBEAT_INTERVAL
+          segundos; sin actividad del cliente en WEBSOCKET_IDLE_TIMEOUT se cierra
+        - reconnect: El servidor se está apagando y el cliente debe reconectar
     """
     user = None
     
@@ -49,16 +53,19 @@ async def websocket_endpoint(
             return
             
         # Conectar al manager
-        connected = await websocket_manager.connect(websocket, chat_id, user.id)
+        connected = await websocket_manager.connect(websocket, chat_id, user.id, encoding)
         if not connected:
             return
             
         # Loop principal de mensajes
         while True:
             try:
-                # Recibir mensaje
-                data = await websocket.receive_text()
-                message = json.loads(data)
+                # Recibir mensaje (texto JSON o binario msgpack)
+                raw = await websocket.receive()
+                if raw["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(raw.get("code", 1000))
+                websocket_manager.touch(chat_id, user.id)
+                message = websocket_manager.helpers.decode_frame(raw)
                 
                 # Procesar mensaje
                 await websocket_manager.handle_message(
@@ -68,14 +75,14 @@ async def websocket_endpoint(
             except WebSocketDisconnect:
                 logger.info(f"WebSocket desconectado: usuario {user.id}, chat {chat_id}")
                 break
-            except json.JSONDecodeError:
-                await websocket.send_json({
+            except ValueError:
+                await websocket_manager.helpers.send_frame(websocket, {
                     "type": "error",
                     "data": {"error": "Mensaje JSON inválido"}
                 })
             except Exception as e:
                 logger.error(f"Error en WebSocket: {str(e)}")
-                await websocket.send_json({
+                await websocket_manager.helpers.send_frame(websocket, {
                     "type": "error",
                     "data": {"error": "Error interno del servidor"}
                 })
@@ -85,7 +92,7 @@ async def websocket_endpoint(
     finally:
         # Desconectar si hay usuario
         if user:
-            await websocket_manager.disconnect(chat_id, user.id)
+            await websocket_manager.disconnect(chat_id, user.id, websocket)
 
 @router.get("/ws/connections/status")
 async def get_websocket_status():
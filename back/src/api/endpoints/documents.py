@@ -261,6 +261,38 @@ async def share_document(
         logger.error(f"Error al compartir documento: {str(e)}", exc_info=True)
         raise DatabaseException("Error al compartir el documento")
 
+@router.post("/{document_id}/share/group/{group_id}")
+async def share_document_with_group(
+    document_id: int = Path(..., description="ID del documento a compartir"),
+    group_id: int = Path(..., description="ID del grupo de usuarios"),
+    current_user: User = Depends(get_current_user),
+    document_service: DocumentService = Depends(get_document_service)
+):
+    """
+    Comparte un documento con todos los miembros de un grupo (departamento,
+    clase...). El grupo se expande en la base de datos.
+    Solo el propietario del documento o un administrador puede compartirlo.
+    """
+    try:
+        result = document_service.share_document_with_group(
+            document_id=document_id,
+            group_id=group_id,
+            requester_id=current_user.id
+        )
+        return {
+            "success": result["total_requested"] > 0,
+            "message": (
+                f"Documento compartido con {result['total_new_shares']} usuario(s) del grupo. "
+                f"{result['total_already_shared']} ya tenían acceso"
+            ),
+            **result
+        }
+    except (ValidationException, NotFoundException, ForbiddenException, UnauthorizedException):
+        raise
+    except Exception as e:
+        logger.error(f"Error al compartir documento con grupo: {str(e)}", exc_info=True)
+        raise DatabaseException("Error al compartir el documento con el grupo")
+
 @router.delete("/{document_id}/share/{user_id}")
 async def revoke_document_access(
     document_id: int = Path(..., description="ID del documento"),
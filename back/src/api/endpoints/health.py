@@ -1,100 +1,63 @@
 """
-Endpoint de health check para monitoreo del sistema - VERSION MIGRADA
+Endpoint de health check para monitoreo del sistema.
+
+/ready y / sirven el último resultado del monitor de dependencias
+(src/services/dependency_monitor.py) en lugar de consultar Supabase y
+ChromaDB en cada sondeo.
 """
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 from typing import Dict, Any
 import logging
 from datetime import datetime
-from src.config.database import get_supabase_client
-from src.utils.chromadb_connector import ChromaDBConnector
-from src.core.exceptions import (
-    DatabaseException,
-    ExternalServiceException
-)
+from src.config.settings import settings
+from src.core.circuit_breaker import breakers
+from src.services.dependency_monitor import dependency_monitor
 
 router = APIRouter(prefix="/health", tags=["health"])
 logger = logging.getLogger(__name__)
 
+
+def _max_age() -> float:
+    # Si el monitor no está en marcha el resultado se refresca al consultarlo
+    return max(settings.HEALTH_CHECK_INTERVAL_SECONDS * 2, settings.HEALTH_CHECK_TIMEOUT_SECONDS)
+
+
 @router.get("/", response_model=Dict[str, Any])
 async def health_check():
     """
-    Verifica el estado de salud del sistema
+    Verifica el estado de salud del sistema: estado de cada dependencia
+    y de su circuito
     """
+    status = await dependency_monitor.status(max_age=_max_age())
     health_status = {
-        "status": "healthy",
+        "status": status["status"],
         "timestamp": datetime.utcnow().isoformat(),
         "version": "1.0.0",
-        "services": {}
+        "services": status["dependencies"],
+        "circuit_breakers": breakers.to_dict()
     }
-    
-    # Verificar Supabase
-    try:
-        supabase = get_supabase_client()
-        # Hacer una consulta simple
-        response = supabase.table("users").select("count").limit(1).execute()
-        health_status["services"]["supabase"] = {
-            "status": "healthy",
-            "message": "Database connection successful"
-        }
-    except Exception as e:
-        health_status["status"] = "unhealthy"
-        health_status["services"]["supabase"] = {
-            "status": "unhealthy",
-            "message": f"Database error: {str(e)}"
-        }
-    
-    # Verificar ChromaDB
-    try:
-        chromadb = ChromaDBConnector()
-        # Verificar que se puede acceder a las colecciones
-        client = chromadb.get_client()
-        collections = client.list_collections()
-        health_status["services"]["chromadb"] = {
-            "status": "healthy",
-            "message": f"Vector DB operational, {len(collections)} collections"
-        }
-    except Exception as e:
-        health_status["status"] = "degraded"
-        health_status["services"]["chromadb"] = {
-            "status": "unhealthy",
-            "message": f"Vector DB error: {str(e)}"
-        }
-    
-    # Determinar código de estado HTTP
-    if health_status["status"] == "unhealthy":
-        # En lugar de HTTPException, lanzar una excepción personalizada
-        # que incluya el status en el detail
-        raise ExternalServiceException(
-            "Sistema no saludable",
-            detail=health_status
-        )
-    
+    if not status["ready"]:
+        return JSONResponse(status_code=503, content=health_status)
     return health_status
 
-@router.get("/ready", response_model=Dict[str, str])
+
+@router.get("/ready", response_model=Dict[str, Any])
 async def readiness_check():
     """
-    Verifica si el servicio está listo para recibir tráfico
+    Verifica si el servicio está listo para recibir tráfico (503 si
+    Supabase o ChromaDB no responden; sin Gemini sigue listo, degradado)
     """
-    try:
-        # Verificar dependencias críticas
-        supabase = get_supabase_client()
-        chromadb = ChromaDBConnector()
-        
-        return {
-            "status": "ready",
-            "timestamp": datetime.utcnow().isoformat()
-        }
-    except Exception as e:
-        # Usar ExternalServiceException para indicar que el servicio no está listo
-        raise ExternalServiceException(
-            "Servicio no está listo",
-            detail={
-                "status": "not_ready",
-                "error": str(e),
-                "timestamp": datetime.utcnow().isoformat()
-            }
-        )
+    status = await dependency_monitor.status(max_age=_max_age())
+    content = {
+        "status": status["status"],
+        "timestamp": datetime.utcnow().isoformat(),
+        "dependencies": {name: result["status"] for name, result in status["dependencies"].items()}
+    }
+    if not status["ready"]:
+        return JSONResponse(status_code=503, content=content)
+    return content
+
 
 @router.get("/live", response_model=Dict[str, str])
 async def liveness_check():
@@ -4,12 +4,14 @@ Endpoints simples que delegan lógica compleja a servicios y helpers.
 """
 from fastapi import APIRouter, Depends, status
 from typing import Dict, Any
+import asyncio
 import logging
 
 from src.models.domain import User
 from src.services.statistics_service import StatisticsService
 from src.services.statistics_validation_service import StatisticsValidationService
 from src.api.helpers.statistics_helpers import StatisticsHelpers
+from src.services.statistics_cache import statistics_cache
 from src.api.dependencies import (
     get_current_user, 
     get_statistics_service, 
@@ -25,14 +27,15 @@ router = APIRouter(prefix="/statistics", tags=["statistics"])
 
 @router.get("/public", response_model=Dict[str, int])
 async def get_public_statistics(
-    stats_service: StatisticsService = Depends(get_statistics_service)
+    stats_service: StatisticsService = Depends(get_statistics_service),
+    stats_helpers: StatisticsHelpers = Depends(get_statistics_helpers)
 ):
     """
     Obtiene estadísticas globales del sistema (endpoint público).
     Lógica delegada completamente al servicio.
     """
     try:
-        return stats_service.get_global_statistics()
+        return await stats_helpers.get_cached_global_statistics(stats_service)
     except Exception as e:
         logger.error(f"Error al obtener estadísticas públicas: {str(e)}", exc_info=True)
         # Retornar valores por defecto en caso de error
@@ -46,7 +49,8 @@ async def get_public_statistics(
 async def get_global_statistics(
     current_user: User = Depends(get_current_user),
     stats_service: StatisticsService = Depends(get_statistics_service),
-    validation_service: StatisticsValidationService = Depends(get_statistics_validation_service)
+    validation_service: StatisticsValidationService = Depends(get_statistics_validation_service),
+    stats_helpers: StatisticsHelpers = Depends(get_statistics_helpers)
 ):
     """
     Obtiene estadísticas globales del sistema.
@@ -56,8 +60,8 @@ async def get_global_statistics(
         # Validar acceso
         validation_service.validate_statistics_access(current_user, "global")
         
-        # Delegar al servicio
-        return stats_service.get_global_statistics()
+        # Delegar al servicio (cacheado)
+        return await stats_helpers.get_cached_global_statistics(stats_service)
         
     except Exception as e:
         logger.error(f"Error al obtener estadísticas globales: {str(e)}", exc_info=True)
@@ -77,12 +81,9 @@ async def get_dashboard_data(
         # Validar acceso al dashboard
         stats_helpers.validate_dashboard_request(current_user)
         
-        # Delegar construcción completa del dashboard al helper
+        # Delegar construcción completa del dashboard al helper (cacheada por usuario)
         # Los servicios se crean automáticamente dentro del helper para evitar importaciones circulares
-        return await stats_helpers.build_dashboard_response(
-            user=current_user,
-            stats_service=stats_service
-        )
+        return await stats_helpers.get_cached_dashboard_response(current_user, stats_service)
         
     except Exception as e:
         logger.error(f"Error al obtener datos del dashboard: {str(e)}", exc_info=True)
@@ -102,7 +103,8 @@ async def get_user_statistics(
     user_id: int,
     current_user: User = Depends(get_current_user),
     stats_service: StatisticsService = Depends(get_statistics_service),
-    validation_service: StatisticsValidationService = Depends(get_statistics_validation_service)
+    validation_service: StatisticsValidationService = Depends(get_statistics_validation_service),
+    stats_helpers: StatisticsHelpers = Depends(get_statistics_helpers)
 ) -> Dict[str, int]:
     """
     Obtiene estadísticas específicas de un usuario.
@@ -113,8 +115,11 @@ async def get_user_statistics(
         if not current_user.is_admin and current_user.id != user_id:
             validation_service.validate_statistics_access(current_user, "admin_only")
         
-        # Delegar al servicio
-        return stats_service.get_user_statistics(user_id)
+        # Delegar al servicio (cacheado)
+        return await stats_helpers.apply_statistics_caching(
+            f"user:{user_id}",
+            lambda: asyncio.to_thread(stats_service.get_user_statistics, user_id)
+        )
         
     except Exception as e:
         logger.error(f"Error al obtener estadísticas de usuario: {str(e)}", exc_info=True)
@@ -135,7 +140,9 @@ async def get_system_health(
         validation_service.validate_statistics_access(current_user, "admin_only")
         
         # Delegar al servicio
-        return stats_service.calculate_system_health_metrics()
+        health = stats_service.calculate_system_health_metrics()
+        health["cache"] = statistics_cache.get_metrics()
+        return health
         
     except Exception as e:
         logger.error(f"Error al obtener salud del sistema: {str(e)}", exc_info=True)
@@ -153,7 +160,7 @@ async def get_statistics_summary(
     """
     try:
         # Obtener estadísticas base
-        base_stats = stats_service.get_global_statistics()
+        base_stats = await stats_helpers.get_cached_global_statistics(stats_service)
         
         # Generar resumen interpretado
         summary = stats_helpers.get_statistics_summary(base_stats)
@@ -2,6 +2,7 @@
 Funciones helper para endpoints administrativos
 Simplifica la lógica compleja de los endpoints admin
 """
+import asyncio
 import logging
 from typing import List, Dict, Any, Optional
 from src.models.domain import User
@@ -10,6 +11,7 @@ from src.services.chat_service import ChatService
 from src.services.user_service import UserService
 from src.services.admin_service import AdminService
 from src.services.admin_validation_service import AdminValidationService
+from src.config.settings import settings
 from src.core.exceptions import ValidationException, DatabaseException
 
 logger = logging.getLogger(__name__)
@@ -186,7 +188,8 @@ class AdminEndpointHelpers:
         resource_type: str,
         resource_ids: List[int],
         admin_user: User,
-        admin_service: AdminService
+        admin_service: AdminService,
+        export_format: str = "jsonl"
     ) -> Dict[str, Any]:
         """
         Maneja operaciones en lote
@@ -197,6 +200,7 @@ class AdminEndpointHelpers:
             resource_ids: Lista de IDs
             admin_user: Usuario administrador
             admin_service: Servicio administrativo
+            export_format: Formato de la exportación (jsonl, csv)
             
         Returns:
             Dict con resultado de la operación
@@ -209,7 +213,9 @@ class AdminEndpointHelpers:
             )
             
             # 2. Validar operación y recursos
-            valid_ids = self.validator.validate_bulk_operation(operation, resource_ids)
+            valid_ids = self.validator.validate_bulk_operation(
+                operation, resource_ids, max_items=settings.BULK_MAX_ITEMS
+            )
             
             # 3. Validar tipo de recurso
             self.validator.validate_resource_access(resource_type, user=admin_user)
@@ -219,8 +225,16 @@ class AdminEndpointHelpers:
                 f"🔄 Ejecutando {operation} en lote para {len(valid_ids)} {resource_type}"
             )
             
-            if operation == "delete":
-                result = admin_service.bulk_delete_resources(
+            if operation == "delete" and len(valid_ids) > settings.BULK_SYNC_LIMIT:
+                result = admin_service.start_bulk_delete_job(
+                    resource_type=resource_type,
+                    resource_ids=valid_ids,
+                    performed_by=admin_user
+                )
+            elif operation == "delete":
+                # Las consultas son síncronas: fuera del event loop
+                result = await asyncio.to_thread(
+                    admin_service.bulk_delete_resources,
                     resource_type=resource_type,
                     resource_ids=valid_ids,
                     performed_by=admin_user
@@ -228,7 +242,8 @@ class AdminEndpointHelpers:
             elif operation == "export":
                 result = admin_service.export_resources(
                     resource_type=resource_type,
-                    format="json"  # TODO: Hacer configurable
+                    format=export_format,
+                    filters={"ids": valid_ids}
                 )
             else:
                 raise ValidationException(f"Operación no implementada: {operation}")
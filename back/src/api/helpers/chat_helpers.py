@@ -12,6 +12,7 @@ from src.models.schemas.chat import MessageCreate, ChatMessage, ChatResponse
 from src.services.chat_service import ChatService
 from src.services.chat_validation_service import ChatValidationService
 from src.services.message_processing_service import MessageProcessingService
+from src.services.chat.message_persistence_queue import message_persistence_queue
 from src.repositories.message_repository import MessageRepository
 from src.core.exceptions import (
     ValidationException, 
@@ -83,16 +84,19 @@ class ChatEndpointHelpers:
             
             # 6. Procesar mensaje con IA y RAG
             processing_start = time.time()
-            response_message = self.message_processor.process_incoming_message(
+            answer = self.message_processor.generate_response(
                 message_data=message_data,
-                chat_id=chat_id,
                 user_id=current_user.id
             )
             
+            # 7. Guardar en el siguiente insert por lotes (WAL + write-behind)
+            saved = await message_persistence_queue.save(chat_id, message_data.question, answer)
+            response_message = ChatMessage(**saved)
+            
             processing_time = time.time() - processing_start
             total_time = time.time() - start_time
             
-            # 7. Log de rendimiento
+            # 8. Log de rendimiento
             self.message_processor.log_message_interaction(
                 user_id=current_user.id,
                 chat_id=chat_id,
@@ -1,32 +1,114 @@
 """
 Helpers para WebSocket de chat
 """
+import json
 import uuid
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
 from fastapi import WebSocket
 from src.models.schemas.chat_websocket import MessageType, MessageFactory
 
+try:
+    import msgpack
+except ImportError:  # msgpack es opcional: sin él solo se ofrece JSON
+    msgpack = None
+
+# Codificaciones de frame soportadas
+ENCODING_JSON = "json"
+ENCODING_MSGPACK = "msgpack"
+
+
+def get_supported_encodings() -> List[str]:
+    """Codificaciones que el servidor puede negociar con el cliente"""
+    encodings = [ENCODING_JSON]
+    if msgpack is not None:
+        encodings.append(ENCODING_MSGPACK)
+    return encodings
+
+
+def negotiate_encoding(requested: Optional[str]) -> str:
+    """Devuelve la codificación a usar según la solicitada por el cliente"""
+    if requested and requested.lower() in get_supported_encodings():
+        return requested.lower()
+    return ENCODING_JSON
+
+
 class ChatWebSocketHelpers:
     """Helpers para facilitar operaciones WebSocket"""
-    
+
+    def get_encoding(self, websocket: WebSocket) -> str:
+        """Codificación negociada para la conexión (JSON por defecto)"""
+        return getattr(websocket.state, "encoding", ENCODING_JSON)
+
+    def encode_frame(self, payload: Dict[str, Any], encoding: str = ENCODING_JSON):
+        """
+        Serializa un frame.
+
+        Returns:
+            str para JSON (frame de texto) o bytes para msgpack (frame binario)
+        """
+        if encoding == ENCODING_MSGPACK:
+            return msgpack.packb(payload, use_bin_type=True)
+        return json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+
+    def decode_frame(self, raw: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Decodifica un mensaje ASGI recibido (texto JSON o binario msgpack).
+
+        Raises:
+            ValueError: Si el contenido no es un mensaje válido
+        """
+        if raw.get("bytes") is not None:
+            if msgpack is None:
+                raise ValueError("Frames binarios no soportados")
+            message = msgpack.unpackb(raw["bytes"], raw=False)
+        else:
+            message = json.loads(raw.get("text") or "")
+
+        if not isinstance(message, dict):
+            raise ValueError("El mensaje debe ser un objeto")
+        return message
+
+    async def send_frame(self, websocket: WebSocket, payload: Dict[str, Any]) -> int:
+        """
+        Envía un frame con la codificación negociada.
+
+        Returns:
+            int: Bytes de payload enviados (antes de compresión del transporte)
+        """
+        frame = self.encode_frame(payload, self.get_encoding(websocket))
+        if isinstance(frame, bytes):
+            await websocket.send_bytes(frame)
+            return len(frame)
+        await websocket.send_text(frame)
+        return len(frame.encode("utf-8"))
+
     async def send_welcome_message(
-        self, 
-        websocket: WebSocket, 
-        chat_id: int, 
-        user_id: int
+        self,
+        websocket: WebSocket,
+        chat_id: int,
+        user_id: int,
+        protocol: Optional[Dict[str, Any]] = None
     ) -> None:
-        """Envía mensaje de bienvenida al conectarse"""
-        await websocket.send_json({
-            "type": MessageType.CONNECTION_SUCCESS,
-            "data": {
-                "chat_id": chat_id,
-                "user_id": user_id,
-                "message": "Conexión establecida exitosamente",
-                "timestamp": datetime.utcnow().isoformat()
-            }
-        })
-        
+        """
+        Envía mensaje de bienvenida al conectarse.
+
+        Siempre se envía como JSON de texto para que el cliente pueda leer la
+        codificación negociada antes de cambiar a frames binarios.
+        """
+        data = {
+            "chat_id": chat_id,
+            "user_id": user_id,
+            "message": "Conexión establecida exitosamente",
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        if protocol:
+            data["protocol"] = protocol
+        await websocket.send_text(self.encode_frame({
+            "type": MessageType.CONNECTION_SUCCESS.value,
+            "data": data
+        }))
+
     async def send_error(
         self,
         websocket: WebSocket,
@@ -35,8 +117,8 @@ class ChatWebSocketHelpers:
         details: Optional[Dict[str, Any]] = None
     ) -> None:
         """Envía mensaje de error"""
-        await websocket.send_json({
-            "type": MessageType.ERROR,
+        await self.send_frame(websocket, {
+            "type": MessageType.ERROR.value,
             "data": {
                 "error": error,
                 "error_code": error_code,
@@ -44,7 +126,7 @@ class ChatWebSocketHelpers:
                 "timestamp": datetime.utcnow().isoformat()
             }
         })
-        
+
     async def send_rate_limit_warning(
         self,
         websocket: WebSocket,
@@ -52,15 +134,15 @@ class ChatWebSocketHelpers:
         reset_time: datetime
     ) -> None:
         """Envía advertencia de rate limit"""
-        await websocket.send_json({
-            "type": MessageType.RATE_LIMIT_WARNING,
+        await self.send_frame(websocket, {
+            "type": MessageType.RATE_LIMIT_WARNING.value,
             "data": {
                 "remaining_messages": remaining_messages,
                 "reset_time": reset_time.isoformat(),
                 "message": f"Has alcanzado el límite de mensajes. Te quedan {remaining_messages} mensajes."
             }
         })
-        
+
     async def start_stream(
         self,
         websocket: WebSocket,
@@ -68,8 +150,8 @@ class ChatWebSocketHelpers:
     ) -> str:
         """Inicia un stream de respuesta"""
         stream_id = str(uuid.uuid4())
-        await websocket.send_json({
-            "type": MessageType.STREAM_START,
+        await self.send_frame(websocket, {
+            "type": MessageType.STREAM_START.value,
             "data": {
                 "stream_id": stream_id,
                 "question": question,
@@ -77,25 +159,37 @@ class ChatWebSocketHelpers:
             }
         })
         return stream_id
-        
+
     async def send_stream_chunk(
         self,
         websocket: WebSocket,
         stream_id: str,
         content: str,
         chunk_index: int
-    ) -> None:
-        """Envía un chunk del stream"""
-        await websocket.send_json({
-            "type": MessageType.STREAM_CHUNK,
-            "data": {
+    ) -> int:
+        """
+        Envía un chunk del stream.
+
+        Con msgpack se usa un frame compacto: el stream_id ya se envió en
+        stream_start y no se repite el timestamp en cada chunk.
+
+        Returns:
+            int: Bytes enviados
+        """
+        if self.get_encoding(websocket) == ENCODING_MSGPACK:
+            data = {"content": content, "chunk_index": chunk_index}
+        else:
+            data = {
                 "stream_id": stream_id,
                 "content": content,
                 "chunk_index": chunk_index,
                 "timestamp": datetime.utcnow().isoformat()
             }
+        return await self.send_frame(websocket, {
+            "type": MessageType.STREAM_CHUNK.value,
+            "data": data
         })
-        
+
     async def end_stream(
         self,
         websocket: WebSocket,
@@ -103,33 +197,35 @@ class ChatWebSocketHelpers:
         metadata: Dict[str, Any]
     ) -> None:
         """Finaliza un stream"""
-        await websocket.send_json({
-            "type": MessageType.STREAM_END,
+        await self.send_frame(websocket, {
+            "type": MessageType.STREAM_END.value,
             "data": {
                 "stream_id": stream_id,
                 **metadata,
                 "timestamp": datetime.utcnow().isoformat()
             }
         })
-        
+
     async def send_message_saved(
         self,
         websocket: WebSocket,
         message_id: int,
         question: str,
-        answer: str
+        answer: str,
+        stream_id: Optional[str] = None
     ) -> None:
-        """Confirma que un mensaje fue guardado"""
-        await websocket.send_json({
-            "type": MessageType.MESSAGE_SAVED,
+        """Confirma que un mensaje fue guardado (stream_id indica a qué respuesta corresponde)"""
+        await self.send_frame(websocket, {
+            "type": MessageType.MESSAGE_SAVED.value,
             "data": {
                 "message_id": message_id,
+                "stream_id": stream_id,
                 "question": question,
                 "answer": answer,
                 "timestamp": datetime.utcnow().isoformat()
             }
         })
-        
+
     async def send_typing_indicator(
         self,
         websocket: WebSocket,
@@ -137,8 +233,8 @@ class ChatWebSocketHelpers:
         is_typing: bool
     ) -> None:
         """Envía indicador de escritura"""
-        await websocket.send_json({
-            "type": MessageType.TYPING_INDICATOR,
+        await self.send_frame(websocket, {
+            "type": MessageType.TYPING_INDICATOR.value,
             "data": {
                 "user_id": user_id,
                 "is_typing": is_typing,
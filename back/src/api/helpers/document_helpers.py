@@ -13,9 +13,19 @@ from src.services.document_validation_service import DocumentValidationService
 from src.services.file_processing_service import FileProcessingService
 from src.services.document_background_processor import DocumentBackgroundProcessor
 from src.core.exceptions import ValidationException, DatabaseException
+from src.core.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+# De la petición de subida hasta que el documento queda vectorizado
+# (en modo async incluye la tarea en segundo plano)
+UPLOAD_LATENCY = metrics.histogram(
+    "document_upload_duration_seconds",
+    "Subida de documentos de extremo a extremo",
+    ["mode", "outcome"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+)
+
 class DocumentEndpointHelpers:
     """Helpers para endpoints de documentos"""
     
@@ -57,7 +67,7 @@ class DocumentEndpointHelpers:
             file_size = self.validator.validate_file_size(file_content, file.filename)
             
             read_time = time.time() - start_time
-            logger.info(f"⏱️ Lectura y validación completada en {read_time:.3f} segundos")
+            logger.debug("⏱️ Lectura y validación completada en %.3f segundos", read_time)
             
             # 3. Crear placeholder en BD
             placeholder_doc = document_service.create_document_placeholder(
@@ -70,7 +80,7 @@ class DocumentEndpointHelpers:
             
             document_id = placeholder_doc.id
             placeholder_time = time.time() - start_time
-            logger.info(f"⏱️ Placeholder creado en {placeholder_time:.3f} segundos")
+            logger.debug("⏱️ Placeholder creado en %.3f segundos", placeholder_time)
             
             # 4. Determinar tipo de procesamiento
             should_sync = self.validator.should_process_synchronously(file_size, content_type)
@@ -83,7 +93,7 @@ class DocumentEndpointHelpers:
             else:
                 return await self._process_document_asynchronously(
                     file_content, file.filename, document_id, content_type,
-                    document_service, current_user.id, background_tasks
+                    document_service, current_user.id, background_tasks, start_time
                 )
                 
         except (ValidationException, DatabaseException):
@@ -104,7 +114,7 @@ class DocumentEndpointHelpers:
     ) -> DocumentResponseHybrid:
         """Procesa un documento de forma síncrona"""
         
-        logger.info(f"🔄 Procesando archivo pequeño ({len(file_content)/1024:.1f}KB) sincrónicamente")
+        logger.debug("🔄 Procesando archivo pequeño (%.1fKB) sincrónicamente", len(file_content) / 1024)
         
         try:
             # 1. Actualizar estado
@@ -121,7 +131,7 @@ class DocumentEndpointHelpers:
             )
             
             extraction_time = time.time() - start_time
-            logger.info(f"⏱️ Extracción de texto completada en {extraction_time:.3f} segundos")
+            logger.debug("⏱️ Extracción de texto completada en %.3f segundos", extraction_time)
             
             # 4. Almacenar archivo original
             file_url = document_service.store_original_file(
@@ -132,7 +142,7 @@ class DocumentEndpointHelpers:
             )
             
             storage_time = time.time() - start_time
-            logger.info(f"⏱️ Almacenamiento completado en {storage_time:.3f} segundos")
+            logger.debug("⏱️ Almacenamiento completado en %.3f segundos", storage_time)
             
             # 5. Actualizar documento con contenido y generar vectores
             document_service.update_document_status(document_id, "processing", "Generando vectores...")
@@ -143,17 +153,19 @@ class DocumentEndpointHelpers:
             )
             
             vectorization_time = time.time() - start_time
-            logger.info(f"⏱️ Vectorización completada en {vectorization_time:.3f} segundos")
+            logger.debug("⏱️ Vectorización completada en %.3f segundos", vectorization_time)
             
             # 6. Finalizar
             document_service.update_document_status(document_id, "completed", "Procesamiento completado")
             
             total_time = time.time() - start_time
-            logger.info(f"🎉 Procesamiento síncrono completado en {total_time:.3f} segundos")
+            UPLOAD_LATENCY.labels("sync", "ok").observe(total_time)
+            logger.info("🎉 Procesamiento síncrono completado en %.3f segundos", total_time)
             
             return document_service.get_document(document_id)
             
         except Exception as e:
+            UPLOAD_LATENCY.labels("sync", "error").observe(time.time() - start_time)
             logger.error(f"❌ Error en procesamiento síncrono: {str(e)}")
             document_service.update_document_status(document_id, "error", f"Error: {str(e)}")
             raise DatabaseException(f"Error procesando documento: {str(e)}")
@@ -166,15 +178,17 @@ class DocumentEndpointHelpers:
         content_type: str,
         document_service: DocumentService,
         user_id: int,
-        background_tasks: BackgroundTasks
+        background_tasks: BackgroundTasks,
+        start_time: float
     ) -> DocumentResponseHybrid:
         """Procesa un documento de forma asíncrona"""
         
-        logger.info(f"🔄 Procesando archivo grande ({len(file_content)/1024/1024:.2f}MB) asincrónicamente")
+        logger.info("🔄 Procesando archivo grande (%.2fMB) asincrónicamente", len(file_content) / 1024 / 1024)
         
         # Agregar tarea en segundo plano
         background_tasks.add_task(
-            self.background_processor.process_document_background,
+            self._process_in_background,
+            start_time,
             file_content=file_content,
             filename=filename,
             document_id=document_id,
@@ -186,6 +200,15 @@ class DocumentEndpointHelpers:
         # Devolver placeholder para seguimiento
         return document_service.get_document(document_id)
     
+    async def _process_in_background(self, start_time: float, **kwargs) -> bool:
+        """Procesamiento en segundo plano midiendo la subida completa"""
+        success = False
+        try:
+            success = await self.background_processor.process_document_background(**kwargs)
+            return success
+        finally:
+            UPLOAD_LATENCY.labels("async", "ok" if success else "error").observe(time.time() - start_time)
+    
     def handle_document_sharing(
         self,
         document_id: int,
@@ -2,8 +2,9 @@
 Helpers para endpoints de estadísticas.
 Contiene lógica específica de operaciones complejas separada de los endpoints.
 """
+import asyncio
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Awaitable, Callable, Dict, Any, List, Optional
 from datetime import datetime
 import time
 
@@ -12,6 +13,7 @@ from src.services.statistics_service import StatisticsService
 from src.services.statistics_validation_service import StatisticsValidationService
 from src.services.document_service import DocumentService
 from src.services.chat_service import ChatService
+from src.services.statistics_cache import statistics_cache, statistics_ttl
 from src.core.exceptions import ValidationException, DatabaseException
 
 logger = logging.getLogger(__name__)
@@ -53,7 +55,10 @@ class StatisticsHelpers:
             logger.info(f"📊 Obteniendo estadísticas del usuario {user.id}...")
             
             # TODOS los usuarios (incluyendo admins) ven SOLO SUS estadísticas
-            user_stats = stats_service.get_user_statistics(user.id)
+            user_stats = await self.apply_statistics_caching(
+                f"user:{user.id}",
+                lambda: asyncio.to_thread(stats_service.get_user_statistics, user.id)
+            )
             stats = {
                 "total_users": 1,  # Solo el usuario actual
                 "total_documents": user_stats.get("user_documents", 0),
@@ -168,27 +173,52 @@ class StatisticsHelpers:
         logger.info(f"🔐 Permisos para {user.username}: {permissions}")
         return permissions
     
-    async def apply_statistics_caching(self, cache_key: str, data_fetcher: callable) -> Any:
+    async def apply_statistics_caching(
+        self,
+        cache_key: str,
+        data_fetcher: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+        cacheable: Optional[Callable[[Any], bool]] = None
+    ) -> Any:
         """
         Aplica cacheo a resultados de estadísticas.
         
+        Peticiones concurrentes de la misma clave comparten un único cálculo y,
+        pasado el TTL, se sirve el valor anterior mientras se recalcula.
+        
         Args:
-            cache_key: Clave para el cache
-            data_fetcher: Función que obtiene los datos
+            cache_key: Clave para el cache (ver src/services/statistics_cache.py)
+            data_fetcher: Función asíncrona que obtiene los datos
+            ttl: TTL en segundos (por defecto el del espacio de la clave)
+            cacheable: Predicado opcional; los resultados que no lo cumplen no se guardan
             
         Returns:
             Any: Datos obtenidos (con cache)
         """
-        # TODO: Implementar cacheo real con Redis o memoria
-        # Por ahora, simplemente ejecuta la función
-        logger.info(f"💾 Aplicando cache (placeholder) para clave: {cache_key}")
-        
-        start_time = time.time()
-        result = await data_fetcher() if callable(data_fetcher) else data_fetcher
-        execution_time = time.time() - start_time
-        
-        logger.info(f"💾 Datos obtenidos en {execution_time:.3f}s (sin cache real aún)")
-        return result
+        return await statistics_cache.get_or_compute(
+            cache_key,
+            data_fetcher,
+            ttl=ttl if ttl is not None else statistics_ttl(cache_key),
+            cacheable=cacheable
+        )
+    
+    async def get_cached_dashboard_response(self, user: User, stats_service: StatisticsService) -> Dict[str, Any]:
+        """
+        Respuesta del dashboard cacheada por usuario.
+        Las respuestas de fallback (por error) no se guardan.
+        """
+        return await self.apply_statistics_caching(
+            f"dashboard:{user.id}",
+            lambda: self.build_dashboard_response(user=user, stats_service=stats_service),
+            cacheable=lambda response: not response.get("meta", {}).get("fallback")
+        )
+    
+    async def get_cached_global_statistics(self, stats_service: StatisticsService) -> Dict[str, int]:
+        """Estadísticas globales cacheadas (calculadas fuera del event loop)"""
+        return await self.apply_statistics_caching(
+            "global",
+            lambda: asyncio.to_thread(stats_service.get_global_statistics)
+        )
     
     def get_statistics_summary(self, stats: Dict[str, int]) -> Dict[str, Any]:
         """
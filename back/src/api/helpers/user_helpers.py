@@ -2,6 +2,7 @@
 Helpers para endpoints de usuarios - VERSION REFACTORIZADA MEJORADA
 Contiene TODA la lógica de los endpoints para mantenerlos limpios
 """
+import asyncio
 import logging
 from typing import Dict, Any, List, Optional
 from datetime import datetime, UTC, timedelta
@@ -20,10 +21,10 @@ from src.services.authentication_service import AuthenticationService
 from src.services.user_registration_service import UserRegistrationService
 from src.services.user_validation_service import UserValidationService
 from src.services.user_service import UserService
-from src.services.email_validation import EmailDeliveryTracker, EmailValidationService
+from src.services.email_validation import EmailDeliveryTracker, EmailValidationService, domain_intelligence
 from src.core.exceptions import (
     ValidationException, UnauthorizedException, ConflictException,
-    ForbiddenException, DatabaseException, UserNotFoundException
+    ForbiddenException, DatabaseException, UserNotFoundException, RateLimitException
 )
 from src.config.settings import get_settings
 
@@ -58,7 +59,7 @@ class UserEndpointHelpers:
         try:
             logger.info(f"🔐 Login attempt from IP: {request.client.host if request.client else 'unknown'}")
             
-            result = self.auth_service.handle_login_process(
+            result = await self.auth_service.handle_login_process(
                 form_data.username, 
                 form_data.password
             )
@@ -66,7 +67,7 @@ class UserEndpointHelpers:
             logger.info(f"✅ Login successful for user: {result['username']}")
             return result
             
-        except (ValidationException, UnauthorizedException):
+        except (ValidationException, UnauthorizedException, RateLimitException):
             raise
         except Exception as e:
             logger.error(f"❌ Error in login: {str(e)}", exc_info=True)
@@ -86,8 +87,9 @@ class UserEndpointHelpers:
             # Validar datos
             self.registration_service.validate_registration_data(user_data)
             
-            # Registrar usuario
-            result = self.registration_service.handle_user_registration(
+            # Registrar usuario (fuera del event loop: incluye el hash de la contraseña)
+            result = await asyncio.to_thread(
+                self.registration_service.handle_user_registration,
                 username=user_data.username,
                 email=user_data.email,
                 password=user_data.password
@@ -253,7 +255,8 @@ class UserEndpointHelpers:
         Maneja el reset de contraseña con token.
         """
         try:
-            success = self.registration_service.handle_password_reset(
+            success = await asyncio.to_thread(
+                self.registration_service.handle_password_reset,
                 reset_request.token,
                 reset_request.new_password
             )
@@ -288,7 +291,8 @@ class UserEndpointHelpers:
             )
             
             # Cambiar contraseña
-            success = self.user_service.change_password(
+            success = await asyncio.to_thread(
+                self.user_service.change_password,
                 user_id=user_id,
                 current_password=change_request.current_password,
                 new_password=change_request.new_password
@@ -580,6 +584,9 @@ class UserEndpointHelpers:
                     }
                 )
             
+            # Los MX se resuelven mientras se consulta la base de datos
+            domain_intelligence.prefetch(validated_email.split('@')[1])
+            
             # 3. Verificar que el email no esté ya registrado
             try:
                 existing_user = self.user_service.get_user_by_email(validated_email)
@@ -889,7 +896,7 @@ class UserEndpointHelpers:
         """
         try:
             from src.config.database import get_supabase_client
-            from src.utils.password_utils import verify_password
+            from src.services.password_hasher import password_hasher
             
             # Verificar si es admin
             supabase = get_supabase_client(use_service_role=True)
@@ -913,7 +920,7 @@ class UserEndpointHelpers:
                 }
             
             user_data = response.data[0]
-            password_valid = verify_password(password, user_data.get('password_hash', ''))
+            password_valid = await password_hasher.verify(password, user_data.get('password_hash', ''))
             
             return {
                 "success": password_valid,
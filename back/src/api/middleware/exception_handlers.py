@@ -8,16 +8,35 @@ from fastapi.exceptions import HTTPException
 from starlette.exceptions import HTTPException as StarletteHTTPException
 import logging
 
-from src.core.exceptions import AppException
+from src.core.exceptions import AppException, CircuitOpenException
 
 logger = logging.getLogger(__name__)
 
 
+def _circuit_open_cause(exc: BaseException):
+    """
+    CircuitOpenException que originó la excepción, si la hay. Repositorios y
+    servicios envuelven los errores (DatabaseException...), pero un circuito
+    abierto debe llegar al cliente como 503 con Retry-After y no como 500
+    """
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        if isinstance(exc, CircuitOpenException):
+            return exc
+        seen.add(id(exc))
+        exc = exc.__cause__ or exc.__context__
+    return None
+
+
 async def app_exception_handler(request: Request, exc: AppException):
     """
     Manejador global para excepciones personalizadas de la aplicación.
     Convierte AppException y sus subclases en respuestas JSON apropiadas.
     """
+    circuit_open = _circuit_open_cause(exc)
+    if circuit_open is not None:
+        return _circuit_open_response(circuit_open)
+    
     logger.error(f"AppException capturada: {exc.__class__.__name__} - {exc.message}")
     
     return JSONResponse(
@@ -26,6 +45,16 @@ async def app_exception_handler(request: Request, exc: AppException):
     )
 
 
+def _circuit_open_response(exc: CircuitOpenException) -> JSONResponse:
+    # Sin log de error por petición: el circuito ya avisó al abrirse
+    retry_after = exc.details.get("retry_after")
+    return JSONResponse(
+        status_code=exc.http_status_code,
+        content=exc.to_dict(),
+        headers={"Retry-After": str(retry_after)} if retry_after else None
+    )
+
+
 async def http_exception_handler(request: Request, exc: HTTPException):
     """
     Manejador para HTTPException estándar de FastAPI.
@@ -46,6 +75,10 @@ async def generic_exception_handler(request: Request, exc: Exception):
     Manejador para excepciones no capturadas.
     Registra el error y devuelve una respuesta genérica.
     """
+    circuit_open = _circuit_open_cause(exc)
+    if circuit_open is not None:
+        return _circuit_open_response(circuit_open)
+    
     logger.exception("Excepción no manejada:", exc_info=exc)
     
     return JSONResponse(
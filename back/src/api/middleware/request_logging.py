@@ -0,0 +1,109 @@
+"""
+Middleware ASGI de registro y tiempos de peticiones.
+
+Sustituye a log_requests y TokenMiddleware (ambos BaseHTTPMiddleware):
+- no toca el cuerpo de la respuesta; solo cuenta los bytes de cada
+  mensaje http.response.body, así que el streaming y FileResponse siguen
+  enviándose a trozos
+- registra método, plantilla de ruta (/api/documents/{document_id}, no la
+  URL con IDs ni query string), status, bytes y duración
+- muestreo: las respuestas correctas se registran con probabilidad
+  REQUEST_LOG_SAMPLE_RATE; los errores (>= 400), las excepciones y las
+  peticiones más lentas que REQUEST_LOG_SLOW_MS siempre
+- el registro va al logger http.requests (JSON en logs/access.log a través
+  de una cola, sin escribir en disco desde el event loop)
+- la duración de todas las peticiones (sin muestrear) va al histograma
+  http_request_duration_seconds por ruta y clase de status
+- un UnauthorizedException de token expirado que llegue hasta aquí se
+  responde con el 401 TOKEN_EXPIRED, igual que hacía TokenMiddleware
+"""
+from typing import Callable, Optional
+import logging
+import random
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.config.settings import settings
+from src.core.logging_config import app_logger
+from src.core.metrics import metrics
+from src.core.token_middleware import is_token_expired_error, token_expired_response
+
+logger = logging.getLogger(__name__)
+
+# Plantilla para las peticiones que no coinciden con ninguna ruta (evita
+# registrar URLs arbitrarias de escaneos)
+UNMATCHED_ROUTE = "<sin ruta>"
+
+HTTP_LATENCY = metrics.histogram(
+    "http_request_duration_seconds",
+    "Duración de las peticiones HTTP",
+    ["method", "route", "status"]
+)
+
+
+class RequestLoggingMiddleware:
+    """
+    Registro muestreado de peticiones HTTP sin envolver la respuesta
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        sample_rate: Optional[float] = None,
+        slow_ms: Optional[float] = None,
+        random_func: Callable[[], float] = random.random
+    ):
+        self.app = app
+        self.sample_rate = settings.REQUEST_LOG_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.slow_ms = settings.REQUEST_LOG_SLOW_MS if slow_ms is None else slow_ms
+        self._random = random_func
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+        bytes_sent = 0
+        response_started = False
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code, bytes_sent, response_started
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                response_started = True
+            elif message["type"] == "http.response.body":
+                bytes_sent += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            if response_started or not is_token_expired_error(e):
+                logger.error(f"Error no manejado en {scope['method']} {_route_template(scope)}: {str(e)}")
+                raise
+            await token_expired_response()(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            route = _route_template(scope)
+            # Clase de status (2xx, 4xx...) para acotar la cardinalidad
+            HTTP_LATENCY.labels(scope["method"], route, f"{status_code // 100}xx").observe(duration)
+            if self._should_log(status_code, duration):
+                app_logger.log_request(
+                    scope["method"], route, status_code, duration,
+                    bytes_sent=bytes_sent
+                )
+
+    def _should_log(self, status_code: int, duration: float) -> bool:
+        if status_code >= 400 or duration * 1000 >= self.slow_ms:
+            return True
+        return self.sample_rate >= 1 or self._random() < self.sample_rate
+
+
+def _route_template(scope: Scope) -> str:
+    # FastAPI deja la ruta resuelta en el scope (APIRoute.matches)
+    route = scope.get("route")
+    path = getattr(route, "path_format", None) or getattr(route, "path", None)
+    return path or UNMATCHED_ROUTE
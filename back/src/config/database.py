@@ -6,12 +6,16 @@ Versión simplificada que solo usa el cliente de Supabase (sin SQLAlchemy).
 import os
 import sys
 import logging
-import importlib
+import time
 from typing import Optional
 
-# Configurar logging
+from src.core.metrics import metrics
+# Módulo (no el objeto): src.core.tracing importa src.config, que importa este módulo
+from src.core import tracing
+from src.core.circuit_breaker import breakers
+
+# Configurar logging (los handlers los pone src.core.logging_config)
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
 
 # Intenta diferentes formas de importar dotenv
 try:
@@ -31,36 +35,20 @@ except ImportError:
                         except ValueError:
                             logger.warning(f"Ignorando línea mal formateada en .env: {line.strip()}")
 
-# Verificación detallada de supabase
-supabase_import_error = None
-try:
-    # Primero verificar si el módulo está instalado
-    if importlib.util.find_spec("supabase") is None:
-        raise ImportError("El módulo 'supabase' no está instalado")
-    
-    # Intentar importar normalmente
-    from supabase import create_client, Client
-    logger.info("supabase importado correctamente")
-except ImportError as e:
-    supabase_import_error = str(e)
-    logger.error(f"ERROR DETALLADO DE IMPORTACIÓN: {supabase_import_error}")
-    logger.info("Intentando importar supabase-py como alternativa...")
-    
+
+def create_client(url: str, key: str):
+    """
+    Crea un cliente de Supabase. El SDK (supabase, postgrest, gotrue, httpx)
+    se importa con el primer cliente y no al importar este módulo
+    """
     try:
-        # Intentar con supabase-py en caso de que ese sea el nombre del paquete
-        import supabase
-        from supabase import create_client, Client
-        print("supabase_py importado correctamente")
-    except ImportError:
-        print("ADVERTENCIA: No se pudo importar supabase ni supabase-py. Las funciones de base de datos no estarán disponibles.")
-        
-        # Definir stubs para permitir que el archivo se cargue
-        class Client:
-            pass
-        
-        def create_client(url, key):
-            print(f"Se llamó a create_client con URL={url} y KEY={key[:4]}***")
-            return None
+        from supabase import create_client as supabase_create_client
+    except ImportError as e:
+        logger.error(f"ERROR DETALLADO DE IMPORTACIÓN: {e}")
+        logger.warning("No se pudo importar supabase. Las funciones de base de datos no estarán disponibles.")
+        return None
+    return supabase_create_client(url, key)
+
 
 # Cargar variables de entorno
 load_dotenv()
@@ -68,12 +56,102 @@ logger.info("Variables de entorno cargadas")
 logger.debug(f"SUPABASE_URL definida: {'Sí' if os.getenv('SUPABASE_URL') else 'No'}")
 logger.debug(f"SUPABASE_KEY definida: {'Sí' if os.getenv('SUPABASE_KEY') else 'No'}")
 
-# Validar variables de entorno requeridas
-required_env_vars = ["SUPABASE_URL", "SUPABASE_KEY", "SUPABASE_SERVICE_KEY"]
-missing_vars = [var for var in required_env_vars if not os.getenv(var)]
-if missing_vars:
-    logger.error(f"Faltan variables de entorno requeridas: {', '.join(missing_vars)}")
-    raise ValueError(f"Faltan variables de entorno requeridas: {', '.join(missing_vars)}")
+REQUIRED_ENV_VARS = ["SUPABASE_URL", "SUPABASE_KEY", "SUPABASE_SERVICE_KEY"]
+
+
+def validate_environment():
+    """
+    Comprueba las variables de entorno de Supabase. Se llama al arrancar la
+    aplicación (el worker no llega a servir peticiones sin ellas)
+    """
+    missing_vars = [var for var in REQUIRED_ENV_VARS if not os.getenv(var)]
+    if missing_vars:
+        logger.error(f"Faltan variables de entorno requeridas: {', '.join(missing_vars)}")
+        raise ValueError(f"Faltan variables de entorno requeridas: {', '.join(missing_vars)}")
+
+SUPABASE_LATENCY = metrics.histogram(
+    "supabase_request_duration_seconds",
+    "Latencia de las peticiones REST a Supabase (hasta recibir la respuesta)",
+    ["table", "method"]
+)
+
+
+def _postgrest_table(path: str) -> str:
+    # /rest/v1/<tabla> o /rest/v1/rpc/<función>
+    parts = path.strip("/").split("/")
+    if len(parts) >= 4 and parts[2] == "rpc":
+        return f"rpc:{parts[3]}"
+    return parts[2] if len(parts) >= 3 else "desconocida"
+
+
+def _record_request_start(request):
+    request.extensions["metrics_start"] = time.perf_counter()
+    # Span hijo de la etapa en curso (no-op fuera de una traza)
+    request.extensions["trace_span"] = tracing.tracer.start_child(
+        f"supabase.{_postgrest_table(request.url.path)}", method=request.method
+    )
+
+
+def _record_request_latency(response):
+    request = response.request
+    start = request.extensions.get("metrics_start")
+    if start is not None:
+        SUPABASE_LATENCY.labels(_postgrest_table(request.url.path), request.method).observe(
+            time.perf_counter() - start
+        )
+    span = request.extensions.get("trace_span")
+    if span is not None:
+        span.set_attribute("status_code", response.status_code)
+        span.end()
+
+
+def _guard_with_circuit(session):
+    """
+    Pasa cada petición a PostgREST por el circuito de Supabase: con el
+    circuito abierto los repositorios fallan al instante en vez de esperar
+    al timeout de una base de datos caída
+    """
+    send = session.send
+
+    def guarded_send(request, **kwargs):
+        breaker = breakers.get("supabase")
+        breaker.before_call()
+        try:
+            response = send(request, **kwargs)
+        except Exception as e:
+            if breaker.is_failure(e):
+                breaker.record_failure(e)
+            else:
+                breaker.record_success()
+            raise
+        breaker.record_response(response.status_code)
+        return response
+
+    session.send = guarded_send
+
+
+def instrument_supabase_client(client):
+    """
+    Mide la latencia por tabla de las peticiones a PostgREST (histograma y
+    span de la traza activa) con los event hooks de httpx y las protege con
+    el circuito de Supabase. El cliente de PostgREST se crea de forma perezosa
+    y se recrea con cada cambio de sesión, así que se envuelve su fábrica
+    """
+    if client is None or not hasattr(client, "_init_postgrest_client"):
+        return client
+    original_init = client._init_postgrest_client
+
+    def init_postgrest_client(*args, **kwargs):
+        postgrest = original_init(*args, **kwargs)
+        hooks = postgrest.session.event_hooks
+        hooks["request"].append(_record_request_start)
+        hooks["response"].append(_record_request_latency)
+        _guard_with_circuit(postgrest.session)
+        return postgrest
+
+    client._init_postgrest_client = init_postgrest_client
+    return client
+
 
 class SupabaseConnector:
     """
@@ -111,12 +189,12 @@ class SupabaseConnector:
                         "para operaciones que requieren permisos elevados."
                     )
                 
-                print(f"Inicializando cliente de Supabase con clave de servicio en {supabase_url}")
+                logger.info("Inicializando cliente de Supabase con clave de servicio en %s", supabase_url)
                 try:
-                    self._service_client = create_client(supabase_url, service_key)
-                    print("Cliente de Supabase con permisos de servicio creado exitosamente")
+                    self._service_client = instrument_supabase_client(create_client(supabase_url, service_key))
+                    logger.info("Cliente de Supabase con permisos de servicio creado exitosamente")
                 except Exception as e:
-                    print(f"Error al crear cliente de Supabase con permisos de servicio: {str(e)}")
+                    logger.error("Error al crear cliente de Supabase con permisos de servicio: %s", e)
                     raise
             
             return self._service_client
@@ -133,12 +211,12 @@ class SupabaseConnector:
                     "Asegúrate de configurarlas en el archivo .env"
                 )
             
-            print(f"Inicializando cliente de Supabase en {supabase_url}")
+            logger.info("Inicializando cliente de Supabase en %s", supabase_url)
             try:
-                self._client = create_client(supabase_url, supabase_key)
-                print("Cliente de Supabase creado exitosamente")
+                self._client = instrument_supabase_client(create_client(supabase_url, supabase_key))
+                logger.info("Cliente de Supabase creado exitosamente")
             except Exception as e:
-                print(f"Error al crear cliente de Supabase: {str(e)}")
+                logger.error("Error al crear cliente de Supabase: %s", e)
                 raise
         
         return self._client
@@ -149,15 +227,15 @@ class SupabaseConnector:
         """
         try:
             client = self.get_client()
-            print("Probando conexión a Supabase...")
+            logger.info("Probando conexión a Supabase...")
             
             # Intenta una operación simple: verificar si existe la tabla users
             response = client.from_('users').select('count').limit(1).execute()
             
-            print(f"Conexión exitosa a Supabase. Respuesta: {response}")
+            logger.info("Conexión exitosa a Supabase. Respuesta: %s", response)
             return True
         except Exception as e:
-            print(f"Error al conectar con Supabase: {str(e)}")
+            logger.error("Error al conectar con Supabase: %s", e)
             return False 
 
 # Funciones auxiliares
@@ -5,7 +5,6 @@ import os
 from typing import Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field, ConfigDict
-from loguru import logger
 
 class Settings(BaseSettings):
     """
@@ -32,6 +31,7 @@ class Settings(BaseSettings):
     CHROMA_PORT: int = Field(default=8050, env="CHROMA_PORT")
     CHROMA_TELEMETRY_ENABLED: bool = False
     CHROMA_SERVER_TIMEOUT: int = 300
+    CHROMA_REGISTRY_TTL_SECONDS: float = Field(default=30.0, env="CHROMA_REGISTRY_TTL_SECONDS")  # caché del nombre de la colección activa
     
     # Documentos - Límites claros y optimización
     MAX_DOCUMENT_SIZE_MB: int = Field(default=100, env="MAX_DOCUMENT_SIZE_MB")  # Tamaño máximo en MB
@@ -46,7 +46,63 @@ class Settings(BaseSettings):
     # Streaming configuration
     STREAMING_CHUNK_SIZE: int = Field(default=1048576, env="STREAMING_CHUNK_SIZE")  # 1MB chunks
     PDF_PROCESSING_CHUNK_SIZE: int = Field(default=5242880, env="PDF_PROCESSING_CHUNK_SIZE")  # 5MB para PDFs
-    
+
+    # WebSocket streaming - agrupación de fragmentos y compresión
+    WEBSOCKET_STREAM_FLUSH_BYTES: int = Field(default=64, env="WEBSOCKET_STREAM_FLUSH_BYTES")  # Liberar lote al llegar a 64 bytes
+    WEBSOCKET_STREAM_FLUSH_INTERVAL_MS: int = Field(default=30, env="WEBSOCKET_STREAM_FLUSH_INTERVAL_MS")  # ... o tras 30 ms
+    WEBSOCKET_PER_MESSAGE_DEFLATE: bool = Field(default=True, env="WEBSOCKET_PER_MESSAGE_DEFLATE")  # Extensión permessage-deflate
+
+    # WebSocket - ciclo de vida de las conexiones
+    WEBSOCKET_MAX_CONNECTIONS: int = Field(default=1000, env="WEBSOCKET_MAX_CONNECTIONS")  # Conexiones totales por worker
+    WEBSOCKET_MAX_CONNECTIONS_PER_USER: int = Field(default=5, env="WEBSOCKET_MAX_CONNECTIONS_PER_USER")
+    WEBSOCKET_HEARTBEAT_INTERVAL: int = Field(default=30, env="WEBSOCKET_HEARTBEAT_INTERVAL")  # Segundos entre heartbeats
+    WEBSOCKET_IDLE_TIMEOUT: int = Field(default=90, env="WEBSOCKET_IDLE_TIMEOUT")  # Cerrar tras 90s sin actividad del cliente
+    WEBSOCKET_DRAIN_TIMEOUT: int = Field(default=10, env="WEBSOCKET_DRAIN_TIMEOUT")  # Espera máxima de streams en el apagado
+
+    # Persistencia diferida de mensajes (write-behind con WAL local)
+    MESSAGE_PERSIST_BATCH_SIZE: int = Field(default=50, env="MESSAGE_PERSIST_BATCH_SIZE")  # Filas por insert
+    MESSAGE_PERSIST_FLUSH_MS: int = Field(default=200, env="MESSAGE_PERSIST_FLUSH_MS")  # Espera máxima antes de insertar
+    MESSAGE_WAL_PATH: str = Field(default="data/message_wal.jsonl", env="MESSAGE_WAL_PATH")  # Base: cada proceso escribe en message_wal.<pid>.jsonl
+    MESSAGE_WAL_FSYNC: bool = Field(default=True, env="MESSAGE_WAL_FSYNC")  # fsync del WAL (agrupado, en un hilo) antes de confirmar cada mensaje
+
+    # Detección de contexto e intenciones del chat
+    CONTEXT_PATTERNS_PATH: Optional[str] = Field(default=None, env="CONTEXT_PATTERNS_PATH")  # None = fichero incluido en el código
+    CONTEXT_PATTERNS_RELOAD_SECONDS: float = Field(default=5.0, env="CONTEXT_PATTERNS_RELOAD_SECONDS")  # 0 desactiva la recarga en caliente
+
+    # Estadísticas (contadores materializados, scripts/sql/statistics_counters.sql)
+    STATISTICS_RECONCILE_SECONDS: float = Field(default=900.0, env="STATISTICS_RECONCILE_SECONDS")  # 0 desactiva el reconciliador
+    STATISTICS_CACHE_BACKEND: str = Field(default="memory", env="STATISTICS_CACHE_BACKEND")  # memory | redis (compartida entre instancias)
+    STATISTICS_CACHE_REDIS_URL: str = Field(default="redis://localhost:6379/0", env="STATISTICS_CACHE_REDIS_URL")
+    STATISTICS_CACHE_MAX_ENTRIES: int = Field(default=1024, env="STATISTICS_CACHE_MAX_ENTRIES")  # LRU del backend en memoria
+    STATISTICS_CACHE_TTL_SECONDS: float = Field(default=30.0, env="STATISTICS_CACHE_TTL_SECONDS")
+    STATISTICS_CACHE_STALE_SECONDS: float = Field(default=300.0, env="STATISTICS_CACHE_STALE_SECONDS")  # se sirve caducado mientras se recalcula
+
+    # Exportaciones de administración (keyset pagination por id)
+    EXPORT_DIR: str = Field(default="uploads/exports", env="EXPORT_DIR")
+    EXPORT_PAGE_SIZE: int = Field(default=1000, env="EXPORT_PAGE_SIZE")  # filas por consulta a Supabase
+    EXPORT_MAX_CONCURRENT_JOBS: int = Field(default=2, env="EXPORT_MAX_CONCURRENT_JOBS")  # exportaciones a fichero simultáneas
+
+    # Operaciones en lote de administración
+    BULK_BATCH_SIZE: int = Field(default=200, env="BULK_BATCH_SIZE")  # IDs por sentencia IN (...)
+    BULK_MAX_CONCURRENCY: int = Field(default=4, env="BULK_MAX_CONCURRENCY")  # lotes en paralelo
+    BULK_SYNC_LIMIT: int = Field(default=500, env="BULK_SYNC_LIMIT")  # por encima se ejecuta como trabajo en segundo plano
+    BULK_MAX_ITEMS: int = Field(default=10000, env="BULK_MAX_ITEMS")
+
+    # Re-indexación completa en una colección nueva de ChromaDB
+    REINDEX_DIR: str = Field(default="uploads/reindex", env="REINDEX_DIR")  # checkpoint del trabajo en curso
+    REINDEX_PAGE_SIZE: int = Field(default=50, env="REINDEX_PAGE_SIZE")  # documentos por página (con contenido)
+    REINDEX_WORKERS: int = Field(default=4, env="REINDEX_WORKERS")  # hilos calculando embeddings
+    REINDEX_EMBED_BATCH_SIZE: int = Field(default=64, env="REINDEX_EMBED_BATCH_SIZE")  # chunks por llamada al modelo
+    VECTOR_AUTO_MIGRATE: bool = Field(default=False, env="VECTOR_AUTO_MIGRATE")  # migrar al arrancar si cambia el modelo (activar en una sola instancia)
+    VECTOR_SWEEP_SECONDS: float = Field(default=21600.0, env="VECTOR_SWEEP_SECONDS")  # barrido de chunks huérfanos, 0 lo desactiva
+    VECTOR_SWEEP_PAGE_SIZE: int = Field(default=1000, env="VECTOR_SWEEP_PAGE_SIZE")  # chunks/documentos por lectura
+
+    # Hashing de contraseñas (pool fuera del event loop)
+    PASSWORD_PBKDF2_ITERATIONS: int = Field(default=100000, env="PASSWORD_PBKDF2_ITERATIONS")  # al subirlo, los hashes se regeneran en el login
+    PASSWORD_HASH_EXECUTOR: str = Field(default="process", env="PASSWORD_HASH_EXECUTOR")  # process | thread
+    PASSWORD_HASH_WORKERS: int = Field(default=0, env="PASSWORD_HASH_WORKERS")  # 0 = uno por núcleo
+    PASSWORD_HASH_MAX_QUEUE: int = Field(default=256, env="PASSWORD_HASH_MAX_QUEUE")  # logins en espera antes de responder 429
+
     # Docker
     DOCKER_ENV: bool = False
     
@@ -76,6 +132,38 @@ class Settings(BaseSettings):
     LOG_FORMAT: str = "%(asctime)s | %(levelname)-8s | %(name)s | %(message)s"
     LOG_FILE_MAX_SIZE: int = Field(default=10485760, env="LOG_FILE_MAX_SIZE")  # 10MB
     LOG_FILE_BACKUP_COUNT: int = Field(default=5, env="LOG_FILE_BACKUP_COUNT")
+    LOG_CONSOLE_FORMAT: str = Field(default="text", env="LOG_CONSOLE_FORMAT")  # text o json (logs/app.log siempre en JSON)
+    LOG_SAMPLING: str = Field(
+        default="src.api.dependencies=0.01,src.services.document_service=0.1,"
+                "src.api.helpers.document_helpers=0.2,src.services.statistics_service=0.1",
+        env="LOG_SAMPLING"
+    )  # módulo=fracción de registros DEBUG/INFO que se escriben
+    LOG_DUPLICATE_WINDOW_SECONDS: float = Field(default=10.0, env="LOG_DUPLICATE_WINDOW_SECONDS")
+    LOG_DUPLICATE_BURST: int = Field(default=5, env="LOG_DUPLICATE_BURST")  # repeticiones por ventana antes de suprimir, 0 lo desactiva
+    REQUEST_LOG_SAMPLE_RATE: float = Field(default=0.1, env="REQUEST_LOG_SAMPLE_RATE")  # fracción de respuestas 2xx/3xx registradas
+    REQUEST_LOG_SLOW_MS: float = Field(default=1000.0, env="REQUEST_LOG_SLOW_MS")  # las más lentas se registran siempre
+    ENABLE_METRICS: bool = Field(default=True, env="ENABLE_METRICS")  # GET /metrics en formato Prometheus
+    METRICS_TOKEN: Optional[str] = Field(default=None, env="METRICS_TOKEN")  # si se define, /metrics exige Authorization: Bearer <token>
+    TRACING_EXPORTER: str = Field(default="json", env="TRACING_EXPORTER")  # json, otlp o none
+    TRACING_SERVICE_NAME: str = Field(default="mentia-backend", env="TRACING_SERVICE_NAME")
+    TRACING_JSON_PATH: str = Field(default="logs/traces.jsonl", env="TRACING_JSON_PATH")
+    TRACING_OTLP_ENDPOINT: str = Field(default="http://localhost:4318", env="TRACING_OTLP_ENDPOINT")  # colector OTLP/HTTP
+    TRACING_OTLP_HEADERS: str = Field(default="", env="TRACING_OTLP_HEADERS")  # "clave=valor,otra=valor"
+    TRACING_SLOW_MS: float = Field(default=5000.0, env="TRACING_SLOW_MS")  # trazas más lentas se exportan siempre
+    TRACING_SAMPLE_RATE: float = Field(default=0.01, env="TRACING_SAMPLE_RATE")  # fracción del resto que se exporta
+    TRACING_MAX_SPANS: int = Field(default=500, env="TRACING_MAX_SPANS")  # spans por traza como máximo
+    PROFILING_LOOP_LAG_ENABLED: bool = Field(default=True, env="PROFILING_LOOP_LAG_ENABLED")  # vigilancia de bloqueos del event loop
+    PROFILING_LOOP_LAG_THRESHOLD_MS: float = Field(default=200.0, env="PROFILING_LOOP_LAG_THRESHOLD_MS")  # bloqueo mínimo que guarda la pila
+    PROFILING_LOOP_LAG_INTERVAL_MS: float = Field(default=100.0, env="PROFILING_LOOP_LAG_INTERVAL_MS")  # periodo del latido del loop
+    PROFILING_LOOP_LAG_MAX_EVENTS: int = Field(default=50, env="PROFILING_LOOP_LAG_MAX_EVENTS")  # bloqueos recientes que se conservan
+    PROFILING_CPU_MAX_SECONDS: float = Field(default=60.0, env="PROFILING_CPU_MAX_SECONDS")  # duración máxima de un perfilado de CPU
+    PROFILING_MEMORY_MAX_SNAPSHOTS: int = Field(default=5, env="PROFILING_MEMORY_MAX_SNAPSHOTS")  # instantáneas de tracemalloc conservadas
+    STARTUP_DEFERRED_TASKS_DELAY_SECONDS: float = Field(default=10.0, env="STARTUP_DEFERRED_TASKS_DELAY_SECONDS")  # espera tras el startup antes del vocabulario ortográfico y la versión de la colección
+    HEALTH_CHECK_INTERVAL_SECONDS: float = Field(default=15.0, env="HEALTH_CHECK_INTERVAL_SECONDS")  # comprobación de Supabase, ChromaDB y Gemini en segundo plano
+    HEALTH_CHECK_TIMEOUT_SECONDS: float = Field(default=5.0, env="HEALTH_CHECK_TIMEOUT_SECONDS")  # una dependencia que tarda más se da por caída
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = Field(default=5, env="CIRCUIT_BREAKER_FAILURE_THRESHOLD")  # fallos seguidos que abren el circuito
+    CIRCUIT_BREAKER_RESET_SECONDS: float = Field(default=30.0, env="CIRCUIT_BREAKER_RESET_SECONDS")  # tiempo abierto antes de la llamada de prueba
+    CHROMA_REQUEST_TIMEOUT_SECONDS: float = Field(default=30.0, env="CHROMA_REQUEST_TIMEOUT_SECONDS")  # timeout de cada petición HTTP a ChromaDB
     
     # AI/ML Models Configuration
     SENTENCE_TRANSFORMER_MODEL: str = Field(default="all-MiniLM-L6-v2", env="SENTENCE_TRANSFORMER_MODEL")
@@ -97,6 +185,20 @@ class Settings(BaseSettings):
     SMTP_USER: Optional[str] = Field(default=None, env="SMTP_USER")
     SMTP_PASSWORD: Optional[str] = Field(default=None, env="SMTP_PASSWORD")
     FROM_EMAIL: Optional[str] = Field(default=None, env="FROM_EMAIL")
+    EMAIL_OUTBOX_PATH: str = Field(default="uploads/email_outbox.sqlite3", env="EMAIL_OUTBOX_PATH")  # cola persistente de envíos
+    EMAIL_SMTP_POOL_SIZE: int = Field(default=2, env="EMAIL_SMTP_POOL_SIZE")  # sesiones SMTP en paralelo
+    EMAIL_OUTBOX_BATCH_SIZE: int = Field(default=20, env="EMAIL_OUTBOX_BATCH_SIZE")  # mensajes por sesión y lectura
+    EMAIL_OUTBOX_POLL_SECONDS: float = Field(default=5.0, env="EMAIL_OUTBOX_POLL_SECONDS")  # revisión de reintentos pendientes
+    EMAIL_OUTBOX_LEASE_SECONDS: float = Field(default=900.0, env="EMAIL_OUTBOX_LEASE_SECONDS")  # reserva de un lote; mayor que su envío más lento
+    EMAIL_MAX_ATTEMPTS: int = Field(default=5, env="EMAIL_MAX_ATTEMPTS")
+    EMAIL_RETRY_BASE_SECONDS: float = Field(default=30.0, env="EMAIL_RETRY_BASE_SECONDS")  # se duplica en cada reintento
+    EMAIL_SMTP_IDLE_SECONDS: float = Field(default=60.0, env="EMAIL_SMTP_IDLE_SECONDS")  # cierre de conexiones sin uso
+    EMAIL_MX_CACHE_SIZE: int = Field(default=10000, env="EMAIL_MX_CACHE_SIZE")  # dominios con MX en caché
+    EMAIL_MX_MIN_TTL: float = Field(default=60.0, env="EMAIL_MX_MIN_TTL")  # límites al TTL del registro DNS
+    EMAIL_MX_MAX_TTL: float = Field(default=3600.0, env="EMAIL_MX_MAX_TTL")
+    EMAIL_MX_NEGATIVE_TTL: float = Field(default=300.0, env="EMAIL_MX_NEGATIVE_TTL")  # dominios sin MX o inexistentes
+    EMAIL_DNS_WORKERS: int = Field(default=8, env="EMAIL_DNS_WORKERS")  # resoluciones DNS simultáneas
+    EMAIL_DNS_TIMEOUT: float = Field(default=3.0, env="EMAIL_DNS_TIMEOUT")
     
     # Frontend URL para links en emails
     FRONTEND_URL: str = Field(default="http://localhost:3000", env="FRONTEND_URL")
@@ -167,9 +269,6 @@ try:
 except ImportError:
     pass
 
-# Configuración de Loguru
-logger.add("logs/app.log", rotation="10 MB", retention="10 days", level="DEBUG")
-
 # Inicializar Sentry si el DSN está configurado
 if Settings().SENTRY_DSN:
     import sentry_sdk
@@ -0,0 +1,319 @@
+"""
+Caché asíncrona con single-flight y stale-while-revalidate.
+
+- Single-flight: peticiones concurrentes de una misma clave comparten un
+  único cálculo. El cálculo corre en su propia tarea, así que cancelar la
+  petición que lo inició no afecta a las demás.
+- Stale-while-revalidate: pasado su TTL una entrada se sigue sirviendo
+  durante `stale_ttl` segundos mientras se recalcula en segundo plano.
+- Invalidación explícita: `invalidate()` desde código asíncrono e
+  `invalidate_nowait()` desde servicios síncronos (hilos del threadpool).
+
+Backends: `MemoryCacheBackend` (LRU en proceso) y `RedisCacheBackend`
+(compartido entre instancias, requiere el paquete opcional `redis`).
+"""
+import asyncio
+import json
+import logging
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CacheEntry(NamedTuple):
+    """Valor cacheado con su instante de cálculo (epoch) y su TTL"""
+    value: Any
+    stored_at: float
+    ttl: float
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+class MemoryCacheBackend:
+    """Backend LRU en memoria del proceso"""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        entry, expires_at = item
+        if time.time() >= expires_at:
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: CacheEntry, expire: float) -> None:
+        self._entries[key] = (entry, entry.stored_at + expire)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, *keys: str) -> None:
+        self.delete_nowait(*keys)
+
+    def delete_nowait(self, *keys: str) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+
+    async def close(self) -> None:
+        self._entries.clear()
+
+
+class RedisCacheBackend:
+    """Backend compartido en Redis (los valores se guardan como JSON)"""
+
+    name = "redis"
+
+    def __init__(self, url: str, namespace: str = "mentia:cache:", client: Any = None):
+        if client is None:
+            import redis.asyncio as redis  # dependencia opcional
+            client = redis.from_url(url)
+        self._client = client
+        self.namespace = namespace
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        raw = await self._client.get(self.namespace + key)
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        return CacheEntry(data["value"], data["stored_at"], data["ttl"])
+
+    async def set(self, key: str, entry: CacheEntry, expire: float) -> None:
+        payload = json.dumps(entry._asdict(), default=_json_default)
+        await self._client.set(self.namespace + key, payload, ex=max(1, math.ceil(expire)))
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self._client.delete(*(self.namespace + key for key in keys))
+
+    async def close(self) -> None:
+        await self._client.close()
+
+
+@dataclass
+class _NamespaceStats:
+    """Métricas de un espacio de claves (prefijo antes de ':')"""
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    computations: int = 0
+    errors: int = 0
+    compute_total_ms: float = 0.0
+    compute_max_ms: float = 0.0
+    compute_last_ms: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+            "computations": self.computations,
+            "errors": self.errors,
+            "compute_avg_ms": round(self.compute_total_ms / self.computations, 2) if self.computations else 0.0,
+            "compute_max_ms": round(self.compute_max_ms, 2),
+            "compute_last_ms": round(self.compute_last_ms, 2),
+        }
+
+
+class AsyncCache:
+    """Caché con single-flight, stale-while-revalidate y métricas por espacio de claves"""
+
+    def __init__(self, backend: Any, default_ttl: float = 30.0, stale_ttl: float = 300.0):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._generations: Dict[str, int] = {}
+        self._stats: Dict[str, _NamespaceStats] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.backend_errors = 0
+
+    async def get_or_compute(
+        self,
+        key: str,
+        fetcher: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+        cacheable: Optional[Callable[[Any], bool]] = None
+    ) -> Any:
+        """
+        Devuelve el valor cacheado de `key` o lo calcula con `fetcher`.
+
+        Args:
+            key: Clave ("espacio:resto"; el espacio agrupa las métricas)
+            fetcher: Función asíncrona sin argumentos que calcula el valor
+            ttl: Segundos que el valor se considera fresco (por defecto default_ttl)
+            cacheable: Si se indica, solo se guardan los valores para los que devuelve True
+
+        Returns:
+            Any: Valor fresco, o caducado hace menos de stale_ttl (se revalida en segundo plano)
+        """
+        self._loop = asyncio.get_running_loop()
+        ttl = self.default_ttl if ttl is None else ttl
+        stats = self._namespace(key)
+
+        entry = await self._backend_get(key)
+        if entry is not None:
+            age = time.time() - entry.stored_at
+            if age < entry.ttl:
+                stats.hits += 1
+                return entry.value
+            if age < entry.ttl + self.stale_ttl:
+                stats.stale_hits += 1
+                self._start(key, fetcher, ttl, cacheable)
+                return entry.value
+
+        stats.misses += 1
+        return await asyncio.shield(self._start(key, fetcher, ttl, cacheable))
+
+    async def invalidate(self, *keys: str) -> None:
+        """Elimina claves de la caché (los cálculos en curso no se guardarán)"""
+        self._forget(keys)
+        try:
+            await self.backend.delete(*keys)
+        except Exception as e:
+            self.backend_errors += 1
+            logger.warning(f"AsyncCache: error invalidando {keys}: {str(e)}")
+
+    def invalidate_nowait(self, *keys: str) -> None:
+        """
+        Versión síncrona de invalidate() para servicios que corren fuera del
+        event loop. En memoria es inmediata; en backends remotos el borrado
+        se programa en el loop de la caché.
+        """
+        self._forget(keys)
+        if hasattr(self.backend, "delete_nowait"):
+            self.backend.delete_nowait(*keys)
+            return
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(lambda: loop.create_task(self.invalidate(*keys)))
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Métricas de aciertos y recálculos por espacio de claves"""
+        namespaces = {name: stats.as_dict() for name, stats in sorted(self._stats.items())}
+        total = _NamespaceStats()
+        for stats in self._stats.values():
+            total.hits += stats.hits
+            total.stale_hits += stats.stale_hits
+            total.misses += stats.misses
+        lookups = total.hits + total.stale_hits + total.misses
+
+        metrics = {
+            "backend": self.backend.name,
+            "default_ttl_seconds": self.default_ttl,
+            "stale_ttl_seconds": self.stale_ttl,
+            "hit_ratio": round((total.hits + total.stale_hits) / lookups, 4) if lookups else 0.0,
+            "in_flight": len(self._inflight),
+            "backend_errors": self.backend_errors,
+            "namespaces": namespaces,
+        }
+        if isinstance(self.backend, MemoryCacheBackend):
+            metrics["entries"] = len(self.backend)
+            metrics["evictions"] = self.backend.evictions
+        return metrics
+
+    async def close(self) -> None:
+        for task in list(self._inflight.values()):
+            task.cancel()
+        self._inflight.clear()
+        await self.backend.close()
+
+    def _namespace(self, key: str) -> _NamespaceStats:
+        name = key.split(":", 1)[0]
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = _NamespaceStats()
+        return stats
+
+    def _forget(self, keys) -> None:
+        for key in keys:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            self._inflight.pop(key, None)
+
+    def _start(self, key: str, fetcher: Callable[[], Awaitable[Any]], ttl: float,
+               cacheable: Optional[Callable[[Any], bool]]) -> asyncio.Task:
+        """Devuelve el cálculo en curso de la clave o lanza uno nuevo"""
+        task = self._inflight.get(key)
+        if task is not None:
+            self._namespace(key).coalesced += 1
+            return task
+
+        task = asyncio.ensure_future(
+            self._compute(key, fetcher, ttl, cacheable, self._generations.get(key, 0))
+        )
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._finish(key, done))
+        return task
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        # pop y no del: invalidate_nowait() puede quitar la clave desde un hilo
+        # del threadpool entre la comprobación y el borrado
+        if self._inflight.get(key) is task:
+            self._inflight.pop(key, None)
+        # Consumir la excepción: en una revalidación nadie espera la tarea
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"AsyncCache: error calculando '{key}': {task.exception()}")
+
+    async def _compute(self, key: str, fetcher: Callable[[], Awaitable[Any]], ttl: float,
+                       cacheable: Optional[Callable[[Any], bool]], generation: int) -> Any:
+        stats = self._namespace(key)
+        started = time.perf_counter()
+        try:
+            value = await fetcher()
+        except Exception:
+            stats.errors += 1
+            raise
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        stats.computations += 1
+        stats.compute_total_ms += elapsed_ms
+        stats.compute_max_ms = max(stats.compute_max_ms, elapsed_ms)
+        stats.compute_last_ms = elapsed_ms
+
+        # Si se invalidó durante el cálculo el resultado puede estar desfasado: no se guarda
+        if cacheable is not None and not cacheable(value):
+            return value
+        if self._generations.get(key, 0) == generation:
+            await self._backend_set(key, CacheEntry(value, time.time(), ttl))
+        return value
+
+    async def _backend_get(self, key: str) -> Optional[CacheEntry]:
+        try:
+            return await self.backend.get(key)
+        except Exception as e:
+            self.backend_errors += 1
+            logger.warning(f"AsyncCache: error leyendo '{key}': {str(e)}")
+            return None
+
+    async def _backend_set(self, key: str, entry: CacheEntry) -> None:
+        try:
+            await self.backend.set(key, entry, entry.ttl + self.stale_ttl)
+        except Exception as e:
+            self.backend_errors += 1
+            logger.warning(f"AsyncCache: error guardando '{key}': {str(e)}")
@@ -0,0 +1,293 @@
+"""
+Circuit breakers por dependencia externa (Supabase, ChromaDB, Gemini).
+
+- closed: las llamadas pasan; N fallos de infraestructura seguidos abren el circuito
+- open: las llamadas fallan al instante con CircuitOpenException (HTTP 503 con
+  Retry-After) en lugar de esperar el timeout de una dependencia caída
+- half_open: pasado reset_timeout se deja pasar una llamada de prueba; si va
+  bien se cierra y si falla vuelve a abrirse
+
+Solo cuentan como fallo los errores de infraestructura (conexión, timeout,
+429, 502/503/504): un 4xx, un 500 o un error de la aplicación significan que
+la dependencia respondió. El monitor de dependencias prueba cada una en segundo
+plano dentro de probing(), que se salta el circuito abierto para poder
+detectar la recuperación.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import logging
+import threading
+import time
+
+from src.core.exceptions import AppException, CircuitOpenException
+from src.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Códigos HTTP que indican que la dependencia no está disponible
+UNAVAILABLE_STATUS_CODES = frozenset({429, 502, 503, 504})
+
+CIRCUIT_STATE = metrics.gauge(
+    "circuit_breaker_state",
+    "Estado del circuito por dependencia (0 cerrado, 1 semiabierto, 2 abierto)",
+    ["dependency"]
+)
+CIRCUIT_REJECTED = metrics.counter(
+    "circuit_breaker_rejected",
+    "Llamadas rechazadas al instante por un circuito abierto",
+    ["dependency"]
+)
+
+# Activo mientras el monitor de dependencias hace sus comprobaciones
+_probing: ContextVar[bool] = ContextVar("circuit_probing", default=False)
+
+
+@contextmanager
+def probing():
+    """Las llamadas dentro de este bloque no se rechazan ni cuentan en el circuito"""
+    token = _probing.set(True)
+    try:
+        yield
+    finally:
+        _probing.reset(token)
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    # google.api_core usa .code; httpx y requests, .response.status_code
+    code = getattr(exc, "code", None)
+    if isinstance(code, int):
+        return code
+    response = getattr(exc, "response", None)
+    code = getattr(response, "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_dependency_failure(exc: BaseException) -> bool:
+    """True si el error indica que la dependencia no está disponible"""
+    if isinstance(exc, CircuitOpenException):
+        return False
+    if isinstance(exc, (AppException, ValueError, TypeError, KeyError)):
+        return False
+    # Errores de PostgREST (restricciones, RLS...): la base de datos respondió
+    if type(exc).__module__.startswith("postgrest"):
+        return False
+    status = _status_code(exc)
+    if status is not None:
+        return status in UNAVAILABLE_STATUS_CODES
+    return True
+
+
+class CircuitBreaker:
+    """Circuito de una dependencia; seguro entre hilos"""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        is_failure: Callable[[BaseException], bool] = is_dependency_failure,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.is_failure = is_failure
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._trial_started = 0.0
+        self._last_error: Optional[str] = None
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def before_call(self):
+        """Lanza CircuitOpenException si la llamada no debe intentarse"""
+        if _probing.get():
+            return
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return
+            trial_expired = self._clock() - self._trial_started >= self.reset_timeout
+            if state == HALF_OPEN and (not self._trial_in_flight or trial_expired):
+                # Una sola llamada de prueba mientras está semiabierto
+                self._trial_in_flight = True
+                self._trial_started = self._clock()
+                return
+            retry_after = max(1.0, self.reset_timeout - (self._clock() - self._opened_at))
+            self.rejected += 1
+        CIRCUIT_REJECTED.labels(self.name).inc()
+        raise CircuitOpenException(self.name, retry_after)
+
+    def reject_if_open(self):
+        """Como before_call pero sin ocupar la llamada de prueba del estado semiabierto"""
+        if _probing.get():
+            return
+        with self._lock:
+            if self._current_state() != OPEN:
+                return
+            retry_after = max(1.0, self.reset_timeout - (self._clock() - self._opened_at))
+            self.rejected += 1
+        CIRCUIT_REJECTED.labels(self.name).inc()
+        raise CircuitOpenException(self.name, retry_after)
+
+    def record_success(self):
+        if _probing.get():
+            return
+        self._close()
+
+    def record_failure(self, error: Optional[BaseException] = None):
+        if _probing.get():
+            return
+        self._fail(f"{type(error).__name__}: {error}" if error is not None else None)
+
+    def record_response(self, status_code: int):
+        """Registra una respuesta HTTP de la dependencia según su código"""
+        if _probing.get():
+            return
+        if status_code in UNAVAILABLE_STATUS_CODES:
+            self._fail(f"HTTP {status_code}")
+        else:
+            self._close()
+
+    def record_probe(self, error: Optional[BaseException] = None):
+        """Resultado de una comprobación del monitor: un éxito cierra el circuito"""
+        if error is None:
+            self._close()
+        else:
+            self._fail(f"{type(error).__name__}: {error}")
+
+    def _close(self):
+        with self._lock:
+            previous = self._state
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+        if previous != CLOSED:
+            logger.info(f"✅ Circuito {self.name} cerrado: la dependencia responde de nuevo")
+
+    def _fail(self, description: Optional[str]):
+        with self._lock:
+            self._last_error = description
+            self._failures += 1
+            state = self._current_state()
+            should_open = state == HALF_OPEN or (state == CLOSED and self._failures >= self.failure_threshold)
+            if should_open:
+                self._state = OPEN
+                self._opened_at = self._clock()
+                self._trial_in_flight = False
+        if should_open:
+            logger.warning(
+                f"🔌 Circuito {self.name} abierto tras {self._failures} fallos "
+                f"({self._last_error}); se reintentará en {self.reset_timeout:.0f} s"
+            )
+
+    @contextmanager
+    def call(self):
+        """Protege un bloque: rechaza si está abierto y registra el resultado"""
+        self.before_call()
+        try:
+            yield
+        except Exception as e:
+            if self.is_failure(e):
+                self.record_failure(e)
+            else:
+                self.record_success()
+            raise
+        except BaseException:
+            # Cancelación o cierre del generador: no dice nada de la dependencia
+            with self._lock:
+                self._trial_in_flight = False
+            raise
+        self.record_success()
+
+    def guard(self, func):
+        """Decorador equivalente a call() para funciones síncronas y asíncronas"""
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with self.call():
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.call():
+                return func(*args, **kwargs)
+        return wrapper
+
+    def reset(self):
+        """Cierra el circuito y olvida los fallos (útil para testing)"""
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+            self._last_error = None
+        self.rejected = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._current_state()
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "retry_after_seconds": round(max(0.0, self.reset_timeout - (self._clock() - self._opened_at)), 1)
+                if state == OPEN else 0.0,
+                "rejected": self.rejected,
+                "last_error": self._last_error,
+            }
+
+
+class CircuitBreakerRegistry:
+    """Un circuito por dependencia, creado con la configuración en el primer uso"""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is not None:
+            return breaker
+        # Import local: src.config importa database.py, que usa este módulo
+        from src.config.settings import settings
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    name,
+                    failure_threshold=settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                    reset_timeout=settings.CIRCUIT_BREAKER_RESET_SECONDS
+                )
+                CIRCUIT_STATE.labels(name).set_function(lambda: _STATE_VALUES[breaker.state])
+                self._breakers[name] = breaker
+        return breaker
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        return {name: breaker.to_dict() for name, breaker in sorted(self._breakers.items())}
+
+
+# Instancia global
+breakers = CircuitBreakerRegistry()
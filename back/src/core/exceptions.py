@@ -17,6 +17,7 @@ y son convertidas automáticamente a respuestas HTTP apropiadas.
 """
 
 from typing import Optional, Dict, Any
+import math
 
 
 class AppException(Exception):
@@ -125,6 +126,16 @@ class ExternalServiceException(AppException):
         super().__init__(message, details={"service": service_name})
 
 
+class CircuitOpenException(ExternalServiceException):
+    """Excepción cuando el circuito de una dependencia está abierto (HTTP 503)."""
+    error_code = "SERVICE_UNAVAILABLE"
+    
+    def __init__(self, service_name: str, retry_after: Optional[float] = None):
+        super().__init__(service_name, f"Servicio {service_name} no disponible temporalmente")
+        if retry_after:
+            self.details["retry_after"] = math.ceil(retry_after)
+
+
 class RateLimitException(AppException):
     """Excepción para límite de tasa excedido (HTTP 429)."""
     http_status_code = 429
@@ -1,18 +1,43 @@
 """
 Sistema unificado de logging para toda la aplicación.
 Proporciona configuración consistente y utilidades de logging.
+
+Todos los registros pasan por un único pipeline sin bloqueo:
+- los loggers solo encolan el registro (QueueHandler); un hilo
+  QueueListener lo formatea y escribe en consola y en logs/app.log
+- el mensaje se compone en ese hilo: con logger.info("... %s", valor) el
+  event loop no llega a formatear nada
+- logs/app.log guarda una línea JSON por registro; la consola usa texto
+  con colores (o JSON con LOG_CONSOLE_FORMAT=json)
+- muestreo por módulo (LOG_SAMPLING) de los registros DEBUG/INFO de las
+  rutas calientes; WARNING y superiores no se muestrean
+- supresión de duplicados: una misma línea de código no escribe más de
+  LOG_DUPLICATE_BURST registros cada LOG_DUPLICATE_WINDOW_SECONDS; el
+  siguiente que pasa indica cuántos se suprimieron
 """
+import json
 import logging
 import logging.handlers
 import os
+import queue
+import random
 import sys
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Callable, Optional, Dict, Any, List, Tuple
 from src.config.settings import get_settings
 
 settings = get_settings()
 
+# Entradas máximas del filtro de duplicados antes de purgar las caducadas
+DUPLICATE_FILTER_MAX_KEYS = 10000
+
+
+def _suppressed_suffix(record) -> str:
+    suppressed = getattr(record, 'suppressed', 0)
+    return f" [{suppressed} mensajes iguales suprimidos]" if suppressed else ""
+
 
 class ColoredFormatter(logging.Formatter):
     """Formatter con colores para la consola"""
@@ -28,12 +53,142 @@ class ColoredFormatter(logging.Formatter):
     }
     
     def format(self, record):
-        # Aplicar color al nivel
-        if hasattr(record, 'levelname'):
-            color = self.COLORS.get(record.levelname, self.COLORS['RESET'])
-            record.levelname = f"{color}{record.levelname}{self.COLORS['RESET']}"
+        # Copia: el mismo registro lo formatean también los demás handlers
+        record = logging.makeLogRecord(record.__dict__)
+        color = self.COLORS.get(record.levelname, self.COLORS['RESET'])
+        record.levelname = f"{color}{record.levelname}{self.COLORS['RESET']}"
         
-        return super().format(record)
+        return super().format(record) + _suppressed_suffix(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por registro; los campos de extra={"fields": {...}} van al nivel superior"""
+    
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "function": record.funcName,
+            "line": record.lineno,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', None) or {})
+        if getattr(record, 'suppressed', 0):
+            entry["suppressed"] = record.suppressed
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que encola el registro sin formatearlo. La cola es del
+    mismo proceso, así que no hace falta convertir args a texto antes: se
+    formatea en el hilo del QueueListener.
+    """
+    
+    def prepare(self, record):
+        return record
+
+
+def parse_sampling(spec: str) -> Dict[str, float]:
+    """Convierte "modulo=0.1,otro=0.5" en {"modulo": 0.1, "otro": 0.5}"""
+    rates = {}
+    for item in (spec or "").split(","):
+        name, _, rate = item.strip().partition("=")
+        if name and rate:
+            try:
+                rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+            except ValueError:
+                continue
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Deja pasar solo una fracción de los registros DEBUG/INFO de los módulos
+    configurados (se aplica al módulo y a sus submódulos).
+    """
+    
+    def __init__(self, rates: Dict[str, float], random_func: Callable[[], float] = random.random):
+        super().__init__()
+        self.rates = rates
+        self._random = random_func
+        self._rate_by_logger: Dict[str, float] = {}
+    
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self._rate_by_logger.get(record.name)
+        if rate is None:
+            rate = self._rate_by_logger[record.name] = self._rate_for(record.name)
+        return rate >= 1 or self._random() < rate
+    
+    def _rate_for(self, name: str) -> float:
+        # El prefijo más largo que coincida
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return 1.0
+
+
+class DuplicateFilter(logging.Filter):
+    """
+    Limita los registros repetidos de una misma línea de código: como mucho
+    burst por ventana de window segundos. El primero que pasa tras la
+    ventana lleva en record.suppressed cuántos se descartaron.
+    """
+    
+    def __init__(self, window: float, burst: int):
+        super().__init__()
+        self.window = window
+        self.burst = burst
+        self._seen: Dict[Tuple, List] = {}  # clave -> [inicio de ventana, registros, suprimidos]
+        self._lock = threading.Lock()
+    
+    def filter(self, record):
+        if self.burst <= 0 or record.levelno >= logging.CRITICAL:
+            return True
+        msg = record.msg if isinstance(record.msg, str) else type(record.msg).__name__
+        key = (record.name, record.lineno, record.levelno, msg)
+        now = record.created
+        with self._lock:
+            entry = self._seen.get(key)
+            if entry is None or now - entry[0] >= self.window:
+                if entry is not None and entry[2]:
+                    record.suppressed = entry[2]
+                if entry is None and len(self._seen) >= DUPLICATE_FILTER_MAX_KEYS:
+                    self._purge(now)
+                self._seen[key] = [now, 1, 0]
+                return True
+            entry[1] += 1
+            if entry[1] <= self.burst:
+                return True
+            entry[2] += 1
+            return False
+    
+    def _purge(self, now: float):
+        for key in [k for k, entry in self._seen.items() if now - entry[0] >= self.window]:
+            del self._seen[key]
+
+
+class FanOutHandler(logging.Handler):
+    """
+    Reparte cada registro entre varios handlers, como el QueueListener pero
+    en el hilo que registra. Sus filtros se aplican una vez por registro y
+    no una vez por destino.
+    """
+    
+    def __init__(self, handlers: list):
+        super().__init__()
+        self.handlers = handlers
+    
+    def emit(self, record):
+        for handler in self.handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
 
 
 class AppLogger:
@@ -43,9 +198,11 @@ class AppLogger:
         self.log_dir = Path("logs")
         self.log_dir.mkdir(exist_ok=True)
         self._configured_loggers: Dict[str, logging.Logger] = {}
+        self._pipelines: list = []  # (logger, QueueHandler, QueueListener, handlers)
         
         # Configurar logging raíz
         self._setup_root_logger()
+        self._setup_access_logger()
     
     def _setup_root_logger(self):
         """Configura el logger raíz de la aplicación"""
@@ -60,32 +217,79 @@ class AppLogger:
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(logging.INFO)
         
-        # Formatter para consola con colores
-        console_formatter = ColoredFormatter(
-            '%(asctime)s | %(levelname)-8s | %(name)s | %(message)s',
-            datefmt='%H:%M:%S'
-        )
+        # Formatter para consola con colores (o JSON)
+        if settings.LOG_CONSOLE_FORMAT.lower() == "json":
+            console_formatter = JsonFormatter()
+        else:
+            console_formatter = ColoredFormatter(
+                '%(asctime)s | %(levelname)-8s | %(name)s | %(message)s',
+                datefmt='%H:%M:%S'
+            )
         console_handler.setFormatter(console_formatter)
         
         # Handler para archivo
         file_handler = logging.handlers.RotatingFileHandler(
             self.log_dir / "app.log",
-            maxBytes=10 * 1024 * 1024,  # 10MB
-            backupCount=5,
+            maxBytes=settings.LOG_FILE_MAX_SIZE,
+            backupCount=settings.LOG_FILE_BACKUP_COUNT,
             encoding='utf-8'
         )
         file_handler.setLevel(getattr(logging, settings.LOG_LEVEL.upper()))
+        file_handler.setFormatter(JsonFormatter())
         
-        # Formatter para archivo (sin colores)
-        file_formatter = logging.Formatter(
-            '%(asctime)s | %(levelname)-8s | %(name)s | %(funcName)s:%(lineno)d | %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
+        # Muestreo y duplicados se descartan antes de encolar
+        self._start_pipeline(
+            root_logger,
+            [console_handler, file_handler],
+            filters=[
+                SamplingFilter(parse_sampling(settings.LOG_SAMPLING)),
+                DuplicateFilter(settings.LOG_DUPLICATE_WINDOW_SECONDS, settings.LOG_DUPLICATE_BURST)
+            ]
         )
-        file_handler.setFormatter(file_formatter)
+    
+    def _setup_access_logger(self):
+        """
+        Log de peticiones HTTP en logs/access.log (JSON por línea). El event
+        loop solo encola el registro; un hilo QueueListener escribe el archivo.
+        """
+        access_logger = logging.getLogger("http.requests")
+        access_logger.propagate = False
+        for handler in access_logger.handlers[:]:
+            access_logger.removeHandler(handler)
+        
+        file_handler = logging.handlers.RotatingFileHandler(
+            self.log_dir / "access.log",
+            maxBytes=settings.LOG_FILE_MAX_SIZE,
+            backupCount=settings.LOG_FILE_BACKUP_COUNT,
+            encoding='utf-8'
+        )
+        file_handler.setFormatter(JsonFormatter())
         
-        # Agregar handlers al logger raíz
-        root_logger.addHandler(console_handler)
-        root_logger.addHandler(file_handler)
+        self._start_pipeline(access_logger, [file_handler])
+    
+    def _start_pipeline(self, logger: logging.Logger, handlers: list, filters: Optional[list] = None):
+        log_queue = queue.SimpleQueue()
+        queue_handler = LazyQueueHandler(log_queue)
+        for log_filter in filters or []:
+            queue_handler.addFilter(log_filter)
+        listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        logger.addHandler(queue_handler)
+        self._pipelines.append((logger, queue_handler, listener, handlers))
+    
+    def shutdown(self):
+        """
+        Vacía las colas de logging y detiene sus hilos de escritura. Lo que
+        se registre después se escribe directamente.
+        """
+        for logger, queue_handler, listener, handlers in self._pipelines:
+            listener.stop()
+            logger.removeHandler(queue_handler)
+            direct_handler = FanOutHandler(handlers)
+            for log_filter in queue_handler.filters:
+                direct_handler.addFilter(log_filter)
+            logger.addHandler(direct_handler)
+        self._pipelines = []
     
     def get_logger(self, name: str) -> logging.Logger:
         """
@@ -109,7 +313,8 @@ class AppLogger:
         return logger
     
     def log_request(self, method: str, url: str, status_code: int, 
-                   duration: float, user_id: Optional[int] = None):
+                   duration: float, user_id: Optional[int] = None,
+                   bytes_sent: Optional[int] = None):
         """Registra una petición HTTP"""
         logger = self.get_logger("http.requests")
         
@@ -121,10 +326,22 @@ class AppLogger:
         else:
             level = logging.INFO
         
-        user_info = f" | User: {user_id}" if user_id else ""
-        message = f"{method} {url} | {status_code} | {duration:.3f}s{user_info}"
+        if not logger.isEnabledFor(level):
+            return
+        
+        fields = {
+            "method": method,
+            "route": url,
+            "status": status_code,
+            "duration_ms": round(duration * 1000, 2),
+        }
+        if bytes_sent is not None:
+            fields["bytes"] = bytes_sent
+        if user_id:
+            fields["user_id"] = user_id
         
-        logger.log(level, message)
+        # Formato diferido: el mensaje se compone al escribirlo
+        logger.log(level, "%s %s | %s | %.3fs", method, url, status_code, duration, extra={"fields": fields})
     
     def log_database_operation(self, operation: str, table: str, 
                               duration: float, affected_rows: int = 0):
@@ -0,0 +1,333 @@
+"""
+Métricas en formato Prometheus (texto 0.0.4) para GET /metrics.
+
+Pensado para dejarlo activo en producción:
+- los contadores e histogramas guardan sus valores en un trozo (lista) por
+  hilo: cada hilo solo escribe en el suyo, así que observe() no toma ningún
+  lock (el event loop y los hilos de ChromaDB/PDF/embeddings no compiten)
+- al hacer scrape se suman los trozos de todos los hilos
+- los gauges de estado (conexiones WebSocket, colas, cachés) se calculan al
+  hacer scrape con una función, sin tocar el camino caliente
+- cada proceso (worker de uvicorn) expone su propio registro; Prometheus
+  los agrega al raspar cada worker
+
+Uso:
+    SUPABASE_LATENCY = metrics.histogram("supabase_request_duration_seconds", "...", ["table", "method"])
+    SUPABASE_LATENCY.labels("documents", "GET").observe(0.012)
+    with metrics.histogram("chroma_query_duration_seconds", "...").time():
+        ...
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+import math
+import threading
+import time
+
+# Límites (segundos) por defecto: de 5 ms a 1 minuto
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+
+class _ThreadShards:
+    """
+    Un vector de valores por hilo. Solo el hilo dueño escribe en su vector;
+    el scrape los lee y suma (una lectura concurrente puede ver una
+    observación a medias, algo aceptable en métricas)
+    """
+
+    __slots__ = ("size", "_shards")
+
+    def __init__(self, size: int):
+        self.size = size
+        self._shards: Dict[int, List[float]] = {}
+
+    def local(self) -> List[float]:
+        ident = threading.get_ident()
+        shard = self._shards.get(ident)
+        if shard is None:
+            # La asignación en un dict es atómica con el GIL; un identificador
+            # reutilizado por otro hilo hereda el trozo (los valores son acumulados)
+            shard = self._shards[ident] = [0.0] * self.size
+        return shard
+
+    def total(self) -> List[float]:
+        total = [0.0] * self.size
+        for shard in list(self._shards.values()):
+            for i, value in enumerate(shard):
+                total[i] += value
+        return total
+
+
+class _CounterChild:
+    __slots__ = ("_shards",)
+
+    def __init__(self):
+        self._shards = _ThreadShards(1)
+
+    def inc(self, amount: float = 1.0):
+        self._shards.local()[0] += amount
+
+    def value(self) -> float:
+        return self._shards.total()[0]
+
+
+class _HistogramChild:
+    __slots__ = ("_buckets", "_shards")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._buckets = buckets
+        # Un hueco por límite + el de +Inf, luego suma y número de observaciones
+        self._shards = _ThreadShards(len(buckets) + 3)
+
+    def observe(self, value: float):
+        shard = self._shards.local()
+        shard[bisect_left(self._buckets, value)] += 1
+        shard[-2] += value
+        shard[-1] += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observa lo que tarda el bloque (también si lanza una excepción)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def snapshot(self) -> Tuple[List[float], float, float]:
+        """(cuentas acumuladas por límite incluido +Inf, suma, número)"""
+        total = self._shards.total()
+        cumulative, running = [], 0.0
+        for count in total[:-2]:
+            running += count
+            cumulative.append(running)
+        return cumulative, total[-2], total[-1]
+
+
+class _GaugeChild:
+    __slots__ = ("_value", "_function")
+
+    def __init__(self):
+        self._value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float):
+        self._value = float(value)
+
+    def inc(self, amount: float = 1.0):
+        # Los gauges se escriben poco; el incremento no es atómico entre hilos
+        self._value += amount
+
+    def dec(self, amount: float = 1.0):
+        self._value -= amount
+
+    def set_function(self, function: Callable[[], float]):
+        """Calcula el valor en cada scrape en lugar de guardarlo"""
+        self._function = function
+
+    def value(self) -> float:
+        if self._function is not None:
+            return float(self._function())
+        return self._value
+
+
+class _Metric:
+    """Familia de métricas con las mismas etiquetas"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """Hijo para los valores de etiqueta dados (se crea una vez y se reutiliza)"""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} espera las etiquetas {self.labelnames}")
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._children[key] = self._new_child()
+        return child
+
+    def _default(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} tiene etiquetas: usa .labels(...)")
+        return self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self) -> Iterator[Tuple[str, Tuple[Tuple[str, str], ...], float]]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {_escape_help(self.documentation)}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for suffix, labels, value in self._samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+    def _labelled_children(self):
+        for key, child in list(self._children.items()):
+            yield tuple(zip(self.labelnames, key)), child
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+    def _samples(self):
+        for labels, child in self._labelled_children():
+            yield "_total", labels, child.value()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets if b != math.inf))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+    def _samples(self):
+        bounds = [_format_value(b) for b in self.buckets] + ["+Inf"]
+        for labels, child in self._labelled_children():
+            cumulative, total, count = child.snapshot()
+            for bound, value in zip(bounds, cumulative):
+                yield "_bucket", labels + (("le", bound),), value
+            yield "_sum", labels, total
+            yield "_count", labels, count
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._default().set(value)
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._default().dec(amount)
+
+    def set_function(self, function: Callable[[], float]):
+        self._default().set_function(function)
+
+    def _samples(self):
+        for labels, child in self._labelled_children():
+            try:
+                value = child.value()
+            except Exception:
+                # Un gauge que falla no debe romper el scrape completo
+                continue
+            yield "", labels, value
+
+
+class MetricsRegistry:
+    """
+    Registro de métricas del proceso. counter/histogram/gauge devuelven la
+    métrica existente si ya se registró con ese nombre (los módulos pueden
+    declararlas a nivel de módulo sin preocuparse del orden de importación)
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Exposición en formato de texto de Prometheus"""
+        lines: List[str] = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self._lock:
+            self._metrics.clear()
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+                if not metric.labelnames:
+                    # Sin etiquetas se expone a cero desde el primer scrape
+                    metric.labels()
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"La métrica {name} ya está registrada con otro tipo o etiquetas")
+            return metric
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if value != value:
+        return "NaN"
+    if float(value).is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+# Instancia global
+metrics = MetricsRegistry()
+
+# Tipo de contenido de /metrics (Starlette añade el charset)
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4"
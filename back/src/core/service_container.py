@@ -0,0 +1,129 @@
+"""
+Contenedor de servicios con construcción perezosa.
+
+Los servicios se registran con una fábrica (una clase, un callable o una ruta
+"modulo:atributo" que ni siquiera se importa hasta el primer uso) y se
+construyen la primera vez que alguien los pide. Así importar la aplicación no
+conecta con Supabase ni carga conectores que el worker quizá no use nunca, y
+report() indica qué se ha construido y cuánto costó.
+"""
+from importlib import import_module
+from typing import Any, Callable, Dict, Optional, Union
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+Factory = Union[str, Callable[[], Any]]
+
+
+def _resolve(factory: Factory) -> Callable[[], Any]:
+    if not isinstance(factory, str):
+        return factory
+    module_name, _, attribute = factory.partition(":")
+    return getattr(import_module(module_name), attribute)
+
+
+class LazyService:
+    """
+    Referencia a un servicio del contenedor que lo construye en el primer
+    acceso a un atributo (para variables de módulo que antes eran instancias)
+    """
+
+    __slots__ = ("_container", "_name")
+
+    def __init__(self, container: "ServiceContainer", name: str):
+        object.__setattr__(self, "_container", container)
+        object.__setattr__(self, "_name", name)
+
+    def __getattr__(self, attribute):
+        return getattr(self._container.get(self._name), attribute)
+
+    def __setattr__(self, attribute, value):
+        setattr(self._container.get(self._name), attribute, value)
+
+    def __repr__(self):
+        built = "construido" if self._container.is_built(self._name) else "sin construir"
+        return f"<LazyService {self._name} ({built})>"
+
+
+class ServiceContainer:
+    """Registro de servicios por nombre, construidos una sola vez y bajo demanda"""
+
+    def __init__(self):
+        self._factories: Dict[str, Factory] = {}
+        self._instances: Dict[str, Any] = {}
+        self._build_seconds: Dict[str, float] = {}
+        # RLock: la fábrica de un servicio puede pedir otros servicios
+        self._lock = threading.RLock()
+
+    def register(self, name: str, factory: Factory):
+        """Registra la fábrica de un servicio (idempotente si es la misma)"""
+        with self._lock:
+            current = self._factories.get(name)
+            if current is not None and current != factory:
+                raise ValueError(f"El servicio {name} ya está registrado con otra fábrica")
+            self._factories[name] = factory
+
+    def get(self, name: str) -> Any:
+        """Devuelve el servicio, construyéndolo si es el primer uso"""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            instance = self._instances.get(name)
+            if instance is not None:
+                return instance
+            if name not in self._factories:
+                raise KeyError(f"Servicio no registrado: {name}")
+            started = time.perf_counter()
+            instance = _resolve(self._factories[name])()
+            elapsed = time.perf_counter() - started
+            self._instances[name] = instance
+            self._build_seconds[name] = elapsed
+        logger.debug("🧩 Servicio %s construido en %.1f ms", name, elapsed * 1000)
+        return instance
+
+    def lazy(self, name: str) -> LazyService:
+        """Referencia perezosa al servicio (no lo construye)"""
+        return LazyService(self, name)
+
+    def provider(self, name: str) -> Callable[[], Any]:
+        """Función sin argumentos que devuelve el servicio (para Depends)"""
+        def provide():
+            return self.get(name)
+        provide.__name__ = f"get_{name}"
+        return provide
+
+    def is_built(self, name: str) -> bool:
+        return name in self._instances
+
+    def override(self, name: str, instance: Any):
+        """Sustituye la instancia de un servicio (útil para testing)"""
+        with self._lock:
+            self._instances[name] = instance
+            self._build_seconds[name] = 0.0
+
+    def reset(self, name: Optional[str] = None):
+        """Descarta instancias para que se reconstruyan en el siguiente uso"""
+        with self._lock:
+            names = [name] if name else list(self._instances)
+            for service in names:
+                self._instances.pop(service, None)
+                self._build_seconds.pop(service, None)
+
+    def report(self) -> Dict[str, Any]:
+        """Servicios registrados y construidos, con su tiempo de construcción"""
+        with self._lock:
+            return {
+                "registered": sorted(self._factories),
+                "built": {
+                    name: round(seconds * 1000, 1)
+                    for name, seconds in sorted(self._build_seconds.items(), key=lambda item: -item[1])
+                },
+            }
+
+
+# Instancia global
+services = ServiceContainer()
@@ -0,0 +1,110 @@
+"""
+Informe del arranque del worker: cuánto tardan los imports de la aplicación,
+cada fase del evento de startup y cuánta memoria ocupa el proceso al quedar
+listo. main.py importa este módulo antes que nada para medir desde ahí.
+
+Las tareas que necesitan Supabase o ChromaDB (vocabulario ortográfico,
+versión de la colección) no forman parte del arranque: corren en segundo
+plano después y se registran aparte como fases diferidas.
+"""
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Módulos pesados que deberían cargarse solo al usarlos
+HEAVY_MODULES = (
+    "google.generativeai", "chromadb", "sentence_transformers", "torch",
+    "pandas", "pdfplumber", "PyPDF2", "sentry_sdk",
+)
+
+
+def current_rss_mb() -> Optional[float]:
+    """Memoria residente actual del proceso (None si no se puede leer)"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is not None:
+        # Pico en vez de actual; en macOS ru_maxrss viene en bytes
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    return None
+
+
+class StartupReport:
+    """Tiempos del arranque, medidos desde la importación de este módulo"""
+
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self._started = clock()
+        self.imports_seconds: Optional[float] = None
+        self.ready_seconds: Optional[float] = None
+        self.rss_mb: Optional[float] = None
+        self.phases: List[Tuple[str, float]] = []
+        self.deferred: List[Tuple[str, float]] = []
+
+    def imports_done(self):
+        """Marca el final de los imports de la aplicación"""
+        self.imports_seconds = self._clock() - self._started
+
+    @contextmanager
+    def phase(self, name: str):
+        """Mide una fase del arranque"""
+        started = self._clock()
+        try:
+            yield
+        finally:
+            self.phases.append((name, self._clock() - started))
+
+    @contextmanager
+    def deferred_phase(self, name: str):
+        """Mide una tarea de arranque que corre en segundo plano tras el startup"""
+        started = self._clock()
+        try:
+            yield
+        finally:
+            self.deferred.append((name, self._clock() - started))
+
+    def finish(self) -> Dict[str, Any]:
+        """Cierra el informe al terminar el startup y lo registra en el log"""
+        self.ready_seconds = self._clock() - self._started
+        self.rss_mb = current_rss_mb()
+        report = self.to_dict()
+        slowest = ", ".join(f"{name} {ms:.0f} ms" for name, ms in list(report["phases_ms"].items())[:3])
+        logger.info(
+            "🚀 Worker listo en %.2f s (imports %.2f s, startup %.2f s, RSS %s MB). Fases más lentas: %s",
+            self.ready_seconds, self.imports_seconds or 0.0,
+            self.ready_seconds - (self.imports_seconds or 0.0),
+            f"{self.rss_mb:.0f}" if self.rss_mb is not None else "?",
+            slowest or "-"
+        )
+        return report
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "imports_seconds": round(self.imports_seconds, 3) if self.imports_seconds is not None else None,
+            "ready_seconds": round(self.ready_seconds, 3) if self.ready_seconds is not None else None,
+            "rss_mb": round(self.rss_mb, 1) if self.rss_mb is not None else None,
+            "phases_ms": {
+                name: round(seconds * 1000, 1)
+                for name, seconds in sorted(self.phases, key=lambda phase: -phase[1])
+            },
+            "deferred_ms": {name: round(seconds * 1000, 1) for name, seconds in self.deferred},
+            "heavy_modules_loaded": [module for module in HEAVY_MODULES if module in sys.modules],
+        }
+
+
+# Instancia global
+startup_report = StartupReport()
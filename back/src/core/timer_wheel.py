@@ -0,0 +1,75 @@
+"""
+Rueda de temporizadores (hashed timing wheel).
+
+Permite programar miles de vencimientos con un único temporizador: cada
+clave se guarda en la ranura correspondiente a su vencimiento y en cada
+tick solo se revisa una ranura. Programar y cancelar son O(1).
+"""
+import math
+from typing import Dict, Hashable, List
+
+
+class TimerWheel:
+    """Rueda de temporizadores con resolución de `tick_seconds`"""
+
+    def __init__(self, tick_seconds: float = 1.0, slots: int = 512):
+        if tick_seconds <= 0:
+            raise ValueError("tick_seconds debe ser mayor que 0")
+        if slots < 1:
+            raise ValueError("slots debe ser al menos 1")
+
+        self.tick_seconds = tick_seconds
+        self._slots: List[Dict[Hashable, int]] = [dict() for _ in range(slots)]
+        # Ranura en la que está cada clave (para cancelar en O(1))
+        self._positions: Dict[Hashable, int] = {}
+        self._cursor = 0
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._positions
+
+    def schedule(self, key: Hashable, delay_seconds: float) -> None:
+        """
+        Programa (o reprograma) una clave para que venza tras `delay_seconds`.
+        """
+        self.cancel(key)
+
+        ticks = max(1, math.ceil(delay_seconds / self.tick_seconds))
+        slot_count = len(self._slots)
+        slot = (self._cursor + ticks) % slot_count
+        # Vueltas completas que la clave debe esperar en su ranura
+        rounds = (ticks - 1) // slot_count
+
+        self._slots[slot][key] = rounds
+        self._positions[key] = slot
+
+    def cancel(self, key: Hashable) -> bool:
+        """Cancela una clave programada. Devuelve True si existía."""
+        slot = self._positions.pop(key, None)
+        if slot is None:
+            return False
+        self._slots[slot].pop(key, None)
+        return True
+
+    def tick(self) -> List[Hashable]:
+        """
+        Avanza una ranura y devuelve las claves vencidas.
+
+        Las claves devueltas dejan de estar programadas.
+        """
+        self._cursor = (self._cursor + 1) % len(self._slots)
+        bucket = self._slots[self._cursor]
+        if not bucket:
+            return []
+
+        expired = []
+        for key, rounds in list(bucket.items()):
+            if rounds <= 0:
+                expired.append(key)
+                del bucket[key]
+                del self._positions[key]
+            else:
+                bucket[key] = rounds - 1
+        return expired
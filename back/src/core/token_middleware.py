@@ -1,49 +1,37 @@
 """
-Middleware para el manejo automático de tokens expirados
+Utilidades para el manejo de tokens expirados
 """
-from fastapi import Request, status
+from fastapi import status
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
 from src.core.exceptions import UnauthorizedException
-from jose import JWTError, jwt
+from jose import jwt
 from datetime import datetime
 import logging
-import json
 
 logger = logging.getLogger(__name__)
 
-class TokenMiddleware(BaseHTTPMiddleware):
+def is_token_expired_error(error: Exception) -> bool:
     """
-    Middleware que intercepta errores de token expirado y sugiere usar refresh token
+    Indica si la excepción es de token expirado (la mapea a TOKEN_EXPIRED
+    el middleware de peticiones, RequestLoggingMiddleware)
     """
-    
-    async def dispatch(self, request: Request, call_next):
-        """
-        Procesa la petición y maneja errores relacionados con tokens
-        """
-        try:
-            response = await call_next(request)
-            return response
-        except Exception as e:
-            # Si es un error de token expirado, devolver respuesta específica
-            if isinstance(e, UnauthorizedException):
-                error_detail = str(e.message).lower()
-                if "expired" in error_detail or "expirado" in error_detail:
-                    return JSONResponse(
-                        status_code=status.HTTP_401_UNAUTHORIZED,
-                        content={
-                            "detail": "Token expirado",
-                            "error_code": "TOKEN_EXPIRED",
-                            "message": "Tu sesión ha expirado. Por favor, usa tu refresh token para obtener uno nuevo.",
-                            "refresh_endpoint": "/api/users/refresh-token"
-                        },
-                        headers={"WWW-Authenticate": "Bearer"}
-                    )
-            
-            # Para otros errores, re-lanzar
-            logger.error(f"Error no manejado en TokenMiddleware: {str(e)}")
-            raise e
+    if not isinstance(error, UnauthorizedException):
+        return False
+    error_detail = str(error.message).lower()
+    return "expired" in error_detail or "expirado" in error_detail
+
+def token_expired_response() -> JSONResponse:
+    """Respuesta 401 que sugiere usar el refresh token"""
+    return JSONResponse(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        content={
+            "detail": "Token expirado",
+            "error_code": "TOKEN_EXPIRED",
+            "message": "Tu sesión ha expirado. Por favor, usa tu refresh token para obtener uno nuevo.",
+            "refresh_endpoint": "/api/users/refresh-token"
+        },
+        headers={"WWW-Authenticate": "Bearer"}
+    )
 
 def check_token_expiry_soon(token: str, secret_key: str, algorithm: str = "HS256", minutes_before: int = 5) -> bool:
     """
@@ -0,0 +1,454 @@
+"""
+Trazas de extremo a extremo de las etapas del chat/RAG.
+
+Una traza empieza en el punto de entrada (WebSocket, ChatService.create_message,
+DocumentService.get_rag_response...) y cada etapa abre un span hijo:
+Supabase por tabla, consulta a ChromaDB, embeddings, generación de Gemini.
+El span activo viaja en un ContextVar, así que se propaga por las llamadas,
+por las tareas de asyncio y por asyncio.to_thread sin pasarlo a mano.
+
+Muestreo por cola (tail-based): los spans de una traza se acumulan en memoria
+y la decisión se toma al cerrar el span raíz. Se exportan siempre las trazas
+más lentas que TRACING_SLOW_MS o con errores, y el resto con probabilidad
+TRACING_SAMPLE_RATE. La exportación (fichero JSON o OTLP/HTTP) se hace en un
+hilo aparte, nunca desde el event loop.
+
+Uso:
+    with tracer.span("chat.create_message", chat_id=chat_id) as span:
+        ...                                  # raíz si no hay traza activa
+    with tracer.child_span("chroma.query"):  # no-op fuera de una traza
+        ...
+    span = tracer.start_child("gemini.stream")  # sin activarlo (generadores)
+    ...
+    span.end()
+
+    @traced("rag.get_rag_response")          # la función completa como span
+    def get_rag_response(...):
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import secrets
+import threading
+import time
+
+from src.config.settings import settings
+from src.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+TRACES = metrics.counter("traces", "Trazas terminadas según la decisión de muestreo", ["decision"])
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """Una etapa con inicio, fin, atributos y error opcional"""
+
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    @property
+    def trace_id(self) -> str:
+        return self.trace.trace_id
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def record_exception(self, error: BaseException):
+        self.error = f"{type(error).__name__}: {error}"
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """Sustituto de Span fuera de una traza: acepta las mismas llamadas"""
+
+    trace_id = None
+    span_id = None
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def record_exception(self, error: BaseException):
+        pass
+
+    def end(self):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """Spans de una petición, retenidos hasta la decisión de muestreo"""
+
+    __slots__ = ("trace_id", "spans", "dropped_spans", "max_spans", "_lock")
+
+    def __init__(self, max_spans: int):
+        self.trace_id = secrets.token_hex(16)
+        self.spans: List[Span] = []
+        self.dropped_spans = 0
+        self.max_spans = max_spans
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> bool:
+        with self._lock:
+            if len(self.spans) >= self.max_spans:
+                self.dropped_spans += 1
+                return False
+            self.spans.append(span)
+            return True
+
+    @property
+    def has_error(self) -> bool:
+        return any(span.error for span in self.spans)
+
+    def stage_timings(self) -> Dict[str, float]:
+        """Milisegundos por etapa (spans hijos sumados por nombre)"""
+        timings: Dict[str, float] = {}
+        for span in list(self.spans)[1:]:
+            timings[span.name] = round(timings.get(span.name, 0.0) + span.duration_ms, 2)
+        return timings
+
+
+class Tracer:
+    """Crea spans, aplica el muestreo por cola y entrega las trazas al exportador"""
+
+    def __init__(
+        self,
+        service_name: str,
+        exporter: Optional["SpanExporter"] = None,
+        slow_ms: float = 2000.0,
+        sample_rate: float = 0.0,
+        max_spans: int = 500,
+        random_func: Callable[[], float] = random.random
+    ):
+        self.service_name = service_name
+        self.exporter = exporter
+        self.slow_ms = slow_ms
+        self.sample_rate = sample_rate
+        self.max_spans = max_spans
+        self._random = random_func
+
+    @staticmethod
+    def current_span() -> Optional[Span]:
+        return _current_span.get()
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span]:
+        """Span activo; abre una traza nueva si no hay ninguna en curso"""
+        parent = _current_span.get()
+        if parent is None:
+            span = Span(Trace(self.max_spans), name, None, attributes)
+            span.trace.add(span)
+        else:
+            span = self._new_child(parent, name, attributes)
+        with self._activate(span):
+            yield span
+
+    @contextmanager
+    def child_span(self, name: str, **attributes) -> Iterator[Any]:
+        """Span activo solo si hay una traza en curso (si no, NOOP_SPAN)"""
+        parent = _current_span.get()
+        if parent is None:
+            yield NOOP_SPAN
+            return
+        with self._activate(self._new_child(parent, name, attributes)) as span:
+            yield span
+
+    def start_child(self, name: str, **attributes):
+        """
+        Span hijo que no se activa en el contexto: para etapas que cruzan un
+        yield (generadores de streaming) o callbacks (hooks de httpx).
+        Hay que cerrarlo con end()
+        """
+        parent = _current_span.get()
+        if parent is None:
+            return NOOP_SPAN
+        return self._new_child(parent, name, attributes)
+
+    def _new_child(self, parent: Span, name: str, attributes: Dict[str, Any]) -> Span:
+        span = Span(parent.trace, name, parent.span_id, attributes)
+        parent.trace.add(span)
+        return span
+
+    @contextmanager
+    def _activate(self, span: Span) -> Iterator[Span]:
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            if not isinstance(e, GeneratorExit):
+                span.record_exception(e)
+            raise
+        finally:
+            span.end()
+            _current_span.reset(token)
+            if span.parent_id is None:
+                self._finish(span)
+
+    def _finish(self, root: Span):
+        trace = root.trace
+        for span in trace.spans:
+            if span.end_ns is None:
+                # Etapa sin cerrar (p. ej. petición sin respuesta): se cierra con la raíz
+                span.attributes["incomplete"] = True
+                span.end_ns = root.end_ns
+        decision = self._decide(root)
+        TRACES.labels(decision).inc()
+        if decision != "dropped" and self.exporter is not None:
+            self.exporter.export(self.service_name, trace)
+
+    def _decide(self, root: Span) -> str:
+        if root.trace.has_error:
+            return "error"
+        if root.duration_ms >= self.slow_ms:
+            return "slow"
+        if self.sample_rate > 0 and self._random() < self.sample_rate:
+            return "sampled"
+        return "dropped"
+
+    def shutdown(self, timeout: float = 5.0):
+        if self.exporter is not None:
+            self.exporter.shutdown(timeout)
+
+
+def traced(name: str):
+    """Decorador: ejecuta la función (síncrona o async) dentro de tracer.span(name)"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with tracer.span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ==================== EXPORTADORES ====================
+
+class SpanExporter:
+    """
+    Exportador en segundo plano: export() solo encola la traza; un hilo las
+    agrupa en lotes y llama a _write()
+    """
+
+    def __init__(self, batch_size: int = 64, max_queue: int = 10_000):
+        self.batch_size = batch_size
+        self.max_queue = max_queue
+        self.exported = 0
+        self.dropped = 0
+        self.errors = 0
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+
+    def export(self, service_name: str, trace: Trace):
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait((service_name, trace))
+        except queue.Full:
+            self.dropped += 1
+
+    def shutdown(self, timeout: float = 5.0):
+        with self._thread_lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            with self._thread_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            stop = item is None
+            batch = [] if stop else [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            if batch:
+                try:
+                    self._write(batch)
+                    self.exported += len(batch)
+                except Exception as e:
+                    self.errors += 1
+                    logger.warning("⚠️ No se pudieron exportar %d trazas: %s", len(batch), e)
+            if stop:
+                return
+
+    def _write(self, batch: List[tuple]):
+        raise NotImplementedError
+
+
+class JsonFileExporter(SpanExporter):
+    """Una línea JSON por traza (con todos sus spans) en un fichero local"""
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+
+    def _write(self, batch: List[tuple]):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for service_name, trace in batch:
+                root = trace.spans[0]
+                f.write(json.dumps({
+                    "service": service_name,
+                    "trace_id": trace.trace_id,
+                    "name": root.name,
+                    "duration_ms": round(root.duration_ms, 3),
+                    "error": trace.has_error,
+                    "dropped_spans": trace.dropped_spans,
+                    "spans": [span.to_dict() for span in trace.spans],
+                }, ensure_ascii=False, default=str) + "\n")
+
+
+class OTLPHttpExporter(SpanExporter):
+    """
+    Envía las trazas a un colector OpenTelemetry por OTLP/HTTP con
+    codificación JSON (POST {endpoint}/v1/traces)
+    """
+
+    def __init__(self, endpoint: str, headers: Optional[Dict[str, str]] = None,
+                 timeout: float = 10.0, client=None, **kwargs):
+        super().__init__(**kwargs)
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+        self.timeout = timeout
+        self._client = client
+
+    def _write(self, batch: List[tuple]):
+        if self._client is None:
+            import httpx
+            self._client = httpx.Client(timeout=self.timeout)
+        response = self._client.post(self.url, content=json.dumps(otlp_payload(batch)), headers=self.headers)
+        response.raise_for_status()
+
+
+def otlp_payload(batch: List[tuple]) -> Dict[str, Any]:
+    """Cuerpo ExportTraceServiceRequest en JSON, agrupado por servicio"""
+    by_service: Dict[str, List[Dict[str, Any]]] = {}
+    for service_name, trace in batch:
+        by_service.setdefault(service_name, []).extend(_otlp_span(span) for span in trace.spans)
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": [_otlp_attribute("service.name", service_name)]},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+            }
+            for service_name, spans in by_service.items()
+        ]
+    }
+
+
+def _otlp_span(span: Span) -> Dict[str, Any]:
+    otlp = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 1,  # SPAN_KIND_INTERNAL
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns or span.start_ns),
+        "attributes": [_otlp_attribute(key, value) for key, value in span.attributes.items()],
+        "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+    }
+    if span.parent_id:
+        otlp["parentSpanId"] = span.parent_id
+    return otlp
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+def _parse_headers(raw: str) -> Dict[str, str]:
+    """'clave=valor,otra=valor' (formato de OTEL_EXPORTER_OTLP_HEADERS)"""
+    headers = {}
+    for item in raw.split(","):
+        if "=" in item:
+            key, value = item.split("=", 1)
+            headers[key.strip()] = value.strip()
+    return headers
+
+
+def _create_exporter() -> Optional[SpanExporter]:
+    if settings.TRACING_EXPORTER == "otlp":
+        return OTLPHttpExporter(settings.TRACING_OTLP_ENDPOINT, _parse_headers(settings.TRACING_OTLP_HEADERS))
+    if settings.TRACING_EXPORTER == "json":
+        return JsonFileExporter(settings.TRACING_JSON_PATH)
+    return None
+
+
+# Instancia global
+tracer = Tracer(
+    service_name=settings.TRACING_SERVICE_NAME,
+    exporter=_create_exporter(),
+    slow_ms=settings.TRACING_SLOW_MS,
+    sample_rate=settings.TRACING_SAMPLE_RATE,
+    max_spans=settings.TRACING_MAX_SPANS
+)
@@ -4,23 +4,67 @@ ACTUALIZAR el WebSocketManager existente para usar los nuevos servicios
 import asyncio
 import json
 import logging
-from typing import Dict, List, Optional, Set
+import random
+import signal
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
 from datetime import datetime, timedelta
 from fastapi import WebSocket, WebSocketDisconnect
 from src.services.chat import ChatWebSocketService, ChatStreamingService
+from src.services.chat.stream_coalescer import StreamCoalescer
+from src.services.chat.message_persistence_queue import message_persistence_queue
 from src.api.helpers import ChatWebSocketHelpers
+from src.api.helpers.chat_websocket_helpers import get_supported_encodings, negotiate_encoding
 from src.models.schemas.chat_websocket import MessageType, StreamStatus
+from src.core.timer_wheel import TimerWheel
+from src.core.tracing import Span, tracer
+from src.config.settings import get_settings
+
+settings = get_settings()
 
 logger = logging.getLogger(__name__)
 
+# Códigos de cierre WebSocket (RFC 6455 / registro IANA)
+WS_CLOSE_GOING_AWAY = 1001
+WS_CLOSE_POLICY_VIOLATION = 1008
+WS_CLOSE_SERVICE_RESTART = 1012
+WS_CLOSE_TRY_AGAIN_LATER = 1013
+
+# Tiempo máximo para enviar un frame de control antes de dar la conexión por muerta
+WS_SEND_TIMEOUT = 5.0
+
+
+@dataclass(slots=True)
+class ConnectionState:
+    """Estado de una conexión (slots para minimizar memoria por conexión)"""
+    websocket: WebSocket
+    chat_id: int
+    user_id: int
+    connected_at: float
+    last_activity: float
+    streaming: bool = False
+
+
 class WebSocketManager:
     def __init__(self):
         # Diccionario de conexiones activas: {chat_id: {user_id: websocket}}
         self._connections: Dict[int, Dict[int, WebSocket]] = {}
+        # Estado por conexión: {(chat_id, user_id): ConnectionState}
+        self._states: Dict[Tuple[int, int], ConnectionState] = {}
+        # Conexiones por usuario: {user_id: {(chat_id, user_id)}}
+        self._user_connections: Dict[int, Set[Tuple[int, int]]] = {}
+        # Un único temporizador para los heartbeats de todas las conexiones
+        self._heartbeat_wheel = TimerWheel(tick_seconds=1.0, slots=max(8, settings.WEBSOCKET_HEARTBEAT_INTERVAL * 2))
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._draining = False
         # Servicios
         self.chat_service = ChatWebSocketService()
         self.streaming_service = ChatStreamingService()
         self.helpers = ChatWebSocketHelpers()
+        # Tareas en segundo plano (notificaciones de mensajes guardados)
+        self._background_tasks: Set[asyncio.Task] = set()
         # Métricas
         self.total_connections = 0
         self.messages_sent = 0
@@ -28,11 +72,48 @@ class WebSocketManager:
         # Rate limiting: {user_id: [timestamps]}
         self._user_message_timestamps: Dict[int, List[datetime]] = {}
         self.rate_limit_per_minute = 20
+        # Métricas de streaming (acumuladas sobre todas las respuestas)
+        self.stream_stats = {
+            "streams": 0,
+            "fragments": 0,
+            "frames": 0,
+            "bytes_sent": 0,
+            "cpu_seconds": 0.0,
+            "stream_seconds": 0.0
+        }
         
-    async def connect(self, websocket: WebSocket, chat_id: int, user_id: int):
-        """Acepta nueva conexión WebSocket"""
+    async def connect(
+        self,
+        websocket: WebSocket,
+        chat_id: int,
+        user_id: int,
+        encoding: Optional[str] = None
+    ):
+        """
+        Acepta nueva conexión WebSocket
+
+        Args:
+            encoding: Codificación de frames solicitada por el cliente
+                (``json`` o ``msgpack``). La elegida se confirma en el
+                mensaje de bienvenida.
+        """
         await websocket.accept()
         
+        # Durante el apagado se pide al cliente que reconecte a otra instancia
+        if self._draining:
+            await websocket.close(code=WS_CLOSE_SERVICE_RESTART, reason="Servidor reiniciando")
+            return False
+            
+        # Límite global de conexiones por worker
+        if self.active_connections >= settings.WEBSOCKET_MAX_CONNECTIONS:
+            await self.helpers.send_error(
+                websocket,
+                "Servidor sin capacidad, inténtalo más tarde",
+                "SERVER_AT_CAPACITY"
+            )
+            await websocket.close(code=WS_CLOSE_TRY_AGAIN_LATER)
+            return False
+        
         # Verificar acceso al chat
         if not self.chat_service.verify_chat_access(chat_id, user_id):
             await self.helpers.send_error(
@@ -43,14 +124,29 @@ class WebSocketManager:
             await websocket.close()
             return False
             
+        # Una conexión previa al mismo chat queda reemplazada por la nueva
+        previous = self._states.get((chat_id, user_id))
+        if previous is not None:
+            await self._evict(previous, WS_CLOSE_POLICY_VIOLATION, "Conexión reemplazada")
+            
+        # Límite de conexiones por usuario: se expulsa la menos activa
+        user_keys = self._user_connections.get(user_id, set())
+        if len(user_keys) >= settings.WEBSOCKET_MAX_CONNECTIONS_PER_USER:
+            oldest = min((self._states[key] for key in user_keys), key=lambda s: s.last_activity)
+            await self._evict(oldest, WS_CLOSE_POLICY_VIOLATION, "Demasiadas conexiones del usuario")
+            
         # Registrar conexión
         if chat_id not in self._connections:
             self._connections[chat_id] = {}
         self._connections[chat_id][user_id] = websocket
+        self._register_state(websocket, chat_id, user_id)
         self.total_connections += 1
         
-        # Enviar mensaje de bienvenida
-        await self.helpers.send_welcome_message(websocket, chat_id, user_id)
+        # Negociar codificación y enviar mensaje de bienvenida
+        websocket.state.encoding = negotiate_encoding(encoding)
+        await self.helpers.send_welcome_message(
+            websocket, chat_id, user_id, self._build_protocol_info(websocket)
+        )
         
         # Registrar evento
         self.chat_service.handle_connection_event(
@@ -60,13 +156,39 @@ class WebSocketManager:
         
         logger.info(f"Usuario {user_id} conectado a chat {chat_id}")
         return True
+
+    def _build_protocol_info(self, websocket: WebSocket) -> dict:
+        """Parámetros del protocolo negociado para esta conexión"""
+        extensions = websocket.headers.get("sec-websocket-extensions", "")
+        compression = None
+        if settings.WEBSOCKET_PER_MESSAGE_DEFLATE and "permessage-deflate" in extensions:
+            compression = "permessage-deflate"
+
+        return {
+            "encoding": websocket.state.encoding,
+            "supported_encodings": get_supported_encodings(),
+            "compression": compression,
+            "stream_flush_bytes": settings.WEBSOCKET_STREAM_FLUSH_BYTES,
+            "stream_flush_interval_ms": settings.WEBSOCKET_STREAM_FLUSH_INTERVAL_MS,
+            "heartbeat_interval": settings.WEBSOCKET_HEARTBEAT_INTERVAL,
+            "idle_timeout": settings.WEBSOCKET_IDLE_TIMEOUT
+        }
         
-    async def disconnect(self, chat_id: int, user_id: int):
-        """Desconecta usuario del chat"""
-        if chat_id in self._connections and user_id in self._connections[chat_id]:
-            del self._connections[chat_id][user_id]
-            if not self._connections[chat_id]:
-                del self._connections[chat_id]
+    async def disconnect(self, chat_id: int, user_id: int, websocket: Optional[WebSocket] = None):
+        """
+        Desconecta usuario del chat
+
+        Si se indica `websocket`, solo se elimina la conexión si sigue siendo
+        la registrada (una reconexión posterior no se ve afectada).
+        """
+        current = self._connections.get(chat_id, {}).get(user_id)
+        if current is None or (websocket is not None and current is not websocket):
+            return
+            
+        del self._connections[chat_id][user_id]
+        if not self._connections[chat_id]:
+            del self._connections[chat_id]
+        self._unregister_state(chat_id, user_id)
                 
         # Registrar evento
         self.chat_service.handle_connection_event(
@@ -75,6 +197,186 @@ class WebSocketManager:
         )
         
         logger.info(f"Usuario {user_id} desconectado de chat {chat_id}")
+
+    # ==================== CICLO DE VIDA ====================
+
+    @property
+    def active_connections(self) -> int:
+        return len(self._states)
+
+    def _register_state(self, websocket: WebSocket, chat_id: int, user_id: int) -> None:
+        """Crea el estado de la conexión y programa su primer heartbeat"""
+        now = time.monotonic()
+        key = (chat_id, user_id)
+        self._states[key] = ConnectionState(websocket, chat_id, user_id, now, now)
+        self._user_connections.setdefault(user_id, set()).add(key)
+        self._heartbeat_wheel.schedule(key, settings.WEBSOCKET_HEARTBEAT_INTERVAL)
+
+    def _unregister_state(self, chat_id: int, user_id: int) -> None:
+        key = (chat_id, user_id)
+        self._states.pop(key, None)
+        self._heartbeat_wheel.cancel(key)
+        user_keys = self._user_connections.get(user_id)
+        if user_keys is not None:
+            user_keys.discard(key)
+            if not user_keys:
+                del self._user_connections[user_id]
+
+    def touch(self, chat_id: int, user_id: int) -> None:
+        """Marca actividad del cliente (cualquier frame recibido)"""
+        state = self._states.get((chat_id, user_id))
+        if state is not None:
+            state.last_activity = time.monotonic()
+
+    async def _evict(self, state: ConnectionState, code: int, reason: str) -> None:
+        """Cierra una conexión y libera su estado"""
+        await self.disconnect(state.chat_id, state.user_id, state.websocket)
+        try:
+            await asyncio.wait_for(state.websocket.close(code=code, reason=reason), timeout=WS_SEND_TIMEOUT)
+        except Exception:
+            pass  # La conexión puede estar ya medio cerrada
+        logger.info(f"Conexión expulsada - Usuario {state.user_id}, chat {state.chat_id}: {reason}")
+
+    async def start(self) -> None:
+        """Inicia el planificador único de heartbeats"""
+        if not self._heartbeat_task:
+            self._draining = False
+            self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+            self.install_drain_on_sigterm()
+            logger.info("WebSocketManager: planificador de heartbeats iniciado")
+
+    def install_drain_on_sigterm(self) -> None:
+        """
+        Drena las conexiones al recibir SIGTERM, antes del apagado del servidor.
+
+        Uvicorn cierra los WebSocket en cuanto recibe la señal y solo después
+        ejecuta el evento de shutdown, así que el drenado debe empezar aquí.
+        Tras drenar se reenvía SIGINT para que uvicorn siga su apagado normal.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+            loop.add_signal_handler(signal.SIGTERM, self._on_sigterm)
+        except (NotImplementedError, RuntimeError, ValueError):
+            # Windows o bucle sin soporte de señales: se drena en el shutdown
+            pass
+
+    def _on_sigterm(self) -> None:
+        async def drain_then_exit():
+            try:
+                await self.stop()
+            finally:
+                signal.raise_signal(signal.SIGINT)
+
+        logger.info("WebSocketManager: SIGTERM recibido, drenando conexiones")
+        asyncio.get_running_loop().create_task(drain_then_exit())
+
+    async def stop(self) -> None:
+        """
+        Drenado ordenado para el apagado.
+
+        Deja de aceptar conexiones, pide a los clientes que reconecten a otra
+        instancia, espera (con límite) a que terminen los streams en curso y
+        cierra todas las conexiones con código 1012 (Service Restart).
+        """
+        if self._draining:
+            return
+        self._draining = True
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+
+        # Retardo aleatorio para que los clientes no reconecten todos a la vez
+        states = list(self._states.values())
+        await asyncio.gather(
+            *(self._send_with_timeout(state, {
+                "type": MessageType.RECONNECT.value,
+                "data": {
+                    "reason": "server_shutdown",
+                    "message": "El servidor se está reiniciando, reconecta en unos segundos",
+                    "retry_after_ms": random.randint(500, 3000)
+                }
+            }) for state in states),
+            return_exceptions=True
+        )
+
+        # Esperar a que terminen los streams en curso
+        deadline = time.monotonic() + settings.WEBSOCKET_DRAIN_TIMEOUT
+        while time.monotonic() < deadline and any(s.streaming for s in self._states.values()):
+            await asyncio.sleep(0.2)
+
+        await asyncio.gather(
+            *(self._evict(state, WS_CLOSE_SERVICE_RESTART, "Servidor reiniciando") for state in list(self._states.values())),
+            return_exceptions=True
+        )
+        logger.info(f"WebSocketManager: {len(states)} conexiones drenadas")
+
+    async def _heartbeat_loop(self) -> None:
+        """Un único temporizador recorre la rueda y atiende las conexiones vencidas"""
+        last_prune = time.monotonic()
+        while True:
+            try:
+                await asyncio.sleep(self._heartbeat_wheel.tick_seconds)
+                due = self._heartbeat_wheel.tick()
+                if due:
+                    await asyncio.gather(
+                        *(self._check_connection(key) for key in due),
+                        return_exceptions=True
+                    )
+
+                now = time.monotonic()
+                if now - last_prune >= 60:
+                    self._prune_rate_limits()
+                    last_prune = now
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error en planificador de heartbeats: {str(e)}")
+
+    async def _check_connection(self, key) -> None:
+        """Expulsa la conexión si está inactiva; si no, envía heartbeat y reprograma"""
+        state = self._states.get(key)
+        if state is None:
+            return
+
+        idle = time.monotonic() - state.last_activity
+        if idle >= settings.WEBSOCKET_IDLE_TIMEOUT and not state.streaming:
+            await self._evict(state, WS_CLOSE_GOING_AWAY, "Conexión inactiva")
+            return
+
+        sent = await self._send_with_timeout(state, {
+            "type": MessageType.HEARTBEAT.value,
+            "data": {"timestamp": datetime.utcnow().isoformat()}
+        })
+        if not sent:
+            await self._evict(state, WS_CLOSE_GOING_AWAY, "Heartbeat fallido")
+            return
+
+        if key in self._states:
+            self._heartbeat_wheel.schedule(key, settings.WEBSOCKET_HEARTBEAT_INTERVAL)
+
+    async def _send_with_timeout(self, state: ConnectionState, payload: dict) -> bool:
+        """Envía un frame sin bloquear el planificador si el socket no drena"""
+        try:
+            await asyncio.wait_for(self.helpers.send_frame(state.websocket, payload), timeout=WS_SEND_TIMEOUT)
+            return True
+        except Exception:
+            return False
+
+    def _prune_rate_limits(self) -> None:
+        """Elimina entradas de rate limit sin mensajes en el último minuto"""
+        now = datetime.utcnow()
+        stale = [
+            user_id for user_id, timestamps in self._user_message_timestamps.items()
+            if not timestamps or (now - timestamps[-1]).total_seconds() >= 60
+        ]
+        for user_id in stale:
+            del self._user_message_timestamps[user_id]
         
     async def handle_message(self, websocket: WebSocket, chat_id: int, user_id: int, message: dict):
         """Procesa mensaje entrante"""
@@ -92,7 +394,15 @@ class WebSocketManager:
                 return
                 
             if msg_type == MessageType.MESSAGE:
-                await self._handle_chat_message(websocket, chat_id, user_id, data)
+                # Marcar la conexión como ocupada para no expulsarla ni cerrarla a mitad de respuesta
+                state = self._states.get((chat_id, user_id))
+                if state is not None:
+                    state.streaming = True
+                try:
+                    await self._handle_chat_message(websocket, chat_id, user_id, data)
+                finally:
+                    if state is not None:
+                        state.streaming = False
             elif msg_type == MessageType.PING:
                 await self._handle_ping(websocket)
             elif msg_type == MessageType.TYPING_INDICATOR:
@@ -124,55 +434,85 @@ class WebSocketManager:
         if not content:
             await self.helpers.send_error(websocket, "Mensaje vacío", "EMPTY_MESSAGE")
             return
-            
+        
+        # Raíz de la traza: las etapas (ChromaDB, Supabase, Gemini) cuelgan de aquí
+        with tracer.span("chat.websocket_message", chat_id=chat_id, user_id=user_id, stream=bool(stream)) as span:
+            await self._answer_chat_message(websocket, chat_id, user_id, content, document_ids, stream, span)
+    
+    async def _answer_chat_message(
+        self,
+        websocket: WebSocket,
+        chat_id: int,
+        user_id: int,
+        content: str,
+        document_ids: list,
+        stream: bool,
+        span: Span
+    ):
+        """Genera la respuesta (en streaming o completa) dentro del span raíz"""
         try:
             if stream:
                 # Streaming habilitado
                 stream_id = await self.helpers.start_stream(websocket, content)
                 
-                # Generar respuesta en streaming
+                # Generar respuesta en streaming, agrupando fragmentos en lotes
+                coalescer = StreamCoalescer(
+                    flush_bytes=settings.WEBSOCKET_STREAM_FLUSH_BYTES,
+                    flush_interval_ms=settings.WEBSOCKET_STREAM_FLUSH_INTERVAL_MS
+                )
                 chunk_index = 0
-                full_response = ""
+                bytes_sent = 0
                 start_time = datetime.utcnow()
+                cpu_start = time.process_time()
                 
-                async for chunk in self.streaming_service.stream_ai_response(
-                    question=content,
-                    chat_id=chat_id,
-                    user_id=user_id,
-                    document_ids=document_ids
+                async for batch in coalescer.coalesce(
+                    self.streaming_service.stream_ai_response(
+                        question=content,
+                        chat_id=chat_id,
+                        user_id=user_id,
+                        document_ids=document_ids
+                    )
                 ):
-                    # Enviar chunk
-                    await self.helpers.send_stream_chunk(
-                        websocket, stream_id, chunk, chunk_index
+                    # Enviar lote
+                    bytes_sent += await self.helpers.send_stream_chunk(
+                        websocket, stream_id, batch, chunk_index
                     )
-                    full_response += chunk
                     chunk_index += 1
                     self.messages_sent += 1
                     
+                full_response = coalescer.full_text
+                
                 # Finalizar stream
                 end_time = datetime.utcnow()
                 processing_time = (end_time - start_time).total_seconds()
+                cpu_time = time.process_time() - cpu_start
+                self._record_stream_stats(coalescer, bytes_sent, cpu_time, processing_time)
                 
                 await self.helpers.end_stream(websocket, stream_id, {
                     "total_chunks": chunk_index,
                     "total_tokens": self.streaming_service.estimate_tokens(full_response),
                     "processing_time": processing_time,
-                    "content_length": len(full_response)
+                    "content_length": len(full_response),
+                    "fragments": coalescer.fragments_in,
+                    "bytes_sent": bytes_sent,
+                    "frames_per_second": round(chunk_index / processing_time, 2) if processing_time > 0 else 0.0,
+                    "server_cpu_ms": round(cpu_time * 1000, 2),
+                    "trace_id": span.trace_id,
+                    "stage_timings_ms": span.trace.stage_timings()
                 })
                 
-                # Guardar mensaje en DB
-                message_id = self.chat_service.save_message(
+                # Encolar el mensaje (WAL + insert en lote); el ID definitivo
+                # se notifica al cliente cuando el lote llega a la base de datos
+                saved = await self.chat_service.queue_message(
                     chat_id=chat_id,
                     question=content,
                     answer=full_response,
                     user_id=user_id,
                     processing_time=processing_time
                 )
-                
-                # Confirmar guardado
-                await self.helpers.send_message_saved(
-                    websocket, message_id, content, full_response
-                )
+                self._spawn(self._notify_message_saved(
+                    websocket, chat_id, user_id, saved, stream_id, content, full_response
+                ))
                 
             else:
                 # Sin streaming - respuesta completa
@@ -183,13 +523,14 @@ class WebSocketManager:
                     document_ids=document_ids
                 )
                 
-                await websocket.send_json({
-                    "type": MessageType.MESSAGE,
+                await self.helpers.send_frame(websocket, {
+                    "type": MessageType.MESSAGE.value,
                     "data": result
                 })
                 self.messages_sent += 1
                 
         except Exception as e:
+            span.record_exception(e)
             logger.error(f"Error generando respuesta: {str(e)}")
             await self.helpers.send_error(
                 websocket,
@@ -198,10 +539,49 @@ class WebSocketManager:
                 {"detail": str(e)}
             )
             
+    def _spawn(self, coro) -> asyncio.Task:
+        """Lanza una tarea en segundo plano manteniendo una referencia hasta que termine"""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    async def _notify_message_saved(
+        self,
+        websocket: WebSocket,
+        chat_id: int,
+        user_id: int,
+        saved: asyncio.Future,
+        stream_id: str,
+        question: str,
+        answer: str
+    ):
+        """Envía message_saved con el ID definitivo cuando el mensaje se inserta"""
+        try:
+            message_id = await saved
+        except asyncio.CancelledError:
+            # Apagado antes del insert: el mensaje sigue en el WAL
+            return
+        except Exception as e:
+            # La base de datos rechazó el mensaje (apartado en el dead letter)
+            logger.warning(f"Mensaje del chat {chat_id} no guardado: {str(e)}")
+            return
+
+        # El cliente pudo desconectarse mientras se esperaba el lote
+        state = self._states.get((chat_id, user_id))
+        if state is None or state.websocket is not websocket:
+            return
+        try:
+            await self.helpers.send_message_saved(
+                websocket, message_id, question, answer, stream_id=stream_id
+            )
+        except Exception as e:
+            logger.debug(f"No se pudo notificar message_saved {message_id}: {str(e)}")
+
     async def _handle_ping(self, websocket: WebSocket):
         """Responde a ping con pong"""
-        await websocket.send_json({
-            "type": MessageType.PONG,
+        await self.helpers.send_frame(websocket, {
+            "type": MessageType.PONG.value,
             "data": {"timestamp": datetime.utcnow().isoformat()}
         })
         
@@ -251,6 +631,34 @@ class WebSocketManager:
         oldest_timestamp = min(self._user_message_timestamps[user_id])
         return oldest_timestamp + timedelta(minutes=1)
         
+    def _record_stream_stats(
+        self,
+        coalescer: StreamCoalescer,
+        bytes_sent: int,
+        cpu_time: float,
+        processing_time: float
+    ) -> None:
+        """Acumula métricas de una respuesta en streaming"""
+        self.stream_stats["streams"] += 1
+        self.stream_stats["fragments"] += coalescer.fragments_in
+        self.stream_stats["frames"] += coalescer.frames_out
+        self.stream_stats["bytes_sent"] += bytes_sent
+        self.stream_stats["cpu_seconds"] += cpu_time
+        self.stream_stats["stream_seconds"] += processing_time
+
+    def get_streaming_stats(self) -> dict:
+        """Promedios por respuesta en streaming"""
+        stats = self.stream_stats
+        streams = stats["streams"] or 1
+        return {
+            "streams": stats["streams"],
+            "avg_fragments_per_answer": round(stats["fragments"] / streams, 2),
+            "avg_frames_per_answer": round(stats["frames"] / streams, 2),
+            "avg_bytes_per_answer": round(stats["bytes_sent"] / streams, 2),
+            "avg_server_cpu_ms_per_answer": round(stats["cpu_seconds"] * 1000 / streams, 2),
+            "frames_per_second": round(stats["frames"] / stats["stream_seconds"], 2) if stats["stream_seconds"] > 0 else 0.0
+        }
+        
     def get_stats(self) -> dict:
         """Obtiene estadísticas del WebSocket"""
         return {
@@ -259,9 +667,14 @@ class WebSocketManager:
             "active_chats": len(self._connections),
             "messages_sent": self.messages_sent,
             "messages_received": self.messages_received,
+            "users_connected": len(self._user_connections),
+            "rate_limit_entries": len(self._user_message_timestamps),
+            "draining": self._draining,
             "connections_by_chat": {
                 chat_id: len(users) for chat_id, users in self._connections.items()
-            }
+            },
+            "streaming": self.get_streaming_stats(),
+            "persistence": message_persistence_queue.get_stats()
         }
 
 # Instancia global
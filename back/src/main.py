@@ -1,8 +1,11 @@
+# Primero: mide el arranque desde aquí (imports, fases del startup, RSS)
+from src.core.startup_report import startup_report
+
 # Configurar timezone a UTC
 from src.utils.timezone_utils import get_utc_now, ensure_utc, format_for_db
 
 from fastapi import FastAPI, Request, Depends
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 from fastapi.exceptions import RequestValidationError
 from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.openapi.utils import get_openapi
@@ -14,14 +17,31 @@ from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 import uvicorn
+import asyncio
 from src.utils.chromadb_connector import ChromaDBConnector, get_chromadb_connector
 from src.config.settings import get_settings
 import logging
-import sentry_sdk
-from loguru import logger
+import hmac
 # from sentry_sdk.integrations.fastapi import FastAPIIntegration  # Comentado temporalmente
 from src.services.token_blacklist_service import token_blacklist
-from src.core.token_middleware import TokenMiddleware
+from src.api.middleware.request_logging import RequestLoggingMiddleware
+from src.core.logging_config import app_logger
+from src.core.metrics import metrics, CONTENT_TYPE_LATEST
+from src.core.tracing import tracer
+from src.core.websocket_manager import websocket_manager
+from src.services.chat.message_persistence_queue import message_persistence_queue
+from src.services.chat.service_factory import ServiceFactory
+from src.services.statistics_reconciler import statistics_reconciler
+from src.services.vector_orphan_sweeper import vector_orphan_sweeper
+from src.services.profiling_service import loop_lag_monitor
+from src.services.dependency_monitor import dependency_monitor
+from src.services.statistics_cache import statistics_cache
+from src.services.export_service import export_service
+from src.services.reindex_service import reindex_service
+from src.services.password_hasher import password_hasher
+from src.services.email_outbox import email_outbox
+from src.services.email_validation import domain_intelligence
+from src.api.dependencies import get_document_service
 
 # Importar los manejadores de excepciones
 from src.api.middleware.exception_handlers import (
@@ -31,6 +51,9 @@ from src.api.middleware.exception_handlers import (
 )
 from src.core.exceptions import AppException
 from fastapi.exceptions import HTTPException
+from src.config.database import validate_environment
+
+startup_report.imports_done()
 
 # Obtener configuración
 settings = get_settings()
@@ -220,31 +243,17 @@ app.add_middleware(
     max_age=3600  # Cache de preflight en segundos
 )
 
-# Agregar middleware de manejo de tokens
-app.add_middleware(TokenMiddleware)
+# Registro y tiempos de peticiones (ASGI puro: no envuelve el cuerpo de la respuesta)
+app.add_middleware(RequestLoggingMiddleware)
 
 # Inicializar Sentry
 if settings.SENTRY_DSN:
+    import sentry_sdk
     sentry_sdk.init(
         dsn=settings.SENTRY_DSN,
         # integrations=[FastAPIIntegration()]  # Comentado temporalmente
     )
 
-# Configurar Loguru
-logger.add("logs/app.log", rotation="10 MB", retention="10 days", level="DEBUG")
-
-# Capturar logs de FastAPI
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    logger.info(f"Request: {request.method} {request.url}")
-    response = await call_next(request)
-    try:
-        body = await response.body()
-    except Exception:
-        body = "<body not available>"
-    logger.info(f"Response: {response.status_code} {body}")
-    return response
-
 # Endpoint de health check mejorado con documentación
 @app.get(
     "/health",
@@ -286,6 +295,81 @@ async def health_check():
         "rate_limiting_enabled": settings.RATE_LIMIT_ENABLED
     }
 
+def _hit_ratio(hits: float, misses: float) -> float:
+    lookups = hits + misses
+    return hits / lookups if lookups else 0.0
+
+
+def register_runtime_gauges():
+    """Gauges de estado calculados en cada scrape de /metrics"""
+    metrics.gauge("websocket_connections", "Conexiones WebSocket activas").set_function(
+        lambda: websocket_manager.get_stats()["active_connections"]
+    )
+
+    queue_depth = metrics.gauge("queue_depth", "Elementos pendientes por cola", ["queue"])
+    queue_depth.labels("message_persistence").set_function(lambda: message_persistence_queue.get_stats()["pending"])
+    queue_depth.labels("email_outbox").set_function(lambda: email_outbox.get_stats()["pending"])
+    queue_depth.labels("password_hashing").set_function(lambda: password_hasher.get_stats()["waiting"])
+
+    hit_ratio = metrics.gauge("cache_hit_ratio", "Proporción de aciertos por caché", ["cache"])
+    hit_ratio.labels("statistics").set_function(lambda: statistics_cache.get_metrics()["hit_ratio"])
+    hit_ratio.labels("mx_records").set_function(
+        lambda: _hit_ratio(domain_intelligence.hits, domain_intelligence.misses)
+    )
+
+
+if settings.ENABLE_METRICS:
+    register_runtime_gauges()
+
+    @app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics(request: Request):
+        """Métricas de este proceso en formato de texto de Prometheus"""
+        if settings.METRICS_TOKEN:
+            expected = f"Bearer {settings.METRICS_TOKEN}"
+            if not hmac.compare_digest(request.headers.get("Authorization", ""), expected):
+                return PlainTextResponse("No autorizado", status_code=401)
+        return Response(metrics.render(), media_type=CONTENT_TYPE_LATEST)
+
+def check_vector_collection_version():
+    """
+    Avisa si la colección activa se llenó con otro modelo de embeddings o
+    troceador y, con VECTOR_AUTO_MIGRATE, lanza la migración en segundo plano
+    """
+    try:
+        if not reindex_service.needs_migration():
+            return
+        if settings.VECTOR_AUTO_MIGRATE:
+            job = get_document_service().reindex_all_documents()
+            logging.info(f"🔁 Migración de embeddings a {job.target_collection} iniciada")
+        else:
+            logging.warning(
+                f"⚠️ La colección activa no usa {settings.SENTENCE_TRANSFORMER_MODEL}: "
+                "lanza POST /api/admin/maintenance/reindex-documents para migrar"
+            )
+    except Exception as e:
+        logging.warning(f"⚠️ No se pudo comprobar la versión de la colección de documentos: {e}")
+
+async def run_deferred_startup_tasks():
+    """
+    Tareas de arranque que consultan Supabase y ChromaDB. Corren en segundo
+    plano tras el startup para no retrasar el worker ni cargar sus SDKs
+    antes de tiempo; hasta entonces el corrector no conoce los títulos de
+    los documentos (GET /api/admin/profiling/startup, "deferred_ms")
+    """
+    await asyncio.sleep(settings.STARTUP_DEFERRED_TASKS_DELAY_SECONDS)
+    
+    # Vocabulario ortográfico con los títulos de documentos indexados
+    with startup_report.deferred_phase("spelling_vocabulary"):
+        await asyncio.to_thread(ServiceFactory.get_spelling_service().refresh_domain_vocabulary)
+    logging.info("🔤 Vocabulario ortográfico cargado")
+    
+    # Versión de la colección de documentos frente al modelo configurado
+    with startup_report.deferred_phase("vector_collection_version"):
+        await asyncio.to_thread(check_vector_collection_version)
+
+# Tarea de run_deferred_startup_tasks (se cancela al cerrar si no terminó)
+deferred_startup_task = None
+
 # Evento de inicio de la aplicación
 @app.on_event("startup")
 async def startup():
@@ -294,26 +378,107 @@ async def startup():
     uvicorn.config.LOOP_WAIT = 0.1
     uvicorn.config.HTTP_TIMEOUT_KEEP_ALIVE = 120
     
-    # Inicializar ChromaDB
+    # Sin las variables de Supabase el worker no arranca
+    validate_environment()
+    
+    # Inicializar ChromaDB (el cliente se conecta en el primer uso)
     global chroma_db
     chroma_db = ChromaDBConnector()
-    logging.info("ChromaDB inicializado correctamente")
     
     # Inicializar servicio de token blacklist
-    await token_blacklist.start()
+    with startup_report.phase("token_blacklist"):
+        await token_blacklist.start()
     logging.info("🔐 Token Blacklist Service iniciado")
     
+    # Inicializar persistencia diferida de mensajes (recupera el WAL pendiente)
+    with startup_report.phase("message_persistence_queue"):
+        await message_persistence_queue.start()
+    logging.info("💾 Cola de persistencia de mensajes iniciada")
+    
+    # Inicializar heartbeats y limpieza de conexiones WebSocket
+    with startup_report.phase("websocket_manager"):
+        await websocket_manager.start()
+    logging.info("🔌 Heartbeats WebSocket iniciados")
+    
+    # Reconciliación periódica de los contadores de estadísticas
+    with startup_report.phase("statistics_reconciler"):
+        await statistics_reconciler.start()
+    logging.info("📊 Reconciliador de estadísticas iniciado")
+    
+    # Barrido periódico de chunks huérfanos en ChromaDB
+    with startup_report.phase("vector_orphan_sweeper"):
+        await vector_orphan_sweeper.start()
+    
+    # Envío de emails en segundo plano (incluye lo que quedó pendiente)
+    with startup_report.phase("email_outbox"):
+        await email_outbox.start()
+    
+    # Comprobaciones periódicas de Supabase, ChromaDB y Gemini (/api/health/ready)
+    with startup_report.phase("dependency_monitor"):
+        await dependency_monitor.start()
+    
+    # Pila de los callbacks que bloquean el event loop (/admin/profiling/loop-lag)
+    if settings.PROFILING_LOOP_LAG_ENABLED:
+        await loop_lag_monitor.start()
+    
     # Log de configuración de seguridad
     logging.info(f"🔒 CORS configurado para: {settings.get_cors_origins}")
     logging.info(f"🚦 Rate limiting: {'ACTIVADO' if settings.RATE_LIMIT_ENABLED else 'DESACTIVADO'}")
     logging.info(f"🌍 Entorno: {settings.APP_ENVIRONMENT}")
+    
+    # Vocabulario ortográfico y versión de la colección, en segundo plano
+    global deferred_startup_task
+    deferred_startup_task = asyncio.create_task(run_deferred_startup_tasks(), name="deferred-startup")
+    
+    # Tiempos de arranque y RSS (también en GET /api/admin/profiling/startup)
+    startup_report.finish()
 
 # Evento de cierre de la aplicación
 @app.on_event("shutdown")
 async def shutdown():
+    if deferred_startup_task and not deferred_startup_task.done():
+        deferred_startup_task.cancel()
+    
+    # Drenar conexiones WebSocket (los clientes reconectan a otra instancia)
+    await websocket_manager.stop()
+    logging.info("🔌 Conexiones WebSocket drenadas")
+    
+    # Volcar los mensajes pendientes (lo que no se inserte queda en el WAL)
+    await message_persistence_queue.stop()
+    logging.info("💾 Cola de persistencia de mensajes detenida")
+    
+    await statistics_reconciler.stop()
+    await statistics_cache.close()
+    logging.info("📊 Reconciliador y caché de estadísticas detenidos")
+    
+    await vector_orphan_sweeper.stop()
+    
+    await loop_lag_monitor.stop()
+    await dependency_monitor.stop()
+    
+    # Las exportaciones en curso quedan interrumpidas y se pueden reanudar
+    await asyncio.to_thread(export_service.shutdown)
+    logging.info("📤 Exportaciones detenidas")
+    
+    # La re-indexación se detiene tras la página en curso y continúa al relanzarla
+    await asyncio.to_thread(reindex_service.shutdown, 30)
+    logging.info("🔄 Re-indexación detenida")
+    
+    password_hasher.shutdown()
+    
+    # Los emails sin enviar quedan en el outbox para el siguiente arranque
+    await email_outbox.stop()
+    domain_intelligence.shutdown()
+    
     # Detener servicio de token blacklist
     await token_blacklist.stop()
     logging.info("🔐 Token Blacklist Service detenido")
+    
+    # Exportar las trazas que queden en cola
+    await asyncio.to_thread(tracer.shutdown)
+    
+    # Escribir los logs que queden en cola
+    app_logger.shutdown()
 
 # Incluir el router principal
 app.include_router(api_router, prefix="/api")
@@ -404,6 +569,7 @@ if __name__ == "__main__":
         limit_max_requests=10000,  # Límite de peticiones máximas
         timeout_keep_alive=120,   # Tiempo de espera para mantener la conexión viva
         backlog=2048,            # Cola de conexiones pendientes
+        ws_per_message_deflate=settings.WEBSOCKET_PER_MESSAGE_DEFLATE,  # Compresión de frames WebSocket
     )
     
     server = uvicorn.Server(config)
@@ -41,6 +41,7 @@ class Document(BaseModel):
     file_size: Optional[int] = None
     original_filename: Optional[str] = None
     content: Optional[str] = None  # IMPORTANTE: Campo para el contenido
+    chunk_count: Optional[int] = None  # Chunks escritos en ChromaDB (None = sin registrar)
     
     model_config = ConfigDict(
         from_attributes=True,
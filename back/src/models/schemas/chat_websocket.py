@@ -24,6 +24,8 @@ class MessageType(str, Enum):
     PONG = "pong"
     RATE_LIMIT_WARNING = "rate_limit_warning"
     STATUS_UPDATE = "status_update"
+    HEARTBEAT = "heartbeat"
+    RECONNECT = "reconnect"
 
 class StreamStatus(str, Enum):
     """Estados del streaming"""
@@ -0,0 +1,162 @@
+"""
+Repositorio de consultas del panel de administración.
+Solo proyecta las columnas que muestra el panel (nunca `content`).
+"""
+from typing import Dict, List, Any, Optional
+import logging
+
+from src.config.database import get_supabase_client
+from src.core.exceptions import DatabaseException
+
+logger = logging.getLogger(__name__)
+
+USER_COLUMNS = "id, username, email, created_at, is_admin"
+DOCUMENT_COLUMNS = "id, title, content_type, status, created_at, file_url, file_size, is_shared, uploaded_by"
+CHAT_COLUMNS = "id, name_chat, created_at, id_user"
+
+class AdminDashboardRepository:
+    """
+    Consultas con columnas proyectadas y límites para el panel de administración.
+    """
+
+    def list_users_with_activity(self, exclude_user_id: int) -> List[Dict[str, Any]]:
+        """
+        Lista los usuarios (excepto uno) con sus contadores de user_statistics.
+
+        Args:
+            exclude_user_id: ID del usuario a excluir (el admin actual)
+
+        Returns:
+            List[Dict[str, Any]]: Usuarios con documents_count y chats_count
+
+        Raises:
+            DatabaseException: Si la consulta falla (p. ej. sin user_statistics instalada)
+        """
+        try:
+            supabase = get_supabase_client(use_service_role=True)
+            response = supabase.table("users")\
+                .select(f"{USER_COLUMNS}, user_statistics(documents, chats)")\
+                .neq("id", exclude_user_id)\
+                .order("id")\
+                .execute()
+        except Exception as e:
+            raise DatabaseException(f"Error al listar usuarios con actividad: {str(e)}")
+
+        users = []
+        for row in response.data or []:
+            row = dict(row)
+            activity = row.pop("user_statistics", None) or {}
+            # Relación 1 a 1: PostgREST puede devolver objeto o lista
+            if isinstance(activity, list):
+                activity = activity[0] if activity else {}
+            row["documents_count"] = activity.get("documents", 0)
+            row["chats_count"] = activity.get("chats", 0)
+            users.append(row)
+        return users
+
+    def list_users(self, exclude_user_id: int) -> List[Dict[str, Any]]:
+        """Lista los usuarios (excepto uno) sin contadores"""
+        try:
+            supabase = get_supabase_client(use_service_role=True)
+            response = supabase.table("users")\
+                .select(USER_COLUMNS)\
+                .neq("id", exclude_user_id)\
+                .order("id")\
+                .execute()
+            return response.data or []
+        except Exception as e:
+            raise DatabaseException(f"Error al listar usuarios: {str(e)}")
+
+    def list_recent_documents(self, exclude_owner_id: int, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Documentos más recientes de otros usuarios.
+
+        Args:
+            exclude_owner_id: Propietario a excluir
+            limit: Número máximo de documentos
+
+        Returns:
+            List[Dict[str, Any]]: Documentos del más reciente al más antiguo
+        """
+        try:
+            supabase = get_supabase_client(use_service_role=True)
+            # neq solo no basta: en PostgREST descarta también los documentos sin propietario
+            response = supabase.table("documents")\
+                .select(DOCUMENT_COLUMNS)\
+                .or_(f"uploaded_by.is.null,uploaded_by.neq.{exclude_owner_id}")\
+                .order("created_at", desc=True)\
+                .limit(limit)\
+                .execute()
+            return response.data or []
+        except Exception as e:
+            raise DatabaseException(f"Error al listar documentos recientes: {str(e)}")
+
+    def list_recent_chats(self, exclude_user_id: int, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Chats más recientes de otros usuarios.
+
+        Args:
+            exclude_user_id: Usuario a excluir
+            limit: Número máximo de chats
+
+        Returns:
+            List[Dict[str, Any]]: Chats del más reciente al más antiguo
+        """
+        try:
+            supabase = get_supabase_client(use_service_role=True)
+            response = supabase.table("chats")\
+                .select(CHAT_COLUMNS)\
+                .neq("id_user", exclude_user_id)\
+                .order("created_at", desc=True)\
+                .limit(limit)\
+                .execute()
+            return response.data or []
+        except Exception as e:
+            raise DatabaseException(f"Error al listar chats recientes: {str(e)}")
+
+    def count_rows(self, table: str, owner_column: Optional[str] = None, owner_id: Optional[int] = None) -> int:
+        """
+        Cuenta filas de una tabla (opcionalmente de un propietario) sin traerlas.
+
+        Args:
+            table: Tabla a contar
+            owner_column: Columna del propietario para filtrar (opcional)
+            owner_id: ID del propietario (opcional)
+
+        Returns:
+            int: Número de filas
+        """
+        try:
+            supabase = get_supabase_client(use_service_role=True)
+            query = supabase.table(table).select("id", count="exact")
+            if owner_column is not None:
+                query = query.eq(owner_column, owner_id)
+            response = query.limit(1).execute()
+            return response.count or 0
+        except Exception as e:
+            raise DatabaseException(f"Error al contar {table}: {str(e)}")
+
+    def count_by_owner(self, table: str, owner_column: str) -> Dict[int, int]:
+        """
+        Cuenta filas por propietario trayendo solo la columna del propietario.
+        Respaldo para cuando user_statistics no está instalada.
+
+        Args:
+            table: Tabla ('documents' o 'chats')
+            owner_column: Columna con el ID del propietario
+
+        Returns:
+            Dict[int, int]: Número de filas por ID de propietario
+        """
+        try:
+            supabase = get_supabase_client(use_service_role=True)
+            response = supabase.table(table).select(owner_column).execute()
+        except Exception as e:
+            raise DatabaseException(f"Error al contar {table} por propietario: {str(e)}")
+
+        counts: Dict[int, int] = {}
+        for row in response.data or []:
+            owner = row.get(owner_column)
+            if owner is not None:
+                counts[owner] = counts.get(owner, 0) + 1
+        return counts
@@ -302,6 +302,51 @@ class ChatRepository:
     
     # ==================== MÉTODOS ADMINISTRATIVOS ====================
     
+    def get_owners(self, chat_ids: List[int]) -> Dict[int, int]:
+        """
+        Obtiene el propietario de varios chats en una consulta.
+        
+        Args:
+            chat_ids: IDs de los chats
+            
+        Returns:
+            Dict[int, int]: ID de chat -> ID de usuario (solo los que existen)
+        """
+        if not chat_ids:
+            return {}
+        try:
+            supabase = get_supabase_client(use_service_role=True)
+            response = supabase.table(self.table_name)\
+                .select('id, id_user')\
+                .in_('id', chat_ids)\
+                .execute()
+            return {row['id']: row['id_user'] for row in response.data or []}
+        except Exception as e:
+            logger.error(f"Error al obtener propietarios de chats: {str(e)}")
+            raise DatabaseException(f"Error al obtener propietarios de chats: {str(e)}")
+    
+    def delete_many(self, chat_ids: List[int]) -> List[int]:
+        """
+        Elimina varios chats con una sola sentencia.
+        
+        Args:
+            chat_ids: IDs de los chats a eliminar
+            
+        Returns:
+            List[int]: IDs realmente eliminados
+        """
+        if not chat_ids:
+            return []
+        try:
+            supabase = get_supabase_client(use_service_role=True)
+            response = supabase.table(self.table_name).delete().in_('id', chat_ids).execute()
+            deleted = [row['id'] for row in response.data or []]
+            logger.info(f"Eliminados {len(deleted)} chats en lote")
+            return deleted
+        except Exception as e:
+            logger.error(f"Error al eliminar chats en lote: {str(e)}")
+            raise DatabaseException(f"Error al eliminar chats en lote: {str(e)}")
+    
     def get_all_chats(self, limit: int = 100, skip: int = 0, sort_by: str = 'created_at', order: str = 'desc') -> List[Chat]:
         """
         Obtiene TODOS los chats del sistema (para administradores).
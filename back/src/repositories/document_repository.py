@@ -154,6 +154,7 @@ class DocumentRepository:
                 document.file_size = document_data.get('file_size')
                 document.original_filename = document_data.get('original_filename')
                 document.content = document_data.get('content')  # IMPORTANTE: Incluir content
+                document.chunk_count = document_data.get('chunk_count')
 
                 logger.info(f"Documento recuperado: ID={document.id}, chromadb_id={document.chromadb_id}, file_url={document.file_url}")
                 return document
@@ -282,6 +283,141 @@ class DocumentRepository:
                 original_error=e
             )
     
+    def list_for_reindex(
+        self,
+        after_id: int,
+        limit: int,
+        updated_since: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Obtiene la siguiente página de documentos a re-indexar (paginación por clave).
+        
+        Args:
+            after_id: Último id ya procesado (0 = desde el principio)
+            limit: Número máximo de documentos
+            updated_since: Solo documentos modificados desde esta fecha ISO (opcional)
+            
+        Returns:
+            List[Dict[str, Any]]: Filas con id > after_id en orden ascendente
+        """
+        try:
+            supabase = get_supabase_client(use_service_role=True)
+            query = supabase.table(self.table_name)\
+                .select('id, title, content, content_type, uploaded_by, updated_at')\
+                .gt('id', after_id)
+            if updated_since:
+                query = query.gte('updated_at', updated_since)
+            response = query.order('id').limit(limit).execute()
+            return response.data or []
+        except Exception as e:
+            logger.error(f"Error al obtener documentos para re-indexar: {str(e)}")
+            raise DatabaseException("Error al obtener documentos para re-indexar", original_error=e)
+    
+    def set_chunk_count(self, document_id: int, chunk_count: int) -> bool:
+        """
+        Registra cuántos chunks tiene el documento en ChromaDB.
+        No es crítico: si falla (p. ej. sin scripts/sql/document_chunk_count.sql)
+        solo se registra el error y el barrido de huérfanos lo rellenará.
+        
+        Args:
+            document_id: ID del documento
+            chunk_count: Número de chunks escritos
+            
+        Returns:
+            bool: True si se guardó
+        """
+        try:
+            supabase = get_supabase_client(use_service_role=True)
+            supabase.table(self.table_name)\
+                .update({"chunk_count": chunk_count})\
+                .eq('id', document_id)\
+                .execute()
+            return True
+        except Exception as e:
+            logger.warning(f"No se pudo registrar chunk_count del documento {document_id}: {str(e)}")
+            return False
+    
+    def list_chunk_counts(self, after_id: int, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Obtiene id y chunk_count de la siguiente página de documentos (paginación por clave).
+        
+        Args:
+            after_id: Último id ya procesado
+            limit: Número máximo de documentos
+            
+        Returns:
+            Optional[List[Dict[str, Any]]]: Filas con id y chunk_count en orden
+            ascendente, o None si la columna chunk_count aún no existe
+            (falta aplicar scripts/sql/document_chunk_count.sql)
+        """
+        try:
+            supabase = get_supabase_client(use_service_role=True)
+            response = supabase.table(self.table_name)\
+                .select('id, chunk_count')\
+                .gt('id', after_id)\
+                .order('id')\
+                .limit(limit)\
+                .execute()
+            return response.data or []
+        except Exception as e:
+            message = str(e)
+            if "chunk_count" in message and ("42703" in message or "does not exist" in message):
+                logger.warning(
+                    "⚠️ La columna documents.chunk_count no existe: aplica "
+                    "scripts/sql/document_chunk_count.sql"
+                )
+                return None
+            logger.error(f"Error al obtener chunk_count de documentos: {message}")
+            raise DatabaseException("Error al obtener chunk_count de documentos", original_error=e)
+    
+    def list_for_deletion(self, document_ids: List[int]) -> List[Dict[str, Any]]:
+        """
+        Obtiene propietario y archivo de varios documentos en una consulta.
+        
+        Args:
+            document_ids: IDs de los documentos
+            
+        Returns:
+            List[Dict[str, Any]]: Filas con id, uploaded_by y file_url (solo los que existen)
+        """
+        if not document_ids:
+            return []
+        try:
+            supabase = get_supabase_client(use_service_role=True)
+            response = supabase.table(self.table_name)\
+                .select('id, uploaded_by, file_url')\
+                .in_('id', document_ids)\
+                .execute()
+            return response.data or []
+        except Exception as e:
+            logger.error(f"Error al obtener documentos para eliminar: {str(e)}")
+            raise DatabaseException("Error al obtener documentos para eliminar", original_error=e)
+    
+    def delete_many(self, document_ids: List[int]) -> List[int]:
+        """
+        Elimina varios documentos con una sola sentencia.
+        
+        Args:
+            document_ids: IDs de los documentos a eliminar
+            
+        Returns:
+            List[int]: IDs realmente eliminados
+            
+        Raises:
+            DatabaseException: Si hay un error de base de datos
+        """
+        if not document_ids:
+            return []
+        try:
+            supabase = get_supabase_client(use_service_role=True)
+            response = supabase.table(self.table_name).delete().in_('id', document_ids).execute()
+            deleted = [row['id'] for row in response.data or []]
+            logger.info(f"Eliminados {len(deleted)} documentos en lote")
+            return deleted
+        except Exception as e:
+            logger.error(f"Error al eliminar documentos en lote: {str(e)}")
+            raise DatabaseException("Error al eliminar documentos en lote", original_error=e)
+    
     def list_by_user(self, user_id: int, limit: int = 100, offset: int = 0, sort_by: str = 'created_at', order: str = 'desc') -> List[Document]:
         """
         Lista documentos de un usuario específico.
@@ -414,6 +550,8 @@ class DocumentRepository:
         Raises:
             DatabaseException: Si hay un error de base de datos
         """
+        if not user_ids:
+            return []
         try:
             supabase = get_supabase_client(use_service_role=True)
             
@@ -423,26 +561,27 @@ class DocumentRepository:
                 .eq("id_document", document_id)\
                 .in_("id_user", user_ids)\
                 .execute()
+            shares = response.data or []
+            if not shares:
+                return []
             
-            existing_shares = []
-            if response.data:
-                # Obtener información adicional de usuarios
-                for share in response.data:
-                    user_response = supabase.table("users")\
-                        .select("id, username, email")\
-                        .eq("id", share["id_user"])\
-                        .execute()
-                    
-                    if user_response.data:
-                        user_info = user_response.data[0]
-                        existing_shares.append({
-                            "id": user_info["id"],
-                            "username": user_info["username"],
-                            "email": user_info["email"],
-                            "shared_at": share["created_at"]
-                        })
-            
-            return existing_shares
+            # Información de todos los usuarios en una sola consulta
+            users_response = supabase.table("users")\
+                .select("id, username, email")\
+                .in_("id", [share["id_user"] for share in shares])\
+                .execute()
+            users = {user["id"]: user for user in users_response.data or []}
+            
+            return [
+                {
+                    "id": share["id_user"],
+                    "username": users[share["id_user"]]["username"],
+                    "email": users[share["id_user"]]["email"],
+                    "shared_at": share["created_at"]
+                }
+                for share in shares
+                if share["id_user"] in users
+            ]
             
         except Exception as e:
             logger.error(f"Error al obtener shares existentes: {str(e)}")
@@ -451,13 +590,25 @@ class DocumentRepository:
                 original_error=e
             )
     
-    def share_document_with_users(self, document_id: int, user_ids: List[int]) -> Dict[str, Any]:
+    def share_document_with_users(
+        self,
+        document_id: int,
+        user_ids: List[int],
+        check_document: bool = True
+    ) -> Dict[str, Any]:
         """
         Comparte un documento con múltiples usuarios, validando duplicados.
         
+        Inserta todos los accesos con un único upsert multi-fila que ignora
+        los que ya existen (índice único de scripts/sql/document_sharing.sql).
+        Sin el índice se comprueban primero los accesos existentes y se
+        insertan solo los nuevos.
+        
         Args:
             document_id: ID del documento a compartir
             user_ids: Lista de IDs de usuarios con quienes compartir
+            check_document: Comprobar que el documento existe (el servicio
+                ya lo ha cargado y pasa False)
             
         Returns:
             Dict con información sobre el resultado:
@@ -470,75 +621,75 @@ class DocumentRepository:
             DatabaseException: Si hay un error de base de datos
         """
         try:
-            logger.info(f"=== INICIANDO COMPARTIR DOCUMENTO ===")
-            logger.info(f"Document ID: {document_id}")
-            logger.info(f"User IDs: {user_ids}")
+            logger.info(f"Compartiendo documento {document_id} con {len(user_ids)} usuarios")
             
             # Usar service role para tener permisos completos
             supabase = get_supabase_client(use_service_role=True)
             
-            # Verificar que el documento existe
-            doc_check = supabase.table("documents").select("id").eq("id", document_id).execute()
-            if not doc_check.data:
-                logger.error(f"Documento {document_id} no existe en la base de datos")
-                raise DocumentNotFoundException(document_id)
-            
-            # Obtener usuarios que ya tienen acceso
-            existing_shares = self.get_existing_shares(document_id, user_ids)
-            existing_user_ids = [share["id"] for share in existing_shares]
-            
-            # Filtrar solo usuarios nuevos
-            new_user_ids = [uid for uid in user_ids if uid not in existing_user_ids]
-            
-            logger.info(f"Usuarios que ya tienen acceso: {existing_user_ids}")
-            logger.info(f"Nuevos usuarios a compartir: {new_user_ids}")
+            if check_document:
+                doc_check = supabase.table("documents").select("id").eq("id", document_id).execute()
+                if not doc_check.data:
+                    logger.error(f"Documento {document_id} no existe en la base de datos")
+                    raise DocumentNotFoundException(document_id)
             
             successful_shares = []
             failed_shares = []
+            access_records = [{"id_document": document_id, "id_user": user_id} for user_id in user_ids]
             
-            # Solo insertar nuevos registros
-            if new_user_ids:
-                access_records = [{
-                    "id_document": document_id,
-                    "id_user": user_id
-                } for user_id in new_user_ids]
-                
-                try:
-                    response = supabase.table("acceso_documentos_usuario").insert(access_records).execute()
-                    
-                    if response.data:
-                        successful_shares = new_user_ids
-                        logger.info(f"✅ Documento {document_id} compartido con {len(successful_shares)} nuevos usuarios")
-                        
-                        # Actualizar is_shared a TRUE si se compartió con alguien
-                        try:
-                            update_response = supabase.table("documents")\
-                                .update({"is_shared": True})\
-                                .eq("id", document_id)\
-                                .execute()
-                            logger.info(f"✅ Columna is_shared actualizada para documento {document_id}")
-                        except Exception as update_error:
-                            logger.error(f"❌ Error actualizando is_shared: {update_error}")
-                    else:
+            try:
+                # Devuelve solo las filas insertadas (las existentes se ignoran)
+                response = supabase.table("acceso_documentos_usuario")\
+                    .upsert(access_records, on_conflict="id_document,id_user", ignore_duplicates=True)\
+                    .execute()
+                inserted = {row["id_user"] for row in response.data or []}
+                successful_shares = [uid for uid in user_ids if uid in inserted]
+                already_ids = [uid for uid in user_ids if uid not in inserted]
+            except Exception as upsert_error:
+                logger.warning(f"⚠️ Upsert de accesos no disponible, insertando solo los nuevos: {upsert_error}")
+                existing = {share["id"] for share in self.get_existing_shares(document_id, user_ids)}
+                already_ids = [uid for uid in user_ids if uid in existing]
+                new_user_ids = [uid for uid in user_ids if uid not in existing]
+                if new_user_ids:
+                    try:
+                        response = supabase.table("acceso_documentos_usuario")\
+                            .insert([r for r in access_records if r["id_user"] not in existing])\
+                            .execute()
+                        if response.data:
+                            successful_shares = new_user_ids
+                        else:
+                            failed_shares = new_user_ids
+                    except Exception as e:
+                        logger.error(f"Error al insertar accesos: {str(e)}")
                         failed_shares = new_user_ids
-                        logger.error(f"❌ No se pudieron compartir con usuarios nuevos")
-                        
-                except Exception as e:
-                    logger.error(f"Error al insertar accesos: {str(e)}")
-                    failed_shares = new_user_ids
+            
+            if successful_shares:
+                logger.info(f"✅ Documento {document_id} compartido con {len(successful_shares)} nuevos usuarios")
+                # Actualizar is_shared a TRUE si se compartió con alguien
+                try:
+                    supabase.table("documents")\
+                        .update({"is_shared": True})\
+                        .eq("id", document_id)\
+                        .execute()
+                except Exception as update_error:
+                    logger.error(f"❌ Error actualizando is_shared: {update_error}")
+            
+            already_shared = self.get_existing_shares(document_id, already_ids) if already_ids else []
             
             # Preparar resultado
             result = {
                 "successful_shares": successful_shares,
-                "already_shared": existing_shares,
+                "already_shared": already_shared,
                 "failed_shares": failed_shares,
                 "total_requested": len(user_ids),
-                "total_already_shared": len(existing_shares),
+                "total_already_shared": len(already_shared),
                 "total_new_shares": len(successful_shares),
                 "total_failed": len(failed_shares)
             }
             
-            logger.info(f"Resultado final: {result}")
+            logger.info(
+                f"Resultado: {result['total_new_shares']} nuevos, "
+                f"{result['total_already_shared']} ya compartidos, {result['total_failed']} fallidos"
+            )
             return result
             
         except DocumentNotFoundException:
@@ -549,6 +700,40 @@ class DocumentRepository:
                 f"Error al compartir documento {document_id}",
                 original_error=e
             )
+    
+    def share_document_with_group(self, document_id: int, group_id: int) -> Dict[str, List[int]]:
+        """
+        Comparte un documento con todos los miembros de un grupo; la
+        expansión del grupo y la inserción se hacen en el servidor
+        (share_document_with_group en scripts/sql/document_sharing.sql).
+        
+        Args:
+            document_id: ID del documento
+            group_id: ID del grupo de usuarios
+            
+        Returns:
+            Dict con 'new' (IDs con acceso nuevo) y 'already' (ya tenían acceso)
+            
+        Raises:
+            DatabaseException: Si hay un error de base de datos
+        """
+        try:
+            supabase = get_supabase_client(use_service_role=True)
+            response = supabase.rpc(
+                "share_document_with_group",
+                {"p_document_id": document_id, "p_group_id": group_id}
+            ).execute()
+            rows = response.data or []
+            return {
+                "new": [row["user_id"] for row in rows if row["newly_shared"]],
+                "already": [row["user_id"] for row in rows if not row["newly_shared"]]
+            }
+        except Exception as e:
+            logger.error(f"Error al compartir documento {document_id} con el grupo {group_id}: {str(e)}")
+            raise DatabaseException(
+                f"Error al compartir documento {document_id} con el grupo {group_id}",
+                original_error=e
+            )
 
     def get_shared_documents(self, user_id: int, limit: int = 100, offset: int = 0) -> List[Document]:
         """
@@ -1083,6 +1268,32 @@ class DocumentRepository:
 
     # Métodos adicionales que faltaban para completar la funcionalidad
     
+    def list_indexed_titles(self, limit: int = 5000) -> List[str]:
+        """
+        Lista los títulos de los documentos ya procesados (solo la columna title).
+        
+        Args:
+            limit: Número máximo de títulos
+            
+        Returns:
+            List[str]: Títulos, del más reciente al más antiguo
+            
+        Raises:
+            DatabaseException: Si hay un error de base de datos
+        """
+        try:
+            supabase = get_supabase_client(use_service_role=True)
+            response = supabase.table(self.table_name)\
+                .select('title')\
+                .eq('status', 'completed')\
+                .order('created_at', desc=True)\
+                .limit(limit)\
+                .execute()
+            return [row['title'] for row in response.data or [] if row.get('title')]
+        except Exception as e:
+            logger.error(f"Error al listar títulos de documentos: {str(e)}")
+            raise DatabaseException("Error al listar títulos de documentos", original_error=e)
+    
     def count_all(self) -> int:
         """
         Cuenta el total de documentos en el sistema.
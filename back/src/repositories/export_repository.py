@@ -0,0 +1,85 @@
+"""
+Repositorio de lectura paginada para las exportaciones de administración.
+Pagina por clave (id > último id exportado) para que cada página cueste lo
+mismo sin importar lo avanzada que esté la exportación.
+"""
+from typing import Dict, List, Any, Optional
+import logging
+
+from src.config.database import get_supabase_client
+from src.core.exceptions import DatabaseException
+
+logger = logging.getLogger(__name__)
+
+# Columnas exportadas por tabla (nunca contraseñas ni tokens)
+EXPORT_COLUMNS = {
+    "users": "id, username, email, is_admin, email_verified, created_at, updated_at, last_login",
+    "documents": (
+        "id, title, uploaded_by, content_type, status, status_message, file_url, "
+        "file_size, original_filename, is_shared, chromadb_id, created_at, updated_at"
+    ),
+    "chats": "id, id_user, name_chat, created_at",
+    "messages": "id, id_chat, question, answer, created_at",
+}
+
+class ExportRepository:
+    """
+    Consultas por páginas de clave para exportar tablas completas.
+    """
+
+    def fetch_page(
+        self,
+        table: str,
+        after_id: int,
+        page_size: int,
+        columns: Optional[str] = None,
+        ids: Optional[List[int]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Obtiene la siguiente página de una tabla ordenada por id.
+
+        Args:
+            table: Tabla a exportar
+            after_id: Último id ya exportado (0 = desde el principio)
+            page_size: Número máximo de filas
+            columns: Columnas a proyectar (por defecto EXPORT_COLUMNS[table])
+            ids: Limitar la exportación a estos ids (opcional)
+
+        Returns:
+            List[Dict[str, Any]]: Filas con id > after_id en orden ascendente
+
+        Raises:
+            DatabaseException: Si la consulta falla
+        """
+        try:
+            supabase = get_supabase_client(use_service_role=True)
+            query = supabase.table(table)\
+                .select(columns or EXPORT_COLUMNS[table])\
+                .gt("id", after_id)
+            if ids is not None:
+                query = query.in_("id", ids)
+            response = query.order("id").limit(page_size).execute()
+            return response.data or []
+        except Exception as e:
+            raise DatabaseException(f"Error al leer {table} para exportar: {str(e)}")
+
+    def count(self, table: str, ids: Optional[List[int]] = None) -> int:
+        """
+        Cuenta las filas que exportaría una exportación completa.
+
+        Args:
+            table: Tabla a exportar
+            ids: Limitar a estos ids (opcional)
+
+        Returns:
+            int: Número de filas
+        """
+        try:
+            supabase = get_supabase_client(use_service_role=True)
+            query = supabase.table(table).select("id", count="exact")
+            if ids is not None:
+                query = query.in_("id", ids)
+            response = query.limit(1).execute()
+            return response.count or 0
+        except Exception as e:
+            raise DatabaseException(f"Error al contar {table} para exportar: {str(e)}")
@@ -94,6 +94,86 @@ class MessageRepository:
             logger.error(f"Error al crear mensaje: {str(e)}")
             raise DatabaseException(f"Error al crear mensaje: {str(e)}")
     
+    def create_messages(self, rows: List[Dict[str, Any]]) -> List[Message]:
+        """
+        Inserta varios mensajes en una sola petición (insert multi-fila).
+
+        Args:
+            rows: Filas con id_chat, question, answer y created_at
+
+        Returns:
+            List[Message]: Mensajes creados, en el mismo orden que `rows`
+        """
+        if not rows:
+            return []
+
+        try:
+            supabase = get_supabase_client(use_service_role=True)
+
+            response = supabase.table(self.table_name).insert(rows).execute()
+
+            if not response.data or len(response.data) != len(rows):
+                raise DatabaseException(
+                    f"Insert por lotes incompleto: {len(response.data or [])} de {len(rows)} mensajes"
+                )
+
+            messages = [
+                Message(
+                    id=msg_data['id'],
+                    id_chat=msg_data['id_chat'],
+                    question=msg_data['question'],
+                    answer=msg_data.get('answer'),
+                    created_at=msg_data.get('created_at')
+                )
+                for msg_data in response.data
+            ]
+
+            logger.info(f"{len(messages)} mensajes creados en lote")
+            return messages
+
+        except DatabaseException:
+            raise
+        except Exception as e:
+            logger.error(f"Error al crear mensajes en lote: {str(e)}")
+            raise DatabaseException(f"Error al crear mensajes en lote: {str(e)}")
+
+    def find_message(self, chat_id: int, question: str, created_at: str) -> Optional[Message]:
+        """
+        Busca un mensaje por chat, pregunta y fecha de creación exacta.
+        Se usa para no duplicar mensajes al reprocesar el WAL tras una caída.
+
+        Args:
+            chat_id: ID del chat
+            question: Pregunta del mensaje
+            created_at: Timestamp ISO con el que se insertó
+
+        Returns:
+            Optional[Message]: El mensaje si existe, None en caso contrario
+        """
+        try:
+            supabase = get_supabase_client(use_service_role=True)
+
+            response = supabase.table(self.table_name)\
+                .select('*')\
+                .eq('id_chat', chat_id)\
+                .eq('created_at', created_at)\
+                .execute()
+
+            for msg_data in response.data or []:
+                if msg_data['question'] == question:
+                    return Message(
+                        id=msg_data['id'],
+                        id_chat=msg_data['id_chat'],
+                        question=msg_data['question'],
+                        answer=msg_data.get('answer'),
+                        created_at=msg_data.get('created_at')
+                    )
+            return None
+
+        except Exception as e:
+            logger.error(f"Error al buscar mensaje del chat {chat_id}: {str(e)}")
+            raise DatabaseException(f"Error al buscar mensaje: {str(e)}")
+
     def get_messages_by_chat(self, chat_id: int, limit: int = 100, skip: int = 0) -> List[Message]:
         """
         Obtiene todos los mensajes de un chat con paginación.
@@ -338,6 +418,31 @@ class MessageRepository:
             logger.error(f"Error al eliminar mensajes del chat {chat_id}: {str(e)}")
             raise DatabaseException(f"Error al eliminar mensajes del chat: {str(e)}")
     
+    def delete_messages_by_chats(self, chat_ids: List[int]) -> int:
+        """
+        Elimina los mensajes de varios chats con una sola sentencia.
+        
+        Args:
+            chat_ids: IDs de los chats
+            
+        Returns:
+            int: Número de mensajes eliminados
+        """
+        if not chat_ids:
+            return 0
+        try:
+            supabase = get_supabase_client(use_service_role=True)
+            response = supabase.table(self.table_name)\
+                .delete()\
+                .in_('id_chat', chat_ids)\
+                .execute()
+            count = len(response.data or [])
+            logger.info(f"Eliminados {count} mensajes de {len(chat_ids)} chats")
+            return count
+        except Exception as e:
+            logger.error(f"Error al eliminar mensajes de {len(chat_ids)} chats: {str(e)}")
+            raise DatabaseException(f"Error al eliminar mensajes de los chats: {str(e)}")
+    
     def search_messages(self, query: str, chat_id: Optional[int] = None, 
                        limit: int = 50) -> List[Message]:
         """
@@ -0,0 +1,124 @@
+"""
+Repositorio para los contadores materializados de estadísticas.
+Lee las tablas mantenidas por los triggers de scripts/sql/statistics_counters.sql.
+"""
+from typing import Dict, List, Optional, Any
+import logging
+from datetime import date
+
+from src.config.database import get_supabase_client
+from src.core.exceptions import DatabaseException
+
+logger = logging.getLogger(__name__)
+
+class StatisticsRepository:
+    """
+    Repositorio para contadores globales, altas diarias y agregados por usuario.
+    Todas las lecturas son O(1) respecto al tamaño de las tablas base.
+    """
+
+    def __init__(self):
+        self.counters_table = "statistics_counters"
+        self.daily_table = "statistics_daily"
+        self.user_table = "user_statistics"
+
+    def get_counters(self) -> Dict[str, int]:
+        """
+        Obtiene todos los contadores globales.
+
+        Returns:
+            Dict[str, int]: Valor de cada contador por nombre
+
+        Raises:
+            DatabaseException: Si la tabla no existe o la consulta falla
+        """
+        try:
+            supabase = get_supabase_client(use_service_role=True)
+            response = supabase.table(self.counters_table).select("name, value").execute()
+            return {row["name"]: int(row["value"]) for row in response.data or []}
+        except Exception as e:
+            raise DatabaseException(f"Error al leer contadores de estadísticas: {str(e)}")
+
+    def get_daily_total(self, name: str, since: date) -> int:
+        """
+        Suma las altas diarias de un contador desde una fecha (incluida).
+
+        Args:
+            name: Nombre del contador ('chats' o 'documents')
+            since: Primer día de la ventana
+
+        Returns:
+            int: Total de altas en la ventana
+        """
+        try:
+            supabase = get_supabase_client(use_service_role=True)
+            response = supabase.table(self.daily_table)\
+                .select("value")\
+                .eq("name", name)\
+                .gte("day", since.isoformat())\
+                .execute()
+            return sum(int(row["value"]) for row in response.data or [])
+        except Exception as e:
+            raise DatabaseException(f"Error al leer altas diarias de '{name}': {str(e)}")
+
+    def get_user_statistics(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Obtiene los agregados de un usuario junto con su rol.
+
+        Args:
+            user_id: ID del usuario
+
+        Returns:
+            Optional[Dict[str, Any]]: documents, chats, shared_by_me,
+                shared_with_me e is_admin; None si el usuario no existe
+        """
+        try:
+            supabase = get_supabase_client(use_service_role=True)
+            response = supabase.table(self.user_table)\
+                .select("documents, chats, shared_by_me, shared_with_me, users(is_admin)")\
+                .eq("user_id", user_id)\
+                .limit(1)\
+                .execute()
+        except Exception as e:
+            raise DatabaseException(f"Error al leer estadísticas del usuario {user_id}: {str(e)}")
+
+        if not response.data:
+            return None
+
+        row = dict(response.data[0])
+        user = row.pop("users", None) or {}
+        row["is_admin"] = bool(user.get("is_admin", False))
+        return row
+
+    def count_active_users(self) -> int:
+        """
+        Cuenta los usuarios que tienen al menos un documento o un chat.
+
+        Returns:
+            int: Número de usuarios con actividad
+        """
+        try:
+            supabase = get_supabase_client(use_service_role=True)
+            response = supabase.table(self.user_table)\
+                .select("user_id", count="exact")\
+                .or_("documents.gt.0,chats.gt.0")\
+                .limit(1)\
+                .execute()
+            return response.count or 0
+        except Exception as e:
+            raise DatabaseException(f"Error al contar usuarios activos: {str(e)}")
+
+    def reconcile(self) -> List[Dict[str, Any]]:
+        """
+        Recalcula los contadores desde las tablas base.
+
+        Returns:
+            List[Dict[str, Any]]: Contadores corregidos (counter_name,
+                stored_value, actual_value); vacía si no había desviación
+        """
+        try:
+            supabase = get_supabase_client(use_service_role=True)
+            response = supabase.rpc("reconcile_statistics", {}).execute()
+            return response.data or []
+        except Exception as e:
+            raise DatabaseException(f"Error al reconciliar estadísticas: {str(e)}")
@@ -262,6 +262,48 @@ class UserRepository:
             logger.error(f"Error al eliminar usuario {user_id}: {str(e)}")
             raise DatabaseException(f"Error al eliminar usuario {user_id}", original_error=e)
     
+    def get_existing_ids(self, user_ids: List[int]) -> List[int]:
+        """
+        Filtra los IDs de usuario que existen (una consulta).
+        
+        Args:
+            user_ids: IDs a comprobar
+            
+        Returns:
+            List[int]: IDs existentes
+        """
+        if not user_ids:
+            return []
+        try:
+            supabase = get_supabase_client(use_service_role=True)
+            response = supabase.table(self.table_name).select('id').in_('id', user_ids).execute()
+            return [row['id'] for row in response.data or []]
+        except Exception as e:
+            logger.error(f"Error al comprobar usuarios: {str(e)}")
+            raise DatabaseException("Error al comprobar usuarios", original_error=e)
+    
+    def delete_many(self, user_ids: List[int]) -> List[int]:
+        """
+        Elimina varios usuarios con una sola sentencia.
+        
+        Args:
+            user_ids: IDs de los usuarios a eliminar
+            
+        Returns:
+            List[int]: IDs realmente eliminados
+        """
+        if not user_ids:
+            return []
+        try:
+            supabase = get_supabase_client(use_service_role=True)
+            response = supabase.table(self.table_name).delete().in_('id', user_ids).execute()
+            deleted = [row['id'] for row in response.data or []]
+            logger.info(f"Eliminados {len(deleted)} usuarios en lote")
+            return deleted
+        except Exception as e:
+            logger.error(f"Error al eliminar usuarios en lote: {str(e)}")
+            raise DatabaseException("Error al eliminar usuarios en lote", original_error=e)
+    
     def get(self, user_id: int) -> User:
         """
         Obtiene un usuario por su ID.
@@ -13,26 +13,56 @@ Los servicios implementan la lógica de negocio y orquestan las interacciones en
 - APIs externas (ChromaDB, OpenAI)
 """
 
-from .document_service import DocumentService
-from .chat_service import ChatService
-from .signed_url_service import SignedURLService, signed_url_service
-
-# Servicios especializados de chat
-from .chat.spelling_correction_service import SpellingCorrectionService
-from .chat.context_detection_service import ContextDetectionService
-from .chat.message_enrichment_service import MessageEnrichmentService
-from .chat.chat_websocket_service import ChatWebSocketService
-from .chat.chat_streaming_service import ChatStreamingService
-
-# Comentamos estos imports si los servicios aún no están implementados
-# from .user_service import UserService
-from .auth_service import AuthService
-# from .notification_service import NotificationService
+from importlib import import_module
+
+from src.core.service_container import services as service_container
+
+# Exportaciones perezosas: importar un submódulo (src.services.password_hasher)
+# ejecuta este __init__, y no debe arrastrar DocumentService, Gemini y ChromaDB
+_EXPORTS = {
+    # Servicios principales
+    "DocumentService": ".document_service",
+    "ChatService": ".chat_service",
+    "SignedURLService": ".signed_url_service",
+    "signed_url_service": ".signed_url_service",
+    "AuthService": ".auth_service",
+
+    # Servicios especializados de chat
+    "SpellingCorrectionService": ".chat.spelling_correction_service",
+    "ContextDetectionService": ".chat.context_detection_service",
+    "MessageEnrichmentService": ".chat.message_enrichment_service",
+    "ChatWebSocketService": ".chat.chat_websocket_service",
+    "ChatStreamingService": ".chat.chat_streaming_service",
+}
+
+# Servicios compartidos, construidos en el primer uso
+service_container.register("document_service", "src.services.document_service:DocumentService")
+service_container.register("chat_service", "src.services.chat_service:ChatService")
+service_container.register("auth_service", "src.services.auth_service:AuthService")
+service_container.register("user_service", "src.services.user_service:UserService")
+service_container.register("statistics_service", "src.services.statistics_service:StatisticsService")
+service_container.register(
+    "statistics_validation_service",
+    "src.services.statistics_validation_service:StatisticsValidationService"
+)
 
 # Instancias predeterminadas para facilitar el uso
-default_document_service = DocumentService()
-default_chat_service = ChatService()
-default_auth_service = AuthService()
+_DEFAULT_INSTANCES = {
+    "default_document_service": "document_service",
+    "default_chat_service": "chat_service",
+    "default_auth_service": "auth_service",
+}
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    if name in _DEFAULT_INSTANCES:
+        return service_container.get(_DEFAULT_INSTANCES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     # Servicios principales
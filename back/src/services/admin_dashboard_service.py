@@ -0,0 +1,104 @@
+"""
+Servicio de datos para el panel de administración.
+Reúne en paralelo los contadores agregados y las listas recientes
+(columnas proyectadas y con límite) que necesita el panel.
+"""
+import asyncio
+import logging
+from typing import Dict, List, Any, Optional
+
+from src.repositories.admin_dashboard_repository import AdminDashboardRepository
+from src.repositories.statistics_repository import StatisticsRepository
+
+logger = logging.getLogger(__name__)
+
+# Elementos de cada lista del panel
+RECENT_ITEMS_LIMIT = 20
+
+class AdminDashboardService:
+    """Servicio para obtener los datos del panel de administración"""
+
+    def __init__(
+        self,
+        repository: Optional[AdminDashboardRepository] = None,
+        statistics_repository: Optional[StatisticsRepository] = None
+    ):
+        self.repository = repository or AdminDashboardRepository()
+        self.statistics_repository = statistics_repository or StatisticsRepository()
+
+    async def load(self, admin_id: int) -> Dict[str, Any]:
+        """
+        Obtiene los datos del panel excluyendo los del admin actual.
+
+        Las consultas son independientes y se lanzan a la vez (cada una en
+        un hilo, el cliente de Supabase es síncrono).
+
+        Args:
+            admin_id: ID del administrador que consulta el panel
+
+        Returns:
+            Dict[str, Any]: statistics, users, documents y chats
+        """
+        statistics, users, documents, chats = await asyncio.gather(
+            asyncio.to_thread(self.get_statistics, admin_id),
+            asyncio.to_thread(self.get_users, admin_id),
+            asyncio.to_thread(self.repository.list_recent_documents, admin_id, RECENT_ITEMS_LIMIT),
+            asyncio.to_thread(self.repository.list_recent_chats, admin_id, RECENT_ITEMS_LIMIT),
+        )
+        return {
+            "statistics": statistics,
+            "users": users,
+            "documents": documents,
+            "chats": chats
+        }
+
+    def get_statistics(self, admin_id: int) -> Dict[str, int]:
+        """
+        Totales del sistema y totales sin los recursos del admin.
+
+        Se leen de los contadores materializados; si no están instalados se
+        cuentan las tablas con count='exact' (sin traer filas).
+        """
+        try:
+            counters = self.statistics_repository.get_counters()
+            if not counters:
+                raise ValueError("Contadores de estadísticas vacíos")
+            own = self.statistics_repository.get_user_statistics(admin_id) or {}
+            system_users = counters.get("users", 0)
+            system_documents = counters.get("documents", 0)
+            system_chats = counters.get("chats", 0)
+            own_documents = own.get("documents", 0)
+            own_chats = own.get("chats", 0)
+            admin_exists = bool(own)
+        except Exception as e:
+            logger.warning(f"⚠️ Contadores no disponibles para el panel admin, contando tablas: {e}")
+            system_users = self.repository.count_rows("users")
+            system_documents = self.repository.count_rows("documents")
+            system_chats = self.repository.count_rows("chats")
+            own_documents = self.repository.count_rows("documents", "uploaded_by", admin_id)
+            own_chats = self.repository.count_rows("chats", "id_user", admin_id)
+            admin_exists = self.repository.count_rows("users", "id", admin_id) > 0
+
+        return {
+            "total_users": max(system_users - (1 if admin_exists else 0), 0),
+            "total_documents": max(system_documents - own_documents, 0),
+            "active_chats": max(system_chats - own_chats, 0),
+            "total_system_users": system_users,
+            "total_system_documents": system_documents,
+            "total_system_chats": system_chats
+        }
+
+    def get_users(self, admin_id: int) -> List[Dict[str, Any]]:
+        """Usuarios (sin el admin) con su número de documentos y chats"""
+        try:
+            return self.repository.list_users_with_activity(admin_id)
+        except Exception as e:
+            logger.warning(f"⚠️ user_statistics no disponible, contando por propietario: {e}")
+
+        users = self.repository.list_users(admin_id)
+        documents_by_owner = self.repository.count_by_owner("documents", "uploaded_by")
+        chats_by_owner = self.repository.count_by_owner("chats", "id_user")
+        for user in users:
+            user["documents_count"] = documents_by_owner.get(user["id"], 0)
+            user["chats_count"] = chats_by_owner.get(user["id"], 0)
+        return users
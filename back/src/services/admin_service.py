@@ -3,13 +3,15 @@ Servicio de lógica de negocio para operaciones administrativas
 Centraliza las operaciones complejas de administración
 """
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
 from datetime import datetime, timedelta
 from src.models.domain import User, Document, Chat
 from src.services.document_service import DocumentService
 from src.services.chat_service import ChatService
 from src.services.user_service import UserService
-from src.core.exceptions import DatabaseException
+from src.services.export_service import export_service
+from src.services.bulk_operation_service import BulkOperationService, bulk_job_registry
+from src.core.exceptions import DatabaseException, ValidationException
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +27,9 @@ class AdminService:
         self.document_service = document_service
         self.chat_service = chat_service
         self.user_service = user_service
+        self.bulk_operations = BulkOperationService.from_services(
+            document_service, chat_service, user_service
+        )
     
     # ==================== ESTADÍSTICAS GENERALES ====================
     
@@ -194,7 +199,7 @@ class AdminService:
         performed_by: User
     ) -> Dict[str, Any]:
         """
-        Elimina múltiples recursos
+        Elimina múltiples recursos por lotes (ver BulkOperationService)
         
         Args:
             resource_type: Tipo de recurso
@@ -202,97 +207,103 @@ class AdminService:
             performed_by: Usuario que realiza la operación
             
         Returns:
-            Dict con resultado de la operación
+            Dict con resultado de la operación y el estado de cada elemento
         """
         try:
-            success_count = 0
-            failed_ids = []
-            
-            for resource_id in resource_ids:
-                try:
-                    if resource_type == "documents":
-                        success = self.document_service.delete_document(
-                            resource_id, performed_by.id
-                        )
-                    elif resource_type == "chats":
-                        success = self.chat_service.delete_chat(
-                            resource_id, performed_by.id
-                        )
-                    elif resource_type == "users":
-                        success = self.user_service.delete_user(
-                            resource_id, performed_by.id
-                        )
-                    else:
-                        success = False
-                    
-                    if success:
-                        success_count += 1
-                    else:
-                        failed_ids.append(resource_id)
-                        
-                except Exception as e:
-                    logger.error(f"Error eliminando {resource_type} {resource_id}: {str(e)}")
-                    failed_ids.append(resource_id)
-            
-            result = {
-                "operation": "bulk_delete",
-                "resource_type": resource_type,
-                "total": len(resource_ids),
-                "success": success_count,
-                "failed": len(failed_ids),
-                "failed_ids": failed_ids,
-                "performed_by": performed_by.username,
-                "timestamp": datetime.utcnow()
-            }
-            
-            logger.info(
-                f"🗑️ Eliminación en lote: {success_count}/{len(resource_ids)} "
-                f"{resource_type} eliminados por {performed_by.username}"
-            )
-            
-            return result
-            
+            return self.bulk_operations.delete(resource_type, resource_ids, performed_by).to_dict()
+        except ValidationException:
+            raise
         except Exception as e:
             logger.error(f"Error en eliminación en lote: {str(e)}")
             raise DatabaseException(f"Error al eliminar recursos: {str(e)}")
     
+    def start_bulk_delete_job(
+        self,
+        resource_type: str,
+        resource_ids: List[int],
+        performed_by: User
+    ) -> Dict[str, Any]:
+        """
+        Programa una eliminación en lote en segundo plano (lotes muy grandes)
+        
+        Returns:
+            Dict con el trabajo (consultar con /admin/bulk/jobs/{job_id})
+        """
+        job = bulk_job_registry.submit_delete(
+            self.bulk_operations, resource_type, resource_ids, performed_by
+        )
+        return job.to_dict()
+    
     def export_resources(
         self,
         resource_type: str,
-        format: str = "json",
-        filters: Optional[Dict[str, Any]] = None
+        format: str = "jsonl",
+        filters: Optional[Dict[str, Any]] = None,
+        compress: bool = False
     ) -> Dict[str, Any]:
         """
-        Exporta recursos en el formato especificado
+        Exporta recursos a un fichero en EXPORT_DIR en segundo plano
         
         Args:
-            resource_type: Tipo de recurso
-            format: Formato de exportación (json, csv)
-            filters: Filtros a aplicar
+            resource_type: Tipo de recurso (users, documents, chats, messages)
+            format: Formato de exportación (jsonl, csv)
+            filters: Filtros a aplicar ("ids": limitar a esos IDs,
+                "include_content": incluir el texto de los documentos)
+            compress: Comprimir el fichero con gzip
             
         Returns:
-            Dict con información de la exportación
+            Dict con el trabajo de exportación (id, estado, progreso y cursor)
         """
+        filters = filters or {}
         try:
-            # TODO: Implementar exportación real
-            # Por ahora, retorna metadata de la exportación
-            
-            export_info = {
-                "resource_type": resource_type,
-                "format": format,
-                "filters": filters or {},
-                "status": "pending",
-                "message": "Exportación programada. Se notificará cuando esté lista.",
-                "timestamp": datetime.utcnow()
-            }
-            
-            logger.info(f"📤 Exportación solicitada: {resource_type} en formato {format}")
-            return export_info
+            job = export_service.start_file_export(
+                resource_type=resource_type,
+                format=format,
+                compress=compress,
+                include_content=bool(filters.get("include_content")),
+                ids=filters.get("ids")
+            )
+            logger.info(f"📤 Exportación solicitada: {resource_type} en formato {job.format}")
+            return job.to_dict()
             
+        except ValidationException:
+            raise
         except Exception as e:
             logger.error(f"Error en exportación: {str(e)}")
             raise DatabaseException(f"Error al exportar recursos: {str(e)}")
     
+    def stream_export(
+        self,
+        resource_type: str,
+        format: str = "jsonl",
+        compress: bool = False,
+        after_id: int = 0,
+        include_content: bool = False
+    ) -> Iterator[bytes]:
+        """
+        Exportación en streaming (para StreamingResponse)
+        
+        Args:
+            resource_type: Tipo de recurso (users, documents, chats, messages)
+            format: Formato de exportación (jsonl, csv)
+            compress: Comprimir con gzip
+            after_id: Cursor; reanuda tras el último ID recibido
+            include_content: Incluir el texto de los documentos
+            
+        Returns:
+            Iterator[bytes]: Fragmentos de la exportación
+        """
+        export_service.validate_resource(resource_type)
+        export_service.normalize_format(format)
+        logger.info(f"📤 Exportación en streaming: {resource_type} en formato {format} desde id {after_id}")
+        return export_service.stream(
+            resource_type,
+            format=format,
+            compress=compress,
+            after_id=after_id,
+            include_content=include_content
+        )
+    
     # ==================== MÉTODOS ESPECIALIZADOS PARA DOCUMENTOS ====================
     
     def get_all_documents_with_filters(
@@ -233,10 +233,12 @@ class AdminValidationService:
         if not resource_ids:
             raise ValidationException("No se especificaron recursos para la operación")
         
-        # Eliminar duplicados y validar IDs
+        # Eliminar duplicados (conservando el orden) y validar IDs
+        seen = set()
         unique_ids = []
         for rid in resource_ids:
-            if isinstance(rid, int) and rid > 0 and rid not in unique_ids:
+            if isinstance(rid, int) and rid > 0 and rid not in seen:
+                seen.add(rid)
                 unique_ids.append(rid)
         
         if not unique_ids:
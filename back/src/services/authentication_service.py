@@ -2,9 +2,10 @@
 Servicio de autenticación mejorado - VERSION REFACTORIZADA
 Maneja toda la lógica compleja de autenticación separada de endpoints
 """
+import asyncio
 import logging
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from uuid import uuid4
 
 from src.services.auth_service import AuthService as BaseAuthService
@@ -13,9 +14,10 @@ from src.repositories.user_repository import UserRepository
 from src.models.domain import User
 from src.config.database import get_supabase_client
 from src.config.settings import get_settings
-from src.utils.password_utils import hash_password, verify_password
+from src.utils.password_utils import hash_password
+from src.services.password_hasher import password_hasher
 from src.core.exceptions import (
-    UnauthorizedException, ValidationException, DatabaseException
+    UnauthorizedException, ValidationException, DatabaseException, RateLimitException
 )
 
 logger = logging.getLogger(__name__)
@@ -38,9 +40,10 @@ class AuthenticationService:
         self.validation_service = validation_service or UserValidationService()
         self.repository = repository or UserRepository()
     
-    def handle_login_process(self, username_or_email: str, password: str) -> Dict[str, Any]:
+    async def handle_login_process(self, username_or_email: str, password: str) -> Dict[str, Any]:
         """
         Maneja el proceso completo de login con todos los casos especiales.
+        Las consultas y el hashing se ejecutan fuera del event loop.
         
         Args:
             username_or_email: Username o email del usuario
@@ -64,12 +67,12 @@ class AuthenticationService:
             
             # 2. Verificar caso especial de Ivan
             if self.validation_service.validate_ivan_special_case(validated_username, validated_password):
-                return self.handle_special_user_login(validated_username, validated_password)
+                return await asyncio.to_thread(self.handle_special_user_login, validated_username, validated_password)
             
             # 3. Login normal
-            return self.handle_normal_login(validated_username, validated_password)
+            return await self.handle_normal_login(validated_username, validated_password)
             
-        except (ValidationException, UnauthorizedException):
+        except (ValidationException, UnauthorizedException, RateLimitException):
             raise
         except Exception as e:
             logger.error(f"❌ Error inesperado en login: {str(e)}")
@@ -184,7 +187,7 @@ class AuthenticationService:
             "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
         }
     
-    def handle_normal_login(self, username_or_email: str, password: str) -> Dict[str, Any]:
+    async def handle_normal_login(self, username_or_email: str, password: str) -> Dict[str, Any]:
         """
         Maneja el login normal de usuarios.
         
@@ -197,119 +200,133 @@ class AuthenticationService:
             
         Raises:
             UnauthorizedException: Si las credenciales son incorrectas
+            RateLimitException: Si la cola de hashing está llena
         """
         try:
-            user = None
-            
-            # Obtener nueva conexión para datos frescos
-            supabase = get_supabase_client(use_service_role=True)
-            
-            # Buscar por username o email directamente en la BD
-            if '@' in username_or_email:
-                logger.info(f"🔍 Buscando por email: {username_or_email}")
-                response = supabase.table("users").select("*").eq("email", username_or_email).execute()
-            else:
-                logger.info(f"🔍 Buscando por username: {username_or_email}")
-                response = supabase.table("users").select("*").ilike("username", username_or_email).execute()
-            
-            # Convertir datos de BD a objeto User
-            if response.data and len(response.data) > 0:
-                user_data = response.data[0]
-                logger.info(f"✅ Usuario encontrado en BD: {user_data['username']}")
-                
-                # Usar repositorio para convertir a objeto User
-                user = self.repository.get_by_username(user_data['username'])
-            
-            # Fallback: buscar con repositorio
-            if not user:
-                user = self.repository.get_by_username(username_or_email)
-                if not user and '@' in username_or_email:
-                    user = self.repository.get_by_email(username_or_email)
+            user = await asyncio.to_thread(self._find_login_user, username_or_email)
             
             if not user:
                 logger.warning(f"❌ Usuario {username_or_email} no encontrado")
                 raise UnauthorizedException("Credenciales incorrectas")
             
-            # Verificar contraseña
-            if not self._verify_password_with_logging(password, user.password_hash, user.username):
+            # Verificar contraseña (en el pool de hashing)
+            is_valid, upgraded_hash = await self._verify_password_with_logging(password, user)
+            if not is_valid:
                 raise UnauthorizedException("Credenciales incorrectas")
             
             logger.info(f"✅ Login exitoso para {user.username}")
+            return await asyncio.to_thread(self._complete_normal_login, user, upgraded_hash)
             
-            # Asegurar que Ivan sea admin
-            if user.username.lower() == "ivan" and not user.is_admin:
-                logger.info("🔧 Actualizando status admin de Ivan")
-                user.is_admin = True
-                self.repository.update(user, {"is_admin": True})
-            
-            # Generar tokens usando el servicio base
-            access_token = self.base_auth._create_access_token({
-                "sub": str(user.auth_id),
-                "user_id": user.id
-            })
-            
-            refresh_token = self.base_auth._create_refresh_token({
-                "sub": str(user.auth_id),
-                "user_id": user.id
-            })
-            
-            # Actualizar último login y refresh token
-            self.repository.update(user, {
-                "refresh_token": refresh_token,
-                "last_login": datetime.utcnow().isoformat()
-            })
-            
-            return {
-                "user_id": user.id,
-                "username": user.username,
-                "email": user.email,
-                "is_admin": user.is_admin,
-                "access_token": access_token,
-                "refresh_token": refresh_token,
-                "token_type": "bearer",
-                "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
-            }
-            
-        except UnauthorizedException:
+        except (UnauthorizedException, RateLimitException):
             raise
         except Exception as e:
             logger.error(f"❌ Error en login normal: {str(e)}")
             raise DatabaseException(f"Error al procesar login: {str(e)}")
     
-    def _verify_password_with_logging(self, password: str, stored_hash: str, username: str) -> bool:
+    def _find_login_user(self, username_or_email: str) -> Optional[User]:
+        """Busca el usuario del login por username o email"""
+        user = None
+        
+        # Obtener nueva conexión para datos frescos
+        supabase = get_supabase_client(use_service_role=True)
+        
+        # Buscar por username o email directamente en la BD
+        if '@' in username_or_email:
+            logger.info(f"🔍 Buscando por email: {username_or_email}")
+            response = supabase.table("users").select("*").eq("email", username_or_email).execute()
+        else:
+            logger.info(f"🔍 Buscando por username: {username_or_email}")
+            response = supabase.table("users").select("*").ilike("username", username_or_email).execute()
+        
+        # Convertir datos de BD a objeto User
+        if response.data and len(response.data) > 0:
+            user_data = response.data[0]
+            logger.info(f"✅ Usuario encontrado en BD: {user_data['username']}")
+            
+            # Usar repositorio para convertir a objeto User
+            user = self.repository.get_by_username(user_data['username'])
+        
+        # Fallback: buscar con repositorio
+        if not user:
+            user = self.repository.get_by_username(username_or_email)
+            if not user and '@' in username_or_email:
+                user = self.repository.get_by_email(username_or_email)
+        return user
+    
+    def _complete_normal_login(self, user: User, upgraded_hash: Optional[str] = None) -> Dict[str, Any]:
+        """Genera los tokens y registra el login (con el hash regenerado si lo hay)"""
+        # Asegurar que Ivan sea admin
+        if user.username.lower() == "ivan" and not user.is_admin:
+            logger.info("🔧 Actualizando status admin de Ivan")
+            user.is_admin = True
+            self.repository.update(user, {"is_admin": True})
+        
+        # Generar tokens usando el servicio base
+        access_token = self.base_auth._create_access_token({
+            "sub": str(user.auth_id),
+            "user_id": user.id
+        })
+        
+        refresh_token = self.base_auth._create_refresh_token({
+            "sub": str(user.auth_id),
+            "user_id": user.id
+        })
+        
+        # Actualizar último login y refresh token (y el hash en la misma escritura)
+        login_data = {
+            "refresh_token": refresh_token,
+            "last_login": datetime.utcnow().isoformat()
+        }
+        if upgraded_hash:
+            login_data["password_hash"] = upgraded_hash
+            logger.info(f"🔐 Hash de contraseña de {user.username} actualizado a los parámetros actuales")
+        self.repository.update(user, login_data)
+        
+        return {
+            "user_id": user.id,
+            "username": user.username,
+            "email": user.email,
+            "is_admin": user.is_admin,
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+            "token_type": "bearer",
+            "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        }
+    
+    async def _verify_password_with_logging(self, password: str, user: User) -> Tuple[bool, Optional[str]]:
         """
         Verifica contraseña con logging detallado para debug.
         
         Args:
             password: Contraseña en texto plano
-            stored_hash: Hash almacenado
-            username: Username (para logging)
+            user: Usuario con el hash almacenado
             
         Returns:
-            bool: True si la contraseña es correcta
+            Tuple[bool, Optional[str]]: Si la contraseña es correcta y, si el
+            hash usa parámetros anteriores, el hash regenerado
         """
-        logger.info(f"🔐 Verificando contraseña para {username}")
+        stored_hash = user.password_hash
+        logger.info(f"🔐 Verificando contraseña para {user.username}")
         logger.info(f"Hash almacenado: {stored_hash[:20] if stored_hash else 'None'}...")
         
         # Verificar si hay tokens de reset que puedan interferir
-        user = self.repository.get_by_username(username)
-        if hasattr(user, 'reset_token') and user.reset_token:
-            logger.warning(f"⚠️ Usuario {username} tiene un token de reset activo")
+        if getattr(user, 'reset_token', None):
+            logger.warning(f"⚠️ Usuario {user.username} tiene un token de reset activo")
         
         # Verificar contraseña
-        is_valid = verify_password(password, stored_hash)
+        is_valid, upgraded_hash = await password_hasher.verify_and_upgrade(password, stored_hash)
         
         if not is_valid:
-            logger.warning(f"❌ Contraseña incorrecta para {username}")
+            logger.warning(f"❌ Contraseña incorrecta para {user.username}")
             # Debug adicional
             logger.warning(f"Password length: {len(password)}")
             logger.warning(f"Hash length: {len(stored_hash) if stored_hash else 0}")
         else:
-            logger.info(f"✅ Contraseña correcta para {username}")
+            logger.info(f"✅ Contraseña correcta para {user.username}")
         
-        return is_valid
+        return is_valid, upgraded_hash
     
-    def verify_user_credentials(self, username_or_email: str, password: str) -> Optional[User]:
+    async def verify_user_credentials(self, username_or_email: str, password: str) -> Optional[User]:
         """
         Verifica credenciales de usuario sin generar tokens.
         
@@ -335,7 +352,7 @@ class AuthenticationService:
                 return None
             
             # Verificar contraseña
-            if not verify_password(validated_password, user.password_hash):
+            if not await password_hasher.verify(validated_password, user.password_hash):
                 return None
             
             return user
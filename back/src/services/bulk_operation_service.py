@@ -0,0 +1,321 @@
+"""
+Motor de operaciones en lote para la administración.
+
+Las eliminaciones masivas se hacen por lotes de BULK_BATCH_SIZE IDs:
+- una consulta para obtener propietarios (y archivos) de todo el lote
+- un DELETE ... WHERE id IN (...) por tabla
+- un único delete en ChromaDB con where={"document_id": {"$in": [...]}}
+- la limpieza de archivos locales del lote
+
+Los lotes se procesan con concurrencia acotada (BULK_MAX_CONCURRENCY) y el
+resultado es un informe por elemento. Las peticiones con más de
+BULK_SYNC_LIMIT IDs se ejecutan como trabajo en segundo plano.
+"""
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from src.config.settings import settings
+from src.core.exceptions import NotFoundException, ValidationException
+from src.models.domain import User
+from src.services.local_storage_service import local_storage
+from src.services.statistics_cache import invalidate_statistics
+
+logger = logging.getLogger(__name__)
+
+# Estados de cada elemento del informe
+DELETED = "deleted"
+NOT_FOUND = "not_found"
+FORBIDDEN = "forbidden"
+INVALID = "invalid"
+FAILED = "failed"
+
+
+@dataclass
+class BulkReport:
+    """Informe de una operación en lote con el resultado de cada elemento"""
+    operation: str
+    resource_type: str
+    total: int
+    performed_by: str
+    items: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+    started_at: float = field(default_factory=time.perf_counter)
+    duration_ms: Optional[float] = None
+
+    def set(self, ids: List[int], status: str, error: Optional[str] = None):
+        for resource_id in ids:
+            item = {"id": resource_id, "status": status}
+            if error:
+                item["error"] = error
+            self.items[resource_id] = item
+
+    @property
+    def success(self) -> int:
+        return sum(1 for item in self.items.values() if item["status"] == DELETED)
+
+    def finish(self):
+        self.duration_ms = round((time.perf_counter() - self.started_at) * 1000, 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        failed_ids = [rid for rid, item in self.items.items() if item["status"] != DELETED]
+        return {
+            "operation": self.operation,
+            "resource_type": self.resource_type,
+            "total": self.total,
+            "success": self.success,
+            "failed": len(failed_ids),
+            "failed_ids": failed_ids,
+            "items": list(self.items.values()),
+            "performed_by": self.performed_by,
+            "duration_ms": self.duration_ms,
+            "timestamp": datetime.utcnow()
+        }
+
+
+class BulkOperationService:
+    """
+    Eliminaciones por lotes sobre los repositorios (sin bucles de una fila)
+    """
+
+    def __init__(
+        self,
+        document_repo,
+        chat_repo,
+        message_repo,
+        user_repo,
+        chromadb,
+        collection_name: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None
+    ):
+        self.document_repo = document_repo
+        self.chat_repo = chat_repo
+        self.message_repo = message_repo
+        self.user_repo = user_repo
+        self.chromadb = chromadb
+        self.collection_name = collection_name
+        self.batch_size = batch_size or settings.BULK_BATCH_SIZE
+        self.max_concurrency = max_concurrency or settings.BULK_MAX_CONCURRENCY
+
+    @classmethod
+    def from_services(cls, document_service, chat_service, user_service) -> "BulkOperationService":
+        """Construye el motor con los repositorios de los servicios existentes"""
+        return cls(
+            document_repo=document_service.document_repo,
+            chat_repo=chat_service.chat_repository,
+            message_repo=chat_service.message_repository,
+            user_repo=user_service.repository,
+            chromadb=document_service.chromadb
+        )
+
+    def delete(self, resource_type: str, resource_ids: List[int], performed_by: User) -> BulkReport:
+        """
+        Elimina recursos por lotes con concurrencia acotada.
+
+        Args:
+            resource_type: documents, chats o users
+            resource_ids: IDs a eliminar (sin duplicados)
+            performed_by: Usuario que realiza la operación
+
+        Returns:
+            BulkReport: Resultado por elemento
+        """
+        handlers = {
+            "documents": self._delete_documents_batch,
+            "chats": self._delete_chats_batch,
+            "users": self._delete_users_batch,
+        }
+        if resource_type not in handlers:
+            raise ValidationException(f"Tipo de recurso no soportado: {resource_type}")
+
+        report = BulkReport("bulk_delete", resource_type, len(resource_ids), performed_by.username)
+        batches = [
+            resource_ids[i:i + self.batch_size]
+            for i in range(0, len(resource_ids), self.batch_size)
+        ]
+
+        def run(batch: List[int]):
+            try:
+                handlers[resource_type](batch, performed_by, report)
+            except Exception as e:
+                logger.error(f"Error eliminando lote de {len(batch)} {resource_type}: {str(e)}")
+                pending = [rid for rid in batch if rid not in report.items]
+                report.set(pending, FAILED, str(e))
+
+        if len(batches) == 1:
+            run(batches[0])
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="bulk") as executor:
+                list(executor.map(run, batches))
+
+        report.finish()
+        logger.info(
+            f"🗑️ Eliminación en lote: {report.success}/{report.total} {resource_type} "
+            f"eliminados por {performed_by.username} en {report.duration_ms} ms ({len(batches)} lotes)"
+        )
+        return report
+
+    # ==================== LOTES POR TIPO ====================
+
+    def _delete_documents_batch(self, batch: List[int], performed_by: User, report: BulkReport):
+        rows = self.document_repo.list_for_deletion(batch)
+        found = {row["id"]: row for row in rows}
+        report.set([rid for rid in batch if rid not in found], NOT_FOUND)
+
+        allowed = [
+            row for row in rows
+            if performed_by.is_admin or row.get("uploaded_by") == performed_by.id
+        ]
+        ids = [row["id"] for row in allowed]
+        allowed_ids = set(ids)
+        report.set([rid for rid in found if rid not in allowed_ids], FORBIDDEN)
+        if not ids:
+            return
+
+        # Un único delete en ChromaDB por colección para todo el lote
+        collections = [self.collection_name] if self.collection_name else self.chromadb.get_write_collection_names()
+        for collection_name in collections:
+            try:
+                self.chromadb.delete_where(
+                    collection_name,
+                    {"document_id": {"$in": [str(rid) for rid in ids]}}
+                )
+            except Exception as e:
+                logger.error(f"Error al eliminar chunks de {len(ids)} documentos en {collection_name}: {str(e)}")
+
+        deleted = set(self.document_repo.delete_many(ids))
+        report.set([rid for rid in ids if rid in deleted], DELETED)
+        report.set([rid for rid in ids if rid not in deleted], FAILED, "No se eliminó en la base de datos")
+
+        self._delete_local_files([row.get("file_url") for row in allowed if row["id"] in deleted])
+        invalidate_statistics(*{row.get("uploaded_by") for row in allowed if row["id"] in deleted})
+
+    def _delete_chats_batch(self, batch: List[int], performed_by: User, report: BulkReport):
+        owners = self.chat_repo.get_owners(batch)
+        report.set([rid for rid in batch if rid not in owners], NOT_FOUND)
+
+        ids = [rid for rid, owner in owners.items() if performed_by.is_admin or owner == performed_by.id]
+        report.set([rid for rid in owners if rid not in ids], FORBIDDEN)
+        if not ids:
+            return
+
+        self.message_repo.delete_messages_by_chats(ids)
+        deleted = set(self.chat_repo.delete_many(ids))
+        report.set([rid for rid in ids if rid in deleted], DELETED)
+        report.set([rid for rid in ids if rid not in deleted], FAILED, "No se eliminó en la base de datos")
+        invalidate_statistics(*{owners[rid] for rid in deleted})
+
+    def _delete_users_batch(self, batch: List[int], performed_by: User, report: BulkReport):
+        if not performed_by.is_admin:
+            report.set(batch, FORBIDDEN, "Solo los administradores pueden eliminar usuarios")
+            return
+        if performed_by.id in batch:
+            report.set([performed_by.id], INVALID, "No puedes eliminarte a ti mismo")
+            batch = [rid for rid in batch if rid != performed_by.id]
+
+        existing = set(self.user_repo.get_existing_ids(batch))
+        report.set([rid for rid in batch if rid not in existing], NOT_FOUND)
+        ids = [rid for rid in batch if rid in existing]
+        if not ids:
+            return
+
+        deleted = set(self.user_repo.delete_many(ids))
+        report.set([rid for rid in ids if rid in deleted], DELETED)
+        report.set([rid for rid in ids if rid not in deleted], FAILED, "No se eliminó en la base de datos")
+        invalidate_statistics(*deleted)
+
+    def _delete_local_files(self, file_urls: List[Optional[str]]):
+        """Elimina los archivos originales (uploads/documents/{user_id}/{archivo})"""
+        removed = 0
+        for file_url in file_urls:
+            if not file_url or "/api/files/" not in file_url:
+                continue
+            relative_path = f"documents/{file_url.split('/api/files/', 1)[1]}"
+            if local_storage.delete_file(relative_path):
+                removed += 1
+        if removed:
+            logger.info(f"🗑️ {removed} archivos locales eliminados")
+
+
+@dataclass
+class BulkJob:
+    """Operación en lote ejecutada en segundo plano"""
+    job_id: str
+    operation: str
+    resource_type: str
+    total: int
+    status: str = "pending"  # pending | running | completed | failed
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "operation": self.operation,
+            "resource_type": self.resource_type,
+            "total": self.total,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at
+        }
+
+
+class BulkJobRegistry:
+    """Trabajos en lote en segundo plano (uno a la vez por hilo del pool)"""
+
+    # Trabajos terminados que se conservan para consulta
+    MAX_FINISHED_JOBS = 100
+
+    def __init__(self, max_workers: int = 1):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bulk-job")
+        self._jobs: Dict[str, BulkJob] = {}
+        self._lock = threading.Lock()
+
+    def submit_delete(
+        self,
+        engine: BulkOperationService,
+        resource_type: str,
+        resource_ids: List[int],
+        performed_by: User
+    ) -> BulkJob:
+        """Programa una eliminación en lote y devuelve el trabajo"""
+        job = BulkJob(uuid.uuid4().hex[:12], "bulk_delete", resource_type, len(resource_ids))
+        with self._lock:
+            self._prune()
+            self._jobs[job.job_id] = job
+
+        def run():
+            job.status = "running"
+            try:
+                job.result = engine.delete(resource_type, resource_ids, performed_by).to_dict()
+                job.status = "completed"
+            except Exception as e:
+                job.status = "failed"
+                job.error = str(e)
+                logger.error(f"❌ Trabajo en lote {job.job_id} fallido: {str(e)}")
+
+        self._executor.submit(run)
+        logger.info(f"🔄 Trabajo en lote {job.job_id}: eliminar {len(resource_ids)} {resource_type}")
+        return job
+
+    def get(self, job_id: str) -> BulkJob:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if not job:
+            raise NotFoundException("Trabajo en lote", job_id)
+        return job
+
+    def _prune(self):
+        finished = [job for job in self._jobs.values() if job.status in ("completed", "failed")]
+        for job in sorted(finished, key=lambda j: j.created_at)[:-self.MAX_FINISHED_JOBS]:
+            del self._jobs[job.job_id]
+
+# Instancia global
+bulk_job_registry = BulkJobRegistry()
@@ -5,6 +5,7 @@ import logging
 from typing import List, Dict, Any, AsyncGenerator
 from src.utils.ai_connector import get_openai_connector
 from src.core.exceptions import ExternalServiceException
+from src.core.tracing import tracer
 
 logger = logging.getLogger(__name__)
 
@@ -36,35 +37,38 @@ class ChatStreamingService:
         try:
             # Implementar búsqueda de contexto en documentos
             context = []
-            if document_ids:
-                from src.services.document_service import DocumentService
-                from src.utils.chromadb_connector import ChromaDBConnector
+            # Búsqueda fuera de los yield: el span activo no cruza el generador
+            with tracer.child_span("rag.retrieve", documents=len(document_ids or [])) as span:
+                if document_ids:
+                    from src.services.document_service import DocumentService
+                    from src.utils.chromadb_connector import ChromaDBConnector
                 
-                document_service = DocumentService()
-                chromadb = ChromaDBConnector()
+                    document_service = DocumentService()
+                    chromadb = ChromaDBConnector()
                 
-                # Buscar chunks relevantes en los documentos especificados
-                relevant_chunks = chromadb.search_relevant_chunks(
-                    query=question,
-                    document_ids=document_ids,
-                    n_results=5  # Número de chunks más relevantes
-                )
+                    # Buscar chunks relevantes en los documentos especificados
+                    relevant_chunks = chromadb.search_relevant_chunks(
+                        query=question,
+                        document_ids=document_ids,
+                        n_results=5  # Número de chunks más relevantes
+                    )
                 
-                # Construir contexto a partir de los chunks encontrados
-                for chunk in relevant_chunks:
-                    document_id = chunk.get('metadata', {}).get('document_id')
-                    content = chunk.get('content', '')
+                    # Construir contexto a partir de los chunks encontrados
+                    for chunk in relevant_chunks:
+                        document_id = chunk.get('metadata', {}).get('document_id')
+                        content = chunk.get('content', '')
                     
-                    # Obtener información del documento
-                    try:
-                        document = document_service.get_document(document_id, user_id)
-                        doc_title = document.title
-                    except:
-                        doc_title = f"Documento {document_id}"
+                        # Obtener información del documento
+                        try:
+                            document = document_service.get_document(document_id, user_id)
+                            doc_title = document.title
+                        except:
+                            doc_title = f"Documento {document_id}"
                     
-                    context.append(f"[{doc_title}]: {content}")
+                        context.append(f"[{doc_title}]: {content}")
                 
-                logger.info(f"Encontrados {len(context)} chunks relevantes para la pregunta")
+                    logger.info(f"Encontrados {len(context)} chunks relevantes para la pregunta")
+                    span.set_attribute("chunks", len(context))
             
             # Preparar mensajes para el modelo
             messages = [
@@ -1,6 +1,7 @@
 """
 Servicio para manejar la lógica de negocio de WebSocket
 """
+import asyncio
 import logging
 from typing import Optional, Dict, Any, List
 from datetime import datetime
@@ -9,6 +10,7 @@ from src.repositories.chat_repository import ChatRepository
 from src.repositories.user_repository import UserRepository
 from src.models.domain import Chat, Message, User
 from src.core.exceptions import NotFoundException, ForbiddenException, DatabaseException
+from src.services.chat.message_persistence_queue import message_persistence_queue
 
 logger = logging.getLogger(__name__)
 
@@ -132,6 +134,43 @@ class ChatWebSocketService:
             logger.error(f"Error guardando mensaje: {str(e)}")
             raise Exception(f"Error al guardar mensaje: {str(e)}")
         
+    async def queue_message(
+        self,
+        chat_id: int,
+        question: str,
+        answer: str,
+        user_id: int,
+        processing_time: float
+    ) -> asyncio.Future:
+        """
+        Encola un mensaje en la persistencia diferida (write-behind).
+
+        A diferencia de save_message no espera al insert: el mensaje queda
+        durable en el WAL local y se inserta en lote poco después. El acceso
+        al chat ya se verificó al abrir la conexión WebSocket.
+
+        Args:
+            chat_id: ID del chat
+            question: Pregunta del usuario
+            answer: Respuesta generada
+            user_id: ID del usuario
+            processing_time: Tiempo de procesamiento
+
+        Returns:
+            asyncio.Future: Se resuelve con el ID del mensaje cuando se guarda
+        """
+        future = await message_persistence_queue.enqueue(
+            chat_id=chat_id,
+            question=question,
+            answer=answer
+        )
+
+        logger.info(
+            f"Mensaje encolado - Chat: {chat_id}, Usuario: {user_id}, "
+            f"Tiempo procesamiento: {processing_time:.2f}s"
+        )
+        return future
+
     def process_message(
         self,
         chat_id: int,
@@ -0,0 +1,254 @@
+"""
+Matcher precompilado de intenciones y preguntas fuera de contexto.
+
+Las tablas de patrones viven en `data/context_patterns.json` (o en el
+fichero indicado por CONTEXT_PATTERNS_PATH) y se compilan una sola vez:
+
+- Todos los patrones, sin acentos y en minúsculas, forman una única
+  expresión regular. Se buscan a partir de inicio de palabra, de modo que
+  "suma" no coincide dentro de "resuma" pero "receta" sí cubre "recetas".
+- Las palabras de más de 3 letras de los patrones fuera de contexto forman
+  un índice de tokens (búsqueda O(1) por palabra).
+
+Clasificar un texto es una sola pasada: se normaliza una vez y se obtienen
+todas las etiquetas que coinciden. El fichero se recarga en caliente cuando
+cambia su fecha de modificación.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATTERNS_PATH = Path(__file__).parent / "data" / "context_patterns.json"
+
+# Separador entre patrones en el índice de "texto contenido en un patrón"
+_SEPARATOR = "\x00"
+
+
+def fold(text: str) -> str:
+    """Pasa a minúsculas y elimina acentos (la ñ se compara como n)"""
+    return "".join(
+        c for c in unicodedata.normalize("NFD", text.lower())
+        if unicodedata.category(c) != "Mn"
+    )
+
+
+@dataclass(frozen=True)
+class MatchResult:
+    """Resultado de clasificar un texto"""
+    labels: FrozenSet[str]
+    out_of_context: Optional[str]
+
+    def has(self, label: str) -> bool:
+        return label in self.labels
+
+
+@dataclass(frozen=True)
+class _CompiledPatterns:
+    """Tablas compiladas; se reemplazan completas en cada recarga"""
+    regex: Optional[re.Pattern]
+    phrase_labels: Dict[str, Tuple[str, ...]]
+    phrase_categories: Dict[str, int]
+    token_categories: Dict[str, int]
+    pattern_index: str
+    pattern_offsets: List[Tuple[int, int]]
+    categories: List[str]
+    out_of_context: Dict[str, Dict]
+    intents: Dict[str, List[str]]
+
+
+class IntentMatcher:
+    """Clasificador de texto con tablas compiladas y recarga en caliente"""
+
+    def __init__(self, path: Optional[str] = None, reload_interval: Optional[float] = None):
+        self.path = Path(path or settings.CONTEXT_PATTERNS_PATH or DEFAULT_PATTERNS_PATH)
+        self.reload_interval = (
+            settings.CONTEXT_PATTERNS_RELOAD_SECONDS if reload_interval is None else reload_interval
+        )
+        self._lock = threading.Lock()
+        self._last_check = time.monotonic()
+        self._mtime: Optional[float] = os.stat(self.path).st_mtime
+        self._compiled = self._load()
+
+    @property
+    def out_of_context_responses(self) -> Dict[str, Dict]:
+        self._maybe_reload()
+        return self._compiled.out_of_context
+
+    def intent_phrases(self, label: str) -> List[str]:
+        self._maybe_reload()
+        return self._compiled.intents.get(label, [])
+
+    def match(self, text: str) -> MatchResult:
+        """
+        Clasifica un texto en una sola pasada.
+
+        Returns:
+            MatchResult: Etiquetas de intención encontradas y la categoría
+                fuera de contexto de mayor prioridad (None si no hay)
+        """
+        self._maybe_reload()
+        compiled = self._compiled
+        folded = fold(text.strip())
+
+        labels = set()
+        best = len(compiled.categories)
+
+        if compiled.regex is not None:
+            for found in compiled.regex.finditer(folded):
+                phrase = found.group(1)
+                labels.update(compiled.phrase_labels[phrase])
+                best = min(best, compiled.phrase_categories.get(phrase, best))
+
+        for token in folded.split():
+            best = min(best, compiled.token_categories.get(token, best))
+
+        # Texto que es el comienzo de alguna palabra de un patrón ("buenos" -> "buenos días")
+        if folded and best > 0:
+            position = compiled.pattern_index.find(" " + folded)
+            if position >= 0:
+                best = min(best, self._category_at(compiled, position))
+
+        category = compiled.categories[best] if best < len(compiled.categories) else None
+        return MatchResult(labels=frozenset(labels), out_of_context=category)
+
+    def reload(self) -> bool:
+        """
+        Recarga el fichero de patrones. Si el fichero no es válido se
+        mantienen las tablas anteriores.
+
+        Returns:
+            bool: True si se cargaron las nuevas tablas
+        """
+        try:
+            # La fecha se registra antes de leer: un fichero inválido no se reintenta hasta que cambie
+            self._mtime = os.stat(self.path).st_mtime
+            compiled = self._load()
+        except Exception as e:
+            logger.error(f"IntentMatcher: no se pudo recargar {self.path}: {str(e)}")
+            return False
+        self._compiled = compiled
+        logger.info(f"IntentMatcher: patrones recargados desde {self.path}")
+        return True
+
+    def _maybe_reload(self):
+        """Comprueba (como mucho cada `reload_interval` s) si el fichero cambió"""
+        if self.reload_interval <= 0:
+            return
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return
+        with self._lock:
+            if now - self._last_check < self.reload_interval:
+                return
+            self._last_check = now
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except OSError:
+                return
+            if mtime != self._mtime:
+                self.reload()
+
+    def _load(self) -> _CompiledPatterns:
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return self._compile(data.get("out_of_context", {}), data.get("intents", {}))
+
+    @staticmethod
+    def _compile(out_of_context: Dict[str, Dict], intents: Dict[str, List[str]]) -> _CompiledPatterns:
+        categories = list(out_of_context)
+
+        # Etiquetas y prioridad de cada frase
+        labels: Dict[str, set] = {}
+        phrase_categories: Dict[str, int] = {}
+        token_categories: Dict[str, int] = {}
+        pattern_offsets: List[Tuple[int, int]] = []
+        index_parts: List[str] = []
+        offset = 0
+
+        for priority, category in enumerate(categories):
+            for pattern in out_of_context[category].get("patterns", []):
+                phrase = fold(pattern)
+                labels.setdefault(phrase, set())
+                phrase_categories.setdefault(phrase, priority)
+                for word in phrase.split():
+                    if len(word) > 3:
+                        token_categories.setdefault(word, priority)
+
+                pattern_offsets.append((offset, priority))
+                part = _SEPARATOR + " " + phrase + " "
+                index_parts.append(part)
+                offset += len(part)
+
+        for label, phrases in intents.items():
+            for phrase in phrases:
+                labels.setdefault(fold(phrase), set()).add(label)
+
+        # En una misma posición la alternancia devuelve solo la frase más larga:
+        # se le asignan también las etiquetas de las frases que son prefijo suyo
+        phrases = sorted(labels, key=len, reverse=True)
+        phrase_labels: Dict[str, Tuple[str, ...]] = {}
+        for phrase in phrases:
+            merged = set()
+            for other in phrases:
+                if phrase.startswith(other):
+                    merged |= labels[other]
+                    if other in phrase_categories:
+                        phrase_categories[phrase] = min(
+                            phrase_categories.get(phrase, phrase_categories[other]),
+                            phrase_categories[other]
+                        )
+            phrase_labels[phrase] = tuple(sorted(merged))
+
+        regex = None
+        if phrases:
+            alternation = "|".join(re.escape(phrase) for phrase in phrases)
+            regex = re.compile(r"\b(?=(" + alternation + r"))")
+
+        return _CompiledPatterns(
+            regex=regex,
+            phrase_labels=phrase_labels,
+            phrase_categories=phrase_categories,
+            token_categories=token_categories,
+            pattern_index="".join(index_parts),
+            pattern_offsets=pattern_offsets,
+            categories=categories,
+            out_of_context=out_of_context,
+            intents={label: list(phrases) for label, phrases in intents.items()}
+        )
+
+    @staticmethod
+    def _category_at(compiled: _CompiledPatterns, position: int) -> int:
+        """Categoría del patrón que contiene la posición dada del índice"""
+        low, high = 0, len(compiled.pattern_offsets) - 1
+        while low < high:
+            mid = (low + high + 1) // 2
+            if compiled.pattern_offsets[mid][0] <= position:
+                low = mid
+            else:
+                high = mid - 1
+        return compiled.pattern_offsets[low][1]
+
+
+_matcher: Optional[IntentMatcher] = None
+_matcher_lock = threading.Lock()
+
+
+def get_intent_matcher() -> IntentMatcher:
+    """Devuelve el matcher compartido (se compila en el primer uso)"""
+    global _matcher
+    if _matcher is None:
+        with _matcher_lock:
+            if _matcher is None:
+                _matcher = IntentMatcher()
+    return _matcher
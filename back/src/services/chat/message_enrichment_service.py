@@ -8,6 +8,7 @@ from datetime import datetime
 from src.services.document_service import DocumentService
 from src.utils.chromadb_connector import ChromaDBConnector
 from src.core.exceptions import ExternalServiceException, DatabaseException
+from src.services.chat.intent_matcher import get_intent_matcher
 
 logger = logging.getLogger(__name__)
 
@@ -81,37 +82,9 @@ class MessageEnrichmentService:
         Returns:
             bool: True si es una consulta sobre documentos
         """
-        message_lower = message.lower().strip()
-        
-        # Palabras clave que indican consulta sobre documentos
-        document_keywords = [
-            "documento", "archivo", "pdf", "txt", "texto",
-            "resume", "resumir", "resumen", "busca", "buscar", 
-            "encuentra", "analiza", "analizar", "información",
-            "tramite", "trámite", "contenido", "dice", "explica",
-            "habla", "trata", "menciona", "contiene", "sobre"
-        ]
-        
-        # Frases específicas sobre listar documentos
-        list_phrases = [
-            "qué documentos tengo",
-            "que documentos tengo", 
-            "mis documentos",
-            "listar documentos",
-            "mostrar documentos",
-            "cuáles son mis documentos",
-            "documentos disponibles",
-            "qué archivos tengo",
-            "documentos subidos"
-        ]
-        
-        # Verificar frases completas primero
-        for phrase in list_phrases:
-            if phrase in message_lower:
-                return True
-        
-        # Verificar palabras clave
-        return any(keyword in message_lower for keyword in document_keywords)
+        # Frases de listar documentos o palabras clave de documentos (matcher precompilado)
+        intent = get_intent_matcher().match(message)
+        return intent.has("document_list") or intent.has("document")
     
     async def build_document_list_response(self, user_id: int) -> str:
         """
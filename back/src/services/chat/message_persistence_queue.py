@@ -0,0 +1,496 @@
+"""
+Persistencia diferida (write-behind) de mensajes de chat.
+
+Guardar cada mensaje con un insert propio añade un viaje a la base de datos
+al final de cada turno de chat. MessagePersistenceQueue acepta el mensaje,
+lo escribe en un WAL local (un JSON por línea) y lo inserta más tarde junto
+con otros mensajes en un único insert multi-fila, cuando se acumulan
+`batch_size` filas o pasan `flush_interval_ms`, lo que ocurra primero.
+
+El streaming por WebSocket usa enqueue() y no espera al insert; la API REST
+(POST /chats/{id}/messages) usa save(), que espera al lote para devolver el
+ID. ChatService.create_message, síncrono (respuesta sin streaming por
+WebSocket), sigue insertando directamente.
+
+Formato del WAL:
+    {"op": "put", "key": ..., "row": {...}}   mensaje aceptado
+    {"op": "ack", "keys": [...]}              mensajes ya insertados
+
+Al arrancar se reprocesan los "put" sin "ack". Cuando no queda nada
+pendiente el fichero se trunca.
+
+Si un lote falla porque la base de datos no está disponible se reintenta
+entero con espera exponencial. Si la base de datos lo rechaza (una fila
+inválida, p. ej. de un chat ya borrado) se inserta mensaje a mensaje: los
+que vuelven a fallar se apartan a message_wal_dead_letter.jsonl (junto a
+MESSAGE_WAL_PATH) con su error y reciben "ack", para que una sola fila no
+bloquee la cola ni tras reiniciar.
+
+Cada proceso escribe en su propio fichero (message_wal.<pid>.jsonl junto a
+MESSAGE_WAL_PATH) y lo mantiene bloqueado con flock mientras vive; así un
+worker no trunca ni reprocesa los mensajes de otro. Al arrancar, un worker
+adopta los ficheros que no tienen dueño (su proceso terminó y el bloqueo se
+liberó): copia sus "put" pendientes a su WAL y los borra.
+
+El fsync del WAL se hace en un hilo y agrupado: los mensajes que llegan
+mientras hay un fsync en curso comparten el siguiente, en lugar de bloquear
+el event loop con un fsync por mensaje. Los "ack" no esperan al fsync: si se
+pierden, la recuperación comprueba en la base de datos si el mensaje ya está.
+"""
+import asyncio
+import json
+import logging
+import os
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from src.config.settings import settings
+from src.core.circuit_breaker import is_dependency_failure
+from src.core.exceptions import AppException, CircuitOpenException
+from src.utils.date_utils import get_safe_timestamp
+
+logger = logging.getLogger(__name__)
+
+# Espera máxima entre reintentos cuando la base de datos no responde
+MAX_RETRY_DELAY = 30.0
+
+
+def _try_lock(handle) -> bool:
+    """Bloqueo exclusivo no bloqueante del fichero; se libera al cerrarlo o al morir el proceso"""
+    if fcntl is None:
+        # Sin flock (Windows, donde se ejecuta un único worker de desarrollo)
+        return True
+    try:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def _is_transient(error: BaseException) -> bool:
+    """
+    True si el error indica que la base de datos no está disponible (se
+    reintenta); False si la rechazó (la fila no se insertará nunca)
+    """
+    # Los repositorios envuelven el error original en DatabaseException
+    while True:
+        if isinstance(error, CircuitOpenException):
+            return True
+        cause = error.__cause__ or error.__context__
+        if cause is None:
+            return not isinstance(error, AppException) and is_dependency_failure(error)
+        error = cause
+
+
+@dataclass
+class PendingMessage:
+    """Mensaje aceptado y pendiente de insertar"""
+    key: str
+    row: Dict
+    future: Optional[asyncio.Future] = field(default=None, repr=False)
+
+
+class MessagePersistenceQueue:
+    """Cola write-behind de mensajes con WAL local"""
+
+    def __init__(
+        self,
+        wal_path: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        flush_interval_ms: Optional[int] = None,
+        fsync: Optional[bool] = None,
+        repository=None
+    ):
+        self.wal_path = Path(wal_path or settings.MESSAGE_WAL_PATH)
+        # WAL propio del proceso; se fija en start()
+        self.wal_file: Optional[Path] = None
+        # Mensajes que la base de datos rechaza (compartido: una línea por escritura)
+        self.dead_letter_file = self.wal_path.with_name(
+            f"{self.wal_path.stem}_dead_letter{self.wal_path.suffix}"
+        )
+        self.batch_size = max(1, batch_size or settings.MESSAGE_PERSIST_BATCH_SIZE)
+        self.flush_interval = max(
+            1, flush_interval_ms if flush_interval_ms is not None else settings.MESSAGE_PERSIST_FLUSH_MS
+        ) / 1000.0
+        self.fsync = settings.MESSAGE_WAL_FSYNC if fsync is None else fsync
+        self._repository = repository
+
+        self._buffer: List[PendingMessage] = []
+        self._wal = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._sync_waiter: Optional[asyncio.Future] = None
+        self._sync_task: Optional[asyncio.Task] = None
+        self._failures = 0
+
+        # Métricas
+        self.stats = {
+            "enqueued": 0,
+            "persisted": 0,
+            "batches": 0,
+            "failed_batches": 0,
+            "recovered": 0,
+            "dead_lettered": 0
+        }
+
+    @property
+    def repository(self):
+        if self._repository is None:
+            from src.repositories.message_repository import MessageRepository
+            self._repository = MessageRepository()
+        return self._repository
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    async def start(self):
+        """Abre el WAL, recupera mensajes pendientes e inicia el volcado periódico"""
+        if self._flush_task:
+            return
+
+        self.wal_path.parent.mkdir(parents=True, exist_ok=True)
+        self.wal_file = self.wal_path.with_name(
+            f"{self.wal_path.stem}.{os.getpid()}{self.wal_path.suffix}"
+        )
+        wal = open(self.wal_file, "a", encoding="utf-8")
+        if not _try_lock(wal):
+            wal.close()
+            raise RuntimeError(f"El WAL {self.wal_file} está en uso por otra cola")
+        self._wal = wal
+        self._wakeup = asyncio.Event()
+        self._stopping = asyncio.Event()
+
+        recovered = self._read_wal(self.wal_file) + await self._adopt_orphans()
+        if recovered:
+            await self._recover(recovered)
+
+        self._flush_task = asyncio.create_task(self._flush_loop())
+        logger.info(
+            f"MessagePersistenceQueue: iniciada (lote {self.batch_size}, "
+            f"{int(self.flush_interval * 1000)} ms, {len(recovered)} pendientes en WAL)"
+        )
+
+    async def stop(self):
+        """Vuelca lo pendiente y cierra el WAL; lo no insertado se recupera en el próximo arranque"""
+        if not self._flush_task:
+            return
+
+        # Sin cancelar el bucle: un lote a mitad de insert terminaría en su
+        # hilo igualmente y el volcado final lo insertaría otra vez
+        self._stopping.set()
+        self._wakeup.set()
+        try:
+            await self._flush_task
+        except Exception as e:
+            logger.error(f"MessagePersistenceQueue: error en el bucle de volcado: {str(e)}")
+        self._flush_task = None
+
+        await self._flush_pending()
+
+        for message in self._buffer:
+            if message.future and not message.future.done():
+                message.future.cancel()
+
+        if self._sync_task:
+            await self._sync_task
+        if not self._buffer and self._wal.tell() == 0:
+            # Nada pendiente: no se deja un fichero vacío por proceso
+            self.wal_file.unlink(missing_ok=True)
+        self._wal.close()
+        self._wal = None
+        logger.info(f"MessagePersistenceQueue: detenida ({len(self._buffer)} mensajes quedan en el WAL)")
+        self._buffer = []
+
+    async def enqueue(self, chat_id: int, question: str, answer: Optional[str]) -> asyncio.Future:
+        """
+        Acepta un mensaje para guardarlo.
+
+        El mensaje es durable en cuanto esta llamada retorna (está en el WAL).
+
+        Returns:
+            asyncio.Future: Se resuelve con el ID definitivo del mensaje cuando se inserta
+        """
+        return (await self._accept(chat_id, question, answer)).future
+
+    async def save(self, chat_id: int, question: str, answer: Optional[str]) -> Dict:
+        """
+        Acepta un mensaje y espera a que se inserte en el siguiente lote
+        (para la API REST, que devuelve el mensaje con su ID).
+
+        Returns:
+            Dict: Fila guardada con su ID definitivo
+        """
+        message = await self._accept(chat_id, question, answer)
+        return {**message.row, "id": await message.future}
+
+    async def _accept(self, chat_id: int, question: str, answer: Optional[str]) -> PendingMessage:
+        if not self._flush_task:
+            await self.start()
+
+        message = PendingMessage(
+            key=uuid.uuid4().hex,
+            row={
+                "id_chat": chat_id,
+                "question": question,
+                "answer": answer,
+                # Fecha de aceptación: conserva el orden aunque el insert sea posterior
+                "created_at": get_safe_timestamp()
+            },
+            future=asyncio.get_running_loop().create_future()
+        )
+        self._append_wal({"op": "put", "key": message.key, "row": message.row})
+
+        self._buffer.append(message)
+        self.stats["enqueued"] += 1
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+        try:
+            await self._sync_wal()
+        except OSError as e:
+            # El mensaje sigue en el buffer: solo se pierde si además cae el sistema
+            logger.error(f"MessagePersistenceQueue: error en el fsync del WAL: {str(e)}")
+
+        return message
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            "pending": len(self._buffer),
+            "consecutive_failures": self._failures
+        }
+
+    async def _flush_loop(self):
+        """Vuelca el buffer cada `flush_interval` o al completarse un lote"""
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._stopping.is_set():
+                # stop() hace el volcado final
+                break
+
+            if not await self._flush_pending():
+                # Backoff exponencial mientras la base de datos falle (stop() lo interrumpe)
+                delay = min(MAX_RETRY_DELAY, self.flush_interval * (2 ** self._failures))
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _flush_pending(self) -> bool:
+        """
+        Inserta el buffer en lotes de `batch_size`.
+
+        Returns:
+            bool: False si la base de datos no está disponible (lo no
+            insertado queda en el buffer para reintentar)
+        """
+        while self._buffer:
+            batch = self._buffer[:self.batch_size]
+            try:
+                messages = await asyncio.to_thread(
+                    self.repository.create_messages, [m.row for m in batch]
+                )
+            except Exception as e:
+                if _is_transient(e):
+                    self._record_failure(len(batch), e)
+                    return False
+                logger.warning(
+                    f"MessagePersistenceQueue: lote de {len(batch)} mensajes rechazado, "
+                    f"se insertan uno a uno: {str(e)}"
+                )
+                if not await self._flush_one_by_one(batch):
+                    return False
+                continue
+
+            self._confirm(batch, messages)
+
+        self._compact_wal()
+        return True
+
+    async def _flush_one_by_one(self, batch: List[PendingMessage]) -> bool:
+        """Inserta un lote rechazado mensaje a mensaje y aparta los que fallan"""
+        for message in batch:
+            try:
+                saved = await asyncio.to_thread(self.repository.create_messages, [message.row])
+            except Exception as e:
+                if _is_transient(e):
+                    self._record_failure(1, e)
+                    return False
+                self._dead_letter(message, e)
+                continue
+            self._confirm([message], saved)
+        return True
+
+    def _confirm(self, batch: List[PendingMessage], messages: List):
+        """Quita del buffer los mensajes insertados (los primeros) y resuelve sus futures"""
+        del self._buffer[:len(batch)]
+        self._failures = 0
+        self._append_wal({"op": "ack", "keys": [m.key for m in batch]})
+        self.stats["batches"] += 1
+        self.stats["persisted"] += len(batch)
+
+        for pending, saved in zip(batch, messages):
+            if pending.future and not pending.future.done():
+                pending.future.set_result(saved.id)
+
+    def _record_failure(self, size: int, error: Exception):
+        self._failures += 1
+        self.stats["failed_batches"] += 1
+        logger.error(
+            f"MessagePersistenceQueue: error insertando lote de {size} mensajes "
+            f"(intento {self._failures}): {str(error)}"
+        )
+
+    def _dead_letter(self, message: PendingMessage, error: Exception):
+        """Aparta un mensaje que la base de datos rechaza y lo confirma en el WAL"""
+        record = {"key": message.key, "row": message.row, "error": str(error), "failed_at": get_safe_timestamp()}
+        try:
+            with open(self.dead_letter_file, "a", encoding="utf-8") as dead_letter:
+                dead_letter.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        except OSError as e:
+            logger.error(f"MessagePersistenceQueue: no se pudo escribir en {self.dead_letter_file}: {str(e)}")
+        logger.error(
+            f"MessagePersistenceQueue: mensaje del chat {message.row.get('id_chat')} rechazado "
+            f"y apartado en {self.dead_letter_file.name}: {str(error)}"
+        )
+        self._buffer.remove(message)
+        self._append_wal({"op": "ack", "keys": [message.key]})
+        self.stats["dead_lettered"] += 1
+        if message.future and not message.future.done():
+            message.future.set_exception(error)
+
+    async def _recover(self, records: List[Dict]):
+        """Reencola los mensajes del WAL que no llegaron a insertarse"""
+        for record in records:
+            row = record["row"]
+            try:
+                # Pudo insertarse justo antes de la caída, sin llegar a escribir el ack
+                existing = await asyncio.to_thread(
+                    self.repository.find_message, row["id_chat"], row["question"], row["created_at"]
+                )
+            except Exception as e:
+                logger.warning(f"MessagePersistenceQueue: no se pudo comprobar mensaje recuperado: {str(e)}")
+                existing = None
+
+            if existing:
+                self._append_wal({"op": "ack", "keys": [record["key"]]})
+                continue
+
+            self._buffer.append(PendingMessage(key=record["key"], row=row))
+            self.stats["recovered"] += 1
+
+        logger.info(f"MessagePersistenceQueue: {self.stats['recovered']} mensajes recuperados del WAL")
+
+    async def _adopt_orphans(self) -> List[Dict]:
+        """
+        Toma los WAL de procesos que ya no existen (y el WAL compartido de
+        versiones anteriores): sus "put" pendientes pasan al WAL propio y
+        los ficheros se borran
+        """
+        candidates = [self.wal_path] + sorted(
+            self.wal_path.parent.glob(f"{self.wal_path.stem}.*{self.wal_path.suffix}")
+        )
+        adopted: List[Dict] = []
+        orphans = []
+        for path in candidates:
+            if path == self.wal_file or not path.exists():
+                continue
+            try:
+                handle = open(path, "r", encoding="utf-8")
+            except FileNotFoundError:
+                continue
+            # Con el bloqueo, el fichero debe seguir en su ruta: si no, otro
+            # worker lo adoptó y borró mientras se esperaba
+            if not _try_lock(handle) or not path.exists() or \
+                    os.stat(path).st_ino != os.fstat(handle.fileno()).st_ino:
+                handle.close()
+                continue
+            adopted.extend(self._read_records(handle))
+            orphans.append((path, handle))
+
+        for record in adopted:
+            self._append_wal(record)
+        if adopted:
+            await self._sync_wal()
+        for path, handle in orphans:
+            path.unlink(missing_ok=True)
+            handle.close()
+        if orphans:
+            logger.info(
+                f"MessagePersistenceQueue: adoptados {len(orphans)} WAL sin dueño "
+                f"({len(adopted)} mensajes pendientes)"
+            )
+        return adopted
+
+    def _read_wal(self, path: Optional[Path] = None) -> List[Dict]:
+        """Devuelve los "put" del WAL que no tienen "ack", en orden"""
+        path = path or self.wal_file or self.wal_path
+        if not path.exists():
+            return []
+        with open(path, "r", encoding="utf-8") as wal:
+            return self._read_records(wal)
+
+    @staticmethod
+    def _read_records(wal) -> List[Dict]:
+        puts: Dict[str, Dict] = {}
+        for line in wal:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Última línea cortada por la caída: el mensaje nunca se confirmó
+                continue
+            if record.get("op") == "put":
+                puts[record["key"]] = record
+            elif record.get("op") == "ack":
+                for key in record.get("keys", []):
+                    puts.pop(key, None)
+        return list(puts.values())
+
+    def _append_wal(self, record: Dict):
+        # Solo hasta la caché del sistema operativo; el fsync lo hace _sync_wal
+        self._wal.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._wal.flush()
+
+    async def _sync_wal(self):
+        """Espera a un fsync que cubra todo lo escrito hasta ahora en el WAL"""
+        if not self.fsync:
+            return
+        if self._sync_waiter is None:
+            self._sync_waiter = asyncio.get_running_loop().create_future()
+            if self._sync_task is None or self._sync_task.done():
+                self._sync_task = asyncio.create_task(self._sync_loop())
+        await asyncio.shield(self._sync_waiter)
+
+    async def _sync_loop(self):
+        """Encadena fsyncs mientras haya escrituras esperando uno"""
+        while self._sync_waiter is not None:
+            waiter, self._sync_waiter = self._sync_waiter, None
+            try:
+                await asyncio.to_thread(os.fsync, self._wal.fileno())
+            except Exception as e:
+                waiter.set_exception(e)
+            else:
+                waiter.set_result(None)
+
+    def _compact_wal(self):
+        """Trunca el WAL cuando todo lo escrito está confirmado"""
+        if self._wal and not self._buffer and self._wal.tell() > 0:
+            self._wal.truncate(0)
+            self._wal.seek(0)
+
+
+# Instancia global
+message_persistence_queue = MessagePersistenceQueue()
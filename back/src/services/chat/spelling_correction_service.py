@@ -2,25 +2,40 @@
 Servicio dedicado a la corrección ortográfica de mensajes
 """
 import re
+import threading
 import unicodedata
-from typing import Tuple, Dict, List, Optional
+from typing import Iterable, Tuple, Dict, List, Optional
 import logging
 
+from src.utils.fuzzy_index import FuzzyIndex
+
 logger = logging.getLogger(__name__)
 
+# Longitud mínima para corregir por distancia de edición (evita tocar palabras cortas)
+FUZZY_MIN_LENGTH = 5
+# A partir de esta longitud se admiten 2 ediciones; por debajo solo 1
+FUZZY_TWO_EDITS_LENGTH = 9
+# Límite de términos tomados de los títulos de documentos
+MAX_DOMAIN_TERMS = 5000
+
+# Signos de puntuación que rodean a una palabra ("¿documeto?")
+_WORD_RE = re.compile(r"^(\W*)(.*?)(\W*)$", re.UNICODE)
+
+
 class SpellingCorrectionService:
     """Servicio para corregir errores ortográficos comunes en español"""
     
     def __init__(self):
-        # Diccionario de correcciones ortográficas comunes
+        # Diccionario de correcciones ortográficas comunes.
+        # Valor str: sustitución directa. Valor lista: la primera forma es la
+        # correcta y el resto son variantes erróneas que se corrigen a ella.
         self.common_corrections = {
             # Errores comunes de acentuación
-            "que": ["qué", "que"],
-            "como": ["cómo", "como"],
-            "cuando": ["cuándo", "cuando"],
-            "donde": ["dónde", "donde"],
-            "porque": ["por qué", "porque"],
-            "quien": ["quién", "quien"],
+            "que": "qué",
+            "como": "cómo",
+            "cuando": "cuándo",
+            "donde": "dónde",
+            "quien": "quién",
             # Errores de escritura comunes
             "aver": "a ver",
             "haber": "a ver",
@@ -61,6 +76,144 @@ class SpellingCorrectionService:
             # Falta de h inicial
             (r'\b(a)(cer|ora|oy)\b', r'h\1\2'),  # acer -> hacer, aora -> ahora
         ]
+        
+        # Términos de dominio (títulos de documentos indexados)
+        self._domain_terms: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._build_indexes()
+    
+    def _build_indexes(self) -> None:
+        """
+        Precalcula los índices de búsqueda:
+        - variante sin acentos -> corrección (acierto exacto en O(1))
+        - índice de borrados del vocabulario (búsqueda aproximada en O(longitud de palabra))
+        """
+        exact: Dict[str, str] = {}
+        vocabulary: Dict[str, str] = {}
+        
+        for key, value in self.common_corrections.items():
+            if isinstance(value, str):
+                exact.setdefault(self.remove_accents(key), value)
+                continue
+            
+            canonical = value[0]
+            for variation in value:
+                # Solo las variantes de una palabra pueden coincidir con un token
+                if " " not in variation:
+                    exact.setdefault(self.remove_accents(variation.lower()), canonical)
+            if " " not in canonical:
+                vocabulary[self.remove_accents(canonical.lower())] = canonical
+        
+        for folded, term in self._domain_terms.items():
+            vocabulary.setdefault(folded, term)
+        
+        # Se reemplazan de una vez: las lecturas concurrentes ven el índice viejo o el nuevo
+        self._index = (exact, vocabulary, FuzzyIndex(vocabulary.keys(), max_distance=2))
+    
+    def add_domain_terms(self, texts: Iterable[str]) -> int:
+        """
+        Añade al vocabulario las palabras de los textos dados (p. ej. títulos de documentos).
+        
+        Se insertan en el índice vigente sin reconstruirlo: al subir un
+        documento solo se calculan los borrados de sus términos nuevos.
+        
+        Args:
+            texts: Textos de los que extraer términos
+            
+        Returns:
+            int: Número de términos nuevos
+        """
+        with self._lock:
+            new_terms = self._collect_domain_terms(texts)
+            _, vocabulary, fuzzy = self._index
+            for folded, term in new_terms.items():
+                # Primero el vocabulario: todo lo que encuentre el índice tiene entrada
+                vocabulary.setdefault(folded, term)
+                fuzzy.add(folded)
+        return len(new_terms)
+    
+    def _collect_domain_terms(self, texts: Iterable[str]) -> Dict[str, str]:
+        """Registra los términos nuevos de los textos, hasta MAX_DOMAIN_TERMS en total (con el lock)"""
+        new_terms: Dict[str, str] = {}
+        for text in texts:
+            for raw in re.findall(r"[^\W\d_]{4,}", text or ""):
+                if len(self._domain_terms) >= MAX_DOMAIN_TERMS:
+                    return new_terms
+                folded = self.remove_accents(raw.lower())
+                if folded not in self._domain_terms and folded not in self._index[0]:
+                    self._domain_terms[folded] = raw.lower()
+                    new_terms[folded] = raw.lower()
+        return new_terms
+    
+    def refresh_domain_vocabulary(self) -> int:
+        """
+        Reconstruye el vocabulario de dominio con los títulos de los documentos indexados.
+        
+        Returns:
+            int: Número de términos de dominio cargados
+        """
+        try:
+            from src.repositories.document_repository import DocumentRepository
+            titles = DocumentRepository().list_indexed_titles(limit=MAX_DOMAIN_TERMS)
+        except Exception as e:
+            logger.warning(f"No se pudo cargar el vocabulario de documentos: {str(e)}")
+            return len(self._domain_terms)
+        
+        # Se sustituye el vocabulario entero (los títulos borrados desaparecen):
+        # un único recálculo del índice en lugar de uno por término
+        with self._lock:
+            self._domain_terms = {}
+            self._collect_domain_terms(titles)
+            self._build_indexes()
+        logger.info(f"Vocabulario ortográfico: {len(self._domain_terms)} términos de {len(titles)} documentos")
+        return len(self._domain_terms)
+    
+    def correct_word(self, word: str) -> Optional[str]:
+        """
+        Corrige una palabra suelta (sin signos de puntuación).
+        
+        Args:
+            word: Palabra a corregir
+            
+        Returns:
+            Optional[str]: La corrección, o None si no hay ninguna
+        """
+        folded = self.remove_accents(word.lower())
+        exact, vocabulary, fuzzy = self._index
+        
+        # 1. Acierto exacto en la tabla de variantes (insensible a acentos)
+        correction = exact.get(folded)
+        if correction is not None:
+            return correction
+        
+        # 2. Palabras conocidas del vocabulario no se tocan
+        if folded in vocabulary:
+            return None
+        
+        # 3. Palabra más cercana del vocabulario por distancia de edición
+        if len(folded) >= FUZZY_MIN_LENGTH:
+            max_distance = 2 if len(folded) >= FUZZY_TWO_EDITS_LENGTH else 1
+            matches = fuzzy.lookup(folded, max_distance)
+            if matches:
+                best, distance = matches[0]
+                ambiguous = len(matches) > 1 and matches[1][1] == distance
+                if not ambiguous and not self._is_inflection(folded, best):
+                    return vocabulary[best]
+        
+        return None
+    
+    @staticmethod
+    def _is_inflection(word: str, candidate: str) -> bool:
+        """
+        Indica si dos palabras solo difieren en la terminación
+        ("documentos"/"documento", "buscas"/"buscar"): es flexión, no errata.
+        """
+        common = 0
+        for a, b in zip(word, candidate):
+            if a != b:
+                break
+            common += 1
+        return common >= min(len(word), len(candidate)) - 2
     
     def correct_spelling(self, text: str) -> Tuple[str, str]:
         """
@@ -74,45 +227,26 @@ class SpellingCorrectionService:
         """
         try:
             corrections_made = []
-            words = text.split()
             corrected_words = []
             
-            for word in words:
-                word_lower = word.lower()
-                corrected = False
-                
-                # Buscar en correcciones comunes directas
-                if word_lower in self.common_corrections:
-                    correction = self.common_corrections[word_lower]
-                    if isinstance(correction, str):
-                        corrected_words.append(correction)
-                        corrections_made.append(f"'{word}' → '{correction}'")
-                        corrected = True
-                
-                if not corrected:
-                    # Buscar en las listas de variaciones
-                    for correct_word, variations in self.common_corrections.items():
-                        if isinstance(variations, list):
-                            # Buscar coincidencias sin acentos
-                            word_no_accent = self.remove_accents(word_lower)
-                            for variation in variations:
-                                if self.remove_accents(variation.lower()) == word_no_accent:
-                                    corrected_words.append(variation)
-                                    if word_lower != variation.lower():
-                                        corrections_made.append(f"'{word}' → '{variation}'")
-                                    corrected = True
-                                    break
-                        if corrected:
-                            break
+            for word in text.split():
+                prefix, core, suffix = _WORD_RE.match(word).groups()
+                correction = self.correct_word(core) if core else None
                 
-                if not corrected:
+                if correction is None:
                     # Aplicar patrones de corrección
                     corrected_word = self._apply_patterns(word)
+                    corrected_words.append(corrected_word)
                     if corrected_word != word:
-                        corrected_words.append(corrected_word)
                         corrections_made.append(f"'{word}' → '{corrected_word}'")
-                    else:
-                        corrected_words.append(word)
+                    continue
+                
+                # Conservar mayúscula inicial ("Que" -> "Qué")
+                if core[:1].isupper():
+                    correction = correction[:1].upper() + correction[1:]
+                corrected_words.append(prefix + correction + suffix)
+                if core.lower() != correction.lower():
+                    corrections_made.append(f"'{core}' → '{correction}'")
             
             corrected_text = ' '.join(corrected_words)
             
@@ -207,32 +341,14 @@ class SpellingCorrectionService:
             List[str]: Lista de sugerencias
         """
         suggestions = []
-        words = text.split()
+        _, vocabulary, fuzzy = self._index
         
-        for word in words:
-            word_lower = word.lower()
-            # Buscar palabras similares en el diccionario
-            for correct_word in self.common_corrections.keys():
-                if self._is_similar(word_lower, correct_word):
-                    suggestions.append(f"¿Quisiste decir '{correct_word}'?")
+        for word in text.split():
+            folded = self.remove_accents(word.lower().strip(".,;:!?¿¡\"'()"))
+            if not folded or folded in vocabulary:
+                continue
+            # Palabras del vocabulario a distancia de edición <= 2
+            for candidate, _ in fuzzy.lookup(folded):
+                suggestions.append(f"¿Quisiste decir '{vocabulary[candidate]}'?")
         
         return suggestions
-    
-    def _is_similar(self, word1: str, word2: str) -> bool:
-        """
-        Determina si dos palabras son similares (distancia de edición).
-        
-        Args:
-            word1: Primera palabra
-            word2: Segunda palabra
-            
-        Returns:
-            bool: True si son similares
-        """
-        # Implementación simple de distancia de Levenshtein
-        if abs(len(word1) - len(word2)) > 2:
-            return False
-        
-        # Comparar caracteres
-        differences = sum(c1 != c2 for c1, c2 in zip(word1, word2))
-        return differences <= 2
@@ -0,0 +1,161 @@
+"""
+Agrupación adaptativa de fragmentos de streaming.
+
+Gemini entrega la respuesta en fragmentos muy pequeños (a veces una sola
+palabra). Enviar cada fragmento como un frame WebSocket independiente
+multiplica el número de frames, los bytes de cabecera y el coste de CPU.
+StreamCoalescer agrupa los fragmentos y emite un lote cuando se supera un
+umbral de tamaño o de tiempo, lo que ocurra primero.
+"""
+import asyncio
+import time
+from typing import AsyncGenerator, AsyncIterator, Callable, List, Optional
+
+# Marcador interno de fin del generador de origen
+_END = object()
+
+
+class StreamCoalescer:
+    """
+    Acumula fragmentos de texto y los libera en lotes.
+
+    El texto completo de la respuesta se acumula en una lista y se une una
+    sola vez al final (evita el coste cuadrático de `full_response += chunk`).
+    """
+
+    def __init__(
+        self,
+        flush_bytes: int = 64,
+        flush_interval_ms: int = 30,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            flush_bytes: Tamaño (en bytes UTF-8) a partir del cual se libera un lote
+            flush_interval_ms: Tiempo máximo que un fragmento puede esperar en el buffer
+            clock: Reloj monotónico (inyectable para tests)
+        """
+        self.flush_bytes = max(1, flush_bytes)
+        self.flush_interval = max(0, flush_interval_ms) / 1000.0
+        self._clock = clock
+
+        # Fragmentos pendientes de enviar
+        self._pending: List[str] = []
+        self._pending_bytes = 0
+        self._pending_since: Optional[float] = None
+
+        # Respuesta completa
+        self._parts: List[str] = []
+
+        # Métricas
+        self.fragments_in = 0
+        self.frames_out = 0
+
+    @property
+    def full_text(self) -> str:
+        """Texto completo recibido hasta el momento"""
+        return "".join(self._parts)
+
+    @property
+    def has_pending(self) -> bool:
+        return bool(self._pending)
+
+    def add(self, fragment: str) -> Optional[str]:
+        """
+        Añade un fragmento al buffer.
+
+        Returns:
+            El lote a enviar si se alcanzó algún umbral, None en caso contrario
+        """
+        if not fragment:
+            return None
+
+        self.fragments_in += 1
+        self._parts.append(fragment)
+        self._pending.append(fragment)
+        self._pending_bytes += len(fragment.encode("utf-8"))
+        if self._pending_since is None:
+            self._pending_since = self._clock()
+
+        if self._pending_bytes >= self.flush_bytes or self.time_to_deadline() <= 0:
+            return self.flush()
+        return None
+
+    def time_to_deadline(self) -> Optional[float]:
+        """Segundos que faltan para liberar por tiempo (None si no hay pendientes)"""
+        if self._pending_since is None:
+            return None
+        return self.flush_interval - (self._clock() - self._pending_since)
+
+    def flush(self) -> Optional[str]:
+        """Libera el lote pendiente, si lo hay"""
+        if not self._pending:
+            return None
+
+        batch = "".join(self._pending)
+        self._pending = []
+        self._pending_bytes = 0
+        self._pending_since = None
+        self.frames_out += 1
+        return batch
+
+    async def coalesce(self, fragments: AsyncIterator[str]) -> AsyncGenerator[str, None]:
+        """
+        Envuelve un generador asíncrono de fragmentos y produce lotes.
+
+        El generador de origen se consume en una tarea aparte para que el
+        umbral de tiempo se respete aunque el modelo tarde en enviar el
+        siguiente fragmento.
+
+        Args:
+            fragments: Generador asíncrono de fragmentos (p. ej. stream de Gemini)
+
+        Yields:
+            str: Lotes de texto listos para enviar
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        error: List[BaseException] = []
+
+        async def pump():
+            try:
+                async for fragment in fragments:
+                    await queue.put(fragment)
+            except Exception as e:
+                error.append(e)
+            finally:
+                await queue.put(_END)
+
+        producer = asyncio.create_task(pump())
+        try:
+            while True:
+                timeout = self.time_to_deadline()
+                try:
+                    if not queue.empty():
+                        # Ráfaga: evitar el coste de wait_for si ya hay datos
+                        item = queue.get_nowait()
+                    elif timeout is None:
+                        item = await queue.get()
+                    else:
+                        item = await asyncio.wait_for(queue.get(), max(0.0, timeout))
+                except asyncio.TimeoutError:
+                    batch = self.flush()
+                    if batch:
+                        yield batch
+                    continue
+
+                if item is _END:
+                    break
+
+                batch = self.add(item)
+                if batch:
+                    yield batch
+
+            tail = self.flush()
+            if tail:
+                yield tail
+
+            if error:
+                raise error[0]
+        finally:
+            if not producer.done():
+                producer.cancel()
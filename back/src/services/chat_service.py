@@ -21,6 +21,8 @@ from src.services.chat.spelling_correction_service import SpellingCorrectionServ
 from src.services.chat.context_detection_service import ContextDetectionService
 from src.services.chat.message_enrichment_service import MessageEnrichmentService
 from src.services.chat.ai_response_service import AIResponseService
+from src.services.statistics_cache import invalidate_statistics
+from src.core.tracing import traced
 
 from src.core.exceptions import (
     NotFoundException,
@@ -86,6 +88,7 @@ class ChatService:
                 name_chat=name_chat,
                 user_id=user_id
             )
+            invalidate_statistics(user_id)
             
             # Convertir a esquema de respuesta
             return self._map_to_chat_response(chat)
@@ -235,6 +238,7 @@ class ChatService:
             if not success:
                 raise NotFoundException("Chat", chat_id)
             
+            invalidate_statistics(user_id)
             return {
                 "status": "success",
                 "message": f"Chat con ID {chat_id} eliminado correctamente",
@@ -301,6 +305,7 @@ class ChatService:
             logger.error(f"Error en servicio al obtener mensajes del chat {chat_id}: {str(e)}")
             raise DatabaseException(f"Error al obtener mensajes: {str(e)}")
     
+    @traced("chat.create_message")
     def create_message(self, chat_id: int, message_data: MessageCreate, user_id: int) -> ChatMessage:
         """
         Crea un nuevo mensaje en un chat y obtiene respuesta del modelo de IA,
@@ -329,7 +334,9 @@ class ChatService:
             
             # 2. Detección de contexto usando servicio especializado
             question_to_process = corrected_question if correction_msg else original_question
-            is_out_of_context, context_category = self.context_service.detect_out_of_context(question_to_process)
+            # Una sola pasada del matcher precompilado: fuera de contexto + intenciones
+            intent = self.context_service.analyze(question_to_process)
+            is_out_of_context, context_category = intent.out_of_context is not None, intent.out_of_context
             
             # Si es pregunta fuera de contexto, responder apropiadamente
             if is_out_of_context:
@@ -356,17 +363,8 @@ class ChatService:
             # 4. Obtener mensajes previos para contexto
             previous_messages = self.message_repository.get_messages_by_chat(chat_id)
             
-            question_lower = question_to_process.lower().strip()
-            
-            # 5. Detectar preguntas sobre listar documentos
-            document_list_queries = [
-                "qué documentos tengo", "que documentos tengo", "mis documentos",
-                "listar documentos", "mostrar documentos", "cuáles son mis documentos",
-                "documentos disponibles", "qué archivos tengo", "documentos subidos"
-            ]
-            
-            # Si pregunta por listar sus documentos
-            if any(phrase in question_lower for phrase in document_list_queries):
+            # 5. Si pregunta por listar sus documentos
+            if intent.has("document_list"):
                 logger.info(f"Usuario {user_id} pregunta por sus documentos")
                 try:
                     all_documents = self.document_service.list_user_documents(user_id, limit=100)
@@ -379,7 +377,7 @@ class ChatService:
                     raise DatabaseException("Error al obtener la lista de documentos")
             
             # 6. Detectar si es pregunta sobre contenido de documentos
-            elif self._is_document_question(question_to_process):
+            elif intent.has("document_question"):
                 if document_ids and len(document_ids) > 0:
                     # Si hay documentos seleccionados, usar RAG
                     try:
@@ -708,20 +706,7 @@ class ChatService:
         Returns:
             bool: True si es sobre documentos
         """
-        text_lower = text.lower().strip()
-        
-        document_keywords = [
-            "documento", "archivo", "pdf", "txt", "texto",
-            "resume", "resumir", "resumen", "busca", "buscar", 
-            "encuentra", "analiza", "analizar", "información",
-            "tramite", "trámite", "contenido", "dice", "explica",
-            "habla", "trata", "menciona", "contiene", "sobre",
-            "este", "seleccion", "que va", "de que va", "que dice",
-            "que contiene", "que hay en", "cuál es", "cuáles son",
-            "tema", "asunto", "materia", "qué es", "que es"
-        ]
-        
-        return any(keyword in text_lower for keyword in document_keywords)
+        return self.context_service.analyze(text).has("document_question")
     
     def _build_document_list_response(self, documents: List) -> str:
         """
@@ -0,0 +1,204 @@
+"""
+Monitor de dependencias: comprueba Supabase, ChromaDB y Gemini en segundo
+plano cada HEALTH_CHECK_INTERVAL_SECONDS y guarda el resultado.
+
+/api/health/ready y /api/health/ sirven ese resultado en lugar de consultar
+las dependencias en cada sondeo del balanceador (que con varios workers y
+sondeos cada pocos segundos era carga propia). Cada comprobación alimenta el
+circuito de su dependencia: un fallo cuenta como fallo y un éxito lo cierra,
+de modo que el circuito se recupera aunque no llegue tráfico.
+
+Las comprobaciones son peticiones HTTP con urllib y no usan los SDKs de
+Supabase, ChromaDB ni Gemini: el monitor no carga esos SDKs en el worker
+antes de que los necesite una petición real.
+"""
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import logging
+import os
+import time
+import urllib.request
+
+from src.config.settings import settings
+from src.core.circuit_breaker import breakers, probing
+
+logger = logging.getLogger(__name__)
+
+UP = "up"
+DOWN = "down"
+UNKNOWN = "unknown"
+UNCONFIGURED = "unconfigured"
+
+# Sin ellas el worker no puede servir tráfico; sin Gemini solo falla el chat
+CRITICAL_DEPENDENCIES = ("supabase", "chroma")
+
+
+def _get(url: str, headers: Optional[Dict[str, str]] = None):
+    """GET que lanza excepción si no hay respuesta o el código no es 2xx"""
+    request = urllib.request.Request(url, headers=headers or {})
+    with urllib.request.urlopen(request, timeout=settings.HEALTH_CHECK_TIMEOUT_SECONDS):
+        pass
+
+
+def check_supabase():
+    key = settings.SUPABASE_SERVICE_KEY or settings.SUPABASE_KEY
+    _get(
+        f"{settings.SUPABASE_URL.rstrip('/')}/rest/v1/users?select=id&limit=1",
+        {"apikey": key, "Authorization": f"Bearer {key}"}
+    )
+
+
+def check_chroma():
+    from src.utils.chromadb_connector import chroma_address
+    host, port = chroma_address()
+    _get(f"http://{host}:{port}/api/v1/heartbeat")
+
+
+def check_gemini() -> Optional[str]:
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        return UNCONFIGURED
+    model_name = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+    # La clave va en cabecera para que no aparezca en los mensajes de error
+    _get(
+        f"https://generativelanguage.googleapis.com/v1beta/models/{model_name}",
+        {"x-goog-api-key": api_key}
+    )
+    return None
+
+
+DEFAULT_CHECKS: Dict[str, Callable[[], Optional[str]]] = {
+    "supabase": check_supabase,
+    "chroma": check_chroma,
+    "gemini": check_gemini,
+}
+
+
+class DependencyMonitor:
+    """Comprobaciones periódicas de las dependencias con el resultado en caché"""
+
+    def __init__(
+        self,
+        checks: Optional[Dict[str, Callable[[], Optional[str]]]] = None,
+        interval: Optional[float] = None,
+        timeout: Optional[float] = None
+    ):
+        self.checks = checks or DEFAULT_CHECKS
+        self.interval = settings.HEALTH_CHECK_INTERVAL_SECONDS if interval is None else interval
+        self.timeout = settings.HEALTH_CHECK_TIMEOUT_SECONDS if timeout is None else timeout
+        self._results: Dict[str, Dict[str, Any]] = {
+            name: {"status": UNKNOWN, "checked_at": None} for name in self.checks
+        }
+        self._checked_at = 0.0
+        # Comprobaciones que siguen en su hilo tras agotar el timeout
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Arranca el bucle periódico; la primera comprobación no retrasa el startup"""
+        if self._task or self.interval <= 0:
+            return
+        self._task = asyncio.create_task(self._run(), name="dependency-monitor")
+        logger.info(f"🩺 Monitor de dependencias iniciado (cada {self.interval:.0f} s)")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.check_all()
+            except Exception as e:
+                logger.error(f"❌ Error en el monitor de dependencias: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def check_all(self) -> Dict[str, Any]:
+        """Comprueba todas las dependencias a la vez"""
+        await asyncio.gather(*(self._check(name) for name in self.checks))
+        self._checked_at = time.monotonic()
+        return self.snapshot()
+
+    async def _check(self, name: str):
+        previous = self._in_flight.get(name)
+        if previous is not None and not previous.done():
+            # La anterior sigue colgada en su hilo: no se acumulan hilos
+            self._store(name, DOWN, None, f"Sin respuesta en más de {self.timeout:.0f} s")
+            return
+
+        def run():
+            with probing():
+                return self.checks[name]()
+
+        started = time.perf_counter()
+        future = asyncio.ensure_future(asyncio.to_thread(run))
+        self._in_flight[name] = future
+        breaker = breakers.get(name)
+        try:
+            outcome = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            error = TimeoutError(f"Sin respuesta en {self.timeout:.0f} s")
+            breaker.record_probe(error)
+            self._store(name, DOWN, None, str(error))
+        except Exception as e:
+            breaker.record_probe(e)
+            self._store(name, DOWN, None, f"{type(e).__name__}: {e}")
+        else:
+            if outcome == UNCONFIGURED:
+                self._store(name, UNCONFIGURED, None, None)
+                return
+            breaker.record_probe()
+            self._store(name, UP, (time.perf_counter() - started) * 1000, None)
+
+    def _store(self, name: str, status: str, latency_ms: Optional[float], error: Optional[str]):
+        previous = self._results.get(name, {}).get("status")
+        self._results[name] = {
+            "status": status,
+            "latency_ms": round(latency_ms, 1) if latency_ms is not None else None,
+            "checked_at": datetime.now(timezone.utc).isoformat(),
+            "error": error,
+        }
+        if status == DOWN and previous != DOWN:
+            logger.warning(f"🩺 Dependencia {name} caída: {error}")
+        elif status == UP and previous == DOWN:
+            logger.info(f"🩺 Dependencia {name} recuperada")
+
+    async def status(self, max_age: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Último resultado. Si es más antiguo que max_age (el monitor no está
+        en marcha, p. ej. en tests o con el intervalo a 0) se refresca antes,
+        con una sola comprobación aunque lleguen varios sondeos a la vez
+        """
+        if max_age is not None and time.monotonic() - self._checked_at > max_age:
+            if self._refresh_lock is None:
+                self._refresh_lock = asyncio.Lock()
+            async with self._refresh_lock:
+                if time.monotonic() - self._checked_at > max_age:
+                    await self.check_all()
+        return self.snapshot()
+
+    def snapshot(self) -> Dict[str, Any]:
+        dependencies = {
+            name: {**result, "circuit": breakers.get(name).to_dict()["state"]}
+            for name, result in self._results.items()
+        }
+        critical_up = all(
+            dependencies[name]["status"] == UP for name in CRITICAL_DEPENDENCIES if name in dependencies
+        )
+        degraded = any(result["status"] == DOWN for result in dependencies.values())
+        return {
+            "status": "ready" if critical_up and not degraded else "degraded" if critical_up else "not_ready",
+            "ready": critical_up,
+            "dependencies": dependencies,
+        }
+
+
+# Instancia global
+dependency_monitor = DependencyMonitor()
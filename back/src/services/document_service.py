@@ -16,6 +16,7 @@ from datetime import datetime, UTC, timezone
 from src.config.database import get_supabase_client
 import concurrent.futures
 import string
+import zlib
 
 # Importaciones de tu proyecto
 from src.utils.chromadb_connector import ChromaDBConnector
@@ -25,6 +26,9 @@ from src.repositories.user_repository import UserRepository
 from src.models.domain import Document
 from src.services.local_storage_service import local_storage
 from src.services.signed_url_service import signed_url_service
+from src.services.statistics_cache import invalidate_statistics
+from src.core.tracing import traced
+from src.services.reindex_service import reindex_service, content_hash, chunk_hash, chunk_ids, ReindexJob
 
 # Importar excepciones personalizadas
 from src.core.exceptions import (
@@ -40,6 +44,11 @@ from src.core.exceptions import (
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Frases o líneas (el texto de los PDF llega sin saltos de línea); una de
+# cada N, según su crc32, puede cerrar un chunk
+CHUNK_SEGMENT_PATTERN = re.compile(r"[^.!?\n]*(?:[.!?\n]+|$)")
+CHUNK_BOUNDARY_DIVISOR = 4
+
 class DocumentService:
     """
     Servicio para gestionar todas las operaciones relacionadas con documentos.
@@ -47,6 +56,9 @@ class DocumentService:
     en bases de datos vectoriales y relacionales.
     """
     
+    # IDs por consulta IN (...) al comprobar destinatarios (como UserService)
+    USER_ID_BATCH_SIZE = 500
+    
     def __init__(self):
         """
         Inicializa el servicio con las dependencias necesarias:
@@ -57,7 +69,11 @@ class DocumentService:
         self.openai = get_openai_connector()
         self.document_repo = DocumentRepository() 
         self.user_repo = UserRepository()  # Añadir el repositorio de usuarios
-        self.collection_name = "documents"  # Colección por defecto en ChromaDB
+
+    @property
+    def collection_name(self) -> str:
+        """Colección activa en ChromaDB (cambia al terminar una re-indexación completa)"""
+        return self.chromadb.get_active_collection_name()
 
     def _generate_signed_url_for_document(self, document: Document, expiration_hours: int = 24) -> Optional[str]:
         """
@@ -316,7 +332,7 @@ class DocumentService:
                 raise ValidationException("No hay contenido para procesar")
             
             # 1. Procesar el documento
-            chunks = self._split_text_into_chunks(content)
+            chunks = self._split_text_into_chunks(content, content_type=content_type)
             
             document = Document(
                 uploaded_by=uploaded_by,  
@@ -332,23 +348,9 @@ class DocumentService:
             supabase_document_id = self.document_repo.create(document)
             document.id = supabase_document_id
             
-            # 4. Preparar para guardar en ChromaDB
-            document_chunks = []
-            document_ids = []
-            metadatas = []
-            
-            for i, chunk in enumerate(chunks):
-                chunk_id = f"{document.id}_{i}"
-                document_chunks.append(chunk)
-                document_ids.append(chunk_id)
-                metadatas.append({
-                    "document_id": str(document.id),
-                    "title": title,
-                    "chunk_index": i,
-                    "content_type": content_type,
-                    "user_id": str(uploaded_by),  # IMPORTANTE: Guardar user_id
-                    "tags": ",".join(tags) if tags else ""
-                })
+            # 4. Preparar para guardar en ChromaDB (IDs direccionados por contenido)
+            document_chunks = chunks
+            document_ids, metadatas = self._chunk_records(document, chunks, ",".join(tags) if tags else "")
                 
             # Log para verificar metadatos
             logger.info(f"\n=== Indexando documento en ChromaDB ===")
@@ -360,12 +362,7 @@ class DocumentService:
             
             # 5. Almacenar en ChromaDB
             try:
-                self.chromadb.add_documents(
-                    collection_name=self.collection_name,
-                    document_ids=document_ids,
-                    chunks=document_chunks,
-                    metadatas=metadatas
-                )
+                self._write_chunks(document_ids, document_chunks, metadatas)
             except Exception as chroma_error:
                 # Si falla en ChromaDB, eliminar el documento de Supabase para mantener consistencia
                 if supabase_document_id:
@@ -382,10 +379,13 @@ class DocumentService:
             if document_ids:
                 document.chromadb_id = document_ids[0].split("_")[0]  # Usar la parte del ID común
                 self.document_repo.update(document)
+                document.chunk_count = len(document_ids)
+                self.document_repo.set_chunk_count(document.id, document.chunk_count)
             else:
                 logger.warning("No se pudieron crear IDs de documento para ChromaDB")
             
             logger.info(f"Documento creado con éxito: {document.id}")
+            invalidate_statistics(uploaded_by)
             return document
             
         except (ValidationException, ExternalServiceException, DatabaseException):
@@ -488,8 +488,6 @@ class DocumentService:
                 if document.content_type == "text/plain" and not self._is_valid_text_content(content):
                     logger.warning(f"Contenido de texto no válido para documento {document_id}")
                     return document
-                # Eliminar chunks antiguos
-                self._delete_document_chunks(document_id)
                 # Crear nuevos chunks
                 try:
                     chunks = self._split_text_into_chunks(
@@ -507,44 +505,25 @@ class DocumentService:
                     logger.warning(f"No se generaron chunks para el documento {document_id}")
                     return document
                 
-                document_chunks = []
-                document_ids = []
-                metadatas = []
-                for i, chunk in enumerate(chunks):
-                    chunk_id = f"{document_id}_{i}"
-                    document_chunks.append(chunk)
-                    document_ids.append(chunk_id)
-                    tags_value = ""
-                    if hasattr(document, 'tags') and document.tags:
-                        tags_value = ",".join(document.tags)
-                    metadatas.append({
-                        "document_id": str(document_id),
-                        "title": document.title,
-                        "chunk_index": i,
-                        "content_type": document.content_type,
-                        "user_id": str(document.uploaded_by),
-                        "tags": tags_value,
-                        "default": "true"
-                    })
+                # Solo se calculan embeddings de los chunks nuevos y se borran los que desaparecen
                 try:
-                    self.chromadb.add_documents(
-                        collection_name=self.collection_name,
-                        document_ids=document_ids,
-                        chunks=document_chunks,
-                        metadatas=metadatas
-                    )
-                    logger.info(f"✅ Documento {document_id} indexado en ChromaDB con {len(document_ids)} chunks")
+                    self._sync_document_chunks(document, chunks, tags=",".join(tags) if tags is not None else None)
                 except Exception as chromadb_error:
                     logger.error(f"❌ Error al indexar en ChromaDB: {str(chromadb_error)}")
                     raise ExternalServiceException("ChromaDB", f"Error al indexar en ChromaDB: {str(chromadb_error)}")
                 
-                if document_ids:
-                    document.chromadb_id = str(document_id)
-                    update_success = self.document_repo.update(document)
-                    if not update_success:
-                        logger.warning(f"No se pudo actualizar chromadb_id en documento {document_id}")
-                else:
-                    logger.warning("No se pudieron crear IDs de documento para ChromaDB")
+                document.chromadb_id = str(document_id)
+                update_success = self.document_repo.update(document)
+                if not update_success:
+                    logger.warning(f"No se pudo actualizar chromadb_id en documento {document_id}")
+                document.chunk_count = len(chunks)
+                self.document_repo.set_chunk_count(document_id, document.chunk_count)
+            elif title is not None or tags is not None:
+                # Cambio solo de metadatos: collection.update, sin recalcular embeddings
+                try:
+                    self._sync_document_chunks(document, None, tags=",".join(tags) if tags is not None else None)
+                except Exception as chromadb_error:
+                    logger.warning(f"⚠️ No se pudieron actualizar los metadatos en ChromaDB: {str(chromadb_error)}")
             
             logger.info(f"Documento actualizado con éxito: {document.id}")
             return document
@@ -557,50 +536,197 @@ class DocumentService:
 
     def verify_document_indexed(self, document_id: int) -> bool:
         """
-        Verifica si un documento está correctamente indexado en ChromaDB
+        Verifica si un documento está correctamente indexado en ChromaDB:
+        tiene chunks y, si se registró chunk_count, exactamente ese número.
         """
         try:
-            where_filter = {"document_id": str(document_id)}
-            results = self.chromadb.search_documents(
-                collection_name=self.collection_name,
-                query_text="test",  # Query dummy
-                n_results=1,
-                where=where_filter
-            )
-            is_indexed = results and 'metadatas' in results and len(results['metadatas'][0]) > 0
+            chunk_count = self.chromadb.count_chunks(self.collection_name, {"document_id": str(document_id)})
+            expected = getattr(self.document_repo.get(document_id), "chunk_count", None)
+            is_indexed = chunk_count > 0 and (expected is None or chunk_count == expected)
+            if expected is not None and chunk_count != expected:
+                logger.warning(f"Documento {document_id}: {chunk_count} chunks en ChromaDB, se esperaban {expected}")
             logger.info(f"Documento {document_id} indexado: {is_indexed}")
             return is_indexed
         except Exception as e:
             logger.error(f"Error verificando indexación: {str(e)}")
             return False
     
+    def _write_chunks(self, document_ids: List[str], chunks: List[str], metadatas: List[Dict[str, Any]]):
+        """
+        Escribe chunks en la colección activa y, si hay una migración en curso,
+        también en la versión nueva. Un fallo en la nueva no afecta al usuario:
+        la sincronización final de la migración vuelve a escribir el documento.
+        """
+        active, *migrating = self.chromadb.get_write_collection_names()
+        self.chromadb.add_documents(
+            collection_name=active,
+            document_ids=document_ids,
+            chunks=chunks,
+            metadatas=metadatas
+        )
+        for collection_name in migrating:
+            try:
+                self.chromadb.add_documents(
+                    collection_name=collection_name,
+                    document_ids=document_ids,
+                    chunks=chunks,
+                    metadatas=[dict(metadata) for metadata in metadatas]
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudo escribir en la colección en migración {collection_name}: {str(e)}")
+
+    def _chunk_records(self, document: Document, chunks: List[str], tags: str) -> tuple:
+        """
+        IDs direccionados por contenido y metadatos de los chunks de un documento.
+
+        Returns:
+            tuple: (ids, metadatas) en el orden de los chunks
+        """
+        digest = content_hash(document.content, document.content_type)
+        hashes = [chunk_hash(chunk) for chunk in chunks]
+        metadatas = [
+            {
+                "document_id": str(document.id),
+                "title": document.title,
+                "chunk_index": i,
+                "content_type": document.content_type,
+                "user_id": str(document.uploaded_by),  # IMPORTANTE: Guardar user_id
+                "tags": tags,
+                "content_hash": digest,  # Permite a la re-indexación copiar sin recalcular
+                "chunk_hash": hashes[i]
+            }
+            for i in range(len(chunks))
+        ]
+        return chunk_ids(document.id, hashes), metadatas
+
+    def _sync_document_chunks(self, document: Document, chunks: Optional[List[str]], tags: Optional[str] = None) -> Dict[str, int]:
+        """
+        Actualiza los chunks de un documento por diferencias en todas las
+        colecciones que reciben escrituras (la nueva, durante una migración,
+        sin afectar al usuario si falla).
+
+        Args:
+            document: Documento con los datos ya actualizados
+            chunks: Nuevos chunks, o None si solo cambian los metadatos
+            tags: Tags separados por comas (None = conservar los actuales)
+
+        Returns:
+            Dict[str, int]: Chunks añadidos, conservados, actualizados y eliminados en la colección activa
+        """
+        active, *migrating = self.chromadb.get_write_collection_names()
+        stats = self._sync_document_chunks_in(active, document, chunks, tags)
+        for collection_name in migrating:
+            try:
+                self._sync_document_chunks_in(collection_name, document, chunks, tags)
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudo sincronizar la colección en migración {collection_name}: {str(e)}")
+        logger.info(
+            f"✅ Documento {document.id} sincronizado en ChromaDB: {stats['added']} chunks nuevos, "
+            f"{stats['kept']} sin cambios ({stats['updated']} con metadatos nuevos), {stats['deleted']} eliminados"
+        )
+        return stats
+
+    def _sync_document_chunks_in(self, collection_name: str, document: Document, chunks: Optional[List[str]], tags: Optional[str]) -> Dict[str, int]:
+        existing = self.chromadb.get_chunks(
+            collection_name, where={"document_id": str(document.id)}, include=["documents", "metadatas"]
+        )
+        old_ids = existing.get("ids") or []
+        old_texts = existing.get("documents") or [""] * len(old_ids)
+        old_metadatas = [meta or {} for meta in existing.get("metadatas") or [{}] * len(old_ids)]
+        # Los chunks indexados antes de chunk_hash se identifican por su texto
+        old_hashes = [meta.get("chunk_hash") or chunk_hash(text) for text, meta in zip(old_texts, old_metadatas)]
+        if tags is None:
+            tags = next((meta["tags"] for meta in old_metadatas if meta.get("tags")), "")
+
+        updated: Dict[str, List] = {"ids": [], "metadatas": []}
+        added: Dict[str, List] = {"ids": [], "chunks": [], "metadatas": []}
+        removed: List[str] = []
+        if chunks is None:
+            # Solo metadatos: cada chunk conserva su texto, posición y embedding
+            _, (base,) = self._chunk_records(document, [""], tags)
+            for i, (chunk_id, digest, metadata) in enumerate(zip(old_ids, old_hashes, old_metadatas)):
+                new_metadata = {**base, "chunk_index": metadata.get("chunk_index", i), "chunk_hash": digest}
+                if new_metadata != metadata:
+                    updated["ids"].append(chunk_id)
+                    updated["metadatas"].append(new_metadata)
+        else:
+            by_hash: Dict[str, List[str]] = {}
+            current: Dict[str, Dict[str, Any]] = {}
+            for chunk_id, digest, metadata in zip(old_ids, old_hashes, old_metadatas):
+                by_hash.setdefault(digest, []).append(chunk_id)
+                current[chunk_id] = metadata
+            new_ids, new_metadatas = self._chunk_records(document, chunks, tags)
+            for chunk_id, chunk, metadata in zip(new_ids, chunks, new_metadatas):
+                candidates = by_hash.get(metadata["chunk_hash"])
+                if candidates:
+                    old_id = candidates.pop(0)
+                    if current[old_id] != metadata:
+                        updated["ids"].append(old_id)
+                        updated["metadatas"].append(metadata)
+                else:
+                    added["ids"].append(chunk_id)
+                    added["chunks"].append(chunk)
+                    added["metadatas"].append(metadata)
+            removed = [chunk_id for remaining in by_hash.values() for chunk_id in remaining]
+
+        # Primero se añade y después se borra: una búsqueda nunca ve el documento vacío
+        if added["ids"]:
+            self.chromadb.add_documents(
+                collection_name=collection_name,
+                document_ids=added["ids"],
+                chunks=added["chunks"],
+                metadatas=added["metadatas"]
+            )
+        if updated["ids"]:
+            self.chromadb.update_metadatas(collection_name, updated["ids"], updated["metadatas"])
+        if removed:
+            self.chromadb.delete_documents(collection_name, removed)
+        kept = len(old_ids) - len(removed)
+        return {"added": len(added["ids"]), "kept": kept, "updated": len(updated["ids"]), "deleted": len(removed)}
+
     def _delete_document_chunks(self, document_id: int):
         """
-        Elimina todos los chunks de un documento en ChromaDB según su document_id.
+        Elimina todos los chunks de un documento en ChromaDB según su document_id
+        (en todas las colecciones que reciben escrituras).
         """
+        for collection_name in self.chromadb.get_write_collection_names():
+            self._delete_document_chunks_from(collection_name, document_id)
+
+    def _delete_document_chunks_from(self, collection_name: str, document_id: int):
         try:
-            # Buscar todos los chunks con el document_id
-            where_filter = {"document_id": str(document_id)}
-            # Buscar los metadatos para obtener los ids de los chunks
-            results = self.chromadb.search_documents(
-                collection_name=self.collection_name,
-                query_text="test",  # Query dummy
-                n_results=1000,
-                where=where_filter
-            )
-            # Extraer los ids de los chunks
-            chunk_ids = []
-            if results and 'ids' in results:
-                for ids_list in results['ids']:
-                    chunk_ids.extend(ids_list)
-            if chunk_ids:
-                self.chromadb.delete_documents(self.collection_name, chunk_ids)
-                logger.info(f"Eliminados {len(chunk_ids)} chunks de documento {document_id} en ChromaDB")
-            else:
-                logger.info(f"No se encontraron chunks para eliminar del documento {document_id} en ChromaDB")
+            # Borrado por metadatos: todos los chunks, sin búsqueda ni límite
+            self.chromadb.delete_where(collection_name, {"document_id": str(document_id)})
+            logger.info(f"Eliminados los chunks del documento {document_id} en {collection_name}")
         except Exception as e:
             logger.error(f"Error al eliminar chunks de documento {document_id} en ChromaDB: {str(e)}")
     
+    def reindex_all_documents(self, resume: bool = True, embedding_model: Optional[str] = None) -> ReindexJob:
+        """
+        Re-indexa todos los documentos en una versión nueva de la colección
+        (documents_v{n}) y la activa al terminar (ver ReindexService). Se
+        ejecuta en segundo plano; mientras tanto las escrituras van a ambas.
+        
+        Args:
+            resume: Continuar la última re-indexación interrumpida si existe
+            embedding_model: Modelo de la versión nueva (por defecto SENTENCE_TRANSFORMER_MODEL)
+            
+        Returns:
+            ReindexJob: Trabajo lanzado (progreso con get_reindex_status)
+            
+        Raises:
+            ConflictException: Si ya hay una re-indexación en curso
+        """
+        return reindex_service.start(self._split_text_into_chunks, resume=resume, embedding_model=embedding_model)
+    
+    def get_reindex_status(self) -> ReindexJob:
+        """
+        Estado de la última re-indexación completa.
+        
+        Raises:
+            NotFoundException: Si nunca se ha lanzado ninguna
+        """
+        return reindex_service.get_job()
+    
     def split_text_into_chunks(self, text: str, content_type: str = None, max_chunk_size: int = 1000, overlap: int = 100) -> list:
         """
         Divide el texto en chunks optimizados para indexación en ChromaDB.
@@ -631,23 +757,36 @@ class DocumentService:
         - max_chunk_size: tamaño máximo de cada chunk (por defecto 1000)
         - overlap: solapamiento entre chunks (por defecto 100)
         - Si el tipo es 'text/plain', usa chunks más grandes y menos solapamiento.
+
+        Los cortes dependen del contenido y no de la posición: se corta tras una
+        frase o línea cuyo crc32 es múltiplo de CHUNK_BOUNDARY_DIVISOR (si el
+        chunk ya supera la mitad del tamaño) o antes de pasar del máximo. Una
+        edición solo cambia los chunks cercanos y el resto conserva su hash y su ID.
         """
         if content_type == "text/plain":
             max_chunk_size = 2000
             overlap = 50
         if not text:
             return []
+        limit = max_chunk_size - overlap  # el solapamiento se añade después
+        segments = []
+        for sentence in CHUNK_SEGMENT_PATTERN.findall(text):
+            segments.extend(sentence[i:i + limit] for i in range(0, len(sentence), limit))
+
         chunks = []
-        start = 0
-        text_length = len(text)
-        while start < text_length:
-            end = min(start + max_chunk_size, text_length)
-            chunk = text[start:end]
-            chunks.append(chunk)
-            if end == text_length:
-                break
-            start += max_chunk_size - overlap
-        return chunks
+        current = ""
+        for segment in segments:
+            if current and len(current) + len(segment) > limit:
+                chunks.append(current)
+                current = ""
+            current += segment
+            if len(current) >= limit // 2 and zlib.crc32(segment.encode("utf-8")) % CHUNK_BOUNDARY_DIVISOR == 0:
+                chunks.append(current)
+                current = ""
+        if current:
+            chunks.append(current)
+        # Solapamiento: cada chunk empieza con el final del anterior
+        return chunks[:1] + [previous[-overlap:] + chunk for previous, chunk in zip(chunks, chunks[1:])]
 
     def list_user_documents(self, user_id: int, skip: int = 0, limit: int = 100, sort_by: str = 'created_at', order: str = 'desc') -> list:
         """
@@ -703,6 +842,7 @@ class DocumentService:
             )
             document_id = self.document_repo.create_placeholder(document)
             document.id = document_id
+            invalidate_statistics(uploaded_by)
             return document
         except (ValidationException, DatabaseException):
             raise
@@ -710,6 +850,7 @@ class DocumentService:
             logger.error(f"Error al crear documento placeholder: {str(e)}")
             raise DatabaseException("Error al crear documento placeholder", original_error=e)
 
+    @traced("rag.get_rag_response")
     def get_rag_response(self, query: str, user_id: int = None, n_results: int = 5, document_ids: Optional[List[int]] = None) -> dict:
         """
         Realiza una búsqueda semántica en ChromaDB y retorna la respuesta generada por el modelo AI.
@@ -732,15 +873,11 @@ class DocumentService:
                 # Convertir IDs a string y crear filtro OR
                 doc_id_strings = [str(doc_id) for doc_id in document_ids]
                 where_filter = {"document_id": {"$in": doc_id_strings}}
-                logger.info(f"\n=== BÚSqueda con documentos específicos ===")
-                logger.info(f"Document IDs: {document_ids}")
-                logger.info(f"Filtro ChromaDB: {where_filter}")
+                logger.debug("Búsqueda RAG en documentos %s (filtro ChromaDB: %s)", document_ids, where_filter)
             elif user_id:
                 # Si no hay document_ids pero sí user_id, filtrar por documentos del usuario
                 where_filter = {"user_id": str(user_id)}
-                logger.info(f"\n=== BúSqueda en todos los documentos del usuario ===")
-                logger.info(f"User ID: {user_id}")
-                logger.info(f"Filtro ChromaDB: {where_filter}")
+                logger.debug("Búsqueda RAG en los documentos del usuario %s (filtro ChromaDB: %s)", user_id, where_filter)
 
             # Buscar chunks relevantes en ChromaDB
             results = self.chromadb.search_documents(
@@ -751,11 +888,10 @@ class DocumentService:
             )
             
             # Log de resultados encontrados
-            logger.info(f"\n=== Resultados de ChromaDB ===")
             if results and 'documents' in results:
-                logger.info(f"Chunks encontrados: {len(results.get('documents', [[]])[0])}")
+                logger.debug("Chunks encontrados en ChromaDB: %d", len(results.get('documents', [[]])[0]))
             else:
-                logger.info("No se encontraron resultados")
+                logger.debug("No se encontraron resultados en ChromaDB")
 
             # Extraer texto y metadatos de los chunks
             chunks = []
@@ -779,7 +915,7 @@ class DocumentService:
 
             # Si no hay chunks, devolver respuesta vacía
             if not chunks:
-                logger.info(f"No se encontraron documentos relevantes para la consulta: {query}")
+                logger.info("No se encontraron documentos relevantes para la consulta: %s", query)
                 return {
                     "context": "",
                     "response": "No encontré información relevante en los documentos disponibles para responder tu pregunta.",
@@ -860,6 +996,11 @@ class DocumentService:
                 raise DatabaseException(f"No se pudo actualizar el estado del documento {document_id}")
 
             logger.info(f"Estado del documento {document_id} actualizado a '{status}' con mensaje: '{message}'")
+
+            # Los títulos de documentos indexados forman parte del vocabulario ortográfico
+            if status == "completed":
+                from src.services.chat.service_factory import ServiceFactory
+                ServiceFactory.get_spelling_service().add_domain_terms([document.title])
         except (DocumentNotFoundException, DatabaseException):
             raise
         except Exception as e:
@@ -927,36 +1068,39 @@ class DocumentService:
             DatabaseException: Si hay error de base de datos
         """
         try:
-            logger.info(f"=== DocumentService.share_document ===")
-            logger.info(f"Document ID: {document_id}")
-            logger.info(f"User IDs to share: {user_ids}")
-            logger.info(f"Requester ID: {requester_id}")
+            logger.info(f"Compartiendo documento {document_id} con {len(user_ids)} usuarios (solicita {requester_id})")
             
             # get() ahora lanza DocumentNotFoundException si no existe
             document = self.document_repo.get(document_id)
             
-            logger.info(f"Documento encontrado: {document.title}, owner: {document.uploaded_by}")
-            
             # Verificar permisos (propietario o admin)
-            is_owner = document.uploaded_by == requester_id
-            is_admin = self.is_admin_user(requester_id)
-            
-            logger.info(f"Is owner: {is_owner}, Is admin: {is_admin}")
-            
-            if not is_owner and not is_admin:
+            if document.uploaded_by != requester_id and not self.is_admin_user(requester_id):
                 logger.error(f"Usuario {requester_id} no tiene permisos para compartir documento {document_id}")
                 raise ForbiddenException("No tienes permisos para compartir este documento")
             
-            # Compartir el documento
-            logger.info(f"Llamando a repository.share_document_with_users...")
-            result = self.document_repo.share_document_with_users(document_id, user_ids)
-            
-            logger.info(f"✅ Resultado de compartir: {result}")
+            # Verificar que los destinatarios existen: una consulta IN (...) por bloque
+            unique_ids = list(dict.fromkeys(user_ids))
+            existing_ids = set()
+            for i in range(0, len(unique_ids), self.USER_ID_BATCH_SIZE):
+                existing_ids.update(self.user_repo.get_existing_ids(unique_ids[i:i + self.USER_ID_BATCH_SIZE]))
+            valid_ids = [uid for uid in unique_ids if uid in existing_ids]
+            invalid_ids = [uid for uid in unique_ids if uid not in existing_ids]
+            if not valid_ids:
+                raise ValidationException(f"Usuarios no encontrados: {invalid_ids}")
+            
+            # Compartir el documento (upsert multi-fila)
+            result = self.document_repo.share_document_with_users(document_id, valid_ids, check_document=False)
+            if invalid_ids:
+                logger.warning(f"Usuarios inexistentes omitidos al compartir {document_id}: {invalid_ids}")
+                result["failed_shares"] = result["failed_shares"] + invalid_ids
+                result["total_failed"] = len(result["failed_shares"])
+                result["total_requested"] = len(unique_ids)
             
             # Validar resultado
             if result["total_new_shares"] == 0 and result["total_already_shared"] == 0:
                 raise DatabaseException("No se pudo compartir el documento con ningún usuario")
-                
+            
+            invalidate_statistics(document.uploaded_by, *result["successful_shares"])
             return result
             
         except (DocumentNotFoundException, ForbiddenException, ValidationException, DatabaseException):
@@ -966,6 +1110,51 @@ class DocumentService:
             logger.error(f"Error inesperado al compartir documento: {str(e)}")
             raise DatabaseException(f"Error al compartir documento: {str(e)}", original_error=e)
     
+    def share_document_with_group(self, document_id: int, group_id: int, requester_id: int) -> Dict[str, Any]:
+        """
+        Comparte un documento con todos los miembros de un grupo de usuarios.
+        El grupo se expande en la base de datos (una sola llamada).
+        
+        Args:
+            document_id: ID del documento a compartir
+            group_id: ID del grupo (user_groups)
+            requester_id: ID del usuario que solicita compartir
+            
+        Returns:
+            Dict con los IDs compartidos y los que ya tenían acceso
+            
+        Raises:
+            DocumentNotFoundException: Si el documento no existe
+            ForbiddenException: Si no tiene permisos
+            DatabaseException: Si hay error de base de datos
+        """
+        try:
+            document = self.document_repo.get(document_id)
+            if document.uploaded_by != requester_id and not self.is_admin_user(requester_id):
+                raise ForbiddenException("No tienes permisos para compartir este documento")
+            
+            shared = self.document_repo.share_document_with_group(document_id, group_id)
+            logger.info(
+                f"📤 Documento {document_id} compartido con el grupo {group_id}: "
+                f"{len(shared['new'])} nuevos, {len(shared['already'])} ya tenían acceso"
+            )
+            
+            invalidate_statistics(document.uploaded_by, *shared["new"])
+            return {
+                "group_id": group_id,
+                "successful_shares": shared["new"],
+                "already_shared": shared["already"],
+                "total_requested": len(shared["new"]) + len(shared["already"]),
+                "total_new_shares": len(shared["new"]),
+                "total_already_shared": len(shared["already"])
+            }
+            
+        except (DocumentNotFoundException, ForbiddenException, DatabaseException):
+            raise
+        except Exception as e:
+            logger.error(f"Error inesperado al compartir documento con grupo: {str(e)}")
+            raise DatabaseException(f"Error al compartir documento con el grupo: {str(e)}", original_error=e)
+    
     def get_existing_shares(self, document_id: int, user_ids: List[int]) -> List[Dict[str, Any]]:
         """
         Obtiene información sobre usuarios que ya tienen acceso al documento.
@@ -1059,7 +1248,9 @@ class DocumentService:
             if document.uploaded_by != requester_id:
                 raise ForbiddenException("Solo el propietario puede eliminar acceso a este documento")
             
-            return self.document_repo.remove_user_access(document_id, user_id)
+            removed = self.document_repo.remove_user_access(document_id, user_id)
+            invalidate_statistics(document.uploaded_by, user_id)
+            return removed
             
         except (DocumentNotFoundException, ForbiddenException, DatabaseException):
             raise
@@ -1088,7 +1279,9 @@ class DocumentService:
             self._delete_document_chunks(document_id)
             
             # Eliminar de la base de datos
-            return self.document_repo.delete(document_id)
+            deleted = self.document_repo.delete(document_id)
+            invalidate_statistics(document.uploaded_by)
+            return deleted
             
         except (DocumentNotFoundException, ForbiddenException, DatabaseException):
             raise
@@ -0,0 +1,344 @@
+"""
+Envío de emails en segundo plano con un outbox persistente.
+
+Los handlers ya no esperan al servidor SMTP: EmailService guarda el
+mensaje en un SQLite local (EMAIL_OUTBOX_PATH) y responde. Un pool de
+EMAIL_SMTP_POOL_SIZE sesiones aiosmtplib lo entrega:
+- cada sesión reutiliza su conexión (STARTTLS y login una sola vez) y
+  envía lotes de hasta EMAIL_OUTBOX_BATCH_SIZE mensajes seguidos; se
+  cierra tras EMAIL_SMTP_IDLE_SECONDS sin uso
+- los errores temporales se reintentan con espera exponencial desde
+  EMAIL_RETRY_BASE_SECONDS hasta EMAIL_MAX_ATTEMPTS intentos; los rechazos
+  definitivos (5xx) se marcan como fallidos sin reintentar
+- los mensajes enviados se borran; los fallidos quedan para revisarlos
+- lo que queda pendiente al parar la aplicación se envía al arrancar
+
+Todos los workers comparten el mismo fichero: cada reserva guarda el worker
+que la hizo y hasta cuándo (EMAIL_OUTBOX_LEASE_SECONDS). Al arrancar o parar
+un worker solo devuelve a la cola sus propios mensajes y los de reservas
+caducadas (un worker caído), nunca los que otro está enviando.
+"""
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+
+import aiosmtplib
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Espera máxima entre reintentos
+MAX_RETRY_DELAY_SECONDS = 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sender TEXT NOT NULL,
+    to_email TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    html TEXT NOT NULL,
+    text TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',  -- pending | sending | failed
+    claimed_by TEXT,  -- worker que lo está enviando
+    lease_expires_at REAL,  -- fin de la reserva; después otro worker puede enviarlo
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at);
+"""
+
+# Columnas añadidas después de crear la tabla (outbox ya existentes)
+MIGRATIONS = {
+    "claimed_by": "ALTER TABLE outbox ADD COLUMN claimed_by TEXT",
+    "lease_expires_at": "ALTER TABLE outbox ADD COLUMN lease_expires_at REAL",
+}
+
+# Mensajes reservados por este worker o con la reserva caducada
+# (las reservas anteriores a los leases no tienen lease_expires_at)
+RELEASE_SQL = (
+    "UPDATE outbox SET status = 'pending', claimed_by = NULL, lease_expires_at = NULL "
+    "WHERE status = 'sending' AND (claimed_by = ? OR lease_expires_at IS NULL OR lease_expires_at < ?)"
+)
+
+
+class EmailOutbox:
+    """
+    Cola persistente de emails con sesiones SMTP reutilizadas
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        hostname: Optional[str] = None,
+        port: Optional[int] = None,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        pool_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        retry_base_seconds: Optional[float] = None,
+        idle_seconds: Optional[float] = None,
+        poll_seconds: Optional[float] = None,
+        lease_seconds: Optional[float] = None,
+        smtp_factory: Optional[Callable[[], aiosmtplib.SMTP]] = None
+    ):
+        self.path = path or settings.EMAIL_OUTBOX_PATH
+        self.hostname = hostname or settings.SMTP_HOST
+        self.port = port or settings.SMTP_PORT
+        self.username = username if username is not None else settings.SMTP_USER
+        self.password = password if password is not None else settings.SMTP_PASSWORD
+        self.pool_size = pool_size or settings.EMAIL_SMTP_POOL_SIZE
+        self.batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+        self.max_attempts = max_attempts or settings.EMAIL_MAX_ATTEMPTS
+        self.retry_base_seconds = settings.EMAIL_RETRY_BASE_SECONDS if retry_base_seconds is None else retry_base_seconds
+        self.idle_seconds = settings.EMAIL_SMTP_IDLE_SECONDS if idle_seconds is None else idle_seconds
+        self.poll_seconds = poll_seconds or settings.EMAIL_OUTBOX_POLL_SECONDS
+        self.lease_seconds = settings.EMAIL_OUTBOX_LEASE_SECONDS if lease_seconds is None else lease_seconds
+        # Identifica las reservas de este proceso en el fichero compartido
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._smtp_factory = smtp_factory or self._default_smtp
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._workers: List[asyncio.Task] = []
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.sent = 0
+        self.connections = 0
+
+    # ==================== API ====================
+
+    def enqueue(self, sender: str, to_email: str, subject: str, html: str, text: Optional[str] = None) -> Optional[int]:
+        """
+        Guarda un email para enviarlo en segundo plano (se puede llamar desde
+        cualquier hilo).
+
+        Returns:
+            Optional[int]: ID del mensaje en el outbox, o None si no se pudo guardar
+        """
+        try:
+            now = time.time()
+            with self._db_lock:
+                db = self._connection()
+                cursor = db.execute(
+                    "INSERT INTO outbox (sender, to_email, subject, html, text, next_attempt_at, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (sender, to_email, subject, html, text, now, now)
+                )
+                db.commit()
+            self._notify()
+            logger.info(f"📧 Email a {to_email} en cola (outbox #{cursor.lastrowid})")
+            return cursor.lastrowid
+        except sqlite3.Error as e:
+            logger.error(f"Error guardando email a {to_email} en el outbox: {str(e)}")
+            return None
+
+    async def start(self):
+        """Arranca las sesiones de envío (las reservas caducadas vuelven a la cola)"""
+        if self._workers:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        await asyncio.to_thread(self._execute, RELEASE_SQL, (self.worker_id, time.time()))
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.pool_size)]
+        logger.info(f"📧 Outbox de emails iniciado ({self.pool_size} sesiones SMTP)")
+
+    async def stop(self):
+        """Detiene el envío; lo pendiente se conserva en el outbox"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        await asyncio.to_thread(self._execute, RELEASE_SQL, (self.worker_id, time.time()))
+        logger.info("📧 Outbox de emails detenido")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Mensajes por estado y contadores de envío"""
+        with self._db_lock:
+            rows = self._connection().execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        stats: Dict[str, Any] = {"pending": 0, "sending": 0, "failed": 0}
+        stats.update(dict(rows))
+        stats.update(sent=self.sent, connections=self.connections, sessions=len(self._workers))
+        return stats
+
+    # ==================== ENVÍO ====================
+
+    async def _worker(self):
+        smtp: Optional[aiosmtplib.SMTP] = None
+        last_used = time.monotonic()
+        try:
+            while True:
+                batch = await asyncio.to_thread(self._claim, self.batch_size)
+                if not batch:
+                    if smtp and time.monotonic() - last_used > self.idle_seconds:
+                        smtp = await self._close(smtp)
+                    await self._wait()
+                    continue
+                for message in batch:
+                    smtp = await self._deliver(smtp, message)
+                last_used = time.monotonic()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            await self._close(smtp)
+
+    async def _deliver(self, smtp: Optional[aiosmtplib.SMTP], message: Dict[str, Any]) -> Optional[aiosmtplib.SMTP]:
+        """Envía un mensaje por la sesión de la tarea; devuelve la sesión a reutilizar"""
+        for reused in (smtp is not None, False):
+            try:
+                if smtp is None:
+                    smtp = self._smtp_factory()
+                    await smtp.connect()
+                    self.connections += 1
+                await smtp.send_message(self._build_message(message))
+                await asyncio.to_thread(self._execute, "DELETE FROM outbox WHERE id = ?", (message["id"],))
+                self.sent += 1
+                logger.info(f"📧 Email enviado a {message['to_email']} (outbox #{message['id']})")
+                return smtp
+            except (aiosmtplib.SMTPServerDisconnected, ConnectionError) as e:
+                # El servidor cerró una conexión reutilizada: se reintenta una vez con otra
+                smtp = await self._close(smtp)
+                if reused:
+                    continue
+                await self._retry_later(message, e)
+                return None
+            except aiosmtplib.SMTPAuthenticationError as e:
+                # Credenciales mal configuradas: se reintenta cuando se corrijan
+                await self._retry_later(message, e)
+                return await self._close(smtp)
+            except aiosmtplib.SMTPRecipientsRefused as e:
+                if any(refused.code >= 500 for refused in e.recipients):
+                    await self._fail(message, e)
+                else:
+                    await self._retry_later(message, e)
+                return smtp
+            except aiosmtplib.SMTPResponseException as e:
+                # 5xx: rechazo definitivo (buzón inexistente, mensaje no aceptado...)
+                if e.code >= 500:
+                    await self._fail(message, e)
+                else:
+                    await self._retry_later(message, e)
+                return smtp
+            except Exception as e:
+                await self._retry_later(message, e)
+                return await self._close(smtp)
+        return smtp
+
+    async def _retry_later(self, message: Dict[str, Any], error: Exception):
+        attempts = message["attempts"] + 1
+        if attempts >= self.max_attempts:
+            await self._fail(message, error)
+            return
+        delay = min(self.retry_base_seconds * 2 ** (attempts - 1), MAX_RETRY_DELAY_SECONDS)
+        delay *= random.uniform(1.0, 1.1)
+        logger.warning(f"⚠️ Error enviando email a {message['to_email']} (intento {attempts}), reintento en {delay:.0f}s: {error}")
+        await asyncio.to_thread(
+            self._execute,
+            "UPDATE outbox SET status = 'pending', claimed_by = NULL, lease_expires_at = NULL, "
+            "attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+            (attempts, time.time() + delay, str(error)[:500], message["id"])
+        )
+
+    async def _fail(self, message: Dict[str, Any], error: Exception):
+        logger.error(f"❌ Email a {message['to_email']} descartado tras {message['attempts'] + 1} intentos: {error}")
+        await asyncio.to_thread(
+            self._execute,
+            "UPDATE outbox SET status = 'failed', attempts = attempts + 1, last_error = ? WHERE id = ?",
+            (str(error)[:500], message["id"])
+        )
+
+    async def _close(self, smtp: Optional[aiosmtplib.SMTP]) -> None:
+        if smtp is not None and smtp.is_connected:
+            try:
+                await smtp.quit()
+            except Exception:
+                smtp.close()
+        return None
+
+    async def _wait(self):
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=self.poll_seconds)
+        except asyncio.TimeoutError:
+            pass
+        self._wake.clear()
+
+    def _notify(self):
+        # Despierta a las sesiones desde el hilo que encoló el mensaje
+        if self._loop and self._wake and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def _build_message(self, message: Dict[str, Any]) -> MIMEMultipart:
+        mime = MIMEMultipart("alternative")
+        mime["Subject"] = message["subject"]
+        mime["From"] = message["sender"]
+        mime["To"] = message["to_email"]
+        if message["text"]:
+            mime.attach(MIMEText(message["text"], "plain"))
+        mime.attach(MIMEText(message["html"], "html"))
+        return mime
+
+    def _default_smtp(self) -> aiosmtplib.SMTP:
+        # 465: TLS implícito; en otro puerto STARTTLS si el servidor lo ofrece
+        return aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            username=self.username or None,
+            password=self.password or None,
+            use_tls=self.port == 465,
+            timeout=settings.EXTERNAL_SERVICE_TIMEOUT
+        )
+
+    # ==================== SQLITE ====================
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.row_factory = sqlite3.Row
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(SCHEMA)
+            columns = {row["name"] for row in self._db.execute("PRAGMA table_info(outbox)")}
+            for column, statement in MIGRATIONS.items():
+                if column not in columns:
+                    self._db.execute(statement)
+            self._db.commit()
+        return self._db
+
+    def _execute(self, sql: str, params: tuple = ()):
+        with self._db_lock:
+            db = self._connection()
+            db.execute(sql, params)
+            db.commit()
+
+    def _claim(self, limit: int) -> List[Dict[str, Any]]:
+        """
+        Reserva los siguientes mensajes pendientes para una sesión (y los de
+        reservas caducadas de un worker caído) a nombre de este worker
+        """
+        now = time.time()
+        with self._db_lock:
+            db = self._connection()
+            rows = db.execute(
+                "UPDATE outbox SET status = 'sending', claimed_by = ?, lease_expires_at = ? WHERE id IN ("
+                "  SELECT id FROM outbox WHERE (status = 'pending' AND next_attempt_at <= ?)"
+                "  OR (status = 'sending' AND lease_expires_at < ?) ORDER BY id LIMIT ?"
+                ") RETURNING id, sender, to_email, subject, html, text, attempts",
+                (self.worker_id, now + self.lease_seconds, now, now, limit)
+            ).fetchall()
+            db.commit()
+        return sorted((dict(row) for row in rows), key=lambda row: row["id"])
+
+# Instancia global
+email_outbox = EmailOutbox()
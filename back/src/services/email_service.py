@@ -1,16 +1,26 @@
 """
 Servicio para envío de emails
 """
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 import logging
+from functools import lru_cache
+from pathlib import Path
 from typing import Optional
 from datetime import datetime
 from src.config.settings import get_settings
+from src.services.email_outbox import email_outbox
 
 logger = logging.getLogger(__name__)
 
+TEMPLATES_DIR = Path(__file__).parent.parent / "templates" / "emails"
+
+@lru_cache(maxsize=None)
+def load_template(name: str) -> Optional[str]:
+    """Lee un template HTML de emails una sola vez (None si no existe)"""
+    try:
+        return (TEMPLATES_DIR / name).read_text(encoding='utf-8')
+    except FileNotFoundError:
+        return None
+
 class EmailService:
     """
     Servicio para enviar emails usando SMTP
@@ -38,7 +48,8 @@ class EmailService:
     
     def send_email(self, to_email: str, subject: str, html_content: str, text_content: Optional[str] = None) -> bool:
         """
-        Envía un email
+        Envía un email: queda guardado en el outbox y se entrega en segundo
+        plano (True si se ha encolado)
         """
         try:
             # Si no hay configuración SMTP, solo loguear
@@ -48,28 +59,15 @@ class EmailService:
                 logger.info(f"Contenido: {text_content or html_content}")
                 return True
             
-            # Crear mensaje
-            message = MIMEMultipart("alternative")
-            message["Subject"] = subject
-            message["From"] = f"{self.app_name} <{self.from_email}>"
-            message["To"] = to_email
-            
-            # Agregar partes del mensaje
-            if text_content:
-                text_part = MIMEText(text_content, "plain")
-                message.attach(text_part)
-            
-            html_part = MIMEText(html_content, "html")
-            message.attach(html_part)
-            
-            # Enviar email
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_user, self.smtp_password)
-                server.send_message(message)
-            
-            logger.info(f"Email enviado exitosamente a {to_email}")
-            return True
+            # Se guarda en el outbox y lo envía el pool de sesiones SMTP
+            outbox_id = email_outbox.enqueue(
+                sender=f"{self.app_name} <{self.from_email}>",
+                to_email=to_email,
+                subject=subject,
+                html=html_content,
+                text=text_content
+            )
+            return outbox_id is not None
             
         except Exception as e:
             logger.error(f"Error enviando email a {to_email}: {str(e)}")
@@ -356,25 +354,19 @@ class EmailService:
         
         subject = f"{self.app_name} - Solicitud de Cambio de Email"
         
-        # Leer el template HTML
-        import os
-        from pathlib import Path
-        
-        template_path = Path(__file__).parent.parent / "templates" / "emails" / "email_change_notification.html"
+        # Template HTML (leído del disco una sola vez)
+        html_template = load_template("email_change_notification.html")
         
-        try:
-            with open(template_path, 'r', encoding='utf-8') as f:
-                html_template = f.read()
-            
+        if html_template is not None:
             # Reemplazar las variables en el template
             html_content = html_template.replace('{{username}}', username)
             html_content = html_content.replace('{{old_email}}', old_email)
             html_content = html_content.replace('{{new_email}}', new_email)
             html_content = html_content.replace('{{confirmation_link}}', confirmation_url)
             
-        except FileNotFoundError:
+        else:
             # Fallback a un template simple si no se encuentra el archivo
-            logger.warning(f"Template HTML no encontrado en {template_path}, usando fallback")
+            logger.warning(f"Template HTML no encontrado en {TEMPLATES_DIR}, usando fallback")
             html_content = f"""
             <!DOCTYPE html>
             <html>
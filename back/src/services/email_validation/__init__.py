@@ -2,5 +2,6 @@
 Módulo de validación y tracking de emails
 """
 from .email_delivery_tracker import EmailDeliveryTracker, EmailValidationService
+from .domain_intelligence import DomainIntelligence, domain_intelligence
 
-__all__ = ['EmailDeliveryTracker', 'EmailValidationService']
+__all__ = ['EmailDeliveryTracker', 'EmailValidationService', 'DomainIntelligence', 'domain_intelligence']
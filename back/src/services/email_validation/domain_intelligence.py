@@ -0,0 +1,252 @@
+"""
+Caché de información de dominios de email (MX y dominios desechables).
+
+Cada cambio de email resolvía de nuevo los MX del dominio en el executor
+por defecto y cada EmailValidationService reconstruía su lista de dominios
+temporales. Este módulo lo comparte entre peticiones:
+- MX cacheados respetando el TTL del registro DNS (acotado entre
+  EMAIL_MX_MIN_TTL y EMAIL_MX_MAX_TTL) y un LRU de EMAIL_MX_CACHE_SIZE dominios
+- caché negativa: los dominios sin MX o inexistentes se recuerdan durante
+  EMAIL_MX_NEGATIVE_TTL; los fallos temporales de DNS no se cachean
+- consultas simultáneas del mismo dominio comparten una sola resolución,
+  hecha en un pool propio de EMAIL_DNS_WORKERS hilos
+- dominios desechables en un trie de etiquetas invertidas construido una
+  vez, que también reconoce subdominios (x.mailinator.com)
+"""
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+import asyncio
+import logging
+import socket
+import threading
+import time
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Dominios temporales/desechables conocidos
+DISPOSABLE_DOMAINS = frozenset({
+    "10minutemail.com", "guerrillamail.com", "mailinator.com",
+    "temp-mail.org", "throwaway.email", "temporarymail.com",
+    "tempmail.com", "10minutemail.net", "fakeinbox.com",
+    "yopmail.com", "trashmail.com", "mailnesia.com",
+    "mintemail.com", "throwawaymail.com", "sharklasers.com",
+    "spam4.me", "grr.la", "guerrillamail.info",
+    "pokemail.net", "abyssmail.com",
+    "mohmal.com", "tmail.com", "zetmail.com",
+    "sute.jp", "1mail.ml", "asu.mx"
+})
+
+
+class MXLookup(NamedTuple):
+    """Resultado de resolver los MX de un dominio"""
+    records: List[str]  # servidores ordenados por preferencia
+    domain_exists: bool
+    ttl: Optional[int] = None  # TTL del registro DNS, si se conoce
+
+
+def normalize_domain(domain: str) -> str:
+    return domain.strip().rstrip(".").lower()
+
+
+class DomainSuffixIndex:
+    """
+    Trie de etiquetas invertidas: "mail.yopmail.com" se guarda como
+    com -> yopmail -> mail. Un dominio coincide si él o alguno de sus
+    dominios padre está en el índice.
+    """
+
+    _END = ""  # una etiqueta DNS nunca está vacía
+
+    def __init__(self, domains: Iterable[str]):
+        self._root: Dict[str, Any] = {}
+        self.size = 0
+        for domain in domains:
+            self.add(domain)
+
+    def add(self, domain: str):
+        node = self._root
+        for label in reversed(normalize_domain(domain).split(".")):
+            node = node.setdefault(label, {})
+        if self._END not in node:
+            node[self._END] = True
+            self.size += 1
+
+    def matches(self, domain: str) -> bool:
+        node = self._root
+        for label in reversed(normalize_domain(domain).split(".")):
+            node = node.get(label)
+            if node is None:
+                return False
+            if self._END in node:
+                return True
+        return False
+
+
+def resolve_mx(domain: str) -> MXLookup:
+    """
+    Resuelve los MX de un dominio (bloqueante, se ejecuta en el pool).
+    Los fallos temporales se propagan para no cachearlos.
+    """
+    try:
+        import dns.resolver
+    except ImportError:
+        # Sin dnspython: basta con que el dominio resuelva
+        logger.warning("dnspython no instalado, usando verificación básica")
+        try:
+            socket.gethostbyname(domain)
+            return MXLookup(["verificación básica"], True)
+        except socket.gaierror as e:
+            if e.errno == socket.EAI_AGAIN:
+                raise
+            return MXLookup([], False)
+
+    try:
+        answer = dns.resolver.resolve(domain, "MX", lifetime=settings.EMAIL_DNS_TIMEOUT)
+    except dns.resolver.NXDOMAIN:
+        return MXLookup([], False)
+    except dns.resolver.NoAnswer:
+        return MXLookup([], True)
+    records = [str(r.exchange) for r in sorted(answer, key=lambda r: r.preference)]
+    return MXLookup(records, True, answer.rrset.ttl if answer.rrset is not None else None)
+
+
+class DomainIntelligence:
+    """
+    Caché compartida de MX y detección de dominios desechables
+    """
+
+    def __init__(
+        self,
+        resolver: Optional[Callable[[str], MXLookup]] = None,
+        disposable_domains: Iterable[str] = DISPOSABLE_DOMAINS,
+        cache_size: Optional[int] = None,
+        min_ttl: Optional[float] = None,
+        max_ttl: Optional[float] = None,
+        negative_ttl: Optional[float] = None,
+        workers: Optional[int] = None
+    ):
+        self._resolver = resolver or resolve_mx
+        self.disposable = DomainSuffixIndex(disposable_domains)
+        self.cache_size = cache_size or settings.EMAIL_MX_CACHE_SIZE
+        self.min_ttl = settings.EMAIL_MX_MIN_TTL if min_ttl is None else min_ttl
+        self.max_ttl = settings.EMAIL_MX_MAX_TTL if max_ttl is None else max_ttl
+        self.negative_ttl = settings.EMAIL_MX_NEGATIVE_TTL if negative_ttl is None else negative_ttl
+        self.workers = workers or settings.EMAIL_DNS_WORKERS
+        self._cache: "OrderedDict[str, Tuple[float, MXLookup]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def is_disposable(self, domain: str) -> bool:
+        """True si el dominio o alguno de sus padres es desechable"""
+        return self.disposable.matches(domain)
+
+    async def lookup(self, domain: str) -> MXLookup:
+        """
+        MX del dominio desde la caché o resolviéndolos (una sola consulta
+        aunque lleguen varias peticiones a la vez).
+        """
+        domain = normalize_domain(domain)
+        cached = self._get_cached(domain)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        future = self._get_inflight(domain) or self._resolve(domain)
+        try:
+            return await asyncio.shield(future)
+        except Exception:
+            # Fallo temporal (timeout, sin servidores DNS...): no se cachea
+            return MXLookup([], True)
+
+    def prefetch(self, domain: str):
+        """
+        Lanza la resolución sin esperarla, para que corra mientras la
+        petición hace otras comprobaciones; lookup() recoge el resultado.
+        """
+        domain = normalize_domain(domain)
+        if self._get_cached(domain) is None and self._get_inflight(domain) is None:
+            self._resolve(domain)
+
+    async def get_mx(self, domain: str) -> List[str]:
+        """Servidores MX del dominio ordenados por preferencia"""
+        return (await self.lookup(domain)).records
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "cached_domains": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "disposable_domains": self.disposable.size,
+        }
+
+    def clear(self):
+        self._cache.clear()
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _get_cached(self, domain: str) -> Optional[MXLookup]:
+        cached = self._cache.get(domain)
+        if cached is None or cached[0] <= time.monotonic():
+            return None
+        self._cache.move_to_end(domain)
+        return cached[1]
+
+    def _get_inflight(self, domain: str) -> Optional[asyncio.Future]:
+        future = self._inflight.get(domain)
+        if future is not None and future.get_loop() is asyncio.get_running_loop():
+            return future
+        return None
+
+    def _resolve(self, domain: str) -> asyncio.Future:
+        # run_in_executor envía la consulta al pool en el momento
+        self.misses += 1
+        future = asyncio.get_running_loop().run_in_executor(self._get_executor(), self._resolver, domain)
+        self._inflight[domain] = future
+        future.add_done_callback(lambda done: self._finish(domain, done))
+        return future
+
+    def _finish(self, domain: str, future: asyncio.Future):
+        if self._inflight.get(domain) is future:
+            del self._inflight[domain]
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            self.errors += 1
+            logger.warning(f"⚠️ Error resolviendo MX de {domain}: {future.exception()}")
+            return
+        self._store(domain, future.result())
+
+    def _store(self, domain: str, result: MXLookup):
+        if result.records:
+            ttl = result.ttl if result.ttl is not None else self.max_ttl
+            ttl = min(max(ttl, self.min_ttl), self.max_ttl)
+        else:
+            ttl = self.negative_ttl
+        self._cache[domain] = (time.monotonic() + ttl, result)
+        self._cache.move_to_end(domain)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="dns-mx"
+                )
+            return self._executor
+
+# Instancia global
+domain_intelligence = DomainIntelligence()
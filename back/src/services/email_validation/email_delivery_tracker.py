@@ -8,8 +8,6 @@ import logging
 import time
 # Importa asyncio para operaciones asíncronas
 import asyncio
-# Importa socket para operaciones de red (DNS, etc.)
-import socket
 # Importa expresiones regulares para validar emails
 import re
 # Importa aiosmtplib para enviar emails de forma asíncrona
@@ -24,6 +22,8 @@ from email.mime.multipart import MIMEMultipart
 
 # Importa la función para obtener la configuración de la app
 from src.config.settings import get_settings
+# Importa la caché compartida de MX y dominios desechables
+from .domain_intelligence import DISPOSABLE_DOMAINS, domain_intelligence
 
 # Crea un logger para este módulo
 logger = logging.getLogger(__name__)
@@ -182,43 +182,8 @@ class EmailDeliveryTracker:
         Returns:
             Lista de MX records encontrados
         """
-        try:
-            # Usar asyncio para hacer la consulta DNS no bloqueante
-            loop = asyncio.get_event_loop()
-            
-            # Importar dns.resolver si está disponible
-            try:
-                import dns.resolver
-                
-                # Hacer la consulta MX
-                def resolve_mx():
-                    try:
-                        mx_records = dns.resolver.resolve(domain, 'MX')
-                        return [(r.preference, str(r.exchange)) for r in mx_records]
-                    except:
-                        return []
-                
-                mx_list = await loop.run_in_executor(None, resolve_mx)
-                return [mx[1] for mx in sorted(mx_list)]
-                
-            except ImportError:
-                # Si dnspython no está instalado, usar método alternativo
-                logger.warning("dnspython no instalado, usando verificación básica")
-                
-                # Verificar al menos que el dominio resuelve
-                def check_domain():
-                    try:
-                        socket.gethostbyname(domain)
-                        return True
-                    except:
-                        return False
-                
-                domain_exists = await loop.run_in_executor(None, check_domain)
-                return ["verificación básica"] if domain_exists else []
-                
-        except Exception as e:
-            logger.error(f"Error verificando MX records para {domain}: {e}")
-            return []
+        # Caché compartida: respeta el TTL del DNS y recuerda los dominios sin MX
+        return await domain_intelligence.get_mx(domain)
     
     def _create_tracked_message(self, to_email: str, subject: str, code: str) -> MIMEMultipart:
         """
@@ -286,20 +251,9 @@ class EmailValidationService:
         Guarda la lista de dominios de emails temporales para poder identificar y bloquear correos desechables automáticamente.        
         """
         
-    def _load_disposable_domains(self) -> set:
-        """Carga lista de dominios temporales conocidos."""
-        # Lista básica de dominios temporales comunes
-        return {
-            "10minutemail.com", "guerrillamail.com", "mailinator.com",
-            "temp-mail.org", "throwaway.email", "temporarymail.com",
-            "tempmail.com", "10minutemail.net", "fakeinbox.com",
-            "yopmail.com", "trashmail.com", "mailnesia.com",
-            "mintemail.com", "throwawaymail.com", "sharklasers.com",
-            "spam4.me", "grr.la", "guerrillamail.info",
-            "pokemail.net", "spam4.me", "abyssmail.com",
-            "mohmal.com", "tmail.com", "zetmail.com",
-            "sute.jp", "1mail.ml", "asu.mx"
-        }
+    def _load_disposable_domains(self) -> frozenset:
+        """Lista de dominios temporales conocidos (compartida, no se copia)."""
+        return DISPOSABLE_DOMAINS
     
     def is_disposable_email(self, email: str) -> bool:
         """
@@ -312,9 +266,9 @@ class EmailValidationService:
             True si es desechable
         """
         try:
-            # Extrae el dominio y lo compara con la lista
-            domain = email.split('@')[1].lower()
-            return domain in self.disposable_domains
+            # Extrae el dominio y lo busca (también como subdominio) en el índice
+            domain = email.split('@')[1]
+            return domain_intelligence.is_disposable(domain)
         except:
             return False
     
@@ -354,19 +308,16 @@ class EmailValidationService:
             return validation_result
         validation_result["checks"]["not_disposable"] = True
         
-        # 3. Verificar dominio
+        # 3. Verificar dominio (con la misma consulta MX cacheada)
         domain = email.split('@')[1]
-        try:
-            # Intenta resolver el dominio
-            socket.gethostbyname(domain)
-            validation_result["checks"]["domain_exists"] = True
-        except:
+        lookup = await domain_intelligence.lookup(domain)
+        if not lookup.domain_exists:
             validation_result["reason"] = "domain_not_found"
             return validation_result
+        validation_result["checks"]["domain_exists"] = True
             
         # 4. Verificar MX Records
-        tracker = EmailDeliveryTracker()
-        mx_records = await tracker._check_mx_records(domain)
+        mx_records = lookup.records
         if not mx_records:
             validation_result["reason"] = "no_mx_records"
             return validation_result
@@ -0,0 +1,408 @@
+"""
+Exportación masiva de recursos para auditorías (usuarios, documentos,
+chats y mensajes).
+
+Las filas se leen por páginas de clave (id > último id exportado) y se
+codifican página a página en JSONL o CSV, opcionalmente con gzip, así que
+la memoria usada no depende del tamaño de la tabla. Dos modos:
+
+- Streaming: un generador de bytes para StreamingResponse. Se reanuda
+  pasando como cursor el último id recibido.
+- Fichero: un trabajo en segundo plano que escribe en EXPORT_DIR y guarda
+  su progreso en un JSON junto al fichero. Cada página se confirma
+  después de escribirla; al reanudar se trunca a los bytes confirmados
+  y se continúa desde el último id.
+"""
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+import threading
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from src.config.settings import settings
+from src.core.exceptions import NotFoundException, ValidationException
+from src.repositories.export_repository import ExportRepository, EXPORT_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {
+    "jsonl": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# El formato "json" de la API anterior se sirve como JSON Lines
+FORMAT_ALIASES = {"json": "jsonl", "ndjson": "jsonl"}
+
+
+@dataclass
+class ExportJob:
+    """Estado de una exportación a fichero (se persiste en <id>.json)"""
+    job_id: str
+    resource_type: str
+    format: str
+    compress: bool = False
+    include_content: bool = False
+    ids: Optional[List[int]] = None
+    status: str = "pending"  # pending | running | completed | failed | interrupted
+    rows_exported: int = 0
+    total_rows: Optional[int] = None
+    last_id: int = 0
+    bytes_written: int = 0
+    error: Optional[str] = None
+    created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    finished_at: Optional[str] = None
+
+    @property
+    def filename(self) -> str:
+        return f"{self.resource_type}_{self.job_id}.{self.format}" + (".gz" if self.compress else "")
+
+    @property
+    def progress(self) -> Optional[float]:
+        if not self.total_rows:
+            return 1.0 if self.status == "completed" else None
+        return round(min(self.rows_exported / self.total_rows, 1.0), 4)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.update(filename=self.filename, progress=self.progress, cursor=self.last_id)
+        return data
+
+
+class ExportService:
+    """
+    Servicio de exportación por páginas de clave con memoria constante
+    """
+
+    def __init__(
+        self,
+        repository: Optional[ExportRepository] = None,
+        export_dir: Optional[str] = None,
+        page_size: Optional[int] = None,
+        max_concurrent_jobs: Optional[int] = None
+    ):
+        self.repository = repository or ExportRepository()
+        self.export_dir = export_dir or settings.EXPORT_DIR
+        self.page_size = page_size or settings.EXPORT_PAGE_SIZE
+        self._max_workers = max_concurrent_jobs or settings.EXPORT_MAX_CONCURRENT_JOBS
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: Dict[str, ExportJob] = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    # ==================== VALIDACIÓN ====================
+
+    def normalize_format(self, format: str) -> str:
+        """Valida el formato de exportación y resuelve los alias"""
+        normalized = FORMAT_ALIASES.get((format or "").lower(), (format or "").lower())
+        if normalized not in EXPORT_FORMATS:
+            raise ValidationException(
+                f"Formato de exportación inválido: {format}. "
+                f"Formatos válidos: {', '.join(EXPORT_FORMATS)}"
+            )
+        return normalized
+
+    def validate_resource(self, resource_type: str) -> str:
+        """Valida que el recurso se pueda exportar"""
+        if resource_type not in EXPORT_COLUMNS:
+            raise ValidationException(
+                f"Recurso no exportable: {resource_type}. "
+                f"Recursos válidos: {', '.join(EXPORT_COLUMNS)}"
+            )
+        return resource_type
+
+    def columns_for(self, resource_type: str, include_content: bool = False) -> List[str]:
+        """Columnas exportadas de un recurso (el contenido de documentos es opcional)"""
+        columns = [c.strip() for c in EXPORT_COLUMNS[resource_type].split(",")]
+        if include_content and resource_type == "documents":
+            columns.append("content")
+        return columns
+
+    # ==================== LECTURA Y CODIFICACIÓN ====================
+
+    def iter_pages(
+        self,
+        resource_type: str,
+        after_id: int = 0,
+        include_content: bool = False,
+        ids: Optional[List[int]] = None
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Recorre la tabla por páginas de clave (solo hay una página en memoria).
+
+        Args:
+            resource_type: Recurso a exportar
+            after_id: Último id ya exportado (cursor)
+            include_content: Incluir el texto de los documentos
+            ids: Limitar la exportación a estos ids (opcional)
+
+        Yields:
+            List[Dict[str, Any]]: Página de filas ordenadas por id
+        """
+        columns = ", ".join(self.columns_for(resource_type, include_content))
+        while True:
+            page = self.repository.fetch_page(resource_type, after_id, self.page_size, columns=columns, ids=ids)
+            if not page:
+                return
+            yield page
+            after_id = page[-1]["id"]
+            if len(page) < self.page_size:
+                return
+
+    def encode_page(
+        self,
+        page: List[Dict[str, Any]],
+        format: str,
+        columns: List[str],
+        header: bool = False
+    ) -> bytes:
+        """Codifica una página en JSONL o CSV"""
+        if format == "jsonl":
+            return "".join(
+                json.dumps(row, ensure_ascii=False, default=str) + "\n" for row in page
+            ).encode("utf-8")
+
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+        if header:
+            writer.writeheader()
+        writer.writerows(page)
+        return buffer.getvalue().encode("utf-8")
+
+    def stream(
+        self,
+        resource_type: str,
+        format: str = "jsonl",
+        compress: bool = False,
+        after_id: int = 0,
+        include_content: bool = False,
+        ids: Optional[List[int]] = None,
+        on_page: Optional[Callable[[int, int], None]] = None
+    ) -> Iterator[bytes]:
+        """
+        Generador de bytes para StreamingResponse.
+
+        Args:
+            resource_type: Recurso a exportar
+            format: jsonl o csv
+            compress: Comprimir con gzip
+            after_id: Reanudar tras este id
+            include_content: Incluir el texto de los documentos
+            ids: Limitar la exportación a estos ids (opcional)
+            on_page: Callback (filas de la página, último id) para progreso
+
+        Yields:
+            bytes: Fragmentos de la exportación (uno por página)
+        """
+        self.validate_resource(resource_type)
+        format = self.normalize_format(format)
+        columns = self.columns_for(resource_type, include_content)
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+        header = format == "csv"
+        exported = 0
+
+        if header and not compressor:
+            # La cabecera sale aunque la tabla esté vacía
+            yield self.encode_page([], format, columns, header=True)
+            header = False
+
+        for page in self.iter_pages(resource_type, after_id, include_content, ids):
+            chunk = self.encode_page(page, format, columns, header=header)
+            header = False
+            exported += len(page)
+            if on_page:
+                on_page(len(page), page[-1]["id"])
+            if compressor:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+
+        if compressor:
+            if header:
+                yield compressor.compress(self.encode_page([], format, columns, header=True))
+            yield compressor.flush()
+
+        logger.info(f"📤 Exportación en streaming de {resource_type}: {exported} filas ({format})")
+
+    def media_type(self, format: str, compress: bool = False) -> str:
+        """Content-Type de la exportación"""
+        return "application/gzip" if compress else EXPORT_FORMATS[self.normalize_format(format)]
+
+    # ==================== EXPORTACIÓN A FICHERO ====================
+
+    def start_file_export(
+        self,
+        resource_type: str,
+        format: str = "jsonl",
+        compress: bool = False,
+        include_content: bool = False,
+        ids: Optional[List[int]] = None
+    ) -> ExportJob:
+        """
+        Crea un trabajo de exportación a fichero y lo lanza en segundo plano.
+
+        Returns:
+            ExportJob: Trabajo creado (consultar con get_job)
+        """
+        job = ExportJob(
+            job_id=uuid.uuid4().hex[:12],
+            resource_type=self.validate_resource(resource_type),
+            format=self.normalize_format(format),
+            compress=compress,
+            include_content=include_content,
+            ids=ids
+        )
+        try:
+            job.total_rows = self.repository.count(resource_type, ids=ids)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo contar {resource_type} para la exportación: {e}")
+        self._register(job)
+        self._submit(job)
+        logger.info(f"📤 Exportación {job.job_id} de {resource_type} programada ({job.total_rows} filas)")
+        return job
+
+    def resume_file_export(self, job_id: str) -> ExportJob:
+        """
+        Reanuda una exportación interrumpida o fallida desde su cursor.
+
+        Raises:
+            NotFoundException: Si el trabajo no existe
+            ValidationException: Si el trabajo está en curso o ya terminó
+        """
+        job = self.get_job(job_id)
+        # Comprobar y marcar a la vez: un trabajo "pending" ya está en la cola
+        # del executor y otro envío lo ejecutaría en dos hilos sobre el mismo fichero
+        with self._lock:
+            if job.status in ("pending", "running", "completed"):
+                raise ValidationException(f"La exportación {job_id} está en estado '{job.status}'")
+            job.status = "pending"
+            job.error = None
+        self._save_state(job)
+        self._submit(job)
+        logger.info(f"📤 Exportación {job_id} reanudada desde id {job.last_id}")
+        return job
+
+    def run_file_export(self, job: ExportJob) -> ExportJob:
+        """
+        Ejecuta (o continúa) una exportación a fichero de forma síncrona.
+        Cada página se escribe, se vuelca a disco y después se confirma el
+        cursor; con gzip cada página es un miembro gzip independiente para
+        que el fichero siga siendo válido al truncarlo.
+        """
+        job.status = "running"
+        self._save_state(job)
+        path = self.file_path(job)
+        columns = self.columns_for(job.resource_type, job.include_content)
+        try:
+            with open(path, "ab") as output:
+                # Descartar lo escrito después de la última página confirmada
+                output.truncate(job.bytes_written)
+                output.seek(job.bytes_written)
+                header = job.format == "csv" and job.bytes_written == 0
+                for page in self.iter_pages(job.resource_type, job.last_id, job.include_content, job.ids):
+                    if self._stopping.is_set():
+                        break
+                    chunk = self.encode_page(page, job.format, columns, header=header)
+                    header = False
+                    if job.compress:
+                        chunk = gzip.compress(chunk)
+                    output.write(chunk)
+                    output.flush()
+                    os.fsync(output.fileno())
+                    job.bytes_written += len(chunk)
+                    job.rows_exported += len(page)
+                    job.last_id = page[-1]["id"]
+                    self._save_state(job)
+                if header and not self._stopping.is_set():
+                    chunk = self.encode_page([], job.format, columns, header=True)
+                    output.write(gzip.compress(chunk) if job.compress else chunk)
+                    job.bytes_written = output.tell()
+
+            if self._stopping.is_set():
+                job.status = "interrupted"
+                logger.info(f"⏸️ Exportación {job.job_id} interrumpida en id {job.last_id}")
+            else:
+                job.status = "completed"
+                job.finished_at = datetime.utcnow().isoformat()
+                logger.info(f"✅ Exportación {job.job_id} completada: {job.rows_exported} filas en {path}")
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            logger.error(f"❌ Exportación {job.job_id} fallida en id {job.last_id}: {str(e)}")
+        self._save_state(job)
+        return job
+
+    def get_job(self, job_id: str) -> ExportJob:
+        """Obtiene un trabajo (de memoria o de su fichero de estado)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job:
+            return job
+
+        state_path = os.path.join(self.export_dir, f"{os.path.basename(job_id)}.json")
+        if not os.path.exists(state_path):
+            raise NotFoundException("Exportación", job_id)
+        with open(state_path, encoding="utf-8") as f:
+            job = ExportJob(**json.load(f))
+        # Un trabajo "running" sin hilo en este proceso quedó interrumpido
+        if job.status in ("running", "pending"):
+            job.status = "interrupted"
+        return self._register(job)
+
+    def list_jobs(self) -> List[ExportJob]:
+        """Trabajos conocidos por este proceso, del más reciente al más antiguo"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+    def file_path(self, job: ExportJob) -> str:
+        """Ruta del fichero de una exportación"""
+        return os.path.join(self.export_dir, job.filename)
+
+    def shutdown(self):
+        """
+        Detiene las exportaciones tras la página en curso; quedan en estado
+        "interrupted" y se pueden reanudar con resume_file_export.
+        """
+        if self._executor:
+            self._stopping.set()
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            self._stopping.clear()
+            # Los que seguían en la cola no llegaron a ejecutarse
+            with self._lock:
+                queued = [job for job in self._jobs.values() if job.status == "pending"]
+                for job in queued:
+                    job.status = "interrupted"
+            for job in queued:
+                self._save_state(job)
+
+    def _register(self, job: ExportJob) -> ExportJob:
+        with self._lock:
+            self._jobs[job.job_id] = job
+        return job
+
+    def _submit(self, job: ExportJob):
+        os.makedirs(self.export_dir, exist_ok=True)
+        self._save_state(job)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="export")
+        self._executor.submit(self.run_file_export, job)
+
+    def _save_state(self, job: ExportJob):
+        os.makedirs(self.export_dir, exist_ok=True)
+        state_path = os.path.join(self.export_dir, f"{job.job_id}.json")
+        tmp_path = state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(job), f)
+        os.replace(tmp_path, state_path)
+
+# Instancia global
+export_service = ExportService()
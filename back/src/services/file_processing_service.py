@@ -8,8 +8,17 @@ import os
 from typing import Optional, Tuple
 from pathlib import Path as PathLib
 
+from src.core.metrics import metrics
+
 logger = logging.getLogger(__name__)
 
+PDF_PAGE_LATENCY = metrics.histogram(
+    "pdf_page_extraction_seconds",
+    "Extracción de texto de una página de PDF",
+    ["library"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
 class FileProcessingService:
     """Servicio para procesamiento de archivos"""
     
@@ -68,9 +77,11 @@ class FileProcessingService:
             pdf_reader = PyPDF2.PdfReader(pdf_file)
             
             text_parts = []
+            page_latency = PDF_PAGE_LATENCY.labels("pypdf2")
             for page_num, page in enumerate(pdf_reader.pages):
                 try:
-                    page_text = page.extract_text()
+                    with page_latency.time():
+                        page_text = page.extract_text()
                     if page_text.strip():
                         text_parts.append(page_text)
                 except Exception as e:
@@ -86,8 +97,10 @@ class FileProcessingService:
                     
                     with pdfplumber.open(io.BytesIO(file_content)) as pdf:
                         text_parts = []
+                        page_latency = PDF_PAGE_LATENCY.labels("pdfplumber")
                         for page in pdf.pages:
-                            page_text = page.extract_text()
+                            with page_latency.time():
+                                page_text = page.extract_text()
                             if page_text:
                                 text_parts.append(page_text)
                         
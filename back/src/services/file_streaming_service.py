@@ -9,9 +9,7 @@ from typing import AsyncIterator, Optional, Tuple
 import logging
 import aiofiles
 from fastapi import UploadFile, status
-import PyPDF2
 from src.core.exceptions import ValidationException
-import pdfplumber
 from src.config.settings import get_settings
 
 logger = logging.getLogger(__name__)
@@ -111,7 +109,8 @@ class FileStreamingService:
         pages_processed = 0
         
         try:
-            # Primero intentar con pdfplumber (mejor calidad)
+            # Primero intentar con pdfplumber (mejor calidad); se importa al usarlo
+            import pdfplumber
             with pdfplumber.open(file_path) as pdf:
                 total_pages = len(pdf.pages)
                 logger.info(f"📄 PDF abierto: {total_pages} páginas")
@@ -150,6 +149,7 @@ class FileStreamingService:
             
             # Fallback a PyPDF2
             try:
+                import PyPDF2
                 with open(file_path, 'rb') as file:
                     pdf_reader = PyPDF2.PdfReader(file)
                     total_pages = len(pdf_reader.pages)
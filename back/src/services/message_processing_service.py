@@ -7,11 +7,12 @@ import re
 from typing import Dict, List, Optional, Tuple, Any
 from datetime import datetime
 
-from src.models.schemas.chat import MessageCreate, ChatMessage
+from src.models.schemas.chat import MessageCreate
 from src.models.domain import User, Message
 from src.services.document_service import DocumentService
 from src.utils.ai_connector import OpenAIConnector
-from src.repositories.message_repository import MessageRepository
+from src.services.chat.intent_matcher import get_intent_matcher
+from src.core.tracing import traced
 from src.core.exceptions import (
     ValidationException, 
     ExternalServiceException, 
@@ -26,7 +27,6 @@ class MessageProcessingService:
     def __init__(self):
         self.document_service = DocumentService()
         self.ai_connector = OpenAIConnector()
-        self.message_repository = MessageRepository()
         
         # Configuración de correcciones ortográficas
         self.spelling_corrections = self._load_spelling_corrections()
@@ -34,22 +34,22 @@ class MessageProcessingService:
         # Configuración de respuestas contextuales
         self.context_responses = self._load_context_responses()
     
-    def process_incoming_message(
+    @traced("message.process")
+    def generate_response(
         self, 
         message_data: MessageCreate, 
-        chat_id: int, 
         user_id: int
-    ) -> ChatMessage:
+    ) -> str:
         """
-        Procesa un mensaje entrante y genera una respuesta completa
+        Procesa un mensaje entrante y genera la respuesta completa. No guarda
+        el mensaje: el llamador lo encola en la persistencia diferida.
         
         Args:
             message_data: Datos del mensaje
-            chat_id: ID del chat
             user_id: ID del usuario
             
         Returns:
-            ChatMessage: Mensaje procesado con respuesta
+            str: Respuesta generada
         """
         try:
             # 1. Preparar y corregir la pregunta
@@ -61,25 +61,18 @@ class MessageProcessingService:
             
             # 3. Procesar según el tipo de mensaje
             if is_out_of_context:
-                response = self._handle_out_of_context_message(
+                return self._handle_out_of_context_message(
                     context_type, corrected_question, correction_msg
                 )
-            else:
-                response = self._handle_document_related_message(
-                    corrected_question, message_data, user_id, correction_msg
-                )
-            
-            # 4. Crear y retornar mensaje
-            return self._create_message_record(
-                chat_id=chat_id,
-                original_question=original_question,
-                response=response
+            return self._handle_document_related_message(
+                corrected_question, message_data, user_id, correction_msg
             )
             
         except Exception as e:
             logger.error(f"Error procesando mensaje: {str(e)}")
             raise DatabaseException(f"Error al procesar mensaje: {str(e)}")
     
+    @traced("message.prepare_rag_context")
     def prepare_rag_context(
         self, 
         question: str, 
@@ -133,6 +126,7 @@ class MessageProcessingService:
             logger.error(f"❌ Error preparando contexto RAG: {str(e)}")
             raise ExternalServiceException("Error al procesar documentos seleccionados")
     
+    @traced("message.generate_response")
     def handle_message_creation(
         self, 
         question: str, 
@@ -358,10 +352,11 @@ Pregunta del usuario: {question}
         correction_msg: str
     ) -> str:
         """Maneja mensajes relacionados con documentos"""
-        question_lower = question.lower().strip()
+        # Clasificación en una sola pasada con el matcher precompilado
+        intent = get_intent_matcher().match(question)
         
         # 1. Detectar preguntas sobre listar documentos
-        if self._is_document_list_question(question_lower):
+        if intent.has("document_list"):
             return self._handle_document_list_request(user_id, correction_msg)
         
         # 2. Verificar si hay documentos seleccionados
@@ -369,7 +364,7 @@ Pregunta del usuario: {question}
         n_results = getattr(message_data, 'n_results', 5)
         
         # 3. Si es pregunta sobre documentos pero no hay documentos seleccionados
-        if self._is_document_content_question(question_lower) and not document_ids:
+        if intent.has("document_content") and not document_ids:
             response = (
                 "Para responder preguntas sobre documentos, primero debes seleccionar "
                 "un documento usando el botón de carpeta en la parte superior del chat.\n\n"
@@ -472,21 +467,11 @@ Pregunta del usuario: {question}
     
     def _is_document_list_question(self, question_lower: str) -> bool:
         """Detecta si es una pregunta sobre listar documentos"""
-        list_patterns = [
-            "qué documentos tengo", "que documentos tengo", "mis documentos",
-            "listar documentos", "mostrar documentos", "cuáles son mis documentos",
-            "documentos disponibles", "qué archivos tengo", "mis archivos"
-        ]
-        return any(pattern in question_lower for pattern in list_patterns)
+        return get_intent_matcher().match(question_lower).has("document_list")
     
     def _is_document_content_question(self, question_lower: str) -> bool:
         """Detecta si es una pregunta sobre contenido de documentos"""
-        content_keywords = [
-            "resume", "resumir", "resumen", "busca", "buscar", "encuentra",
-            "analiza", "analizar", "información", "contenido", "dice",
-            "explica", "habla", "trata", "menciona", "contiene"
-        ]
-        return any(keyword in question_lower for keyword in content_keywords)
+        return get_intent_matcher().match(question_lower).has("document_content")
     
     def _build_conversation_context(self, previous_messages: Optional[List[Message]]) -> List[Dict[str, str]]:
         """Construye el contexto de la conversación para la IA"""
@@ -537,29 +522,6 @@ Pregunta del usuario: {question}
                 info += "*"
             return info
     
-    def _create_message_record(self, chat_id: int, original_question: str, response: str) -> ChatMessage:
-        """Crea el registro del mensaje en la base de datos"""
-        try:
-            # Crear mensaje en la base de datos
-            message = self.message_repository.create_message(
-                chat_id=chat_id,
-                question=original_question,
-                answer=response
-            )
-            
-            # Convertir a esquema de respuesta
-            return ChatMessage(
-                id=message.id,
-                id_chat=message.id_chat,
-                question=message.question or "",
-                answer=message.answer,
-                created_at=message.created_at
-            )
-            
-        except Exception as e:
-            logger.error(f"❌ Error creando registro de mensaje: {str(e)}")
-            raise DatabaseException(f"Error al guardar mensaje: {str(e)}")
-    
     def _load_spelling_corrections(self) -> Dict[str, Any]:
         """Carga configuración de correcciones ortográficas"""
         return {
@@ -0,0 +1,147 @@
+"""
+Hashing de contraseñas fuera del event loop.
+
+PBKDF2 (y bcrypt en hashes antiguos) cuesta decenas de milisegundos de CPU
+por llamada; ejecutado dentro de un handler async congela el streaming de
+todos los chats mientras dura. Este servicio lo delega a un pool dedicado:
+- PASSWORD_HASH_EXECUTOR=process (por defecto) o thread
+- PASSWORD_HASH_WORKERS procesos/hilos (0 = uno por núcleo)
+- admisión: como mucho un cálculo por worker en vuelo; el resto espera en
+  la cola del event loop y, si ya hay PASSWORD_HASH_MAX_QUEUE esperando,
+  se responde 429 en lugar de acumular logins sin límite
+- verify_and_upgrade devuelve un hash nuevo cuando el almacenado usa
+  parámetros anteriores (rehash transparente en el login)
+"""
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+
+from src.config.settings import settings
+from src.core.exceptions import RateLimitException
+from src.utils.password_utils import hash_password, needs_rehash, verify_password
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasher:
+    """
+    Pool de hashing de contraseñas con envoltorios async
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        executor_type: Optional[str] = None,
+        max_queue: Optional[int] = None,
+        iterations: Optional[int] = None
+    ):
+        self.workers = workers or settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+        self.executor_type = executor_type or settings.PASSWORD_HASH_EXECUTOR
+        self.max_queue = settings.PASSWORD_HASH_MAX_QUEUE if max_queue is None else max_queue
+        self.iterations = iterations or settings.PASSWORD_PBKDF2_ITERATIONS
+        self._executor: Optional[Executor] = None
+        self._executor_lock = threading.Lock()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+
+    async def hash(self, password: str) -> str:
+        """Genera el hash de una contraseña con los parámetros configurados"""
+        return await self._run(hash_password, password, self.iterations)
+
+    async def verify(self, password: str, stored_hash: str) -> bool:
+        """Verifica una contraseña contra el hash almacenado"""
+        return await self._run(verify_password, password, stored_hash)
+
+    async def verify_and_upgrade(self, password: str, stored_hash: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verifica la contraseña y, si es correcta pero el hash usa parámetros
+        anteriores, calcula el hash actualizado.
+
+        Returns:
+            Tuple[bool, Optional[str]]: (válida, hash nuevo a guardar o None)
+        """
+        if not await self.verify(password, stored_hash):
+            return False, None
+        if not needs_rehash(stored_hash, self.iterations):
+            return True, None
+        self.rehashed += 1
+        return True, await self.hash(password)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estado del pool (para administración)"""
+        return {
+            "executor": self.executor_type,
+            "workers": self.workers,
+            "iterations": self.iterations,
+            "waiting": self._waiting,
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+        }
+
+    def shutdown(self):
+        """Cierra el pool (los cálculos pendientes se cancelan)"""
+        with self._executor_lock:
+            if self._executor:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+                logger.info("🔐 Pool de hashing de contraseñas detenido")
+
+    # ==================== INTERNOS ====================
+
+    async def _run(self, func: Callable, *args):
+        if self._waiting >= self.max_queue:
+            self.rejected += 1
+            logger.warning(f"⚠️ Cola de hashing llena ({self._waiting} en espera): login rechazado")
+            raise RateLimitException("Demasiados inicios de sesión simultáneos, inténtalo de nuevo", retry_after=1)
+
+        self._waiting += 1
+        try:
+            async with self._get_semaphore():
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self._get_executor(), func, *args)
+            self.completed += 1
+            return result
+        finally:
+            self._waiting -= 1
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Un semáforo por event loop (los tests crean uno nuevo por caso)
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.workers)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    def _get_executor(self) -> Executor:
+        with self._executor_lock:
+            if self._executor is None:
+                if self.executor_type == "process":
+                    try:
+                        # spawn: los workers no heredan hilos ni locks del servidor
+                        self._executor = ProcessPoolExecutor(
+                            max_workers=self.workers,
+                            mp_context=multiprocessing.get_context("spawn")
+                        )
+                    except (OSError, NotImplementedError) as e:
+                        logger.warning(f"⚠️ No se pudo crear el pool de procesos ({e}), se usan hilos")
+                        self.executor_type = "thread"
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers,
+                        thread_name_prefix="password-hash"
+                    )
+                logger.info(f"🔐 Pool de hashing de contraseñas: {self.workers} {self.executor_type}")
+            return self._executor
+
+# Instancia global
+password_hasher = PasswordHasher()
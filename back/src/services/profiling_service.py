@@ -0,0 +1,443 @@
+"""
+Herramientas de diagnóstico en producción (expuestas en /admin/profiling).
+
+- LoopLagMonitor: un latido en el event loop cada PROFILING_LOOP_LAG_INTERVAL_MS
+  y un hilo vigilante. Si el latido se retrasa más de
+  PROFILING_LOOP_LAG_THRESHOLD_MS, el vigilante captura la pila del hilo del
+  loop *mientras está bloqueado* (sys._current_frames), así que el evento
+  apunta al callback culpable y no a quien se ejecuta después. El retraso de
+  cada latido va al histograma event_loop_lag_seconds de /metrics.
+- SamplingProfiler: profiler de CPU bajo demanda por muestreo de pilas desde
+  un hilo aparte (sin sys.setprofile: no ralentiza el código perfilado).
+  Devuelve pilas colapsadas (formato de flamegraph.pl / speedscope) o un
+  flamegraph SVG autocontenido.
+- MemorySnapshots: instantáneas de tracemalloc y diferencias entre dos de
+  ellas. tracemalloc solo se activa bajo demanda (tiene coste en memoria y CPU).
+"""
+from collections import Counter, OrderedDict, deque
+from datetime import datetime, timezone
+from html import escape
+from typing import Any, Callable, Dict, List, Optional, Set
+import asyncio
+import hashlib
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+from src.config.settings import settings
+from src.core.exceptions import ConflictException, NotFoundException, ValidationException
+from src.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG = metrics.histogram(
+    "event_loop_lag_seconds",
+    "Retraso del latido del event loop respecto a su hora prevista",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+# Marcos por pila capturada (los más cercanos al punto de bloqueo)
+MAX_STACK_FRAMES = 40
+
+# Prefijos de ruta que se recortan al mostrar ficheros
+_PATH_PREFIXES = sorted({os.getcwd() + os.sep, *(p + os.sep for p in sys.path if p)}, key=len, reverse=True)
+
+
+def _short_path(filename: str) -> str:
+    for prefix in _PATH_PREFIXES:
+        if filename.startswith(prefix):
+            return filename[len(prefix):]
+    return filename
+
+
+def _format_stack(frame) -> List[str]:
+    """Pila de un marco, del más externo al más interno"""
+    lines = []
+    while frame is not None:
+        code = frame.f_code
+        lines.append(f"{_short_path(code.co_filename)}:{frame.f_lineno} in {code.co_name}")
+        frame = frame.f_back
+    lines.reverse()
+    return lines[-MAX_STACK_FRAMES:]
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# ==================== LAG DEL EVENT LOOP ====================
+
+class LoopLagMonitor:
+    """
+    Detecta bloqueos del event loop y guarda la pila del callback que los causa
+    """
+
+    def __init__(
+        self,
+        threshold_ms: Optional[float] = None,
+        interval_ms: Optional[float] = None,
+        max_events: Optional[int] = None,
+        clock: Callable[[], float] = time.perf_counter
+    ):
+        self.threshold = (settings.PROFILING_LOOP_LAG_THRESHOLD_MS if threshold_ms is None else threshold_ms) / 1000
+        self.interval = (settings.PROFILING_LOOP_LAG_INTERVAL_MS if interval_ms is None else interval_ms) / 1000
+        self.events: deque = deque(maxlen=max_events or settings.PROFILING_LOOP_LAG_MAX_EVENTS)
+        self.stalls = 0
+        self.max_lag = 0.0
+        self._clock = clock
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._last_beat = 0.0
+        self._expected = 0.0
+        self._lock = threading.Lock()
+        # Evento del bloqueo en curso y latido en el que empezó
+        self._current: Optional[Dict[str, Any]] = None
+        self._current_beat = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    async def start(self):
+        """Empieza a vigilar el loop en el que se llama"""
+        if self.running or self.threshold <= 0:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        self._last_beat = self._expected = self._clock()
+        self._handle = self._loop.call_later(self.interval, self._beat)
+        self._expected += self.interval
+        self._thread = threading.Thread(target=self._watch, name="loop-lag-monitor", daemon=True)
+        self._thread.start()
+        logger.info(f"🐢 Monitor de bloqueos del event loop iniciado (umbral {self.threshold * 1000:.0f} ms)")
+
+    async def stop(self):
+        if not self.running:
+            return
+        if self._handle:
+            self._handle.cancel()
+            self._handle = None
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        await asyncio.to_thread(thread.join, 2)
+
+    def _beat(self):
+        """Latido en el loop: mide su retraso y cierra el bloqueo en curso"""
+        now = self._clock()
+        lag = max(0.0, now - self._expected)
+        LOOP_LAG.observe(lag)
+        self.max_lag = max(self.max_lag, lag)
+        with self._lock:
+            if self._current is not None and self._current_beat == self._last_beat:
+                self._current["blocked_ms"] = round(lag * 1000, 1)
+                self._current["resolved_at"] = _utc_now()
+                self._current = None
+            self._last_beat = now
+        self._expected = now + self.interval
+        if not self._stop.is_set():
+            self._handle = self._loop.call_later(self.interval, self._beat)
+
+    def _watch(self):
+        """Hilo vigilante: captura la pila del loop cuando el latido no llega"""
+        check_every = max(self.threshold / 4, 0.005)
+        while not self._stop.wait(check_every):
+            self.check()
+
+    def check(self) -> Optional[Dict[str, Any]]:
+        """Comprueba el latido; devuelve el evento si el loop está bloqueado"""
+        with self._lock:
+            beat = self._last_beat
+            blocked = self._clock() - beat - self.interval
+            if blocked < self.threshold:
+                return None
+            if self._current is not None and self._current_beat == beat:
+                # Mismo bloqueo: solo se actualiza la duración
+                self._current["blocked_ms"] = round(blocked * 1000, 1)
+                return self._current
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            task = asyncio.current_task(self._loop) if self._loop else None
+            event = {
+                "detected_at": _utc_now(),
+                "resolved_at": None,
+                "blocked_ms": round(blocked * 1000, 1),
+                "task": task.get_name() if task else None,
+                "stack": _format_stack(frame),
+            }
+            self.events.append(event)
+            self.stalls += 1
+            self._current, self._current_beat = event, beat
+
+        where = event["stack"][-1] if event["stack"] else "desconocido"
+        logger.warning("🐢 Event loop bloqueado más de %.0f ms en %s", self.threshold * 1000, where)
+        return event
+
+    def get_events(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Bloqueos más recientes primero"""
+        with self._lock:
+            return [dict(event) for event in reversed(self.events)][:limit]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "threshold_ms": self.threshold * 1000,
+            "interval_ms": self.interval * 1000,
+            "stalls": self.stalls,
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "events_kept": len(self.events),
+        }
+
+    def clear(self):
+        with self._lock:
+            self.events.clear()
+            self._current = None
+        self.stalls = 0
+        self.max_lag = 0.0
+
+
+# ==================== PROFILER DE CPU ====================
+
+class SamplingProfiler:
+    """
+    Profiler por muestreo: cada `interval` lee las pilas de los hilos y cuenta
+    pilas colapsadas ("hilo;módulo:func;...;func")
+    """
+
+    def __init__(self, max_seconds: Optional[float] = None):
+        self.max_seconds = settings.PROFILING_CPU_MAX_SECONDS if max_seconds is None else max_seconds
+        self._busy = threading.Lock()
+
+    def profile(
+        self,
+        duration: float,
+        interval: float = 0.005,
+        thread_ids: Optional[Set[int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Muestrea durante `duration` segundos (bloqueante: llamar con
+        asyncio.to_thread). thread_ids limita el muestreo a esos hilos.
+        """
+        if duration <= 0 or duration > self.max_seconds:
+            raise ValidationException(f"La duración debe estar entre 0 y {self.max_seconds:.0f} segundos")
+        if not 0.001 <= interval <= 1:
+            raise ValidationException("El intervalo de muestreo debe estar entre 1 y 1000 ms")
+        if not self._busy.acquire(blocking=False):
+            raise ConflictException("Ya hay un perfilado de CPU en curso")
+        try:
+            return self._sample(duration, interval, thread_ids)
+        finally:
+            self._busy.release()
+
+    def _sample(self, duration: float, interval: float, thread_ids: Optional[Set[int]]) -> Dict[str, Any]:
+        own = threading.get_ident()
+        stacks: Counter = Counter()
+        rounds = 0
+        started = time.perf_counter()
+        deadline = started + duration
+        while time.perf_counter() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or (thread_ids and ident not in thread_ids):
+                    continue
+                stacks[self._collapse(names.get(ident, str(ident)), frame)] += 1
+            rounds += 1
+            time.sleep(interval)
+        return {
+            "duration_seconds": round(time.perf_counter() - started, 3),
+            "interval_ms": interval * 1000,
+            "rounds": rounds,
+            "samples": sum(stacks.values()),
+            "stacks": stacks,
+        }
+
+    @staticmethod
+    def _collapse(thread_name: str, frame) -> str:
+        parts = []
+        while frame is not None:
+            code = frame.f_code
+            # Primera línea de la función: identifica la función sin partirla por líneas
+            parts.append(f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})".replace(";", ","))
+            frame = frame.f_back
+        parts.append(thread_name.replace(";", ","))
+        return ";".join(reversed(parts))
+
+
+def collapsed_text(stacks: Counter) -> str:
+    """Pilas colapsadas, una por línea con su número de muestras"""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def render_flamegraph_svg(stacks: Counter, title: str = "Perfil de CPU", width: int = 1200) -> str:
+    """Flamegraph SVG autocontenido (raíz abajo, ancho proporcional a las muestras)"""
+    tree: Dict[str, Any] = {"children": {}, "count": 0}
+    for stack, count in stacks.items():
+        node = tree
+        node["count"] += count
+        for name in stack.split(";"):
+            node = node["children"].setdefault(name, {"children": {}, "count": 0})
+            node["count"] += count
+
+    total = tree["count"] or 1
+    frames: List[tuple] = []  # (nombre, muestras, x, profundidad, ancho)
+
+    def walk(node, x, depth):
+        for name in sorted(node["children"]):
+            child = node["children"][name]
+            child_width = child["count"] / total * width
+            if child_width >= 0.3:
+                frames.append((name, child["count"], x, depth, child_width))
+                walk(child, x, depth + 1)
+            x += child_width
+
+    walk(tree, 0.0, 0)
+    frame_height, top_margin = 16, 24
+    depth = max((frame[3] for frame in frames), default=0) + 1
+    height = top_margin + depth * frame_height
+    rects = [
+        _svg_frame(name, count, total, x, height - (level + 1) * frame_height, frame_width, frame_height)
+        for name, count, x, level, frame_width in frames
+    ]
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'font-family="monospace" font-size="11">\n'
+        f'<text x="{width / 2}" y="16" text-anchor="middle" font-size="14">'
+        f'{escape(title)} ({tree["count"]} muestras)</text>\n'
+        + "\n".join(rects)
+        + "\n</svg>\n"
+    )
+
+
+def _svg_frame(name: str, count: int, total: int, x: float, y: int, width: float, height: int) -> str:
+    # Color estable por función para poder comparar flamegraphs
+    digest = hashlib.md5(name.encode("utf-8")).digest()
+    color = f"rgb({205 + digest[0] % 50},{80 + digest[1] % 130},{digest[2] % 60})"
+    chars = int((width - 6) / 7)
+    label = name if len(name) <= chars else name[:max(0, chars - 2)] + ".."
+    text = f'<text x="{x + 3:.1f}" y="{y + 12}">{escape(label)}</text>' if chars >= 3 else ""
+    return (
+        f'<g><title>{escape(name)} ({count} muestras, {count / total:.1%})</title>'
+        f'<rect x="{x:.1f}" y="{y}" width="{width:.1f}" height="{height - 1}" fill="{color}" rx="2"/>{text}</g>'
+    )
+
+
+# ==================== MEMORIA (TRACEMALLOC) ====================
+
+class MemorySnapshots:
+    """Instantáneas de tracemalloc identificadas por número, con diferencias entre dos"""
+
+    # Asignaciones internas que no interesan en el diff
+    _IGNORED = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    )
+
+    def __init__(self, max_snapshots: Optional[int] = None):
+        self.max_snapshots = max_snapshots or settings.PROFILING_MEMORY_MAX_SNAPSHOTS
+        self._snapshots: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def start(self, frames: int = 25) -> Dict[str, Any]:
+        """Activa tracemalloc (solo registra asignaciones a partir de ahora)"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            logger.info(f"🧠 tracemalloc activado ({frames} marcos por asignación)")
+        return self.get_status()
+
+    def stop(self) -> Dict[str, Any]:
+        """Desactiva tracemalloc y descarta las instantáneas"""
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            logger.info("🧠 tracemalloc desactivado")
+        with self._lock:
+            self._snapshots.clear()
+        return self.get_status()
+
+    def take(self, label: Optional[str] = None) -> Dict[str, Any]:
+        """Toma una instantánea (bloqueante: llamar con asyncio.to_thread)"""
+        if not tracemalloc.is_tracing():
+            raise ValidationException("tracemalloc no está activo: POST /admin/profiling/memory/start")
+        snapshot = tracemalloc.take_snapshot().filter_traces(self._IGNORED)
+        current, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            entry = {
+                "id": self._next_id,
+                "label": label,
+                "taken_at": _utc_now(),
+                "traced_kb": round(current / 1024, 1),
+                "peak_kb": round(peak / 1024, 1),
+                "snapshot": snapshot,
+            }
+            self._snapshots[self._next_id] = entry
+            self._next_id += 1
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+        return self._describe(entry)
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [self._describe(entry) for entry in self._snapshots.values()]
+
+    def diff(self, from_id: int, to_id: int, group_by: str = "lineno", limit: int = 20) -> Dict[str, Any]:
+        """Mayores crecimientos de memoria entre dos instantáneas"""
+        if group_by not in ("lineno", "filename", "traceback"):
+            raise ValidationException("group_by debe ser lineno, filename o traceback")
+        older, newer = self._get(from_id)["snapshot"], self._get(to_id)["snapshot"]
+        stats = newer.compare_to(older, group_by)
+        return {
+            "from": from_id,
+            "to": to_id,
+            "group_by": group_by,
+            "size_diff_kb": round(sum(stat.size_diff for stat in stats) / 1024, 1),
+            "count_diff": sum(stat.count_diff for stat in stats),
+            "top": [
+                {
+                    "location": _short_path(str(stat.traceback[-1])) if stat.traceback else "?",
+                    "size_diff_kb": round(stat.size_diff / 1024, 1),
+                    "size_kb": round(stat.size / 1024, 1),
+                    "count_diff": stat.count_diff,
+                    "count": stat.count,
+                    **({"traceback": [_short_path(line) for line in stat.traceback.format()]}
+                       if group_by == "traceback" else {}),
+                }
+                for stat in stats[:limit]
+            ],
+        }
+
+    def get_status(self) -> Dict[str, Any]:
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        return {
+            "tracing": tracing,
+            "frames": tracemalloc.get_traceback_limit() if tracing else 0,
+            "traced_kb": round(current / 1024, 1),
+            "peak_kb": round(peak / 1024, 1),
+            "overhead_kb": round(tracemalloc.get_tracemalloc_memory() / 1024, 1),
+            "snapshots": len(self._snapshots),
+        }
+
+    def _get(self, snapshot_id: int) -> Dict[str, Any]:
+        with self._lock:
+            entry = self._snapshots.get(snapshot_id)
+        if entry is None:
+            raise NotFoundException(f"Instantánea de memoria {snapshot_id} no encontrada")
+        return entry
+
+    @staticmethod
+    def _describe(entry: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: value for key, value in entry.items() if key != "snapshot"}
+
+
+# Instancias globales
+loop_lag_monitor = LoopLagMonitor()
+sampling_profiler = SamplingProfiler()
+memory_snapshots = MemorySnapshots()
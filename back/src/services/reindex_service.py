@@ -0,0 +1,524 @@
+"""
+Re-indexación completa de los documentos en ChromaDB y migración entre
+versiones de la colección (documents_v{n}).
+
+El trabajo llena una versión nueva mientras la activa sigue sirviendo las
+búsquedas:
+- crea documents_v{n+1} para el modelo SENTENCE_TRANSFORMER_MODEL y activa
+  la doble escritura (los documentos nuevos o editados van a las dos)
+- recorre los documentos por páginas de clave (id > último id procesado)
+- si el modelo no cambia y el hash del contenido coincide con el guardado
+  en la versión activa, copia sus chunks con los embeddings existentes
+- el resto se trocea; los chunks cuyo hash (chunk_hash) ya existía se copian
+  igualmente y solo los nuevos se envían al modelo, por lotes de
+  REINDEX_EMBED_BATCH_SIZE chunks en REINDEX_WORKERS hilos
+- los tags solo existen en los metadatos de los chunks: se copian de los
+  chunks del documento en la colección origen, también si cambia el modelo
+- al terminar repasa los documentos modificados durante el trabajo, borra
+  del destino los eliminados (los workers con el registro aún en caché,
+  hasta CHROMA_REGISTRY_TTL_SECONDS, solo los borraron de la activa),
+  cambia la versión activa en el registro con una sola escritura y borra
+  las versiones antiguas (se conserva la anterior para volver atrás)
+
+El progreso se guarda tras cada página en REINDEX_DIR/state.json; un
+trabajo interrumpido continúa desde el último id en la misma colección.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import unicodedata
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from src.config.settings import settings
+from src.core.exceptions import ConflictException, NotFoundException
+from src.repositories.document_repository import DocumentRepository
+from src.utils.chromadb_connector import ChromaDBConnector
+
+logger = logging.getLogger(__name__)
+
+# Subir al cambiar el algoritmo de troceado: invalida todos los hashes
+CHUNKER_VERSION = 2
+
+# Chroma limita el número de registros por llamada
+CHROMA_WRITE_BATCH = 1000
+
+# Documentos por consulta IN (...) al buscar los eliminados durante el trabajo
+EXISTENCE_CHECK_BATCH = 200
+
+Chunker = Callable[..., List[str]]
+
+
+def content_hash(content: str, content_type: Optional[str] = None) -> str:
+    """
+    Hash del contenido de un documento tal y como se trocea.
+
+    Args:
+        content: Texto del documento
+        content_type: Tipo pasado al troceador (cambia el tamaño de los chunks)
+
+    Returns:
+        str: sha256 hexadecimal
+    """
+    digest = hashlib.sha256(f"{CHUNKER_VERSION}\n{content_type or ''}\n".encode("utf-8"))
+    digest.update((content or "").encode("utf-8"))
+    return digest.hexdigest()
+
+
+def chunk_hash(chunk: str) -> str:
+    """
+    Hash de un chunk normalizado (Unicode NFC y espacios colapsados), de modo
+    que un cambio solo de espaciado no obliga a recalcular su embedding.
+    """
+    normalized = " ".join(unicodedata.normalize("NFC", chunk or "").split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def chunk_ids(document_id: Any, hashes: List[str]) -> List[str]:
+    """
+    IDs direccionados por contenido: {document_id}_{hash[:16]}, con sufijo
+    _{n} para la n-ésima repetición de un mismo chunk dentro del documento.
+    """
+    seen: Dict[str, int] = {}
+    ids = []
+    for digest in hashes:
+        occurrence = seen.get(digest, 0)
+        seen[digest] = occurrence + 1
+        suffix = f"_{occurrence}" if occurrence else ""
+        ids.append(f"{document_id}_{digest[:16]}{suffix}")
+    return ids
+
+
+@dataclass
+class ReindexJob:
+    """Estado de una re-indexación (se persiste en REINDEX_DIR/state.json)"""
+    job_id: str
+    source_collection: str
+    target_collection: str
+    embedding_model: str = ""
+    source_model: str = ""
+    status: str = "pending"  # pending | running | completed | failed | interrupted
+    last_id: int = 0
+    total_documents: Optional[int] = None
+    documents_processed: int = 0
+    documents_reindexed: int = 0
+    documents_copied: int = 0
+    documents_skipped: int = 0
+    documents_failed: int = 0
+    documents_removed: int = 0
+    failed_ids: List[int] = field(default_factory=list)
+    chunks_embedded: int = 0
+    chunks_copied: int = 0
+    elapsed_seconds: float = 0.0
+    error: Optional[str] = None
+    created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
+    @property
+    def progress(self) -> Optional[float]:
+        if not self.total_documents:
+            return 1.0 if self.status == "completed" else None
+        return round(min(self.documents_processed / self.total_documents, 1.0), 4)
+
+    @property
+    def throughput(self) -> Dict[str, float]:
+        elapsed = self.elapsed_seconds or 0.0
+        if elapsed <= 0:
+            return {"documents_per_second": 0.0, "chunks_per_second": 0.0, "embedded_chunks_per_second": 0.0}
+        return {
+            "documents_per_second": round(self.documents_processed / elapsed, 2),
+            "chunks_per_second": round((self.chunks_embedded + self.chunks_copied) / elapsed, 2),
+            "embedded_chunks_per_second": round(self.chunks_embedded / elapsed, 2),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.update(
+            elapsed_seconds=round(self.elapsed_seconds, 3),
+            progress=self.progress,
+            throughput=self.throughput
+        )
+        return data
+
+
+class ReindexService:
+    """
+    Re-indexación completa en una colección sombra con cambio atómico
+    """
+
+    STATE_FILE = "state.json"
+
+    def __init__(
+        self,
+        document_repo: Optional[DocumentRepository] = None,
+        chromadb: Optional[ChromaDBConnector] = None,
+        state_dir: Optional[str] = None,
+        page_size: Optional[int] = None,
+        workers: Optional[int] = None,
+        embed_batch_size: Optional[int] = None
+    ):
+        self.document_repo = document_repo or DocumentRepository()
+        self.chromadb = chromadb or ChromaDBConnector()
+        self.state_dir = state_dir or settings.REINDEX_DIR
+        self.page_size = page_size or settings.REINDEX_PAGE_SIZE
+        self.workers = workers or settings.REINDEX_WORKERS
+        self.embed_batch_size = embed_batch_size or settings.REINDEX_EMBED_BATCH_SIZE
+        self._job: Optional[ReindexJob] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    # ==================== API ====================
+
+    def start(self, chunker: Chunker, resume: bool = True, embedding_model: Optional[str] = None) -> ReindexJob:
+        """
+        Lanza la re-indexación (o migración de modelo) en segundo plano.
+
+        Args:
+            chunker: Troceador de documentos (texto, content_type=...) -> chunks
+            resume: Continuar el último trabajo interrumpido o fallido si existe
+            embedding_model: Modelo de la versión nueva (por defecto SENTENCE_TRANSFORMER_MODEL)
+
+        Returns:
+            ReindexJob: Trabajo lanzado
+
+        Raises:
+            ConflictException: Si ya hay una re-indexación en curso
+        """
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                raise ConflictException("Ya hay una re-indexación en curso")
+
+            job = self._load_state() if resume else None
+            if job and job.status not in ("interrupted", "failed"):
+                job = None
+            if job is None:
+                source = self.chromadb.get_active_collection_name()
+                model = embedding_model or settings.SENTENCE_TRANSFORMER_MODEL
+                job = ReindexJob(
+                    job_id=uuid.uuid4().hex[:12],
+                    source_collection=source,
+                    target_collection=self.chromadb.create_version(
+                        model, metadata={"chunker_version": CHUNKER_VERSION}
+                    ),
+                    embedding_model=model,
+                    source_model=self.chromadb.collection_model(source)
+                )
+            # Desde aquí las escrituras de documentos van también a la versión nueva
+            self.chromadb.begin_migration(job.target_collection)
+            job.status = "pending"
+            job.error = None
+            self._job = job
+            self._save_state(job)
+            self._thread = threading.Thread(
+                target=self.run, args=(job, chunker), name="reindex", daemon=True
+            )
+            self._thread.start()
+
+        logger.info(
+            f"🔄 Re-indexación {job.job_id}: '{job.source_collection}' -> "
+            f"'{job.target_collection}' desde id {job.last_id}"
+        )
+        return job
+
+    def needs_migration(self) -> bool:
+        """La versión activa no corresponde al modelo o troceador configurados"""
+        active = self.chromadb.get_active_collection_name()
+        metadata = self.chromadb.collection_metadata(active)
+        return (
+            self.chromadb.collection_model(active) != settings.SENTENCE_TRANSFORMER_MODEL
+            or int(metadata.get("chunker_version") or 1) != CHUNKER_VERSION
+        )
+
+    def get_job(self) -> ReindexJob:
+        """Último trabajo (de memoria o del checkpoint)"""
+        job = self._job or self._load_state()
+        if not job:
+            raise NotFoundException("Re-indexación", "actual")
+        return job
+
+    def shutdown(self, timeout: Optional[float] = None):
+        """Detiene el trabajo tras la página en curso (queda "interrupted")"""
+        if self._thread and self._thread.is_alive():
+            self._stopping.set()
+            self._thread.join(timeout)
+        self._stopping.clear()
+
+    # ==================== EJECUCIÓN ====================
+
+    def run(self, job: ReindexJob, chunker: Chunker) -> ReindexJob:
+        """Ejecuta (o continúa) una re-indexación de forma síncrona"""
+        job.status = "running"
+        job.started_at = job.started_at or datetime.utcnow().isoformat()
+        if job.total_documents is None:
+            try:
+                job.total_documents = self.document_repo.count_all()
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudo contar los documentos a re-indexar: {e}")
+        self._save_state(job)
+
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="reindex-embed")
+        try:
+            while not self._stopping.is_set():
+                page = self.document_repo.list_for_reindex(job.last_id, self.page_size)
+                if not page:
+                    break
+                self._timed(job, self.process_page, job, page, chunker, executor)
+                job.last_id = page[-1]["id"]
+                self._save_state(job)
+                if len(page) < self.page_size:
+                    break
+
+            if self._stopping.is_set():
+                job.status = "interrupted"
+                logger.info(f"⏸️ Re-indexación {job.job_id} interrumpida en id {job.last_id}")
+            else:
+                # Documentos escritos antes de que cada proceso viera la doble
+                # escritura (caché del registro) o durante el recorrido
+                self._timed(job, self._sync_changes, job, job.started_at, chunker, executor)
+                self._timed(job, self._drop_deleted_documents, job)
+                self.chromadb.set_active_collection_name(job.target_collection)
+                removed = self.chromadb.garbage_collect_collections()
+                if removed:
+                    logger.info(f"🗑️ Versiones antiguas eliminadas: {', '.join(removed)}")
+
+                job.status = "completed"
+                job.finished_at = datetime.utcnow().isoformat()
+                logger.info(
+                    f"✅ Re-indexación {job.job_id} completada: {job.documents_reindexed} re-indexados, "
+                    f"{job.documents_copied} sin cambios, {job.documents_failed} con error "
+                    f"({job.throughput['documents_per_second']} docs/s)"
+                )
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            logger.error(f"❌ Re-indexación {job.job_id} fallida en id {job.last_id}: {str(e)}")
+        finally:
+            executor.shutdown(wait=True)
+        self._save_state(job)
+        return job
+
+    def process_page(
+        self,
+        job: ReindexJob,
+        page: List[Dict[str, Any]],
+        chunker: Chunker,
+        executor: ThreadPoolExecutor,
+        replace: bool = False
+    ):
+        """
+        Escribe una página de documentos en la colección destino.
+
+        Args:
+            job: Trabajo en curso (se actualizan sus contadores)
+            page: Filas de documentos (id, title, content, content_type, uploaded_by)
+            chunker: Troceador de documentos
+            executor: Pool para calcular embeddings
+            replace: Borrar antes los chunks existentes en el destino
+        """
+        ids = [str(row["id"]) for row in page]
+        same_model = job.source_model == job.embedding_model
+        # Los tags solo se guardan en los chunks: se leen siempre de la colección
+        # origen, y los embeddings solo si el modelo no cambia
+        existing = self._existing_chunks(job.source_collection, ids, include_embeddings=same_model)
+
+        copied: Dict[str, List] = {"ids": [], "documents": [], "embeddings": [], "metadatas": []}
+        pending: Dict[str, List] = {"ids": [], "documents": [], "metadatas": []}
+        chunk_counts: Dict[int, int] = {}
+        for row in page:
+            job.documents_processed += 1
+            content = row.get("content") or ""
+            if len(content.strip()) < 10:
+                job.documents_skipped += 1
+                continue
+
+            digest = content_hash(content, row.get("content_type"))
+            previous = existing.get(str(row["id"]))
+            # Con otro modelo los vectores no son comparables: nunca se copian
+            if previous and same_model and all(meta.get("content_hash") == digest for meta in previous["metadatas"]):
+                for key in copied:
+                    copied[key].extend(previous[key])
+                job.documents_copied += 1
+                continue
+
+            try:
+                chunks = chunker(content, content_type=row.get("content_type"))
+            except Exception as e:
+                logger.error(f"Error troceando documento {row['id']}: {str(e)}")
+                job.documents_failed += 1
+                job.failed_ids.append(row["id"])
+                continue
+            # Chunks sin cambios dentro de un documento editado: se copia su embedding
+            reusable = self._embeddings_by_hash(previous) if previous and same_model else {}
+            tags = next((meta["tags"] for meta in previous["metadatas"] if meta.get("tags")), "") if previous else ""
+            hashes = [chunk_hash(chunk) for chunk in chunks]
+            for i, (chunk_id, chunk, digest_i) in enumerate(zip(chunk_ids(row["id"], hashes), chunks, hashes)):
+                metadata = self._chunk_metadata(row, i, digest, digest_i, tags)
+                embedding = reusable.get(digest_i)
+                records = pending if embedding is None else copied
+                records["ids"].append(chunk_id)
+                records["documents"].append(chunk)
+                records["metadatas"].append(metadata)
+                if embedding is not None:
+                    copied["embeddings"].append(embedding)
+            chunk_counts[row["id"]] = len(chunks)
+            job.documents_reindexed += 1
+
+        pending["embeddings"] = self._embed(pending["documents"], job.embedding_model, executor)
+
+        if replace:
+            self.chromadb.delete_where(job.target_collection, {"document_id": {"$in": ids}})
+        for records in (copied, pending):
+            self._write(job.target_collection, records)
+        job.chunks_copied += len(copied["ids"])
+        job.chunks_embedded += len(pending["ids"])
+        # chunk_count de los documentos re-troceados (en paralelo: una fila por llamada)
+        list(executor.map(lambda item: self.document_repo.set_chunk_count(*item), chunk_counts.items()))
+
+    # ==================== INTERNOS ====================
+
+    def _sync_changes(self, job: ReindexJob, since: str, chunker: Chunker, executor: ThreadPoolExecutor):
+        """Vuelve a escribir los documentos modificados desde `since`"""
+        after_id = 0
+        while True:
+            page = self.document_repo.list_for_reindex(after_id, self.page_size, updated_since=since)
+            if not page:
+                return
+            self.process_page(job, page, chunker, executor, replace=True)
+            after_id = page[-1]["id"]
+            if len(page) < self.page_size:
+                return
+
+    def _drop_deleted_documents(self, job: ReindexJob):
+        """Borra del destino los chunks de documentos que ya no existen en la BD"""
+        document_ids = set()
+        for _, metadatas in self.chromadb.iter_chunk_metadatas(job.target_collection, CHROMA_WRITE_BATCH):
+            document_ids.update(str(meta["document_id"]) for meta in metadatas if meta and meta.get("document_id"))
+        ids = sorted(document_ids)
+        for start in range(0, len(ids), EXISTENCE_CHECK_BATCH):
+            batch = ids[start:start + EXISTENCE_CHECK_BATCH]
+            existing = {str(row["id"]) for row in self.document_repo.list_for_deletion([int(i) for i in batch])}
+            deleted = [document_id for document_id in batch if document_id not in existing]
+            if deleted:
+                self.chromadb.delete_where(job.target_collection, {"document_id": {"$in": deleted}})
+                job.documents_removed += len(deleted)
+        if job.documents_removed:
+            logger.info(f"🗑️ {job.documents_removed} documentos eliminados durante la re-indexación borrados de {job.target_collection}")
+
+    def _existing_chunks(
+        self,
+        collection_name: str,
+        document_ids: List[str],
+        include_embeddings: bool = True
+    ) -> Dict[str, Dict[str, List]]:
+        """
+        Chunks actuales de la página en la colección origen, agrupados por
+        documento (sin include_embeddings solo se leen los metadatos)
+        """
+        include = ["documents", "embeddings", "metadatas"] if include_embeddings else ["metadatas"]
+        try:
+            result = self.chromadb.get_chunks(
+                collection_name,
+                where={"document_id": {"$in": document_ids}},
+                include=include
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudieron leer los chunks de {collection_name}: {e}")
+            return {}
+
+        found = result.get("ids") or []
+        missing = [None] * len(found)
+        grouped: Dict[str, Dict[str, List]] = {}
+        for chunk_id, document, embedding, metadata in zip(
+            found, result.get("documents") or missing,
+            result.get("embeddings") or missing, result.get("metadatas") or [{} for _ in found]
+        ):
+            metadata = metadata or {}
+            entry = grouped.setdefault(
+                str(metadata.get("document_id")),
+                {"ids": [], "documents": [], "embeddings": [], "metadatas": []}
+            )
+            entry["ids"].append(chunk_id)
+            entry["documents"].append(document)
+            entry["embeddings"].append(embedding)
+            entry["metadatas"].append(metadata)
+        return grouped
+
+    def _embed(self, texts: List[str], model: str, executor: ThreadPoolExecutor) -> List[List[float]]:
+        """Embeddings por lotes en paralelo (conserva el orden)"""
+        batches = [texts[i:i + self.embed_batch_size] for i in range(0, len(texts), self.embed_batch_size)]
+        embeddings: List[List[float]] = []
+        for batch_embeddings in executor.map(lambda batch: self.chromadb.embed(batch, model=model), batches):
+            embeddings.extend(batch_embeddings)
+        return embeddings
+
+    def _write(self, collection_name: str, records: Dict[str, List]):
+        for start in range(0, len(records["ids"]), CHROMA_WRITE_BATCH):
+            end = start + CHROMA_WRITE_BATCH
+            self.chromadb.upsert_embeddings(
+                collection_name,
+                document_ids=records["ids"][start:end],
+                chunks=records["documents"][start:end],
+                embeddings=records["embeddings"][start:end],
+                metadatas=records["metadatas"][start:end]
+            )
+
+    def _embeddings_by_hash(self, previous: Dict[str, List]) -> Dict[str, List[float]]:
+        """Embeddings existentes de un documento indexados por el hash de cada chunk"""
+        return {
+            metadata.get("chunk_hash") or chunk_hash(document): embedding
+            for document, embedding, metadata in zip(previous["documents"], previous["embeddings"], previous["metadatas"])
+        }
+
+    def _chunk_metadata(
+        self, row: Dict[str, Any], index: int, digest: str, chunk_digest: str, tags: str = ""
+    ) -> Dict[str, Any]:
+        return {
+            "document_id": str(row["id"]),
+            "title": row.get("title") or "",
+            "chunk_index": index,
+            "content_type": row.get("content_type") or "",
+            "user_id": str(row.get("uploaded_by")),
+            "tags": tags,
+            "content_hash": digest,
+            "chunk_hash": chunk_digest
+        }
+
+    def _timed(self, job: ReindexJob, func: Callable, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            job.elapsed_seconds += time.perf_counter() - started
+
+    def _state_path(self) -> str:
+        return os.path.join(self.state_dir, self.STATE_FILE)
+
+    def _load_state(self) -> Optional[ReindexJob]:
+        path = self._state_path()
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            job = ReindexJob(**json.load(f))
+        # Un trabajo "running" sin hilo en este proceso quedó interrumpido
+        if job.status in ("running", "pending") and not (self._thread and self._thread.is_alive()):
+            job.status = "interrupted"
+        return job
+
+    def _save_state(self, job: ReindexJob):
+        os.makedirs(self.state_dir, exist_ok=True)
+        path = self._state_path()
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(job), f)
+        os.replace(tmp_path, path)
+
+# Instancia global
+reindex_service = ReindexService()
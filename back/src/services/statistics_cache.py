@@ -0,0 +1,62 @@
+"""
+Caché de estadísticas compartida por los endpoints /statistics.
+
+Claves:
+- "global": estadísticas globales (/public, /global, /summary)
+- "user:{id}": estadísticas de un usuario
+- "dashboard:{id}": respuesta completa del dashboard de un usuario
+
+Las mutaciones de documentos, chats, comparticiones y usuarios llaman a
+invalidate_statistics() con los usuarios afectados.
+"""
+import logging
+from typing import Optional
+
+from src.config.settings import settings
+from src.core.async_cache import AsyncCache, MemoryCacheBackend, RedisCacheBackend
+
+logger = logging.getLogger(__name__)
+
+# TTL (segundos) por espacio de claves; el resto usa STATISTICS_CACHE_TTL_SECONDS
+STATISTICS_TTLS = {
+    "global": 60.0,
+    "user": 30.0,
+    "dashboard": 15.0,
+}
+
+
+def _create_backend():
+    if settings.STATISTICS_CACHE_BACKEND == "redis":
+        try:
+            return RedisCacheBackend(settings.STATISTICS_CACHE_REDIS_URL, namespace="mentia:stats:")
+        except ImportError:
+            logger.warning("Paquete 'redis' no instalado: la caché de estadísticas usará memoria local")
+    return MemoryCacheBackend(max_entries=settings.STATISTICS_CACHE_MAX_ENTRIES)
+
+
+def statistics_ttl(key: str) -> Optional[float]:
+    """TTL de una clave según su espacio (None = TTL por defecto de la caché)"""
+    return STATISTICS_TTLS.get(key.split(":", 1)[0])
+
+
+def invalidate_statistics(*user_ids: Optional[int]) -> None:
+    """
+    Invalida las estadísticas globales y las de los usuarios indicados.
+    Se puede llamar desde código síncrono; nunca lanza excepciones.
+    """
+    keys = ["global"]
+    for user_id in user_ids:
+        if user_id is not None:
+            keys.extend((f"user:{user_id}", f"dashboard:{user_id}"))
+    try:
+        statistics_cache.invalidate_nowait(*keys)
+    except Exception as e:
+        logger.warning(f"No se pudo invalidar la caché de estadísticas: {str(e)}")
+
+
+# Instancia global
+statistics_cache = AsyncCache(
+    _create_backend(),
+    default_ttl=settings.STATISTICS_CACHE_TTL_SECONDS,
+    stale_ttl=settings.STATISTICS_CACHE_STALE_SECONDS
+)
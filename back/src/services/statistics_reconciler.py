@@ -0,0 +1,77 @@
+"""
+Reconciliador periódico de los contadores materializados de estadísticas.
+Los triggers mantienen los contadores al día; este servicio los recalcula
+cada STATISTICS_RECONCILE_SECONDS para corregir cualquier desviación
+(cargas masivas con triggers desactivados, borrados en cascada, etc.).
+"""
+from typing import Optional
+import asyncio
+import logging
+
+from src.config.settings import settings
+from src.services.statistics_cache import invalidate_statistics
+from src.services.statistics_service import StatisticsService
+
+logger = logging.getLogger(__name__)
+
+class StatisticsReconciler:
+    """
+    Ejecuta reconcile_statistics() en segundo plano
+    """
+
+    def __init__(self, interval: Optional[float] = None, statistics_service: Optional[StatisticsService] = None):
+        self.interval = settings.STATISTICS_RECONCILE_SECONDS if interval is None else interval
+        self._statistics_service = statistics_service
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.corrections = 0
+
+    async def start(self):
+        """Inicia la reconciliación periódica (la primera pasada es inmediata)"""
+        if self.interval <= 0 or self._task:
+            return
+        self._task = asyncio.create_task(self._reconcile_loop())
+        logger.info(f"StatisticsReconciler: iniciado (cada {self.interval:.0f}s)")
+
+    async def stop(self):
+        """Detiene la reconciliación periódica"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("StatisticsReconciler: detenido")
+
+    async def reconcile_once(self) -> int:
+        """
+        Ejecuta una pasada de reconciliación fuera del event loop.
+
+        Returns:
+            int: Número de contadores corregidos
+        """
+        if self._statistics_service is None:
+            self._statistics_service = StatisticsService()
+        drift = await asyncio.to_thread(self._statistics_service.reconcile_counters)
+        self.runs += 1
+        self.corrections += len(drift)
+        if drift:
+            invalidate_statistics()
+        return len(drift)
+
+    async def _reconcile_loop(self):
+        while True:
+            try:
+                await self.reconcile_once()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error reconciliando estadísticas: {str(e)}")
+            try:
+                await asyncio.sleep(self.interval)
+            except asyncio.CancelledError:
+                break
+
+# Instancia global
+statistics_reconciler = StatisticsReconciler()
@@ -7,115 +7,55 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 
 from src.config.database import get_supabase_client
+from src.core.exceptions import DatabaseException
 from src.models.domain import User
+from src.repositories.statistics_repository import StatisticsRepository
 
 logger = logging.getLogger(__name__)
 
+# Ventana (en días) de los chats considerados activos
+ACTIVE_CHATS_DAYS = 7
+
 class StatisticsService:
     """Servicio para gestionar estadísticas del sistema."""
     
     def __init__(self):
         self.supabase = get_supabase_client()
+        self.repository = StatisticsRepository()
     
     def get_global_statistics(self) -> Dict[str, int]:
         """
-        Obtiene estadísticas globales del sistema usando permisos de servicio.
-        Las estadísticas se obtienen en tiempo real para reflejar siempre el estado actual.
+        Obtiene estadísticas globales del sistema.
+
+        Se leen de los contadores materializados (statistics_counters y
+        statistics_daily), mantenidos por triggers: el coste no depende del
+        tamaño de las tablas. Si los contadores no están instalados se cuentan
+        las tablas directamente.
+
+        Returns:
+            Dict[str, int]: total_users, total_documents y active_chats
+                (chats creados en los últimos 7 días, o todos si no hay recientes)
         """
         try:
-            logger.info("🔄 Obteniendo estadísticas actualizadas con permisos de servicio...")
-            
-            # USAR CLIENTE CON PERMISOS DE SERVICIO PARA BYPASSING RLS
-            service_client = get_supabase_client(use_service_role=True)
-            
-            # Contar usuarios usando cliente de servicio - METODO SIMPLIFICADO
-            try:
-                # Obtener TODOS los usuarios sin filtros
-                users_response = service_client.table('users').select('id, username').execute()
-                logger.info(f"👥 Respuesta usuarios: {len(users_response.data) if users_response.data else 0} usuarios encontrados")
-                
-                # Contar simplemente la longitud de la lista
-                total_users = len(users_response.data) if users_response.data else 0
-                
-                # Log de usuarios encontrados para debug
-                if users_response.data:
-                    usernames = [u.get('username', 'Unknown') for u in users_response.data]
-                    logger.info(f"👥 Usuarios encontrados: {usernames}")
-                    
-                logger.info(f"👥 Total usuarios en el sistema: {total_users}")
-            except Exception as e:
-                logger.error(f"❌ Error contando usuarios: {e}")
-                # Fallback: contar manualmente
-                try:
-                    # Intento alternativo
-                    all_users = service_client.table('users').select('*').execute()
-                    total_users = len(all_users.data) if all_users.data else 0
-                    logger.info(f"👥 Total usuarios (método alternativo): {total_users}")
-                except:
-                    total_users = 0
-            
-            # Contar documentos usando cliente de servicio
-            try:
-                # Usar count para ser más eficiente
-                docs_response = service_client.table('documents').select('*', count='exact').execute()
-                logger.info(f"📄 Respuesta documentos: {docs_response}")
-                
-                if hasattr(docs_response, 'count') and docs_response.count is not None:
-                    total_documents = docs_response.count
-                elif docs_response.data:
-                    total_documents = len(docs_response.data)
-                else:
-                    total_documents = 5  # Valor conocido
-                    
-                logger.info(f"📄 Total documentos encontrados: {total_documents}")
-            except Exception as e:
-                logger.error(f"❌ Error contando documentos: {e}")
-                total_documents = 5  # Valor conocido de la BD
-            
-            # Contar chats activos (creados en los últimos 7 días)
-            try:
-                # Calcular fecha hace 7 días
-                seven_days_ago = (datetime.now() - timedelta(days=7)).isoformat()
-                
-                # Contar chats creados recientemente (la tabla solo tiene created_at)
-                chats_response = service_client.table('chats').select('*', count='exact').gte('created_at', seven_days_ago).execute()
-                active_chats = chats_response.count if hasattr(chats_response, 'count') and chats_response.count is not None else len(chats_response.data)
-                logger.info(f"💬 Chats activos (últimos 7 días): {active_chats}")
-                
-                # Si no hay chats recientes, contar todos los chats
-                if active_chats == 0:
-                    all_chats_response = service_client.table('chats').select('*', count='exact').execute()
-                    active_chats = all_chats_response.count if hasattr(all_chats_response, 'count') and all_chats_response.count is not None else len(all_chats_response.data)
-                    logger.info(f"💬 Total chats en el sistema: {active_chats}")
-                    
-            except Exception as e:
-                logger.error(f"❌ Error contando chats: {e}")
-                # Si falla, contar todos los chats sin filtro
-                try:
-                    all_chats_response = service_client.table('chats').select('*', count='exact').execute()
-                    active_chats = all_chats_response.count if hasattr(all_chats_response, 'count') and all_chats_response.count is not None else len(all_chats_response.data)
-                    logger.info(f"💬 Total chats (sin filtro): {active_chats}")
-                except:
-                    active_chats = 0
-            
-            stats = {
-                "total_users": total_users,
-                "total_documents": total_documents,
+            counters = self.repository.get_counters()
+            if not counters:
+                raise DatabaseException("Contadores de estadísticas vacíos")
+
+            since = (datetime.now() - timedelta(days=ACTIVE_CHATS_DAYS - 1)).date()
+            active_chats = self.repository.get_daily_total("chats", since)
+            if active_chats == 0:
+                active_chats = counters.get("chats", 0)
+
+            return {
+                "total_users": counters.get("users", 0),
+                "total_documents": counters.get("documents", 0),
                 "active_chats": active_chats
             }
-            
-            logger.info(f"✅ ESTADÍSTICAS ACTUALIZADAS EN TIEMPO REAL:")
-            logger.info(f"   👥 Usuarios: {total_users}")
-            logger.info(f"   📄 Documentos: {total_documents}")
-            logger.info(f"   💬 Chats activos: {active_chats}")
-            
-            return stats
-            
+
         except Exception as e:
-            logger.error(f"❌ Error general en estadísticas: {e}")
-            # Fallback: usar método simple con conteo manual
-            return self._get_manual_count_statistics()
-    
+            logger.warning(f"⚠️ Contadores de estadísticas no disponibles, contando tablas: {e}")
+            return self._count_global_statistics()
+
     def get_dashboard_statistics(self, user: User) -> Dict[str, Any]:
         """
         Obtiene estadísticas específicas para dashboard según permisos del usuario.
@@ -127,14 +67,14 @@ class StatisticsService:
             Dict[str, Any]: Estadísticas filtradas según permisos
         """
         try:
-            logger.info(f"📊 Obteniendo estadísticas de dashboard para usuario {user.id} (admin: {user.is_admin})")
+            logger.debug("📊 Obteniendo estadísticas de dashboard para usuario %s (admin: %s)", user.id, user.is_admin)
             
             # Obtener estadísticas base
             base_stats = self.get_global_statistics()
             
             # Si es admin, incluir estadísticas adicionales
             if user.is_admin:
-                logger.info("👑 Usuario admin - agregando estadísticas administrativas")
+                logger.debug("👑 Usuario admin - agregando estadísticas administrativas")
                 admin_stats = self._get_admin_statistics()
                 base_stats.update(admin_stats)
             
@@ -161,7 +101,7 @@ class StatisticsService:
             List[Dict]: Lista de recursos recientes
         """
         try:
-            logger.info(f"🔍 Obteniendo {resource_type} recientes para usuario {user.id} (admin: {user.is_admin})")
+            logger.debug("🔍 Obteniendo %s recientes para usuario %s (admin: %s)", resource_type, user.id, user.is_admin)
             
             if resource_type == "documents":
                 return self._get_recent_documents(user, limit)
@@ -177,109 +117,54 @@ class StatisticsService:
     
     def get_shared_documents_count(self, user_id: int) -> int:
         """
-        Cuenta los documentos que el usuario HA COMPARTIDO con otros usuarios.
+        Cuenta las comparticiones de los documentos del usuario con otros usuarios.
         
         Args:
             user_id: ID del usuario
             
         Returns:
-            int: Número de documentos que el usuario ha compartido
+            int: Número de comparticiones de documentos del usuario
         """
         try:
-            service_client = get_supabase_client(use_service_role=True)
-            
-            # Llamar a la función SQL optimizada
-            response = service_client.rpc('get_user_sharing_stats', {'user_id': user_id}).execute()
-            
-            if response.data and len(response.data) > 0:
-                stats = response.data[0]
-                shared_by_me = stats.get('documents_shared_by_me', 0)
-                logger.info(f"🔗 Usuario {user_id} ha compartido {shared_by_me} documentos")
-                return shared_by_me
-            else:
-                logger.warning(f"No se obtuvieron datos de get_user_sharing_stats para usuario {user_id}")
-                return self._count_documents_shared_by_user_fallback(user_id)
-                
+            user_stats = self.repository.get_user_statistics(user_id)
+            return user_stats["shared_by_me"] if user_stats else 0
         except Exception as e:
-            logger.error(f"Error en get_shared_documents_count: {e}")
-            # Usar método fallback
-            return self._count_documents_shared_by_user_fallback(user_id)
+            logger.warning(f"⚠️ Estadísticas de usuario no disponibles, contando comparticiones: {e}")
+            return self._count_documents_shared_by_user(user_id)
     
-    def _count_documents_shared_by_user_fallback(self, user_id: int) -> int:
+    def _count_documents_shared_by_user(self, user_id: int) -> int:
         """
-        Método fallback para contar documentos que el usuario ha compartido.
-        Cuenta cada documento único que tiene al menos un acceso compartido.
+        Cuenta en vivo las comparticiones de los documentos del usuario.
+        Usa la función SQL get_user_sharing_stats y, si no existe, una única
+        consulta con join sobre documents.
         """
+        service_client = get_supabase_client(use_service_role=True)
+        
         try:
-            service_client = get_supabase_client(use_service_role=True)
-            
-            # Consulta directa: contar documentos del usuario que tienen accesos compartidos
-            query = """
-                SELECT COUNT(DISTINCT d.id) as shared_count
-                FROM documents d
-                INNER JOIN acceso_documentos_usuario adu ON d.id = adu.id_document
-                WHERE d.uploaded_by = %s
-            """
-            
-            # Usar consulta SQL directa con Supabase
-            response = service_client.rpc('exec_sql', {
-                'sql': query,
-                'params': [user_id]
-            }).execute()
-            
-            if response.data and len(response.data) > 0:
-                shared_count = response.data[0].get('shared_count', 0)
-                logger.info(f"🔗 Usuario {user_id} ha compartido {shared_count} documentos (método fallback directo)")
-                return shared_count
-            else:
-                # Fallback usando múltiples consultas
-                return self._count_documents_shared_legacy(user_id)
-                
+            response = service_client.rpc('get_user_sharing_stats', {'user_id': user_id}).execute()
+            if response.data:
+                return response.data[0].get('documents_shared_by_me', 0)
         except Exception as e:
-            logger.error(f"Error en fallback SQL directo: {e}")
-            # Fallback final usando múltiples consultas
-            return self._count_documents_shared_legacy(user_id)
-    
-    def _count_documents_shared_legacy(self, user_id: int) -> int:
-        """
-        Método legacy que cuenta documento por documento.
-        """
+            logger.warning(f"get_user_sharing_stats no disponible: {e}")
+        
         try:
-            service_client = get_supabase_client(use_service_role=True)
-            
-            # Obtener todos los documentos del usuario
-            docs_response = service_client.table('documents')\
-                .select('id')\
-                .eq('uploaded_by', user_id)\
+            response = service_client.table('acceso_documentos_usuario')\
+                .select('id_document, documents!inner(uploaded_by)', count='exact')\
+                .eq('documents.uploaded_by', user_id)\
+                .limit(1)\
                 .execute()
-            
-            if not docs_response.data:
-                return 0
-            
-            # Contar cuántos de estos documentos tienen accesos compartidos
-            shared_count = 0
-            for doc in docs_response.data:
-                doc_id = doc['id']
-                access_response = service_client.table('acceso_documentos_usuario')\
-                    .select('id')\
-                    .eq('id_document', doc_id)\
-                    .limit(1)\
-                    .execute()
-                
-                if access_response.data and len(access_response.data) > 0:
-                    shared_count += 1
-            
-            logger.info(f"🔗 Usuario {user_id} ha compartido {shared_count} documentos (método legacy)")
-            return shared_count
-            
+            return response.count or 0
         except Exception as e:
-            logger.error(f"Error en método legacy de documentos compartidos: {e}")
+            logger.error(f"Error contando documentos compartidos por el usuario {user_id}: {e}")
             return 0
     
     def get_user_statistics(self, user_id: int) -> Dict[str, int]:
         """
         Obtiene estadísticas específicas de un usuario.
         
+        Para administradores shared_documents son las comparticiones de sus
+        documentos; para el resto, los documentos compartidos con ellos.
+        
         Args:
             user_id: ID del usuario
             
@@ -287,50 +172,57 @@ class StatisticsService:
             Dict[str, int]: Estadísticas del usuario
         """
         try:
-            logger.info(f"👤 Obteniendo estadísticas para usuario {user_id}")
-            
+            user_stats = self.repository.get_user_statistics(user_id)
+        except Exception as e:
+            logger.warning(f"⚠️ Estadísticas de usuario no disponibles, contando tablas: {e}")
+            return self._count_user_statistics(user_id)
+        
+        if not user_stats:
+            return {
+                "user_documents": 0,
+                "user_chats": 0,
+                "shared_documents": 0
+            }
+        
+        return {
+            "user_documents": user_stats["documents"],
+            "user_chats": user_stats["chats"],
+            "shared_documents": (
+                user_stats["shared_by_me"] if user_stats["is_admin"] else user_stats["shared_with_me"]
+            )
+        }
+    
+    def _count_user_statistics(self, user_id: int) -> Dict[str, int]:
+        """Cuenta en vivo las estadísticas de un usuario (sin contadores instalados)."""
+        try:
             # IMPORTANTE: Usar service role para bypasear RLS
             service_client = get_supabase_client(use_service_role=True)
             
-            # Contar documentos del usuario
-            docs_response = service_client.table('documents').select('id').eq('uploaded_by', user_id).execute()
-            user_documents = len(docs_response.data) if docs_response.data else 0
-            logger.info(f"📄 Usuario {user_id} tiene {user_documents} documentos")
-            
-            # Contar chats del usuario
-            chats_response = service_client.table('chats').select('id').eq('id_user', user_id).execute()
-            user_chats = len(chats_response.data) if chats_response.data else 0
-            logger.info(f"💬 Usuario {user_id} tiene {user_chats} chats")
+            user_documents = self._count(
+                service_client.table('documents').select('id', count='exact').eq('uploaded_by', user_id)
+            )
+            user_chats = self._count(
+                service_client.table('chats').select('id', count='exact').eq('id_user', user_id)
+            )
             
-            # ✨ LÓGICA DIFERENCIADA PARA ADMIN VS USUARIOS NORMALES
-            # Primero verificar si el usuario es admin
             user_response = service_client.table('users').select('is_admin').eq('id', user_id).execute()
             is_admin = user_response.data[0]['is_admin'] if user_response.data else False
             
             if is_admin:
-                # Para ADMIN (Ivan): contar documentos que ÉL ha compartido con otros
-                logger.info(f"👑 Usuario {user_id} es ADMIN - contando documentos que ha compartido")
-                shared_docs = self.get_shared_documents_count(user_id)
+                shared_docs = self._count_documents_shared_by_user(user_id)
             else:
-                # Para USUARIOS NORMALES: contar documentos que le han compartido A ELLOS
-                logger.info(f"👤 Usuario {user_id} es usuario normal - contando documentos compartidos con él/ella")
-                shared_with_me_response = service_client.table('acceso_documentos_usuario')\
-                    .select('id_document')\
-                    .eq('id_user', user_id)\
-                    .execute()
-                
-                shared_docs = len(shared_with_me_response.data) if shared_with_me_response.data else 0
-                logger.info(f"🔗 Usuario {user_id} tiene {shared_docs} documentos compartidos CON él/ella")
+                shared_docs = self._count(
+                    service_client.table('acceso_documentos_usuario')
+                    .select('id_document', count='exact')
+                    .eq('id_user', user_id)
+                )
             
-            stats = {
+            return {
                 "user_documents": user_documents,
                 "user_chats": user_chats,
                 "shared_documents": shared_docs
             }
             
-            logger.info(f"✅ Estadísticas de usuario {user_id}: {stats}")
-            return stats
-            
         except Exception as e:
             logger.error(f"❌ Error obteniendo estadísticas de usuario: {e}")
             return {
@@ -339,6 +231,21 @@ class StatisticsService:
                 "shared_documents": 0
             }
     
+    def reconcile_counters(self) -> List[Dict[str, Any]]:
+        """
+        Recalcula los contadores materializados y corrige la desviación.
+        
+        Returns:
+            List[Dict[str, Any]]: Contadores que estaban desviados
+        """
+        drift = self.repository.reconcile()
+        for row in drift:
+            logger.warning(
+                f"📊 Contador '{row.get('counter_name')}' corregido: "
+                f"{row.get('stored_value')} -> {row.get('actual_value')}"
+            )
+        return drift
+    
     def calculate_system_health_metrics(self) -> Dict[str, Any]:
         """
         Calcula métricas de salud del sistema.
@@ -458,38 +365,31 @@ class StatisticsService:
     def _get_admin_statistics(self) -> Dict[str, int]:
         """Obtiene estadísticas adicionales para administradores."""
         try:
-            logger.info("👑 Obteniendo estadísticas administrativas")
+            return {
+                "active_users": self.repository.count_active_users(),
+                "shared_documents": self.repository.get_counters().get("shared_documents", 0)
+            }
+        except Exception as e:
+            logger.warning(f"⚠️ Contadores no disponibles para estadísticas admin, contando tablas: {e}")
+        
+        try:
+            service_client = get_supabase_client(use_service_role=True)
             
             # Usuarios activos (que han creado contenido)
-            try:
-                users_with_docs_response = self.supabase.table('documents').select('uploaded_by').execute()
-                users_with_chats_response = self.supabase.table('chats').select('id_user').execute()
-                
-                active_users = set()
-                if users_with_docs_response.data:
-                    active_users.update([doc.get('uploaded_by') for doc in users_with_docs_response.data if doc.get('uploaded_by')])
-                if users_with_chats_response.data:
-                    active_users.update([chat.get('id_user') for chat in users_with_chats_response.data if chat.get('id_user')])
-                
-                active_users_count = len(active_users)
-            except:
-                active_users_count = 0
+            users_with_docs_response = service_client.table('documents').select('uploaded_by').execute()
+            users_with_chats_response = service_client.table('chats').select('id_user').execute()
             
-            # Documentos públicos/compartidos
-            try:
-                shared_docs_response = self.supabase.table('documents').select('id').eq('is_shared', True).execute()
-                shared_documents = len(shared_docs_response.data) if shared_docs_response.data else 0
-            except:
-                shared_documents = 0
+            active_users = set()
+            active_users.update(doc.get('uploaded_by') for doc in users_with_docs_response.data or [] if doc.get('uploaded_by'))
+            active_users.update(chat.get('id_user') for chat in users_with_chats_response.data or [] if chat.get('id_user'))
             
-            admin_stats = {
-                "active_users": active_users_count,
-                "shared_documents": shared_documents
+            return {
+                "active_users": len(active_users),
+                "shared_documents": self._count(
+                    service_client.table('documents').select('id', count='exact').eq('is_shared', True)
+                )
             }
             
-            logger.info(f"👑 Estadísticas admin: {admin_stats}")
-            return admin_stats
-            
         except Exception as e:
             logger.error(f"❌ Error obteniendo estadísticas admin: {e}")
             return {
@@ -497,45 +397,34 @@ class StatisticsService:
                 "shared_documents": 0
             }
     
-    def _get_manual_count_statistics(self) -> Dict[str, int]:
-        """Método de fallback contando manualmente."""
+    def _count_global_statistics(self) -> Dict[str, int]:
+        """Cuenta las tablas directamente (sin contadores instalados)."""
         try:
-            logger.info("🔄 Usando conteo manual como fallback...")
-            
-            # Para usuarios: contar basándose en los IDs visibles en Supabase
-            # Según las imágenes, veo usuarios con IDs: 9, 10, 19, 24, 25, 28, 30
-            users_count = 7  # Conteo manual basado en las imágenes
-            
-            # Para documentos: usar consulta normal
-            try:
-                docs_response = self.supabase.table('documents').select('id').execute()
-                docs_count = len(docs_response.data) if docs_response.data else 5
-            except:
-                docs_count = 5  # Basado en las imágenes: IDs 39, 40, 41, 45, 46
-            
-            # Para chats: usar consulta normal
-            try:
-                chats_response = self.supabase.table('chats').select('id').execute()
-                chats_count = len(chats_response.data) if chats_response.data else 3
-            except:
-                chats_count = 3  # Basado en las imágenes: IDs 37, 38, 39
+            service_client = get_supabase_client(use_service_role=True)
             
-            logger.info(f"✅ ESTADÍSTICAS MANUALES:")
-            logger.info(f"   👥 Usuarios: {users_count}")
-            logger.info(f"   📄 Documentos: {docs_count}")
-            logger.info(f"   💬 Chats: {chats_count}")
+            seven_days_ago = (datetime.now() - timedelta(days=ACTIVE_CHATS_DAYS)).isoformat()
+            active_chats = self._count(
+                service_client.table('chats').select('id', count='exact').gte('created_at', seven_days_ago)
+            )
+            if active_chats == 0:
+                active_chats = self._count(service_client.table('chats').select('id', count='exact'))
             
             return {
-                "total_users": users_count,
-                "total_documents": docs_count,
-                "active_chats": chats_count
+                "total_users": self._count(service_client.table('users').select('id', count='exact')),
+                "total_documents": self._count(service_client.table('documents').select('id', count='exact')),
+                "active_chats": active_chats
             }
             
         except Exception as e:
-            logger.error(f"Error en conteo manual: {e}")
-            # Último recurso: valores fijos basados en las imágenes
+            logger.error(f"❌ Error contando estadísticas globales: {e}")
             return {
-                "total_users": 7,  # Veo 7 usuarios en la tabla
-                "total_documents": 5,  # Veo 5 documentos en la tabla (IDs: 39, 40, 41, 45, 46)
-                "active_chats": 3  # Veo 3 chats en la tabla (IDs: 37, 38, 39)
+                "total_users": 0,
+                "total_documents": 0,
+                "active_chats": 0
             }
+    
+    @staticmethod
+    def _count(query) -> int:
+        """Ejecuta una consulta con count='exact' trayendo como mucho una fila."""
+        response = query.limit(1).execute()
+        return response.count or 0
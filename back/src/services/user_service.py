@@ -25,6 +25,7 @@ from src.models.schemas.user import UserCreate, UserUpdate, UserResponse
 from src.utils.password_utils import hash_password, verify_password
 from src.config.database import get_supabase_client
 from src.services.email_service import email_service
+from src.services.statistics_cache import invalidate_statistics
 
 # Configuración de logging
 logger = logging.getLogger(__name__)
@@ -34,6 +35,9 @@ class UserService:
     Servicio para gestionar todas las operaciones relacionadas con usuarios.
     """
     
+    # IDs por consulta IN (...) al validar listas de usuarios
+    USER_ID_BATCH_SIZE = 500
+    
     def __init__(self):
         """Inicializa el servicio con las dependencias necesarias."""
         self.repository = UserRepository()
@@ -59,6 +63,7 @@ class UserService:
             
             # El repositorio se encarga de todas las validaciones y lanza las excepciones apropiadas
             user = self.repository.create_user(user_data)
+            invalidate_statistics(user.id)
             
             # Enviar email de verificación si hay email
             if user.email:
@@ -458,6 +463,7 @@ class UserService:
                 
             # Realizar la eliminación - lanzará DatabaseException si falla
             self.repository.delete(user_id)
+            invalidate_statistics(user_id)
             
             logger.info(f"Usuario {current_user.username} (ID: {current_user.id}) eliminó al usuario ID: {user_id}")
             return True
@@ -930,14 +936,14 @@ class UserService:
             Dict con 'valid' e 'invalid' IDs
         """
         try:
-            valid_ids = []
-            invalid_ids = []
-            
-            for user_id in user_ids:
-                if self.repository.exists(user_id):
-                    valid_ids.append(user_id)
-                else:
-                    invalid_ids.append(user_id)
+            # Una consulta IN (...) por bloque en lugar de una por ID
+            unique_ids = list(dict.fromkeys(user_ids))
+            existing = set()
+            for i in range(0, len(unique_ids), self.USER_ID_BATCH_SIZE):
+                existing.update(self.repository.get_existing_ids(unique_ids[i:i + self.USER_ID_BATCH_SIZE]))
+            
+            valid_ids = [uid for uid in user_ids if uid in existing]
+            invalid_ids = [uid for uid in user_ids if uid not in existing]
             
             return {
                 "valid": valid_ids,
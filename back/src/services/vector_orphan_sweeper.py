@@ -0,0 +1,193 @@
+"""
+Barrido periódico de chunks huérfanos en ChromaDB.
+
+Compara las colecciones que reciben escrituras (la activa y, durante una
+migración, la nueva) con la tabla documents de Supabase:
+- elimina los chunks cuyos documentos ya no existen (un delete por lote de
+  documentos con where={"document_id": {"$in": [...]}})
+- rellena chunk_count de los documentos que aún no lo tenían
+- informa de los documentos cuyo número de chunks no coincide con chunk_count
+
+Primero se leen los metadatos de ChromaDB y después la BD: un documento
+creado durante el barrido nunca parece huérfano porque su fila se inserta
+antes que sus chunks. Se ejecuta cada VECTOR_SWEEP_SECONDS y bajo demanda
+desde /admin/maintenance/cleanup.
+"""
+from collections import Counter
+from typing import Any, Dict, List, Optional
+import asyncio
+import logging
+import time
+
+from src.config.settings import settings
+from src.repositories.document_repository import DocumentRepository
+from src.utils.chromadb_connector import ChromaDBConnector
+
+logger = logging.getLogger(__name__)
+
+# Documentos por delete en ChromaDB y máximo de IDs listados en el informe
+DELETE_BATCH_SIZE = 200
+REPORT_SAMPLE_SIZE = 100
+
+
+class VectorOrphanSweeper:
+    """
+    Reconcilia ChromaDB con Supabase en segundo plano
+    """
+
+    def __init__(
+        self,
+        interval: Optional[float] = None,
+        document_repo: Optional[DocumentRepository] = None,
+        chromadb: Optional[ChromaDBConnector] = None,
+        page_size: Optional[int] = None
+    ):
+        self.interval = settings.VECTOR_SWEEP_SECONDS if interval is None else interval
+        self.document_repo = document_repo or DocumentRepository()
+        self.chromadb = chromadb or ChromaDBConnector()
+        self.page_size = page_size or settings.VECTOR_SWEEP_PAGE_SIZE
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.runs = 0
+        self.last_report: Optional[Dict[str, Any]] = None
+
+    async def start(self):
+        """Inicia el barrido periódico (el primero tras un intervalo completo)"""
+        if self.interval <= 0 or self._task:
+            return
+        self._task = asyncio.create_task(self._sweep_loop())
+        logger.info(f"VectorOrphanSweeper: iniciado (cada {self.interval:.0f}s)")
+
+    async def stop(self):
+        """Detiene el barrido periódico"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("VectorOrphanSweeper: detenido")
+
+    async def sweep_once(self) -> Dict[str, Any]:
+        """Ejecuta un barrido fuera del event loop (uno a la vez)"""
+        async with self._lock:
+            report = await asyncio.to_thread(self.sweep)
+        self.runs += 1
+        self.last_report = report
+        return report
+
+    def sweep(self) -> Dict[str, Any]:
+        """
+        Ejecuta un barrido completo de forma síncrona.
+
+        Returns:
+            Dict[str, Any]: Informe por colección y de chunk_count
+        """
+        started = time.perf_counter()
+        collections = self.chromadb.get_write_collection_names()
+
+        # 1. ChromaDB: chunks por documento en cada colección
+        chunk_counts: Dict[str, Counter] = {}
+        unlabeled: Dict[str, List[str]] = {}
+        for name in collections:
+            counts: Counter = Counter()
+            unlabeled[name] = []
+            for ids, metadatas in self.chromadb.iter_chunk_metadatas(name, self.page_size):
+                for chunk_id, metadata in zip(ids, metadatas):
+                    document_id = (metadata or {}).get("document_id")
+                    if document_id is None:
+                        unlabeled[name].append(chunk_id)
+                    else:
+                        counts[str(document_id)] += 1
+            chunk_counts[name] = counts
+
+        # 2. Supabase: documentos existentes y su chunk_count
+        expected: Dict[str, Optional[int]] = {}
+        after_id = 0
+        while True:
+            rows = self.document_repo.list_chunk_counts(after_id, self.page_size)
+            if rows is None:
+                # Sin la columna chunk_count no se puede comparar: no se borra nada
+                logger.warning("⚠️ Barrido de ChromaDB omitido: falta la columna documents.chunk_count")
+                return {
+                    "skipped": True,
+                    "reason": "Falta la columna documents.chunk_count (scripts/sql/document_chunk_count.sql)",
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 1)
+                }
+            for row in rows:
+                expected[str(row["id"])] = row.get("chunk_count")
+            if len(rows) < self.page_size:
+                break
+            after_id = rows[-1]["id"]
+
+        report: Dict[str, Any] = {"documents": len(expected), "collections": {}}
+
+        # 3. Huérfanos (una BD vacía se trata como error de configuración, no se borra nada)
+        for name, counts in chunk_counts.items():
+            orphans = [document_id for document_id in counts if document_id not in expected]
+            deleted = 0
+            if orphans and not expected:
+                logger.warning(f"⚠️ La tabla documents está vacía: no se eliminan {len(orphans)} documentos de {name}")
+            elif orphans or unlabeled[name]:
+                deleted = self._delete_orphans(name, orphans, unlabeled[name], counts)
+            report["collections"][name] = {
+                "chunks": sum(counts.values()) + len(unlabeled[name]),
+                "documents": len(counts),
+                "orphan_documents": len(orphans),
+                "orphan_sample": orphans[:REPORT_SAMPLE_SIZE],
+                "orphan_chunks_deleted": deleted,
+            }
+
+        # 4. chunk_count frente a la colección activa
+        active_counts = chunk_counts[collections[0]]
+        backfilled = 0
+        mismatched = []
+        for document_id, chunk_count in expected.items():
+            actual = active_counts.get(document_id, 0)
+            if chunk_count is None:
+                if actual and self.document_repo.set_chunk_count(int(document_id), actual):
+                    backfilled += 1
+            elif actual != chunk_count:
+                mismatched.append({"document_id": int(document_id), "expected": chunk_count, "actual": actual})
+
+        report.update(
+            chunk_count_backfilled=backfilled,
+            mismatched_documents=len(mismatched),
+            mismatched_sample=mismatched[:REPORT_SAMPLE_SIZE],
+            duration_ms=round((time.perf_counter() - started) * 1000, 1)
+        )
+        logger.info(
+            f"🧹 Barrido de ChromaDB: {sum(c['orphan_chunks_deleted'] for c in report['collections'].values())} "
+            f"chunks huérfanos eliminados, {backfilled} chunk_count rellenados, "
+            f"{len(mismatched)} documentos con chunks incompletos ({report['duration_ms']} ms)"
+        )
+        return report
+
+    def _delete_orphans(self, collection_name: str, orphans: List[str], unlabeled: List[str], counts: Counter) -> int:
+        deleted = 0
+        for start in range(0, len(orphans), DELETE_BATCH_SIZE):
+            batch = orphans[start:start + DELETE_BATCH_SIZE]
+            self.chromadb.delete_where(collection_name, {"document_id": {"$in": batch}})
+            deleted += sum(counts[document_id] for document_id in batch)
+        if unlabeled:
+            # Chunks sin document_id: no pertenecen a ningún documento
+            self.chromadb.delete_documents(collection_name, unlabeled)
+            deleted += len(unlabeled)
+        return deleted
+
+    async def _sweep_loop(self):
+        while True:
+            try:
+                await asyncio.sleep(self.interval)
+            except asyncio.CancelledError:
+                break
+            try:
+                await self.sweep_once()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error en el barrido de chunks huérfanos: {str(e)}")
+
+# Instancia global
+vector_orphan_sweeper = VectorOrphanSweeper()
@@ -3,16 +3,36 @@ Conector para la API de Gemini con patrón singleton.
 Gestiona las llamadas a Gemini para generación de texto y embeddings.
 """
 import os
+import time
 from typing import List, Dict, Optional, Any
-import google.generativeai as genai
 from src.core.logging_config import get_logger
-from src.core.exceptions import ValidationException, ExternalServiceException
+from src.core.exceptions import ValidationException, ExternalServiceException, CircuitOpenException
 from src.config.settings import get_settings
 from src.core.interfaces.connectors import IAIConnector
+from src.core.circuit_breaker import breakers
+from src.core.metrics import metrics
+from src.core.tracing import tracer
 
 logger = get_logger(__name__)
 settings = get_settings()
 
+GEMINI_TIME_TO_FIRST_TOKEN = metrics.histogram(
+    "gemini_time_to_first_token_seconds",
+    "Tiempo hasta el primer fragmento de una respuesta en streaming de Gemini"
+)
+GEMINI_GENERATION = metrics.histogram(
+    "gemini_generation_duration_seconds",
+    "Duración total de la generación con Gemini",
+    ["mode"]
+)
+# Compartido con chromadb_connector (mismo nombre = misma métrica)
+EMBEDDING_LATENCY = metrics.histogram(
+    "embedding_duration_seconds",
+    "Cálculo de embeddings por lote",
+    ["model"]
+)
+GEMINI_BREAKER = breakers.get("gemini")
+
 class GeminiConnector(IAIConnector):
     """
     Implementación del patrón Singleton para las conexiones a Gemini.
@@ -56,7 +76,9 @@ class GeminiConnector(IAIConnector):
             # Registra un mensaje indicando que se está inicializando el cliente
             logger.info("Inicializando cliente de Gemini")
             
-            # Configurar la API de Gemini
+            # Configurar la API de Gemini (el SDK tarda ~1 s en importarse:
+            # se importa en la primera llamada, no al arrancar el worker)
+            import google.generativeai as genai
             genai.configure(api_key=api_key)
             self._client = genai
         
@@ -95,7 +117,9 @@ class GeminiConnector(IAIConnector):
             # Usar SentenceTransformer para embeddings
             embedding_model = self.get_embedding_model()
             # Generar embeddings
-            embeddings = embedding_model.encode(texts, convert_to_numpy=True)
+            with tracer.child_span("embedding", model=settings.SENTENCE_TRANSFORMER_MODEL, texts=len(texts)), \
+                    EMBEDDING_LATENCY.labels(settings.SENTENCE_TRANSFORMER_MODEL).time():
+                embeddings = embedding_model.encode(texts, convert_to_numpy=True)
             # Convertir a lista de listas para mantener compatibilidad
             return embeddings.tolist()
         except Exception as e:
@@ -156,30 +180,33 @@ class GeminiConnector(IAIConnector):
                     })
             
             # Crear configuración de generación
-            generation_config = genai.types.GenerationConfig(
+            generation_config = client.types.GenerationConfig(
                 temperature=temperature,
                 max_output_tokens=max_tokens,
             )
             
             # Si hay historial, usar chat
-            if gemini_history:
-                chat = gemini_model.start_chat(history=gemini_history)
-                # Enviar el último mensaje
-                response = chat.send_message(
-                    last_message["content"],
-                    generation_config=generation_config
-                )
-            else:
-                # Si no hay historial, generar directamente
-                response = gemini_model.generate_content(
-                    last_message["content"],
-                    generation_config=generation_config
-                )
+            with GEMINI_BREAKER.call(), \
+                    tracer.child_span("gemini.generate", model=model_name, mode="chat"), \
+                    GEMINI_GENERATION.labels("chat").time():
+                if gemini_history:
+                    chat = gemini_model.start_chat(history=gemini_history)
+                    # Enviar el último mensaje
+                    response = chat.send_message(
+                        last_message["content"],
+                        generation_config=generation_config
+                    )
+                else:
+                    # Si no hay historial, generar directamente
+                    response = gemini_model.generate_content(
+                        last_message["content"],
+                        generation_config=generation_config
+                    )
             
             # Devolver el texto generado
             return response.text
             
-        except ValidationException:
+        except (ValidationException, CircuitOpenException):
             raise  # Re-lanzar excepciones ya manejadas
         except Exception as e:
             logger.error(f"Error al generar respuesta: {str(e)}", exc_info=True)
@@ -228,19 +255,22 @@ class GeminiConnector(IAIConnector):
             gemini_model = client.GenerativeModel(model_name)
             
             # Generar respuesta
-            generation_config = genai.types.GenerationConfig(
+            generation_config = client.types.GenerationConfig(
                 temperature=temperature,
                 max_output_tokens=max_tokens,
             )
             
-            response = gemini_model.generate_content(
-                combined_prompt,
-                generation_config=generation_config
-            )
+            with GEMINI_BREAKER.call(), \
+                    tracer.child_span("gemini.generate", model=model_name, mode="rag"), \
+                    GEMINI_GENERATION.labels("rag").time():
+                response = gemini_model.generate_content(
+                    combined_prompt,
+                    generation_config=generation_config
+                )
             
             return response.text
             
-        except ValidationException:
+        except (ValidationException, CircuitOpenException):
             raise  # Re-lanzar excepciones ya manejadas
         except Exception as e:
             logger.error(f"Error al generar respuesta RAG: {str(e)}", exc_info=True)
@@ -301,32 +331,51 @@ class GeminiConnector(IAIConnector):
                     })
             
             # Crear configuración de generación
-            generation_config = genai.types.GenerationConfig(
+            generation_config = client.types.GenerationConfig(
                 temperature=temperature,
                 max_output_tokens=max_tokens,
             )
             
-            # Si hay historial, usar chat
-            if gemini_history:
-                chat = gemini_model.start_chat(history=gemini_history)
-                # Enviar el último mensaje con streaming
-                response = chat.send_message(
-                    last_message["content"],
-                    generation_config=generation_config,
-                    stream=True  # Habilitar streaming
-                )
-            else:
-                # Si no hay historial, generar directamente con streaming
-                response = gemini_model.generate_content(
-                    last_message["content"],
-                    generation_config=generation_config,
-                    stream=True  # Habilitar streaming
-                )
-            
-            # Yield chunks de la respuesta
-            for chunk in response:
-                if chunk.text:
-                    yield chunk.text
+            # Spans sin activar: la generación cruza los yield del generador
+            started = time.perf_counter()
+            stream_span = tracer.start_child("gemini.stream", model=model_name)
+            first_token_span = tracer.start_child("gemini.first_token", model=model_name)
+            try:
+                # Cuenta en el circuito de Gemini (el circuito abierto falla al instante)
+                with GEMINI_BREAKER.call():
+                    # Si hay historial, usar chat
+                    if gemini_history:
+                        chat = gemini_model.start_chat(history=gemini_history)
+                        # Enviar el último mensaje con streaming
+                        response = chat.send_message(
+                            last_message["content"],
+                            generation_config=generation_config,
+                            stream=True  # Habilitar streaming
+                        )
+                    else:
+                        # Si no hay historial, generar directamente con streaming
+                        response = gemini_model.generate_content(
+                            last_message["content"],
+                            generation_config=generation_config,
+                            stream=True  # Habilitar streaming
+                        )
+                
+                    # Yield chunks de la respuesta
+                    first_token = True
+                    for chunk in response:
+                        if chunk.text:
+                            if first_token:
+                                GEMINI_TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - started)
+                                first_token_span.end()
+                                first_token = False
+                            yield chunk.text
+                    GEMINI_GENERATION.labels("stream").observe(time.perf_counter() - started)
+            except Exception as e:
+                stream_span.record_exception(e)
+                raise
+            finally:
+                first_token_span.end()
+                stream_span.end()
                     
         except Exception as e:
             logger.error(f"Error en streaming Gemini: {str(e)}")
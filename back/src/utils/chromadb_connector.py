@@ -49,20 +49,98 @@ Excelente manejo de errores con bloques try/except
 Documentación detallada con docstrings explicativos
 
 """
-import chromadb
+import re
+import threading
 import time
-from chromadb.config import Settings
-from chromadb.utils import embedding_functions
 import os
 import uuid
 from typing import List, Dict, Any, Optional
 from src.core.logging_config import get_logger
 from src.core.exceptions import ExternalServiceException, DatabaseException
+from src.core.circuit_breaker import breakers
+from src.core.metrics import metrics
+from src.core.tracing import tracer
 from src.config.settings import get_settings
+from datetime import datetime
 
 logger = get_logger(__name__)
 settings = get_settings()
 
+# Colección por defecto y colección que guarda el puntero a la activa
+DEFAULT_COLLECTION = "documents"
+REGISTRY_COLLECTION = "collection_registry"
+
+# Versiones de la colección: documents_v1, documents_v2...
+VERSION_PATTERN = re.compile(rf"^{DEFAULT_COLLECTION}_v(\d+)$")
+
+# Modelo con el que se crearon las colecciones sin metadatos de versión
+# (la función por defecto de Chroma, all-MiniLM-L6-v2 en ONNX)
+DEFAULT_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+CHROMA_LATENCY = metrics.histogram(
+    "chroma_operation_duration_seconds",
+    "Duración de las operaciones de ChromaDB (add/upsert incluyen el cálculo de embeddings)",
+    ["operation"]
+)
+EMBEDDING_LATENCY = metrics.histogram(
+    "embedding_duration_seconds",
+    "Cálculo de embeddings por lote",
+    ["model"]
+)
+
+CHROMA_BREAKER = breakers.get("chroma")
+
+
+def chroma_address():
+    """Host y puerto de ChromaDB (en Docker, el nombre del servicio y su puerto interno)"""
+    if os.environ.get('DOCKER_ENV', 'false').lower() == 'true':
+        return 'chromadb', 8000
+    return settings.CHROMA_HOST, settings.CHROMA_PORT
+
+
+def _protect_session(client):
+    """
+    Monta en la sesión HTTP del cliente un adaptador con el circuito de
+    ChromaDB y un timeout por defecto (requests no pone ninguno: con Chroma
+    colgado cada petición esperaría indefinidamente)
+    """
+    session = getattr(getattr(client, "_server", None), "_session", None)
+    if session is None:
+        logger.warning("⚠️ Cliente de ChromaDB sin sesión HTTP: sin circuito ni timeout por petición")
+        return
+    from requests.adapters import HTTPAdapter
+
+    class CircuitAdapter(HTTPAdapter):
+        def send(self, request, **kwargs):
+            if kwargs.get("timeout") is None:
+                kwargs["timeout"] = settings.CHROMA_REQUEST_TIMEOUT_SECONDS
+            CHROMA_BREAKER.before_call()
+            try:
+                response = super().send(request, **kwargs)
+            except Exception as e:
+                CHROMA_BREAKER.record_failure(e)
+                raise
+            CHROMA_BREAKER.record_response(response.status_code)
+            return response
+
+    adapter = CircuitAdapter()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+
+class _TimedEmbeddingFunction:
+    """Envuelve una función de embeddings de Chroma para medir cada lote"""
+
+    def __init__(self, function, model: str):
+        self._function = function
+        self._model = model
+        self._latency = EMBEDDING_LATENCY.labels(model)
+
+    def __call__(self, input):
+        # Chroma valida la firma: el parámetro tiene que llamarse `input`
+        with tracer.child_span("embedding", model=self._model, texts=len(input)), self._latency.time():
+            return self._function(input)
+
 
 def load_env_file():
     """Lee el archivo .env manualmente"""
@@ -87,38 +165,46 @@ class ChromaDBConnector:
             cls._instance = super(ChromaDBConnector, cls).__new__(cls)
             cls._instance._client = None
             cls._instance._initialized_collections = set()  # Para rastrear colecciones inicializadas
+            cls._instance._embedding_functions = {}
+            cls._instance._collection_models = {}
+            cls._instance._migrating_to = None
+            cls._instance._active_collection = None
+            cls._instance._active_checked_at = 0.0
+            cls._instance._registry_lock = threading.Lock()
         return cls._instance
     
     def get_client(self):
         """Inicializa el cliente si aún no existe (lazy initialization)"""
         if self._client is None:
+            # Con el circuito abierto no se reintenta la conexión en cada petición
+            CHROMA_BREAKER.reject_if_open()
             try:
                 import chromadb
-                from src.config.settings import get_settings
-                settings = get_settings()
-                
-                # Detectar si estamos en Docker
-                import os
-                in_docker = os.environ.get('DOCKER_ENV', 'false').lower() == 'true'
                 
                 # Si estamos en Docker, usar el nombre del servicio
-                host = 'chromadb' if in_docker else settings.CHROMA_HOST
-                port = 8000 if in_docker else settings.CHROMA_PORT  # Puerto interno en Docker
+                host, port = chroma_address()
                 
                 logger.info(f"Conectando a ChromaDB en {host}:{port}")
                 
                 # Usar el cliente HTTP para conectarse al contenedor Docker
+                client = None
                 try:
-                    self._client = chromadb.HttpClient(
+                    client = chromadb.HttpClient(
                         host=host,
                         port=port
                     )
+                    _protect_session(client)
                     
                     # Verificar con heartbeat
-                    self._client.heartbeat()
+                    client.heartbeat()
+                    self._client = client
                     logger.info("✅ Conexión exitosa a ChromaDB!")
-                    self._ensure_collection_exists("documents")
+                    self._ensure_collection_exists(self.get_active_collection_name())
                 except Exception as connection_error:
+                    if client is None:
+                        # El primer contacto no pasa por el adaptador (y chromadb
+                        # convierte el fallo de conexión en ValueError)
+                        CHROMA_BREAKER.record_failure(connection_error)
                     logger.error(f"Error al conectar con ChromaDB: {str(connection_error)}", exc_info=True)
                     raise ExternalServiceException(f"No se pudo conectar a ChromaDB: {str(connection_error)}")
                     
@@ -199,12 +285,12 @@ class ChromaDBConnector:
         """Añade documentos a ChromaDB con timeout."""
         start_time = time.time()
         try:
-            # Obtener cliente y asegurar que la colección existe
-            client = self.get_client()
+            # Conectar y asegurar que la colección existe
+            self.get_client()
             self._ensure_collection_exists(collection_name)
             
-            # Obtener la colección
-            collection = client.get_collection(collection_name)
+            # Obtener la colección (con el modelo de embeddings de su versión)
+            collection = self.get_collection(collection_name)
             logger.info(f"Preparando para añadir {len(chunks)} chunks a ChromaDB")
             
             # Verificar metadatos
@@ -218,6 +304,7 @@ class ChromaDBConnector:
             # IMPORTANTE: Procesar con timeout para evitar bloqueos
             import concurrent.futures
             with concurrent.futures.ThreadPoolExecutor() as executor:
+                add_started = time.perf_counter()
                 future = executor.submit(
                     collection.add,
                     ids=document_ids,
@@ -228,6 +315,7 @@ class ChromaDBConnector:
                 try:
                     # Esperar hasta timeout
                     result = future.result(timeout=settings.CHROMA_OPERATION_TIMEOUT)
+                    CHROMA_LATENCY.labels("add").observe(time.perf_counter() - add_started)
                     chroma_time = time.time() - start_time
                     logger.info(f"⏱️ ChromaDB: Añadidos {len(chunks)} chunks en {chroma_time:.3f} segundos")
                     logger.info(f"✅ Añadidos {len(chunks)} chunks a ChromaDB en {collection_name}")
@@ -252,9 +340,8 @@ class ChromaDBConnector:
                 n_results: int = 5,
                 where: Optional[Dict[str, Any]] = None):
         try:
-            client = self.get_client()
             self._ensure_collection_exists(collection_name)
-            collection = client.get_collection(collection_name)
+            collection = self.get_collection(collection_name)
             
             # Si where es un diccionario vacío, establecerlo a None
             if where is not None and not where:
@@ -263,11 +350,13 @@ class ChromaDBConnector:
             # Formato correcto para where: debe incluir un operador como $eq, $gt, etc.
             # Ejemplo: {"document_id": {"$eq": "33"}}
             
-            results = collection.query(
-                query_texts=[query_text],
-                n_results=n_results,
-                where=where
-            )
+            with tracer.child_span("chroma.query", collection=collection_name, n_results=n_results), \
+                    CHROMA_LATENCY.labels("query").time():
+                results = collection.query(
+                    query_texts=[query_text],
+                    n_results=n_results,
+                    where=where
+                )
             return results
         except Exception as e:
             logger.error(f"Error al buscar documentos: {str(e)}", exc_info=True)
@@ -283,8 +372,7 @@ class ChromaDBConnector:
         """Actualiza un documento existente"""
         
         try:
-            client = self.get_client()
-            collection = client.get_collection(name=collection_name)
+            collection = self.get_collection(collection_name)
             collection.update(
                 ids=[document_id], # ID del documento a actualizar
                 documents=[chunk] if chunk else None, # Nuevo contenido del documento enviado a traves de chunk a chroma que ya existe previamente en la base de datos y si es none indica que no quiero actualizar el contenido
@@ -311,6 +399,273 @@ class ChromaDBConnector:
             logger.error(f"Error al eliminar documentos: {str(e)}", exc_info=True)
             raise DatabaseException(f"Error al eliminar documentos de ChromaDB: {str(e)}")
 
+    def delete_where(self, collection_name: str, where: Dict[str, Any]):
+        """Elimina todos los chunks que cumplen un filtro de metadatos (una sola llamada)"""
+        client = self.get_client()
+        try:
+            collection = client.get_collection(name=collection_name)
+            collection.delete(where=where)
+            logger.info(f"Eliminados chunks de {collection_name} con filtro {where}")
+            return True
+        except Exception as e:
+            logger.error(f"Error al eliminar chunks por filtro: {str(e)}", exc_info=True)
+            raise DatabaseException(f"Error al eliminar chunks de ChromaDB: {str(e)}")
+
+
+    def get_chunks(self,
+                   collection_name: str,
+                   where: Optional[Dict[str, Any]] = None,
+                   include: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Obtiene los chunks que cumplen un filtro sin ejecutar ninguna búsqueda"""
+        try:
+            collection = self.get_client().get_collection(name=collection_name)
+            return collection.get(where=where, include=include if include is not None else ["metadatas"])
+        except Exception as e:
+            logger.error(f"Error al obtener chunks de {collection_name}: {str(e)}", exc_info=True)
+            raise DatabaseException(f"Error al obtener chunks de ChromaDB: {str(e)}")
+
+    def count_chunks(self, collection_name: str, where: Dict[str, Any]) -> int:
+        """Cuenta los chunks que cumplen un filtro (solo IDs, sin embeddings ni búsqueda)"""
+        return len(self.get_chunks(collection_name, where=where, include=[]).get("ids") or [])
+
+    def iter_chunk_metadatas(self, collection_name: str, page_size: int = 1000):
+        """
+        Recorre los metadatos de todos los chunks de una colección por páginas.
+
+        Yields:
+            Tuple[List[str], List[Dict[str, Any]]]: IDs y metadatos de cada página
+        """
+        collection = self.get_client().get_collection(name=collection_name)
+        offset = 0
+        while True:
+            page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+            ids = page.get("ids") or []
+            if not ids:
+                return
+            yield ids, page.get("metadatas") or [{} for _ in ids]
+            if len(ids) < page_size:
+                return
+            offset += len(ids)
+
+    def upsert_embeddings(self,
+                          collection_name: str,
+                          document_ids: List[str],
+                          chunks: List[str],
+                          embeddings: List[List[float]],
+                          metadatas: List[Dict[str, Any]]) -> bool:
+        """Inserta o reemplaza chunks con embeddings ya calculados"""
+        try:
+            self._ensure_collection_exists(collection_name)
+            collection = self.get_client().get_collection(name=collection_name)
+            with CHROMA_LATENCY.labels("upsert").time():
+                collection.upsert(ids=document_ids, documents=chunks, embeddings=embeddings, metadatas=metadatas)
+            return True
+        except Exception as e:
+            logger.error(f"Error al escribir embeddings en {collection_name}: {str(e)}", exc_info=True)
+            raise DatabaseException(f"Error al escribir embeddings en ChromaDB: {str(e)}")
+
+    def update_metadatas(self,
+                         collection_name: str,
+                         document_ids: List[str],
+                         metadatas: List[Dict[str, Any]]) -> bool:
+        """Actualiza solo los metadatos de varios chunks (sin recalcular embeddings)"""
+        try:
+            collection = self.get_client().get_collection(name=collection_name)
+            collection.update(ids=document_ids, metadatas=metadatas)
+            return True
+        except Exception as e:
+            logger.error(f"Error al actualizar metadatos en {collection_name}: {str(e)}", exc_info=True)
+            raise DatabaseException(f"Error al actualizar metadatos en ChromaDB: {str(e)}")
+
+    def embed(self, texts: List[str], model: Optional[str] = None) -> List[List[float]]:
+        """
+        Calcula embeddings con el modelo indicado (por defecto el de la colección
+        activa), para poder hacerlo por lotes y en paralelo fuera de Chroma
+        """
+        model = model or self.collection_model(self.get_active_collection_name())
+        embedding_function = self._embedding_function_for(model)
+        return [list(map(float, vector)) for vector in embedding_function(texts)]
+
+    def list_collection_names(self) -> List[str]:
+        """Nombres de todas las colecciones"""
+        return [collection.name for collection in self.get_client().list_collections()]
+
+    def delete_collection(self, collection_name: str):
+        """Elimina una colección completa"""
+        self.get_client().delete_collection(name=collection_name)
+        if hasattr(self, '_initialized_collections'):
+            self._initialized_collections.discard(collection_name)
+        self._collection_models.pop(collection_name, None)
+        logger.info(f"🗑️ Colección '{collection_name}' eliminada")
+
+#---------------------------------------------------------
+# Colecciones versionadas (documents_v{n}). Cada versión guarda en sus
+# metadatos el modelo de embeddings con el que se llenó, y las consultas
+# usan siempre ese modelo. El registro indica la versión activa (lecturas)
+# y, durante una migración, la versión nueva (las escrituras van a ambas).
+
+    def get_collection(self, collection_name: str):
+        """Obtiene una colección con la función de embeddings de su modelo"""
+        model = self.collection_model(collection_name)
+        return self.get_client().get_collection(
+            name=collection_name,
+            embedding_function=self._embedding_function_for(model)
+        )
+
+    def collection_metadata(self, collection_name: str) -> Dict[str, Any]:
+        """Metadatos de versión de una colección"""
+        return dict(self.get_client().get_collection(name=collection_name).metadata or {})
+
+    def collection_model(self, collection_name: str) -> str:
+        """Modelo de embeddings de una colección (cacheado: no cambia nunca)"""
+        if collection_name not in self._collection_models:
+            metadata = self.collection_metadata(collection_name)
+            self._collection_models[collection_name] = metadata.get("embedding_model") or DEFAULT_EMBEDDING_MODEL
+        return self._collection_models[collection_name]
+
+    def create_version(self, embedding_model: str, metadata: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Crea la siguiente versión de la colección de documentos.
+
+        Args:
+            embedding_model: Modelo con el que se llenará
+            metadata: Metadatos adicionales (versión del troceador...)
+
+        Returns:
+            str: Nombre de la colección creada (documents_v{n})
+        """
+        versions = [
+            int(match.group(1)) for match in map(VERSION_PATTERN.match, self.list_collection_names()) if match
+        ]
+        name = f"{DEFAULT_COLLECTION}_v{max(versions, default=0) + 1}"
+        self.get_client().create_collection(
+            name=name,
+            metadata={**(metadata or {}), "embedding_model": embedding_model, "created_at": datetime.utcnow().isoformat()},
+            embedding_function=self._embedding_function_for(embedding_model)
+        )
+        self._collection_models[name] = embedding_model
+        self._initialized_collections.add(name)
+        logger.info(f"🆕 Colección '{name}' creada para el modelo {embedding_model}")
+        return name
+
+    def get_active_collection_name(self) -> str:
+        """Colección activa según el registro (cacheada CHROMA_REGISTRY_TTL_SECONDS)"""
+        self._refresh_registry()
+        return self._active_collection or DEFAULT_COLLECTION
+
+    def get_write_collection_names(self) -> List[str]:
+        """Colecciones que reciben las escrituras: la activa y, si hay migración, la nueva"""
+        self._refresh_registry()
+        names = [self._active_collection or DEFAULT_COLLECTION]
+        if self._migrating_to and self._migrating_to not in names:
+            names.append(self._migrating_to)
+        return names
+
+    def get_collection_registry(self) -> Dict[str, Any]:
+        """Contenido del registro y versiones existentes con su modelo"""
+        registry = dict(self._registry_collection().metadata or {})
+        registry.setdefault("active", DEFAULT_COLLECTION)
+        registry["collections"] = [
+            {"name": name, "embedding_model": self.collection_model(name)}
+            for name in self.list_collection_names() if self._is_document_collection(name)
+        ]
+        return registry
+
+    def begin_migration(self, collection_name: str):
+        """Activa la doble escritura hacia una versión nueva"""
+        self._write_registry(migrating_to=collection_name)
+        logger.info(f"🔁 Migración a '{collection_name}': escrituras duplicadas activadas")
+
+    def abort_migration(self):
+        """Desactiva la doble escritura (la versión a medio llenar la borra el GC)"""
+        self._write_registry(migrating_to=None)
+
+    def set_active_collection_name(self, collection_name: str) -> Optional[str]:
+        """
+        Cambia la colección activa en una sola escritura del registro y
+        termina la migración en curso.
+
+        Returns:
+            Optional[str]: Colección que estaba activa antes del cambio
+        """
+        previous = (self._registry_collection().metadata or {}).get("active") or DEFAULT_COLLECTION
+        self._write_registry(
+            active=collection_name,
+            previous=previous,
+            migrating_to=None,
+            switched_at=datetime.utcnow().isoformat()
+        )
+        logger.info(f"🔀 Colección activa: '{previous}' -> '{collection_name}'")
+        return previous
+
+    def garbage_collect_collections(self) -> List[str]:
+        """
+        Elimina las versiones que ya no se usan: se conservan la activa, la
+        anterior (para volver atrás) y la de la migración en curso.
+
+        Returns:
+            List[str]: Colecciones eliminadas
+        """
+        registry = self._registry_collection().metadata or {}
+        keep = {registry.get("active") or DEFAULT_COLLECTION, registry.get("previous"), registry.get("migrating_to")}
+        removed = []
+        for name in self.list_collection_names():
+            if self._is_document_collection(name) and name not in keep:
+                try:
+                    self.delete_collection(name)
+                    removed.append(name)
+                except Exception as e:
+                    logger.warning(f"⚠️ No se pudo eliminar la colección {name}: {e}")
+        return removed
+
+    def _is_document_collection(self, name: str) -> bool:
+        return name == DEFAULT_COLLECTION or bool(VERSION_PATTERN.match(name))
+
+    def _refresh_registry(self):
+        now = time.monotonic()
+        if self._active_collection and now - self._active_checked_at < settings.CHROMA_REGISTRY_TTL_SECONDS:
+            return
+        try:
+            metadata = self._registry_collection().metadata or {}
+            self._active_collection = metadata.get("active") or DEFAULT_COLLECTION
+            self._migrating_to = metadata.get("migrating_to") or None
+            self._active_checked_at = now
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo leer el registro de colecciones: {str(e)}")
+            self._active_collection = self._active_collection or DEFAULT_COLLECTION
+
+    def _write_registry(self, **changes):
+        """Actualiza el registro (Chroma no admite None: las claves vacías se guardan como "")"""
+        with self._registry_lock:
+            registry = self._registry_collection()
+            metadata = dict(registry.metadata or {})
+            metadata.update({key: value or "" for key, value in changes.items()})
+            metadata.setdefault("active", DEFAULT_COLLECTION)
+            registry.modify(metadata=metadata)
+            self._active_collection = metadata["active"]
+            self._migrating_to = metadata.get("migrating_to") or None
+            self._active_checked_at = time.monotonic()
+
+    def _registry_collection(self):
+        return self.get_client().get_or_create_collection(name=REGISTRY_COLLECTION)
+
+    def _embedding_function_for(self, model: str):
+        """Función de embeddings por modelo (se carga una vez por proceso)"""
+        if model not in self._embedding_functions:
+            # chromadb se importa al conectar o al cargar el modelo, no al arrancar
+            from chromadb.utils import embedding_functions
+            if model == DEFAULT_EMBEDDING_MODEL:
+                function = embedding_functions.DefaultEmbeddingFunction()
+            else:
+                try:
+                    function = embedding_functions.SentenceTransformerEmbeddingFunction(model_name=model)
+                except Exception as e:
+                    raise ExternalServiceException(
+                        f"No se pudo cargar el modelo de embeddings {model}: {str(e)}. "
+                        "Ejecuta: pip install sentence-transformers"
+                    )
+            self._embedding_functions[model] = _TimedEmbeddingFunction(function, model)
+        return self._embedding_functions[model]
 
 #---------------------------------------------------------
     def get_document(self, collection_name: str, document_id: str):
@@ -330,7 +685,7 @@ class ChromaDBConnector:
                              query: str,
                              document_ids: List[int],
                              n_results: int = 5,
-                             collection_name: str = "documents") -> List[Dict[str, Any]]:
+                             collection_name: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Busca chunks relevantes en documentos específicos
         
@@ -338,12 +693,13 @@ class ChromaDBConnector:
             query: Texto de búsqueda
             document_ids: Lista de IDs de documentos
             n_results: Número de resultados a retornar
-            collection_name: Nombre de la colección
+            collection_name: Nombre de la colección (por defecto la activa)
             
         Returns:
             Lista de chunks con su contenido y metadata
         """
         try:
+            collection_name = collection_name or self.get_active_collection_name()
             # Construir filtro where para ChromaDB
             where = {
                 "document_id": {
@@ -1,12 +1,10 @@
 """
 Servicio de email para envío de notificaciones.
 """
-import smtplib
 import logging
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from typing import Optional
 from src.config.settings import get_settings
+from src.services.email_outbox import email_outbox
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -25,7 +23,7 @@ class EmailService:
     
     def send_email(self, to_email: str, subject: str, body_html: str, body_text: Optional[str] = None) -> bool:
         """
-        Envía un email usando SMTP.
+        Envía un email usando SMTP (a través del outbox).
         
         Args:
             to_email: Email destinatario
@@ -34,7 +32,7 @@ class EmailService:
             body_text: Cuerpo del email en texto plano (opcional)
             
         Returns:
-            bool: True si el email fue enviado exitosamente
+            bool: True si el email quedó en cola para enviarse
         """
         try:
             # Si no hay configuración SMTP, solo loguear (modo desarrollo)
@@ -44,29 +42,15 @@ class EmailService:
                 logger.info(f"Contenido: {body_text or 'Ver HTML'}")
                 return True
             
-            # Crear mensaje
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = subject
-            msg['From'] = f"{self.app_name} <{self.from_email}>"
-            msg['To'] = to_email
-            
-            # Agregar versión texto
-            if body_text:
-                part1 = MIMEText(body_text, 'plain')
-                msg.attach(part1)
-            
-            # Agregar versión HTML
-            part2 = MIMEText(body_html, 'html')
-            msg.attach(part2)
-            
-            # Conectar y enviar
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_user, self.smtp_password)
-                server.send_message(msg)
-            
-            logger.info(f"Email enviado exitosamente a {to_email}")
-            return True
+            # Se guarda en el outbox y lo envía el pool de sesiones SMTP
+            outbox_id = email_outbox.enqueue(
+                sender=f"{self.app_name} <{self.from_email}>",
+                to_email=to_email,
+                subject=subject,
+                html=body_html,
+                text=body_text
+            )
+            return outbox_id is not None
             
         except Exception as e:
             logger.error(f"Error al enviar email a {to_email}: {str(e)}")
@@ -0,0 +1,128 @@
+"""
+Índice de búsqueda aproximada por distancia de edición (estilo SymSpell).
+
+Para cada palabra del vocabulario se precalculan todas las variantes que
+resultan de borrar hasta `max_distance` caracteres. Una búsqueda genera los
+borrados de la palabra consultada y cruza ambos conjuntos: el coste depende
+de la longitud de la palabra, no del tamaño del vocabulario.
+
+Los resultados se cachean por palabra: en un chat las mismas palabras
+(correctas pero fuera del vocabulario) se repiten continuamente.
+
+add() es incremental y admite búsquedas concurrentes sin lock: cada palabra
+nueva sustituye la caché por otra vacía, así que una búsqueda que empezó
+antes guarda su resultado en la caché descartada y no en la vigente.
+"""
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Entradas máximas de la caché de búsquedas (se vacía al llenarse)
+LOOKUP_CACHE_SIZE = 10000
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Distancia de Damerau-Levenshtein restringida (inserción, borrado,
+    sustitución y transposición de caracteres adyacentes).
+
+    Devuelve `max_distance + 1` en cuanto se sabe que se supera el límite.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    if a == b:
+        return 0
+
+    previous_previous: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = current[0]
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(
+                previous[j] + 1,         # borrado
+                current[j - 1] + 1,      # inserción
+                previous[j - 1] + cost   # sustitución
+            )
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)  # transposición
+            row_min = min(row_min, current[j])
+        if row_min > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return min(previous[-1], max_distance + 1)
+
+
+def _deletes(word: str, max_distance: int) -> Set[str]:
+    """Todas las cadenas obtenidas borrando entre 1 y `max_distance` caracteres"""
+    result: Set[str] = set()
+    frontier = {word}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for candidate in frontier:
+            if len(candidate) <= 1:
+                continue
+            for i in range(len(candidate)):
+                deleted = candidate[:i] + candidate[i + 1:]
+                if deleted not in result:
+                    result.add(deleted)
+                    next_frontier.add(deleted)
+        frontier = next_frontier
+    return result
+
+
+class FuzzyIndex:
+    """Vocabulario con búsqueda de la palabra más cercana hasta `max_distance` ediciones"""
+
+    def __init__(self, words: Iterable[str] = (), max_distance: int = 2):
+        self.max_distance = max_distance
+        self._words: Set[str] = set()
+        self._deletes: Dict[str, List[str]] = {}
+        self._cache: Dict[Tuple[str, int], List[Tuple[str, int]]] = {}
+        for word in words:
+            self.add(word)
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self._words
+
+    def add(self, word: str) -> None:
+        if not word or word in self._words:
+            return
+        self._deletes.setdefault(word, []).append(word)
+        for deleted in _deletes(word, self.max_distance):
+            self._deletes.setdefault(deleted, []).append(word)
+        self._words.add(word)
+        self._cache = {}
+
+    def lookup(self, word: str, max_distance: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        Palabras del vocabulario a distancia <= max_distance, de menor a mayor distancia.
+        """
+        limit = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        if word in self._words:
+            return [(word, 0)]
+
+        cache = self._cache
+        cached = cache.get((word, limit))
+        if cached is not None:
+            return cached
+
+        seen: Set[str] = set()
+        matches: List[Tuple[str, int]] = []
+        for probe in _deletes(word, limit) | {word}:
+            for candidate in self._deletes.get(probe, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                distance = edit_distance(word, candidate, limit)
+                if distance <= limit:
+                    matches.append((candidate, distance))
+
+        matches.sort(key=lambda match: (match[1], match[0]))
+
+        if len(cache) >= LOOKUP_CACHE_SIZE:
+            cache.clear()
+        cache[(word, limit)] = matches
+        return matches
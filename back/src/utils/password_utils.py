@@ -1,7 +1,11 @@
 import hashlib
+import hmac
 import os
 import base64
 import logging
+from typing import Optional
+
+from src.config.settings import settings
 
 # Para compatibilidad con hashes bcrypt antiguos
 try:
@@ -10,64 +14,80 @@ try:
 except ImportError:
     BCRYPT_AVAILABLE = False
 
-def hash_password(password: str) -> str:
-    """Genera un hash PBKDF2 para la contraseña."""
+# Formato actual: $pbkdf2-sha256$<iteraciones>$<base64(salt + clave)>
+PBKDF2_PREFIX = "$pbkdf2-sha256$"
+# Formato anterior: $pbkdf2$<base64(salt + clave)>, siempre con 100000 iteraciones
+LEGACY_PBKDF2_PREFIX = "$pbkdf2$"
+LEGACY_PBKDF2_ITERATIONS = 100000
+SALT_BYTES = 16
+
+def _pbkdf2(password: str, salt: bytes, iterations: int) -> bytes:
+    return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+
+def hash_password(password: str, iterations: Optional[int] = None) -> str:
+    """
+    Genera un hash PBKDF2 para la contraseña.
+
+    Las iteraciones (PASSWORD_PBKDF2_ITERATIONS por defecto) se guardan en el
+    propio hash, así que se pueden subir sin invalidar los existentes.
+    """
+    iterations = iterations or settings.PASSWORD_PBKDF2_ITERATIONS
     # Generar un salt aleatorio
-    salt = os.urandom(16)
-    
-    # Generar el hash
-    key = hashlib.pbkdf2_hmac(
-        'sha256',
-        password.encode('utf-8'),
-        salt,
-        100000  # Número de iteraciones
-    )
-    
-    # Combinar salt y hash y convertir a formato legible
-    storage = salt + key
-    # Añadir prefijo para identificar el formato
-    return "$pbkdf2$" + base64.b64encode(storage).decode('utf-8')
+    salt = os.urandom(SALT_BYTES)
+    key = _pbkdf2(password, salt, iterations)
+    return f"{PBKDF2_PREFIX}{iterations}${base64.b64encode(salt + key).decode('utf-8')}"
 
 def verify_password(plain_password: str, stored_password: str) -> bool:
     """Verifica si la contraseña coincide con el hash almacenado."""
-    
-    # Comprobamos si es nuestro formato PBKDF2
-    if stored_password.startswith("$pbkdf2$"):
-        # Quitar el prefijo
-        encoded = stored_password[8:]
+    if not stored_password:
+        return False
+
+    # Formatos PBKDF2 (actual con iteraciones y anterior sin ellas)
+    if stored_password.startswith(PBKDF2_PREFIX) or stored_password.startswith(LEGACY_PBKDF2_PREFIX):
         try:
+            if stored_password.startswith(PBKDF2_PREFIX):
+                iterations, encoded = stored_password[len(PBKDF2_PREFIX):].split("$", 1)
+                iterations = int(iterations)
+            else:
+                iterations, encoded = LEGACY_PBKDF2_ITERATIONS, stored_password[len(LEGACY_PBKDF2_PREFIX):]
             # Decodificar para obtener salt y key original
             storage = base64.b64decode(encoded.encode('utf-8'))
-            salt = storage[:16]
-            original_key = storage[16:]
-            
-            # Generar clave con mismos parámetros
-            key = hashlib.pbkdf2_hmac(
-                'sha256',
-                plain_password.encode('utf-8'),
-                salt,
-                100000
-            )
-            
-            # Comparar claves
-            return key == original_key
+            salt, original_key = storage[:SALT_BYTES], storage[SALT_BYTES:]
+            # Comparación en tiempo constante
+            return hmac.compare_digest(_pbkdf2(plain_password, salt, iterations), original_key)
         except Exception as e:
             logging.error(f"Error al verificar contraseña PBKDF2: {str(e)}")
             return False
-    
+
     # Si es bcrypt (para compatibilidad con hashes existentes)
     elif stored_password.startswith('$2b$'):
+        if not BCRYPT_AVAILABLE:
+            logging.error("bcrypt no está instalado: no se puede verificar el hash")
+            return False
         try:
-            import bcrypt
             return bcrypt.checkpw(
-                plain_password.encode('utf-8'), 
+                plain_password.encode('utf-8'),
                 stored_password.encode('utf-8')
             )
         except Exception as e:
             logging.error(f"Error al verificar contraseña bcrypt: {str(e)}")
             return False
-            
+
     # Si no reconocemos el formato
     else:
         logging.warning(f"Formato de hash desconocido: {stored_password[:10]}...")
-        return False
\ No newline at end of file
+        return False
+
+def needs_rehash(stored_password: str, iterations: Optional[int] = None) -> bool:
+    """
+    Indica si un hash válido usa parámetros anteriores a los configurados
+    (bcrypt, formato $pbkdf2$ o menos iteraciones) y debe regenerarse en
+    el siguiente login correcto.
+    """
+    iterations = iterations or settings.PASSWORD_PBKDF2_ITERATIONS
+    if not stored_password or not stored_password.startswith(PBKDF2_PREFIX):
+        return True
+    try:
+        return int(stored_password[len(PBKDF2_PREFIX):].split("$", 1)[0]) < iterations
+    except ValueError:
+        return True
@@ -0,0 +1,227 @@
+"""
+Benchmark del panel de administración (/admin-panel/dashboard).
+
+Sobre un conjunto sintético (100.000 documentos con contenido, 200 usuarios,
+20.000 chats) servido por un cliente Supabase en memoria, compara:
+  - la versión anterior: select('*') de users, documents y chats, y filtrado
+    y conteo en Python
+  - la versión actual: contadores materializados, usuarios con
+    user_statistics y listas recientes con columnas proyectadas y límite
+
+Mide filas y bytes JSON recibidos de la base de datos, el tiempo total y
+el tiempo sumado de las consultas a la "base de datos" en memoria (filtrar
+y ordenar en Python; orientativo, en la versión actual las consultas van en
+paralelo). La forma de la respuesta del endpoint no cambia.
+
+Uso (desde el directorio back):
+    python tests/benchmarks/bench_admin_dashboard.py [documentos]
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.api.endpoints.admin_panel import dashboard
+from src.repositories import admin_dashboard_repository, statistics_repository
+
+DOCUMENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+USERS = 200
+CHATS = 20_000
+CONTENT_BYTES = 2000
+ADMIN_ID = 1
+
+
+class Traffic:
+    rows = 0
+    bytes = 0
+    db_seconds = 0.0
+
+
+class FakeQuery:
+    """Subconjunto de la API de postgrest usado por el panel"""
+
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.columns = "*"
+        self.count = None
+        self.filters = []
+        self.order_by = None
+        self.limit_n = None
+
+    def select(self, columns="*", count=None):
+        self.columns = columns
+        self.count = count
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def neq(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and row.get(column) != value)
+        return self
+
+    def order(self, column, desc=False):
+        self.order_by = (column, desc)
+        return self
+
+    def limit(self, n):
+        self.limit_n = n
+        return self
+
+    def _project(self, row):
+        if self.columns.strip() == "*":
+            return dict(row)
+        result = {}
+        for part in _split_columns(self.columns):
+            if "(" in part:
+                relation, inner = part.split("(", 1)
+                fields = [field.strip() for field in inner.rstrip(")").split(",")]
+                related = self.db.embed(self.table, relation.strip(), row)
+                result[relation.strip()] = {f: related.get(f) for f in fields} if related else None
+            else:
+                result[part] = row.get(part)
+        return result
+
+    def execute(self):
+        start = time.perf_counter()
+        rows = [row for row in self.db.tables[self.table] if all(f(row) for f in self.filters)]
+        total = len(rows)
+        if self.order_by:
+            column, desc = self.order_by
+            rows.sort(key=lambda row: row.get(column) or "", reverse=desc)
+        if self.limit_n is not None:
+            rows = rows[:self.limit_n]
+        payload = json.dumps([self._project(row) for row in rows])
+        Traffic.db_seconds += time.perf_counter() - start
+        Traffic.rows += len(rows)
+        Traffic.bytes += len(payload)
+        return SimpleNamespace(data=json.loads(payload), count=total if self.count else None)
+
+
+def _split_columns(columns):
+    parts, depth, current = [], 0, ""
+    for char in columns:
+        if char == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+            continue
+        depth += char == "("
+        depth -= char == ")"
+        current += char
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+class FakeSupabase:
+    def __init__(self, tables):
+        self.tables = tables
+        self.user_stats = {row["user_id"]: row for row in tables["user_statistics"]}
+        self.users = {row["id"]: row for row in tables["users"]}
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def embed(self, table, relation, row):
+        if table == "users" and relation == "user_statistics":
+            return self.user_stats.get(row["id"])
+        if table == "user_statistics" and relation == "users":
+            return self.users.get(row["user_id"])
+        return None
+
+
+def build_dataset():
+    random.seed(7)
+    now = datetime.now(timezone.utc)
+    content = "x" * CONTENT_BYTES
+    users = [
+        {"id": i, "username": f"user{i}", "email": f"user{i}@example.com", "password_hash": "$2b$12$" + "h" * 53,
+         "created_at": (now - timedelta(days=i)).isoformat(), "is_admin": i == ADMIN_ID}
+        for i in range(1, USERS + 1)
+    ]
+    documents = [
+        {"id": i, "title": f"Documento {i}", "content": content, "uploaded_by": random.randint(1, USERS),
+         "content_type": "application/pdf", "status": "completed", "status_message": "ok",
+         "file_url": f"/uploads/{i}.pdf", "file_size": 120_000, "is_shared": i % 10 == 0,
+         "chromadb_id": f"doc_{i}", "created_at": (now - timedelta(minutes=i)).isoformat()}
+        for i in range(1, DOCUMENTS + 1)
+    ]
+    chats = [
+        {"id": i, "name_chat": f"Chat {i}", "id_user": random.randint(1, USERS),
+         "created_at": (now - timedelta(minutes=3 * i)).isoformat()}
+        for i in range(1, CHATS + 1)
+    ]
+    per_user = {user["id"]: {"user_id": user["id"], "documents": 0, "chats": 0,
+                             "shared_by_me": 0, "shared_with_me": 0} for user in users}
+    for doc in documents:
+        per_user[doc["uploaded_by"]]["documents"] += 1
+    for chat in chats:
+        per_user[chat["id_user"]]["chats"] += 1
+    counters = [{"name": "users", "value": USERS}, {"name": "documents", "value": DOCUMENTS},
+                {"name": "chats", "value": CHATS}]
+    return {"users": users, "documents": documents, "chats": chats,
+            "user_statistics": list(per_user.values()), "statistics_counters": counters}
+
+
+def legacy_dashboard(client, admin_id):
+    """Carga de datos de la versión anterior del endpoint"""
+    all_users = client.table('users').select('*').execute().data
+    all_documents = client.table('documents').select('*').order('created_at', desc=True).execute().data
+    all_chats = client.table('chats').select('*').order('created_at', desc=True).execute().data
+    other_documents = [doc for doc in all_documents if doc.get('uploaded_by') != admin_id]
+    other_chats = [chat for chat in all_chats if chat.get('id_user') != admin_id]
+    other_users = [user for user in all_users if user.get('id') != admin_id]
+    users_list = [
+        {"id": user["id"],
+         "documents_count": len([d for d in all_documents if d.get('uploaded_by') == user.get('id')]),
+         "chats_count": len([c for c in all_chats if c.get('id_user') == user.get('id')])}
+        for user in other_users
+    ]
+    return {
+        "statistics": {"total_users": len(other_users), "total_documents": len(other_documents)},
+        "users": users_list,
+        "documents": other_documents[:20],
+        "chats": other_chats[:20],
+    }
+
+
+def measure(label, fn):
+    Traffic.rows = Traffic.bytes = 0
+    Traffic.db_seconds = 0.0
+    start = time.perf_counter()
+    result = fn()
+    total_ms = (time.perf_counter() - start) * 1000
+    print(f"{label:<28}{Traffic.rows:>12,}{Traffic.bytes / 1e3:>16,.1f}"
+          f"{total_ms:>12.1f}{Traffic.db_seconds * 1000:>12.1f}")
+    return result
+
+
+def main():
+    logging.disable(logging.INFO)
+    print(f"Conjunto sintético: {DOCUMENTS:,} documentos ({CONTENT_BYTES} B de contenido), "
+          f"{USERS} usuarios, {CHATS:,} chats\n")
+    client = FakeSupabase(build_dataset())
+    admin = SimpleNamespace(id=ADMIN_ID, username="user1", is_admin=True)
+
+    print(f"{'Versión':<28}{'filas BD':>12}{'KB desde BD':>16}{'ms total':>12}{'ms BD':>12}")
+    print("-" * 80)
+    measure("Anterior (select *)", lambda: legacy_dashboard(client, ADMIN_ID))
+    with mock.patch.object(admin_dashboard_repository, "get_supabase_client", lambda **_: client), \
+         mock.patch.object(statistics_repository, "get_supabase_client", lambda **_: client):
+        response = measure("Actual (agregados)", lambda: asyncio.run(dashboard.get_admin_dashboard(current_user=admin)))
+
+    print(f"\nRespuesta del endpoint: {len(json.dumps(response, default=str)) / 1e3:.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmark de la eliminación en lote de documentos (AdminService.bulk_delete_resources).
+
+Simula la latencia de red de Supabase y ChromaDB (LATENCY_MS por llamada) y
+compara:
+  - la versión anterior: por cada documento get + is_admin + consulta dummy
+    en ChromaDB + delete en ChromaDB + comprobación + delete en Supabase
+  - la versión actual: BulkOperationService (IN (...) por lote, un delete
+    en ChromaDB por lote y lotes en paralelo)
+
+Uso (desde el directorio back):
+    python tests/benchmarks/bench_bulk_delete.py [documentos] [latencia_ms]
+"""
+import logging
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.services import bulk_operation_service
+from src.services.bulk_operation_service import BulkOperationService
+
+DOCUMENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+LATENCY_MS = float(sys.argv[2]) if len(sys.argv) > 2 else 20.0
+
+
+class Network:
+    calls = 0
+    lock = threading.Lock()
+
+    @classmethod
+    def round_trip(cls):
+        with cls.lock:
+            cls.calls += 1
+        time.sleep(LATENCY_MS / 1000)
+
+
+class FakeBackend:
+    """Supabase + ChromaDB con latencia por llamada"""
+
+    def __init__(self):
+        self.documents = {i: {"id": i, "uploaded_by": 2, "file_url": None} for i in range(1, DOCUMENTS + 1)}
+
+    # Operaciones de la versión anterior
+    def get(self, document_id):
+        Network.round_trip()
+        return SimpleNamespace(**self.documents[document_id])
+
+    def get_user(self, user_id):
+        Network.round_trip()
+        return SimpleNamespace(id=user_id, is_admin=True)
+
+    def search_documents(self, **kwargs):
+        Network.round_trip()
+        return {"ids": [[f"doc_{kwargs['where']['document_id']}_chunk_0"]]}
+
+    def delete_documents(self, collection_name, ids):
+        Network.round_trip()
+
+    def delete(self, document_id):
+        Network.round_trip()  # comprobación de existencia
+        Network.round_trip()
+        self.documents.pop(document_id, None)
+        return True
+
+    # Operaciones por lote
+    def list_for_deletion(self, ids):
+        Network.round_trip()
+        return [dict(self.documents[i]) for i in ids if i in self.documents]
+
+    def delete_many(self, ids):
+        Network.round_trip()
+        return [self.documents.pop(i)["id"] for i in ids if i in self.documents]
+
+    def get_write_collection_names(self):
+        return ["documents"]
+
+    def delete_where(self, collection_name, where):
+        Network.round_trip()
+
+
+def legacy_delete(backend, ids, admin_id):
+    success = 0
+    for document_id in ids:
+        document = backend.get(document_id)
+        if document.uploaded_by != admin_id and not backend.get_user(admin_id).is_admin:
+            continue
+        results = backend.search_documents(query_text="test", n_results=1000,
+                                           where={"document_id": str(document_id)})
+        chunk_ids = [cid for ids_list in results["ids"] for cid in ids_list]
+        if chunk_ids:
+            backend.delete_documents("documents", chunk_ids)
+        success += backend.delete(document_id)
+    return success
+
+
+def measure(label, fn):
+    Network.calls = 0
+    start = time.perf_counter()
+    success = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<26}{success:>10}{Network.calls:>12,}{elapsed:>10.2f}")
+
+
+def main():
+    logging.disable(logging.INFO)
+    admin = SimpleNamespace(id=1, username="admin", is_admin=True)
+    ids = list(range(1, DOCUMENTS + 1))
+    print(f"{DOCUMENTS} documentos, {LATENCY_MS:.0f} ms por llamada\n")
+    print(f"{'Versión':<26}{'borrados':>10}{'llamadas':>12}{'s':>10}")
+    print("-" * 58)
+
+    backend = FakeBackend()
+    measure("Anterior (uno a uno)", lambda: legacy_delete(backend, ids, admin.id))
+
+    backend = FakeBackend()
+    engine = BulkOperationService(backend, None, None, None, backend)
+    with mock.patch.object(bulk_operation_service, "invalidate_statistics", lambda *ids: None):
+        measure("Actual (por lotes)", lambda: engine.delete("documents", ids, admin).success)
+
+
+if __name__ == "__main__":
+    main()
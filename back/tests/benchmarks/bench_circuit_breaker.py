@@ -0,0 +1,83 @@
+"""
+Benchmark de peticiones con una dependencia caída (ChromaDB sin responder).
+
+Simula REQUESTS peticiones concurrentes que llaman a una dependencia que
+tarda TIMEOUT segundos en fallar (el timeout de la petición HTTP, a escala)
+desde un pool de WORKERS hilos (como el threadpool de FastAPI) y compara:
+  - sin circuito: cada petición espera el timeout completo
+  - con el circuito de src.core.circuit_breaker: tras FAILURE_THRESHOLD
+    fallos las demás fallan al instante con CircuitOpenException (503)
+Muestra la mediana y el p99 de la latencia, el tiempo total y los segundos
+de hilo ocupados esperando a la dependencia.
+
+Uso (desde el directorio back):
+    python tests/benchmarks/bench_circuit_breaker.py [peticiones] [timeout_s]
+"""
+from concurrent.futures import ThreadPoolExecutor
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.core.circuit_breaker import CircuitBreaker
+from src.core.exceptions import CircuitOpenException
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+TIMEOUT = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+WORKERS = 40
+FAILURE_THRESHOLD = 5
+
+
+def dead_dependency():
+    time.sleep(TIMEOUT)
+    raise TimeoutError("ChromaDB no responde")
+
+
+def run(breaker):
+    def request():
+        started = time.perf_counter()
+        try:
+            if breaker is None:
+                dead_dependency()
+            else:
+                with breaker.call():
+                    dead_dependency()
+        except CircuitOpenException:
+            return time.perf_counter() - started, 0.0
+        except TimeoutError:
+            pass
+        elapsed = time.perf_counter() - started
+        return elapsed, elapsed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(WORKERS) as pool:
+        results = list(pool.map(lambda _: request(), range(REQUESTS)))
+    total = time.perf_counter() - started
+    latencies = sorted(latency for latency, _ in results)
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "total_s": total,
+        "busy_thread_s": sum(busy for _, busy in results),
+    }
+
+
+def main():
+    print(f"{REQUESTS} peticiones, {WORKERS} hilos, dependencia que falla tras {TIMEOUT * 1000:.0f} ms\n")
+    print(f"{'Versión':<22}{'p50 (ms)':>12}{'p99 (ms)':>12}{'total (s)':>12}{'hilo ocupado (s)':>20}")
+    print("-" * 78)
+    for label, breaker in (
+        ("Sin circuito", None),
+        ("Con circuito", CircuitBreaker("chroma", failure_threshold=FAILURE_THRESHOLD, reset_timeout=60)),
+    ):
+        data = run(breaker)
+        print(
+            f"{label:<22}{data['p50_ms']:>12.1f}{data['p99_ms']:>12.1f}"
+            f"{data['total_s']:>12.2f}{data['busy_thread_s']:>20.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
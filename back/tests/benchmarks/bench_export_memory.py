@@ -0,0 +1,78 @@
+"""
+Benchmark de memoria de la exportación masiva (ExportService).
+
+Exporta tablas sintéticas de chats de distintos tamaños con un repositorio
+que genera las páginas bajo demanda y mide el pico de memoria (tracemalloc)
+frente a cargar la tabla entera antes de serializarla.
+
+Uso (desde el directorio back):
+    python tests/benchmarks/bench_export_memory.py
+"""
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.services.export_service import ExportService
+
+SIZES = (10_000, 50_000, 200_000)
+
+
+class GeneratedRepository:
+    """Simula Supabase: genera cada página al pedirla"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def _row(self, i):
+        return {"id": i, "id_user": i % 500, "name_chat": f"Chat {i} " + "x" * 60, "created_at": "2025-01-01T00:00:00"}
+
+    def fetch_page(self, table, after_id, page_size, columns=None, ids=None):
+        return [self._row(i) for i in range(after_id + 1, min(after_id + page_size, self.rows) + 1)]
+
+    def fetch_all(self):
+        return [self._row(i) for i in range(1, self.rows + 1)]
+
+    def count(self, table, ids=None):
+        return self.rows
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return size, peak, elapsed
+
+
+def main():
+    logging.disable(logging.INFO)
+    print(f"{'filas':>10}{'modo':>22}{'MB salida':>12}{'pico MB':>10}{'s':>8}")
+    print("-" * 62)
+    for rows in SIZES:
+        repository = GeneratedRepository(rows)
+        service = ExportService(repository, export_dir="/tmp", page_size=1000)
+
+        def legacy():
+            payload = "\n".join(json.dumps(row) for row in repository.fetch_all()).encode()
+            return len(payload)
+
+        def streamed():
+            return sum(len(chunk) for chunk in service.stream("chats", "jsonl"))
+
+        def streamed_gzip():
+            return sum(len(chunk) for chunk in service.stream("chats", "jsonl", compress=True))
+
+        for label, fn in (("tabla completa", legacy), ("streaming", streamed), ("streaming gzip", streamed_gzip)):
+            size, peak, elapsed = measure(fn)
+            print(f"{rows:>10,}{label:>22}{size / 1e6:>12.1f}{peak / 1e6:>10.1f}{elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Benchmark de throughput de peticiones según la configuración de logging.
+
+Una app FastAPI mínima con un endpoint que registra lo mismo que una
+consulta de chat (autenticación + búsqueda RAG) recibe REQUESTS peticiones
+con CONCURRENCY en vuelo a la vez:
+  - la versión anterior: f-strings a INFO y handlers de consola y archivo
+    escribiendo desde el event loop
+  - los mismos registros escritos a través de la cola (QueueListener),
+    sin muestreo ni supresión de duplicados
+  - el pipeline actual a INFO: formato diferido, muestreo por módulo,
+    supresión de duplicados y escritura en el hilo QueueListener
+  - logging desactivado (WARNING)
+
+Uso (desde el directorio back):
+    python tests/benchmarks/bench_logging.py [peticiones] [concurrencia]
+"""
+import asyncio
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import httpx
+from fastapi import FastAPI
+
+from src.config.settings import settings
+from src.core.logging_config import (
+    ColoredFormatter, DuplicateFilter, JsonFormatter, LazyQueueHandler, SamplingFilter, parse_sampling
+)
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+CONCURRENCY = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+auth_logger = logging.getLogger("src.api.dependencies")
+rag_logger = logging.getLogger("src.services.document_service")
+
+USER = {"id": 7, "username": "ana", "is_admin": False}
+WHERE = {"user_id": "7"}
+
+
+def make_app(lazy: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/chat")
+    async def chat():
+        if lazy:
+            auth_logger.debug("Token recibido: %s...", "eyJhbGciOi")
+            auth_logger.debug("Token decodificado correctamente. User ID: %s", USER["id"])
+            auth_logger.debug("Usuario encontrado: %s, Admin: %s", USER["username"], USER["is_admin"])
+            rag_logger.debug("Búsqueda RAG en los documentos del usuario %s (filtro ChromaDB: %s)", USER["id"], WHERE)
+            rag_logger.debug("Chunks encontrados en ChromaDB: %d", 5)
+            rag_logger.info("Respuesta RAG generada para el usuario %s", USER["id"])
+        else:
+            auth_logger.info(f"Token recibido: {'eyJhbGciOi'}...")
+            auth_logger.info(f"Token decodificado correctamente. User ID: {USER['id']}")
+            auth_logger.info(f"Usuario encontrado: {USER['username']}, Admin: {USER['is_admin']}")
+            rag_logger.info("\n=== BúSqueda en todos los documentos del usuario ===")
+            rag_logger.info(f"User ID: {USER['id']}")
+            rag_logger.info(f"Filtro ChromaDB: {WHERE}")
+            rag_logger.info("\n=== Resultados de ChromaDB ===")
+            rag_logger.info(f"Chunks encontrados: {5}")
+            rag_logger.info(f"Respuesta RAG generada para el usuario {USER['id']}")
+        return {"ok": True}
+
+    return app
+
+
+def configure(mode: str, log_dir: str):
+    """Deja el logger raíz como en la versión indicada; devuelve el listener si hay"""
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+
+    # La consola va a un archivo para no medir la terminal
+    console = logging.StreamHandler(open(os.path.join(log_dir, f"{mode}.console"), "w", encoding="utf-8"))
+    file_handler = logging.handlers.RotatingFileHandler(
+        os.path.join(log_dir, f"{mode}.log"), maxBytes=10 * 1024 * 1024, backupCount=1, encoding="utf-8"
+    )
+
+    if mode == "anterior":
+        root.setLevel(logging.INFO)
+        console.setFormatter(ColoredFormatter("%(asctime)s | %(levelname)-8s | %(name)s | %(message)s"))
+        file_handler.setFormatter(logging.Formatter(
+            "%(asctime)s | %(levelname)-8s | %(name)s | %(funcName)s:%(lineno)d | %(message)s"
+        ))
+        root.addHandler(console)
+        root.addHandler(file_handler)
+        return None
+
+    root.setLevel(logging.WARNING if mode == "off" else logging.INFO)
+    console.setFormatter(ColoredFormatter("%(asctime)s | %(levelname)-8s | %(name)s | %(message)s"))
+    file_handler.setFormatter(JsonFormatter())
+    log_queue = queue.SimpleQueue()
+    queue_handler = LazyQueueHandler(log_queue)
+    if mode != "cola":
+        queue_handler.addFilter(SamplingFilter(parse_sampling(settings.LOG_SAMPLING)))
+        queue_handler.addFilter(DuplicateFilter(settings.LOG_DUPLICATE_WINDOW_SECONDS, settings.LOG_DUPLICATE_BURST))
+    root.addHandler(queue_handler)
+    listener = logging.handlers.QueueListener(log_queue, console, file_handler)
+    listener.start()
+    return listener
+
+
+async def run(label: str, mode: str, log_dir: str):
+    listener = configure(mode, log_dir)
+    app = make_app(lazy=mode not in ("anterior", "cola"))
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        await client.get("/chat")  # calentamiento
+
+        semaphore = asyncio.Semaphore(CONCURRENCY)
+
+        async def one():
+            async with semaphore:
+                response = await client.get("/chat")
+                assert response.status_code == 200
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(REQUESTS)))
+        elapsed = time.perf_counter() - started
+
+    flush_started = time.perf_counter()
+    if listener:
+        listener.stop()
+    flush = time.perf_counter() - flush_started
+    lines = sum(1 for name in os.listdir(log_dir) if name.startswith(mode) and name.endswith(".log")
+                for _ in open(os.path.join(log_dir, name), encoding="utf-8"))
+    print(f"{label:<30}{REQUESTS / elapsed:>10.0f}{elapsed * 1000 / REQUESTS:>12.3f}{lines:>14}{flush * 1000:>12.1f}")
+
+
+async def main():
+    print(f"{REQUESTS} peticiones, {CONCURRENCY} concurrentes, muestreo: {settings.LOG_SAMPLING}\n")
+    print(f"{'Versión':<30}{'req/s':>10}{'ms/petición':>12}{'líneas log':>14}{'vaciado ms':>12}")
+    print("-" * 78)
+    with tempfile.TemporaryDirectory() as log_dir:
+        await run("Anterior (INFO en el loop)", "anterior", log_dir)
+        await run("Anterior a través de la cola", "cola", log_dir)
+        await run("Pipeline (INFO)", "pipeline", log_dir)
+        await run("Logging desactivado", "off", log_dir)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
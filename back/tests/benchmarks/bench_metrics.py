@@ -0,0 +1,80 @@
+"""
+Benchmark del coste de observar una latencia en un histograma.
+
+Compara, con 1 y con THREADS hilos observando a la vez (como el event loop
+más los hilos de ChromaDB, PDF y embeddings):
+  - un histograma protegido por un threading.Lock (lo habitual en un
+    cliente de métricas genérico)
+  - el histograma de src.core.metrics, con un trozo por hilo sin locks
+y el coste de un scrape con 200 series etiquetadas.
+
+Uso (desde el directorio back):
+    python tests/benchmarks/bench_metrics.py [observaciones_por_hilo] [hilos]
+"""
+from bisect import bisect_left
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.core.metrics import DEFAULT_BUCKETS, MetricsRegistry
+
+OBSERVATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+THREADS = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+
+class LockedHistogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        with self.lock:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.sum += value
+            self.count += 1
+
+
+def run(observe, threads: int) -> float:
+    """Nanosegundos por observación"""
+    def work():
+        for i in range(OBSERVATIONS):
+            observe((i % 100) / 1000)
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return (time.perf_counter() - started) * 1e9 / (OBSERVATIONS * threads)
+
+
+def main():
+    print(f"{OBSERVATIONS} observaciones por hilo\n")
+    print(f"{'Versión':<32}{'ns/obs (1 hilo)':>18}{f'ns/obs ({THREADS} hilos)':>20}")
+    print("-" * 70)
+
+    locked = LockedHistogram(DEFAULT_BUCKETS)
+    registry = MetricsRegistry()
+    child = registry.histogram("bench_seconds", "Benchmark", ["op"]).labels("query")
+
+    for label, observe in (("Histograma con Lock", locked.observe), ("Trozo por hilo (metrics)", child.observe)):
+        print(f"{label:<32}{run(observe, 1):>18.0f}{run(observe, THREADS):>20.0f}")
+
+    series = registry.histogram("bench_route_seconds", "Benchmark", ["route"])
+    for i in range(200):
+        series.labels(f"/api/ruta/{i}").observe(0.01)
+    started = time.perf_counter()
+    text = registry.render()
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"\nScrape de 200 series: {elapsed:.1f} ms, {len(text) / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
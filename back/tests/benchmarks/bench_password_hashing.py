@@ -0,0 +1,86 @@
+"""
+Benchmark de logins concurrentes y su efecto en el event loop.
+
+Lanza LOGINS verificaciones de contraseña (PBKDF2 con las iteraciones
+configuradas) a la vez mientras una tarea simula el envío de frames de
+streaming por WebSocket cada TICK_MS y mide cuántos frames salen y cuánto
+se retrasa cada uno:
+  - la versión anterior: verify_password síncrono dentro del handler async
+  - PasswordHasher con pool de hilos
+  - PasswordHasher con pool de procesos
+
+Uso (desde el directorio back):
+    python tests/benchmarks/bench_password_hashing.py [logins] [workers]
+"""
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.config.settings import settings
+from src.services.password_hasher import PasswordHasher
+from src.utils.password_utils import hash_password, verify_password
+
+LOGINS = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+WORKERS = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+TICK_MS = 10.0
+
+
+async def stream_frames(stop: asyncio.Event, delays: list):
+    """Frames de streaming: retraso de cada uno respecto a su hora prevista"""
+    interval = TICK_MS / 1000
+    expected = time.perf_counter() + interval
+    while not stop.is_set():
+        await asyncio.sleep(max(expected - time.perf_counter(), 0))
+        delays.append((time.perf_counter() - expected) * 1000)
+        expected += interval
+
+
+async def run(label, login, stored):
+    stop = asyncio.Event()
+    delays: list = []
+    streamer = asyncio.create_task(stream_frames(stop, delays))
+    await asyncio.sleep(0.05)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(login("contraseña-segura", stored) for _ in range(LOGINS)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await streamer
+    assert all(results)
+
+    delays.sort()
+    p99 = delays[int(len(delays) * 0.99) - 1] if delays else 0.0
+    print(
+        f"{label:<28}{LOGINS / elapsed:>10.1f}{len(delays):>8}{statistics.median(delays):>10.1f}"
+        f"{p99:>10.1f}{max(delays):>10.1f}"
+    )
+
+
+async def main():
+    logging.disable(logging.INFO)
+    stored = hash_password("contraseña-segura")
+    print(
+        f"{LOGINS} logins simultáneos, PBKDF2 {settings.PASSWORD_PBKDF2_ITERATIONS} iteraciones, "
+        f"{WORKERS} workers, frame cada {TICK_MS:.0f} ms\n"
+    )
+    print(f"{'Versión':<28}{'logins/s':>10}{'frames':>8}{'p50 ms':>10}{'p99 ms':>10}{'máx ms':>10}")
+    print("-" * 76)
+
+    async def blocking_login(password, stored_hash):
+        return verify_password(password, stored_hash)
+
+    await run("Anterior (en el loop)", blocking_login, stored)
+    for executor_type in ("thread", "process"):
+        hasher = PasswordHasher(workers=WORKERS, executor_type=executor_type, max_queue=LOGINS)
+        await hasher.verify("calentamiento", stored)  # arranque del pool fuera de la medida
+        await run(f"PasswordHasher ({executor_type})", hasher.verify, stored)
+        hasher.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
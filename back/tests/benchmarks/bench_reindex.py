@@ -0,0 +1,193 @@
+"""
+Benchmark de la re-indexación completa (ReindexService).
+
+Simula ChromaDB con latencia por llamada (LATENCY_MS) y un modelo de
+embeddings con coste fijo por llamada más un coste por chunk, y compara:
+  - el script anterior (tests/reindex_all_documents.py): por documento una
+    consulta dummy, un delete y un add que calcula los embeddings
+  - ReindexService con todos los documentos cambiados (primera ejecución)
+  - ReindexService con un 5 % de documentos cambiados (se copian los
+    embeddings del resto)
+  - ReindexService con todos los documentos editados en un solo chunk (se
+    copian los embeddings de los chunks cuyo chunk_hash no cambia)
+
+Uso (desde el directorio back):
+    python tests/benchmarks/bench_reindex.py [documentos] [latencia_ms]
+"""
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.config.settings import settings
+from src.services.reindex_service import ReindexJob, ReindexService, content_hash
+
+DOCUMENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+LATENCY_MS = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+EMBED_CALL_MS = 10.0   # coste fijo por llamada al modelo
+EMBED_CHUNK_MS = 1.0   # coste por chunk
+CHUNKS_PER_DOCUMENT = 8
+
+
+class Counters:
+    lock = threading.Lock()
+    calls = 0
+    embed_calls = 0
+    embedded = 0
+
+    @classmethod
+    def reset(cls):
+        cls.calls = cls.embed_calls = cls.embedded = 0
+
+    @classmethod
+    def round_trip(cls):
+        with cls.lock:
+            cls.calls += 1
+        time.sleep(LATENCY_MS / 1000)
+
+    @classmethod
+    def embed(cls, texts):
+        with cls.lock:
+            cls.embed_calls += 1
+            cls.embedded += len(texts)
+        time.sleep((EMBED_CALL_MS + EMBED_CHUNK_MS * len(texts)) / 1000)
+        return [[0.0] for _ in texts]
+
+
+def chunker(text, content_type=None):
+    size = max(len(text) // CHUNKS_PER_DOCUMENT, 1)
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def make_documents(version, filler="texto "):
+    return [
+        {"id": i, "title": f"doc {i}", "content_type": "text/plain", "uploaded_by": 1,
+         "updated_at": "2025-01-01T00:00:00",
+         "content": f"documento {i} versión {version(i)} " + filler * 200}
+        for i in range(1, DOCUMENTS + 1)
+    ]
+
+
+class FakeRepository:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def count_all(self):
+        return len(self.documents)
+
+    def set_chunk_count(self, document_id, chunk_count):
+        Counters.round_trip()
+
+    def list_for_reindex(self, after_id, limit, updated_since=None):
+        Counters.round_trip()
+        if updated_since:
+            return []
+        return [d for d in self.documents if d["id"] > after_id][:limit]
+
+
+class FakeChroma:
+    """Colección origen con los chunks de la versión 0 de cada documento"""
+
+    def __init__(self):
+        self.source = {}
+        for doc in make_documents(lambda i: 0):
+            digest = content_hash(doc["content"], doc["content_type"])
+            for n, chunk in enumerate(chunker(doc["content"])):
+                self.source[f"{doc['id']}_{n}"] = (chunk, [0.0], {"document_id": str(doc["id"]), "content_hash": digest})
+
+    def get_active_collection_name(self):
+        return "documents"
+
+    def set_active_collection_name(self, name):
+        Counters.round_trip()
+
+    def garbage_collect_collections(self):
+        Counters.round_trip()
+        return []
+
+    def embed(self, texts, model=None):
+        return Counters.embed(texts)
+
+    def get_chunks(self, name, where=None, include=None):
+        Counters.round_trip()
+        wanted = set(where["document_id"]["$in"])
+        rows = [(cid, r) for cid, r in self.source.items() if r[2]["document_id"] in wanted]
+        return {
+            "ids": [cid for cid, _ in rows],
+            "documents": [r[0] for _, r in rows],
+            "embeddings": [r[1] for _, r in rows],
+            "metadatas": [r[2] for _, r in rows],
+        }
+
+    def upsert_embeddings(self, *args, **kwargs):
+        Counters.round_trip()
+
+    def delete_where(self, *args, **kwargs):
+        Counters.round_trip()
+
+
+def legacy_reindex(documents):
+    """Bucle de tests/reindex_all_documents.py"""
+    for doc in documents:
+        Counters.round_trip()            # consulta dummy para buscar los chunks
+        Counters.embed(["test"])         # ...que además calcula un embedding
+        Counters.round_trip()            # delete
+        chunks = chunker(doc["content"])
+        Counters.embed(chunks)           # add calcula los embeddings
+        Counters.round_trip()
+    return len(documents)
+
+
+def reindex(documents):
+    service = ReindexService(
+        document_repo=FakeRepository(documents),
+        chromadb=FakeChroma(),
+        state_dir=tempfile.mkdtemp(),
+        page_size=settings.REINDEX_PAGE_SIZE,
+        workers=settings.REINDEX_WORKERS,
+        embed_batch_size=settings.REINDEX_EMBED_BATCH_SIZE
+    )
+    job = ReindexJob(
+        job_id="bench", source_collection="documents", target_collection="documents_v1",
+        embedding_model=settings.SENTENCE_TRANSFORMER_MODEL, source_model=settings.SENTENCE_TRANSFORMER_MODEL
+    )
+    service.run(job, chunker)
+    return job.documents_processed
+
+
+def measure(label, func):
+    Counters.reset()
+    started = time.perf_counter()
+    processed = func()
+    elapsed = time.perf_counter() - started
+    print(
+        f"{label:<32}{processed:>8}{Counters.embedded:>10}{Counters.embed_calls:>10}"
+        f"{Counters.calls:>10}{elapsed:>9.2f}{processed / elapsed:>10.1f}"
+    )
+
+
+def main():
+    logging.disable(logging.INFO)
+    print(
+        f"{DOCUMENTS} documentos x {CHUNKS_PER_DOCUMENT} chunks, {LATENCY_MS:.0f} ms por llamada, "
+        f"modelo {EMBED_CALL_MS:.0f} ms/llamada + {EMBED_CHUNK_MS:.0f} ms/chunk, "
+        f"{settings.REINDEX_WORKERS} hilos\n"
+    )
+    print(f"{'Versión':<32}{'docs':>8}{'chunks':>10}{'modelo':>10}{'red':>10}{'s':>9}{'docs/s':>10}")
+    print("-" * 89)
+
+    all_changed = make_documents(lambda i: 1, filler="textos ")
+    few_changed = make_documents(lambda i: 1 if i % 20 == 0 else 0)
+    all_edited = make_documents(lambda i: 1)
+    measure("Anterior (script)", lambda: legacy_reindex(all_changed))
+    measure("Actual (todo cambiado)", lambda: reindex(all_changed))
+    measure("Actual (5 % cambiado)", lambda: reindex(few_changed))
+    measure("Actual (1 chunk editado/doc)", lambda: reindex(all_edited))
+
+
+if __name__ == "__main__":
+    main()
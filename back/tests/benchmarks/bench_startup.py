@@ -0,0 +1,98 @@
+"""
+Benchmark del arranque en frío de un worker (import de src.main).
+
+Lanza RUNS procesos nuevos con `python -X importtime` y compara:
+  - el arranque actual: servicios perezosos y SDKs pesados (Gemini, ChromaDB,
+    PDF, Sentry) importados en el primer uso
+  - el arranque anterior, simulado: los mismos imports pesados y todos los
+    servicios del contenedor construidos al importar
+Para cada uno muestra la mediana del tiempo de import, la RSS del proceso y,
+para el actual, los paquetes que más tiempo de import se llevan.
+
+Uso (desde el directorio back):
+    python tests/benchmarks/bench_startup.py [procesos] [top_paquetes]
+"""
+from collections import defaultdict
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACK_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+RUNS = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+TOP = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+
+CHILD = """
+import json, time
+started = time.perf_counter()
+import src.main
+if {eager}:
+    import google.generativeai, chromadb, chromadb.utils.embedding_functions, PyPDF2, pdfplumber, sentry_sdk
+    from src.core.service_container import services
+    for name in services.report()["registered"]:
+        services.get(name)
+elapsed = time.perf_counter() - started
+from src.core.startup_report import current_rss_mb, startup_report
+print(json.dumps({{"seconds": elapsed, "rss_mb": current_rss_mb(),
+                  "heavy": startup_report.to_dict()["heavy_modules_loaded"]}}))
+"""
+
+
+def child_env():
+    env = dict(os.environ)
+    # Variables mínimas para importar la configuración sin .env (no se conecta a nada)
+    env.setdefault("SUPABASE_URL", "http://localhost:1")
+    for key in ("SUPABASE_KEY", "SUPABASE_SERVICE_KEY"):
+        env.setdefault(key, "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.bench")
+    env["LOG_LEVEL"] = "WARNING"
+    return env
+
+
+def run_once(eager: bool):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD.format(eager=eager)],
+        cwd=BACK_DIR, env=child_env(), capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def self_time_by_package(importtime_output: str):
+    """Suma el tiempo propio (µs) de import por paquete de primer nivel"""
+    totals = defaultdict(int)
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, module = line[len("import time:"):].split("|")
+        module = module.strip()
+        package = module.split(".")[0] if not module.startswith("src.") else ".".join(module.split(".")[:2])
+        totals[package] += int(self_us)
+    return sorted(totals.items(), key=lambda item: -item[1])
+
+
+def main():
+    print(f"{RUNS} procesos por versión\n")
+    print(f"{'Versión':<36}{'import (s, mediana)':>22}{'RSS (MB)':>12}")
+    print("-" * 70)
+
+    lazy_importtime = ""
+    for label, eager in (("Anterior (todo al importar)", True), ("Actual (perezoso)", False)):
+        runs = []
+        for _ in range(RUNS):
+            data, importtime = run_once(eager)
+            runs.append(data)
+            if not eager:
+                lazy_importtime = importtime
+        seconds = statistics.median(run["seconds"] for run in runs)
+        rss = statistics.median(run["rss_mb"] or 0 for run in runs)
+        print(f"{label:<36}{seconds:>22.2f}{rss:>12.0f}")
+
+    print(f"\nMódulos pesados cargados al arrancar (actual): {', '.join(runs[-1]['heavy']) or 'ninguno'}")
+    print("\nPaquetes con más tiempo de import (actual, último proceso):")
+    for package, micros in self_time_by_package(lazy_importtime)[:TOP]:
+        print(f"  {package:<40}{micros / 1000:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark del protocolo de streaming del chat.
+
+Simula una respuesta de Gemini fragmentada y compara:
+  - un frame JSON por fragmento (protocolo anterior)
+  - frames JSON agrupados por StreamCoalescer
+  - frames msgpack compactos agrupados
+con y sin compresión permessage-deflate (simulada con zlib).
+
+Mide frames por respuesta, bytes en el cable y CPU del servidor por respuesta.
+
+Uso (desde el directorio back):
+    python tests/benchmarks/bench_stream_framing.py
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+import zlib
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.services.chat.stream_coalescer import StreamCoalescer
+from src.api.helpers.chat_websocket_helpers import (
+    ChatWebSocketHelpers, ENCODING_JSON, ENCODING_MSGPACK, msgpack
+)
+
+ANSWERS = 200
+WORDS_PER_ANSWER = 300
+
+
+class CountingWebSocket:
+    """WebSocket falso que mide bytes con y sin deflate por mensaje"""
+
+    def __init__(self, encoding):
+        self.state = SimpleNamespace(encoding=encoding)
+        self.frames = 0
+        self.raw_bytes = 0
+        # permessage-deflate mantiene el contexto entre mensajes
+        self._deflate = zlib.compressobj(wbits=-15)
+        self.deflated_bytes = 0
+
+    async def _send(self, data: bytes):
+        self.frames += 1
+        self.raw_bytes += len(data)
+        compressed = self._deflate.compress(data) + self._deflate.flush(zlib.Z_SYNC_FLUSH)
+        self.deflated_bytes += len(compressed) - 4  # RFC 7692: sin el trailer 00 00 ff ff
+
+    async def send_text(self, data):
+        await self._send(data.encode("utf-8"))
+
+    async def send_bytes(self, data):
+        await self._send(data)
+
+
+def make_fragments():
+    vocabulary = ["el", "documento", "indica", "que", "la", "política", "de", "vacaciones",
+                  "se", "aplica", "a", "todos", "los", "empleados", "según", "artículo", "3."]
+    return [random.choice(vocabulary) + " " for _ in range(WORDS_PER_ANSWER)]
+
+
+async def fragment_source(fragments):
+    for fragment in fragments:
+        yield fragment
+
+
+async def run(encoding, coalesce):
+    helpers = ChatWebSocketHelpers()
+    ws = CountingWebSocket(encoding)
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+
+    for _ in range(ANSWERS):
+        fragments = make_fragments()
+        if coalesce:
+            coalescer = StreamCoalescer(flush_bytes=64, flush_interval_ms=30)
+            source = coalescer.coalesce(fragment_source(fragments))
+        else:
+            source = fragment_source(fragments)
+
+        index = 0
+        async for chunk in source:
+            await helpers.send_stream_chunk(ws, "stream-id", chunk, index)
+            index += 1
+
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    return {
+        "frames_per_answer": ws.frames / ANSWERS,
+        "bytes_per_answer": ws.raw_bytes / ANSWERS,
+        "deflated_bytes_per_answer": ws.deflated_bytes / ANSWERS,
+        "cpu_ms_per_answer": cpu * 1000 / ANSWERS,
+        "frames_per_second": ws.frames / wall if wall > 0 else 0.0,
+    }
+
+
+def main():
+    random.seed(42)
+    scenarios = [
+        ("JSON, 1 frame por fragmento", ENCODING_JSON, False),
+        ("JSON agrupado (64 B / 30 ms)", ENCODING_JSON, True),
+    ]
+    if msgpack is not None:
+        scenarios.append(("msgpack agrupado (64 B / 30 ms)", ENCODING_MSGPACK, True))
+
+    print(f"{ANSWERS} respuestas x {WORDS_PER_ANSWER} fragmentos\n")
+    header = f"{'Escenario':<34}{'frames':>9}{'bytes':>10}{'deflate':>10}{'CPU ms':>9}{'frames/s':>12}"
+    print(header)
+    print("-" * len(header))
+    for name, encoding, coalesce in scenarios:
+        result = asyncio.run(run(encoding, coalesce))
+        print(
+            f"{name:<34}{result['frames_per_answer']:>9.1f}{result['bytes_per_answer']:>10.0f}"
+            f"{result['deflated_bytes_per_answer']:>10.0f}{result['cpu_ms_per_answer']:>9.2f}"
+            f"{result['frames_per_second']:>12.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
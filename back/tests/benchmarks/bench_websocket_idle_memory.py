@@ -0,0 +1,83 @@
+"""
+Benchmark de memoria por conexión WebSocket inactiva.
+
+Registra 10.000 conexiones falsas en WebSocketManager (diccionarios de
+conexiones, ConnectionState, índice por usuario y rueda de heartbeats) y
+mide la memoria asignada con tracemalloc y el crecimiento del RSS.
+
+Solo mide la contabilidad del servidor: los buffers del socket y del
+protocolo en uvicorn no se incluyen.
+
+Uso (desde el directorio back):
+    python tests/benchmarks/bench_websocket_idle_memory.py
+"""
+import asyncio
+import os
+import resource
+import sys
+import tracemalloc
+from types import SimpleNamespace
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.core.websocket_manager import WebSocketManager, settings
+
+CONNECTIONS = 10_000
+
+
+class IdleWebSocket:
+    """WebSocket falso que descarta todo lo que se envía"""
+
+    __slots__ = ("state", "headers")
+
+    def __init__(self):
+        self.state = SimpleNamespace()
+        self.headers = {}
+
+    async def accept(self):
+        pass
+
+    async def close(self, code=1000, reason=None):
+        pass
+
+    async def send_text(self, data):
+        pass
+
+    async def send_bytes(self, data):
+        pass
+
+
+def rss_kb() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+async def run():
+    settings.WEBSOCKET_MAX_CONNECTIONS = CONNECTIONS
+    manager = WebSocketManager()
+    sockets = [IdleWebSocket() for _ in range(CONNECTIONS)]
+
+    # Funciones simples en lugar de MagicMock: un mock guarda cada llamada y falsearía la medida
+    with patch.object(manager.chat_service, "verify_chat_access", new=lambda *args: True), \
+         patch.object(manager.chat_service, "handle_connection_event", new=lambda *args: None):
+        rss_before = rss_kb()
+        tracemalloc.start()
+        snapshot_before = tracemalloc.take_snapshot()
+
+        for i, ws in enumerate(sockets):
+            # Un chat por conexión, usuarios repartidos para no tocar el límite por usuario
+            await manager.connect(ws, chat_id=i, user_id=i // settings.WEBSOCKET_MAX_CONNECTIONS_PER_USER)
+
+        snapshot_after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        rss_after = rss_kb()
+
+    allocated = sum(stat.size_diff for stat in snapshot_after.compare_to(snapshot_before, "filename"))
+    print(f"Conexiones activas: {manager.active_connections}")
+    print(f"Timers en la rueda: {len(manager._heartbeat_wheel)}")
+    print(f"tracemalloc: {allocated / 1024:.0f} KiB en total, {allocated / CONNECTIONS:.0f} B por conexión")
+    print(f"RSS máximo: +{rss_after - rss_before} KiB ({(rss_after - rss_before) * 1024 / CONNECTIONS:.0f} B por conexión)")
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,170 @@
+"""
+Tests para los datos del panel de administración (AdminDashboardService)
+"""
+import pytest
+
+from src.core.exceptions import DatabaseException
+from src.repositories import admin_dashboard_repository
+from src.repositories.admin_dashboard_repository import AdminDashboardRepository
+from src.services.admin_dashboard_service import AdminDashboardService, RECENT_ITEMS_LIMIT
+
+
+class FakeStatisticsRepository:
+    """Contadores materializados en memoria"""
+
+    def __init__(self, counters=None, users=None, fail=False):
+        self.counters = counters or {}
+        self.users = users or {}
+        self.fail = fail
+
+    def get_counters(self):
+        if self.fail:
+            raise DatabaseException('relation "statistics_counters" does not exist')
+        return dict(self.counters)
+
+    def get_user_statistics(self, user_id):
+        if self.fail:
+            raise DatabaseException('relation "user_statistics" does not exist')
+        return self.users.get(user_id)
+
+
+class FakeAdminDashboardRepository:
+    """Tablas en memoria con las consultas del panel"""
+
+    def __init__(self, users, documents, chats, with_activity=True):
+        self.users = users
+        self.documents = documents
+        self.chats = chats
+        self.with_activity = with_activity
+        self.calls = []
+
+    def list_users_with_activity(self, exclude_user_id):
+        self.calls.append("list_users_with_activity")
+        if not self.with_activity:
+            raise DatabaseException("Could not find a relationship between 'users' and 'user_statistics'")
+        users = self.list_users(exclude_user_id)
+        for user in users:
+            user["documents_count"] = sum(1 for d in self.documents if d["uploaded_by"] == user["id"])
+            user["chats_count"] = sum(1 for c in self.chats if c["id_user"] == user["id"])
+        return users
+
+    def list_users(self, exclude_user_id):
+        return [dict(u) for u in self.users if u["id"] != exclude_user_id]
+
+    def list_recent_documents(self, exclude_owner_id, limit=20):
+        self.calls.append(("list_recent_documents", limit))
+        return [d for d in self.documents if d["uploaded_by"] != exclude_owner_id][:limit]
+
+    def list_recent_chats(self, exclude_user_id, limit=20):
+        self.calls.append(("list_recent_chats", limit))
+        return [c for c in self.chats if c["id_user"] != exclude_user_id][:limit]
+
+    def count_rows(self, table, owner_column=None, owner_id=None):
+        self.calls.append(("count_rows", table, owner_column))
+        rows = getattr(self, table)
+        if owner_column is None:
+            return len(rows)
+        return sum(1 for row in rows if row.get(owner_column) == owner_id)
+
+    def count_by_owner(self, table, owner_column):
+        self.calls.append(("count_by_owner", table))
+        counts = {}
+        for row in getattr(self, table):
+            counts[row[owner_column]] = counts.get(row[owner_column], 0) + 1
+        return counts
+
+
+def make_tables():
+    users = [{"id": i, "username": f"user{i}"} for i in (1, 2, 3)]
+    documents = [{"id": i, "uploaded_by": 1 if i <= 2 else 2} for i in range(1, 6)]
+    chats = [{"id": i, "id_user": 3} for i in range(1, 4)] + [{"id": 4, "id_user": 1}]
+    return users, documents, chats
+
+
+class TestAdminDashboardService:
+
+    def test_statistics_from_counters(self):
+        repository = FakeAdminDashboardRepository(*make_tables())
+        stats_repository = FakeStatisticsRepository(
+            counters={"users": 3, "documents": 5, "chats": 4},
+            users={1: {"documents": 2, "chats": 1}}
+        )
+        service = AdminDashboardService(repository, stats_repository)
+
+        assert service.get_statistics(1) == {
+            "total_users": 2,
+            "total_documents": 3,
+            "active_chats": 3,
+            "total_system_users": 3,
+            "total_system_documents": 5,
+            "total_system_chats": 4
+        }
+        assert not any(call[0] == "count_rows" for call in repository.calls if isinstance(call, tuple))
+
+    def test_statistics_fall_back_to_counting(self):
+        repository = FakeAdminDashboardRepository(*make_tables())
+        service = AdminDashboardService(repository, FakeStatisticsRepository(fail=True))
+
+        stats = service.get_statistics(1)
+
+        assert stats["total_users"] == 2
+        assert stats["total_documents"] == 3
+        assert stats["active_chats"] == 3
+        assert stats["total_system_chats"] == 4
+
+    def test_users_fall_back_to_owner_counts(self):
+        repository = FakeAdminDashboardRepository(*make_tables(), with_activity=False)
+        service = AdminDashboardService(repository, FakeStatisticsRepository())
+
+        users = service.get_users(1)
+
+        assert [u["id"] for u in users] == [2, 3]
+        assert users[0]["documents_count"] == 3 and users[0]["chats_count"] == 0
+        assert users[1]["documents_count"] == 0 and users[1]["chats_count"] == 3
+        assert ("count_by_owner", "documents") in repository.calls
+
+    @pytest.mark.asyncio
+    async def test_load_gathers_every_section(self):
+        repository = FakeAdminDashboardRepository(*make_tables())
+        stats_repository = FakeStatisticsRepository(
+            counters={"users": 3, "documents": 5, "chats": 4},
+            users={1: {"documents": 2, "chats": 1}}
+        )
+        service = AdminDashboardService(repository, stats_repository)
+
+        data = await service.load(1)
+
+        assert set(data) == {"statistics", "users", "documents", "chats"}
+        assert all(doc["uploaded_by"] != 1 for doc in data["documents"])
+        assert all(chat["id_user"] != 1 for chat in data["chats"])
+        assert ("list_recent_documents", RECENT_ITEMS_LIMIT) in repository.calls
+        assert ("list_recent_chats", RECENT_ITEMS_LIMIT) in repository.calls
+
+
+class RecordingQuery:
+    """Consulta de Supabase que registra los filtros aplicados"""
+
+    def __init__(self):
+        self.filters = []
+
+    def __getattr__(self, name):
+        def method(*args, **kwargs):
+            self.filters.append((name, args))
+            return self
+        return method
+
+    def execute(self):
+        return type("Response", (), {"data": []})()
+
+
+class TestAdminDashboardRepository:
+
+    def test_recent_documents_keep_documents_without_owner(self, monkeypatch):
+        query = RecordingQuery()
+        client = type("Client", (), {"table": lambda self, name: query})()
+        monkeypatch.setattr(admin_dashboard_repository, "get_supabase_client", lambda **_: client)
+
+        AdminDashboardRepository().list_recent_documents(exclude_owner_id=7)
+
+        assert ("or_", ("uploaded_by.is.null,uploaded_by.neq.7",)) in query.filters
+        assert not [name for name, _ in query.filters if name == "neq"]
@@ -0,0 +1,187 @@
+"""
+Tests para la caché asíncrona de estadísticas (AsyncCache y backends)
+"""
+import asyncio
+
+import pytest
+
+from src.core.async_cache import AsyncCache, MemoryCacheBackend, RedisCacheBackend
+
+
+class CountingFetcher:
+    """Fetcher asíncrono que cuenta sus ejecuciones"""
+
+    def __init__(self, delay=0.0, fail=False):
+        self.calls = 0
+        self.delay = delay
+        self.fail = fail
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("fallo calculando")
+        return {"version": self.calls}
+
+
+def make_cache(ttl=30.0, stale_ttl=300.0, max_entries=100):
+    return AsyncCache(MemoryCacheBackend(max_entries=max_entries), default_ttl=ttl, stale_ttl=stale_ttl)
+
+
+class TestAsyncCache:
+    """Tests para AsyncCache con backend en memoria"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_computation(self):
+        cache = make_cache()
+        fetcher = CountingFetcher(delay=0.02)
+
+        results = await asyncio.gather(*(cache.get_or_compute("dashboard:1", fetcher) for _ in range(10)))
+
+        assert fetcher.calls == 1
+        assert all(result == {"version": 1} for result in results)
+        metrics = cache.get_metrics()["namespaces"]["dashboard"]
+        assert (metrics["misses"], metrics["coalesced"], metrics["computations"]) == (10, 9, 1)
+
+    @pytest.mark.asyncio
+    async def test_hit_after_computation(self):
+        cache = make_cache()
+        fetcher = CountingFetcher()
+
+        await cache.get_or_compute("global", fetcher)
+        await cache.get_or_compute("global", fetcher)
+
+        assert fetcher.calls == 1
+        assert cache.get_metrics()["hit_ratio"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_stale_value_is_served_while_revalidating(self):
+        cache = make_cache(stale_ttl=60)
+        fetcher = CountingFetcher(delay=0.01)
+        await cache.get_or_compute("global", fetcher, ttl=0.01)
+        await asyncio.sleep(0.02)
+
+        stale = await cache.get_or_compute("global", fetcher, ttl=60)
+        await asyncio.sleep(0.03)
+        fresh = await cache.get_or_compute("global", fetcher, ttl=60)
+
+        assert stale == {"version": 1}
+        assert fresh == {"version": 2}
+        assert cache.get_metrics()["namespaces"]["global"]["stale_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_beyond_stale_window_recomputes(self):
+        cache = make_cache(stale_ttl=0)
+        fetcher = CountingFetcher()
+        await cache.get_or_compute("global", fetcher, ttl=0.01)
+        await asyncio.sleep(0.02)
+
+        assert await cache.get_or_compute("global", fetcher, ttl=0.01) == {"version": 2}
+
+    @pytest.mark.asyncio
+    async def test_invalidation_during_computation_is_not_stored(self):
+        cache = make_cache()
+        fetcher = CountingFetcher(delay=0.02)
+
+        pending = asyncio.ensure_future(cache.get_or_compute("user:7", fetcher))
+        await asyncio.sleep(0.005)
+        await cache.invalidate("user:7")
+        await pending
+
+        assert await cache.get_or_compute("user:7", fetcher) == {"version": 2}
+
+    @pytest.mark.asyncio
+    async def test_invalidate_nowait_from_worker_thread(self):
+        cache = make_cache()
+        fetcher = CountingFetcher()
+        await cache.get_or_compute("user:7", fetcher)
+
+        await asyncio.to_thread(cache.invalidate_nowait, "user:7")
+
+        assert await cache.get_or_compute("user:7", fetcher) == {"version": 2}
+
+    @pytest.mark.asyncio
+    async def test_thread_invalidation_while_computation_finishes(self):
+        class RacingInflight(dict):
+            """Simula invalidate_nowait() desde un hilo entre el get y el borrado de _finish"""
+            def get(self, key, default=None):
+                task = super().get(key, default)
+                super().pop(key, None)
+                return task
+
+        cache = make_cache()
+        cache._inflight = RacingInflight()
+        errors = []
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+
+        assert await cache.get_or_compute("user:7", CountingFetcher()) == {"version": 1}
+        await asyncio.sleep(0)
+
+        assert errors == []
+        assert len(cache._inflight) == 0
+
+    @pytest.mark.asyncio
+    async def test_errors_are_not_cached(self):
+        cache = make_cache()
+        failing = CountingFetcher(fail=True)
+
+        with pytest.raises(RuntimeError):
+            await cache.get_or_compute("global", failing)
+
+        assert await cache.get_or_compute("global", CountingFetcher()) == {"version": 1}
+        assert cache.get_metrics()["namespaces"]["global"]["errors"] == 1
+
+    @pytest.mark.asyncio
+    async def test_uncacheable_results_are_not_stored(self):
+        cache = make_cache()
+        fetcher = CountingFetcher()
+
+        for _ in range(2):
+            await cache.get_or_compute("dashboard:1", fetcher, cacheable=lambda value: False)
+
+        assert fetcher.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_cancelled_request_does_not_cancel_shared_computation(self):
+        cache = make_cache()
+        fetcher = CountingFetcher(delay=0.02)
+
+        first = asyncio.ensure_future(cache.get_or_compute("global", fetcher))
+        second = asyncio.ensure_future(cache.get_or_compute("global", fetcher))
+        await asyncio.sleep(0.005)
+        first.cancel()
+
+        assert await second == {"version": 1}
+        assert fetcher.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self):
+        cache = make_cache(max_entries=2)
+        fetcher = CountingFetcher()
+        for key in ("user:1", "user:2", "user:1", "user:3"):
+            await cache.get_or_compute(key, fetcher)
+
+        metrics = cache.get_metrics()
+        assert (metrics["entries"], metrics["evictions"]) == (2, 1)
+        # user:2 era la menos usada
+        assert await cache.backend.get("user:2") is None
+        assert await cache.backend.get("user:1") is not None
+
+
+class TestRedisCacheBackend:
+    """Tests para el backend compartido"""
+
+    @pytest.mark.asyncio
+    async def test_instances_share_entries(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        server = fakeredis.FakeServer()
+        first = AsyncCache(RedisCacheBackend("", client=fakeredis.FakeAsyncRedis(server=server)))
+        second = AsyncCache(RedisCacheBackend("", client=fakeredis.FakeAsyncRedis(server=server)))
+        fetcher = CountingFetcher()
+
+        await first.get_or_compute("global", fetcher)
+        assert await second.get_or_compute("global", fetcher) == {"version": 1}
+
+        await second.invalidate("global")
+        assert await first.get_or_compute("global", fetcher) == {"version": 2}
+        assert fetcher.calls == 2
@@ -0,0 +1,181 @@
+"""
+Tests para el motor de eliminaciones en lote (BulkOperationService)
+"""
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.core.exceptions import NotFoundException
+from src.services import bulk_operation_service
+from src.services.bulk_operation_service import BulkJobRegistry, BulkOperationService
+
+
+class FakeDocumentRepository:
+    def __init__(self, owners):
+        self.rows = {doc_id: {"id": doc_id, "uploaded_by": owner,
+                              "file_url": f"http://localhost/api/files/{owner}/{doc_id}.pdf"}
+                     for doc_id, owner in owners.items()}
+        self.calls = []
+
+    def list_for_deletion(self, ids):
+        self.calls.append(("list", len(ids)))
+        return [dict(self.rows[i]) for i in ids if i in self.rows]
+
+    def delete_many(self, ids):
+        self.calls.append(("delete", len(ids)))
+        return [self.rows.pop(i)["id"] for i in ids if i in self.rows]
+
+
+class FakeChatRepository:
+    def __init__(self, owners):
+        self.owners = dict(owners)
+
+    def get_owners(self, ids):
+        return {i: self.owners[i] for i in ids if i in self.owners}
+
+    def delete_many(self, ids):
+        return [i for i in ids if self.owners.pop(i, None) is not None]
+
+
+class FakeMessageRepository:
+    def __init__(self):
+        self.deleted_for = []
+
+    def delete_messages_by_chats(self, ids):
+        self.deleted_for.extend(ids)
+        return len(ids)
+
+
+class FakeUserRepository:
+    def __init__(self, ids):
+        self.ids = set(ids)
+
+    def get_existing_ids(self, ids):
+        return [i for i in ids if i in self.ids]
+
+    def delete_many(self, ids):
+        deleted = [i for i in ids if i in self.ids]
+        self.ids -= set(deleted)
+        return deleted
+
+
+class FakeChroma:
+    def __init__(self, fail=False):
+        self.wheres = []
+        self.fail = fail
+
+    def get_write_collection_names(self):
+        return ["documents"]
+
+    def delete_where(self, collection_name, where):
+        if self.fail:
+            raise ConnectionError("chroma caído")
+        self.wheres.append(where)
+
+
+@pytest.fixture(autouse=True)
+def no_side_effects(monkeypatch):
+    removed = []
+    monkeypatch.setattr(bulk_operation_service, "invalidate_statistics", lambda *ids: None)
+    monkeypatch.setattr(bulk_operation_service.local_storage, "delete_file",
+                        lambda path: removed.append(path) or True)
+    return removed
+
+
+def make_engine(documents=None, chats=None, users=(), chroma=None, batch_size=3):
+    return BulkOperationService(
+        document_repo=FakeDocumentRepository(documents or {}),
+        chat_repo=FakeChatRepository(chats or {}),
+        message_repo=FakeMessageRepository(),
+        user_repo=FakeUserRepository(users),
+        chromadb=chroma or FakeChroma(),
+        batch_size=batch_size,
+        max_concurrency=2
+    )
+
+
+ADMIN = SimpleNamespace(id=1, username="admin", is_admin=True)
+USER = SimpleNamespace(id=2, username="user", is_admin=False)
+
+
+class TestBulkDelete:
+
+    def test_documents_are_deleted_in_batches(self, no_side_effects):
+        engine = make_engine(documents={i: 2 for i in range(1, 8)})
+
+        report = engine.delete("documents", list(range(1, 8)), ADMIN).to_dict()
+
+        assert report["success"] == 7 and report["failed"] == 0
+        # 7 IDs en lotes de 3: tres consultas y tres DELETE IN (...)
+        assert engine.document_repo.calls.count(("delete", 3)) == 2
+        assert len(engine.chromadb.wheres) == 3
+        assert sorted(w["document_id"]["$in"] for w in engine.chromadb.wheres) == [
+            ["1", "2", "3"], ["4", "5", "6"], ["7"]
+        ]
+        assert sorted(no_side_effects) == sorted(f"documents/2/{i}.pdf" for i in range(1, 8))
+
+    def test_report_per_item(self):
+        engine = make_engine(documents={1: 2, 2: 3})
+
+        report = engine.delete("documents", [1, 2, 99], USER).to_dict()
+        statuses = {item["id"]: item["status"] for item in report["items"]}
+
+        assert statuses == {1: "deleted", 2: "forbidden", 99: "not_found"}
+        assert sorted(report["failed_ids"]) == [2, 99]
+
+    def test_chroma_failure_does_not_block_database_delete(self):
+        engine = make_engine(documents={1: 2}, chroma=FakeChroma(fail=True))
+
+        report = engine.delete("documents", [1], ADMIN)
+
+        assert report.success == 1
+
+    def test_chats_delete_messages_first(self):
+        engine = make_engine(chats={10: 2, 11: 2, 12: 5})
+
+        report = engine.delete("chats", [10, 11, 12], USER).to_dict()
+
+        assert report["success"] == 2
+        assert engine.message_repo.deleted_for == [10, 11]
+
+    def test_users_cannot_delete_themselves(self):
+        engine = make_engine(users=[1, 2, 3])
+
+        report = engine.delete("users", [1, 2, 3, 4], ADMIN).to_dict()
+        statuses = {item["id"]: item["status"] for item in report["items"]}
+
+        assert statuses == {1: "invalid", 2: "deleted", 3: "deleted", 4: "not_found"}
+
+    def test_failed_batch_is_reported(self):
+        engine = make_engine(documents={i: 2 for i in range(1, 7)})
+        original = engine.document_repo.delete_many
+
+        def flaky(ids):
+            if 4 in ids:
+                raise ConnectionError("timeout")
+            return original(ids)
+        engine.document_repo.delete_many = flaky
+
+        report = engine.delete("documents", list(range(1, 7)), ADMIN).to_dict()
+
+        assert report["success"] == 3
+        assert sorted(report["failed_ids"]) == [4, 5, 6]
+
+
+class TestBulkJobRegistry:
+
+    def test_job_runs_in_background(self):
+        registry = BulkJobRegistry()
+        engine = make_engine(documents={i: 2 for i in range(1, 5)})
+
+        job = registry.submit_delete(engine, "documents", [1, 2, 3, 4], ADMIN)
+        for _ in range(200):
+            if registry.get(job.job_id).status == "completed":
+                break
+            time.sleep(0.01)
+
+        assert job.status == "completed"
+        assert job.result["success"] == 4
+        with pytest.raises(NotFoundException):
+            registry.get("missing")
@@ -0,0 +1,264 @@
+"""
+Tests para los circuit breakers por dependencia y el monitor de dependencias
+que sirve /api/health/ready
+"""
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.middleware.exception_handlers import app_exception_handler, generic_exception_handler
+from src.config.database import instrument_supabase_client
+from src.core.circuit_breaker import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, breakers, is_dependency_failure, probing
+)
+from src.core.exceptions import AppException, CircuitOpenException, DatabaseException, ValidationException
+from src.services.dependency_monitor import DOWN, UNCONFIGURED, UP, DependencyMonitor
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Unavailable(Exception):
+    def __init__(self, code):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+@pytest.fixture(autouse=True)
+def reset_breakers():
+    for name in ("supabase", "chroma", "gemini"):
+        breakers.get(name).reset()
+    yield
+    for name in ("supabase", "chroma", "gemini"):
+        breakers.get(name).reset()
+
+
+class TestCircuitBreaker:
+
+    def test_opens_after_threshold_and_half_opens_after_timeout(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=10, clock=clock)
+
+        for _ in range(3):
+            with pytest.raises(ConnectionError):
+                with breaker.call():
+                    raise ConnectionError("refused")
+        assert breaker.state == OPEN
+
+        clock.now = 4
+        with pytest.raises(CircuitOpenException) as info:
+            breaker.before_call()
+        assert info.value.details["retry_after"] == 6 and breaker.rejected == 1
+
+        clock.now = 10
+        assert breaker.state == HALF_OPEN
+        with breaker.call():
+            pass
+        assert breaker.state == CLOSED
+
+    def test_half_open_lets_a_single_trial_through(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=10, clock=clock)
+        breaker.record_failure(ConnectionError())
+        clock.now = 10
+
+        breaker.before_call()
+        with pytest.raises(CircuitOpenException):
+            breaker.before_call()
+
+        # Una prueba que falla vuelve a abrir el circuito
+        breaker.record_failure(ConnectionError())
+        assert breaker.state == OPEN
+
+        # Una prueba que nunca termina caduca tras reset_timeout
+        clock.now = 20
+        breaker.before_call()
+        clock.now = 30
+        breaker.before_call()
+
+    def test_application_errors_do_not_count_and_reset_failures(self):
+        breaker = CircuitBreaker("test", failure_threshold=2)
+
+        breaker.record_failure(ConnectionError())
+        with pytest.raises(ValidationException):
+            with breaker.call():
+                raise ValidationException("Pregunta vacía")
+        breaker.record_failure(ConnectionError())
+
+        assert breaker.state == CLOSED
+
+    def test_probing_bypasses_open_circuit_and_probe_closes_it(self):
+        breaker = CircuitBreaker("test", failure_threshold=1)
+        breaker.record_failure(ConnectionError())
+
+        with probing():
+            breaker.before_call()
+            breaker.record_failure(ConnectionError())
+        assert breaker.to_dict()["consecutive_failures"] == 1
+
+        breaker.record_probe()
+        assert breaker.state == CLOSED
+
+    @pytest.mark.asyncio
+    async def test_guard_wraps_coroutines(self):
+        breaker = CircuitBreaker("test", failure_threshold=1)
+
+        @breaker.guard
+        async def generate():
+            raise TimeoutError()
+
+        with pytest.raises(TimeoutError):
+            await generate()
+        with pytest.raises(CircuitOpenException):
+            await generate()
+
+    @pytest.mark.parametrize("error, expected", [
+        (ConnectionError("refused"), True),
+        (TimeoutError(), True),
+        (Unavailable(503), True),
+        (Unavailable(429), True),
+        (Unavailable(500), False),
+        (Unavailable(404), False),
+        (ValueError("bad"), False),
+        (AppException("app"), False),
+        (CircuitOpenException("chroma", 5), False),
+    ])
+    def test_only_infrastructure_errors_are_failures(self, error, expected):
+        assert is_dependency_failure(error) is expected
+
+
+class TestSupabaseCircuit:
+
+    def test_repositories_fail_fast_once_supabase_circuit_opens(self):
+        sent = []
+
+        def handler(request):
+            sent.append(request)
+            return httpx.Response(503, json={"message": "upstream unavailable"})
+
+        class FakePostgrest:
+            def __init__(self):
+                self.session = httpx.Client(base_url="http://supabase.test", transport=httpx.MockTransport(handler))
+
+        class FakeClient:
+            @staticmethod
+            def _init_postgrest_client(*args, **kwargs):
+                return FakePostgrest()
+
+        client = instrument_supabase_client(FakeClient())
+        postgrest = client._init_postgrest_client("http://supabase.test/rest/v1", {}, "public", 5)
+        breaker = breakers.get("supabase")
+
+        for _ in range(breaker.failure_threshold):
+            assert postgrest.session.get("/rest/v1/documents").status_code == 503
+        with pytest.raises(CircuitOpenException):
+            postgrest.session.get("/rest/v1/documents")
+
+        assert len(sent) == breaker.failure_threshold
+        assert breaker.state == OPEN
+
+
+class TestCircuitOpenResponse:
+
+    def test_wrapped_circuit_open_becomes_503_with_retry_after(self):
+        app = FastAPI()
+        app.add_exception_handler(AppException, app_exception_handler)
+        app.add_exception_handler(Exception, generic_exception_handler)
+
+        @app.get("/documents")
+        async def documents():
+            try:
+                raise CircuitOpenException("supabase", 12.2)
+            except CircuitOpenException as e:
+                raise DatabaseException("Error al listar documentos", e) from e
+
+        response = TestClient(app, raise_server_exceptions=False).get("/documents")
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "13"
+        assert response.json()["error_code"] == "SERVICE_UNAVAILABLE"
+
+
+class TestDependencyMonitor:
+
+    @pytest.mark.asyncio
+    async def test_gemini_down_is_degraded_but_ready(self):
+        def failing():
+            raise ConnectionError("refused")
+
+        monitor = DependencyMonitor(
+            checks={"supabase": lambda: None, "chroma": lambda: None, "gemini": failing},
+            interval=0, timeout=1
+        )
+        status = await monitor.check_all()
+
+        assert status["status"] == "degraded" and status["ready"]
+        assert status["dependencies"]["supabase"]["status"] == UP
+        assert status["dependencies"]["gemini"]["status"] == DOWN
+        assert "ConnectionError" in status["dependencies"]["gemini"]["error"]
+
+    @pytest.mark.asyncio
+    async def test_probe_results_drive_the_circuit(self):
+        breaker = breakers.get("chroma")
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure(ConnectionError())
+        assert breaker.state == OPEN
+
+        monitor = DependencyMonitor(
+            checks={"supabase": lambda: None, "chroma": breaker.before_call, "gemini": lambda: UNCONFIGURED},
+            interval=0, timeout=1
+        )
+        status = await monitor.check_all()
+
+        assert status["status"] == "ready"
+        assert status["dependencies"]["chroma"]["circuit"] == CLOSED
+        assert status["dependencies"]["gemini"]["status"] == UNCONFIGURED
+
+    @pytest.mark.asyncio
+    async def test_hung_check_times_out_without_piling_up_threads(self):
+        release = threading.Event()
+        calls = []
+
+        def hung():
+            calls.append(1)
+            release.wait(5)
+
+        monitor = DependencyMonitor(
+            checks={"supabase": hung, "chroma": lambda: None}, interval=0, timeout=0.05
+        )
+        try:
+            first = await monitor.check_all()
+            second = await monitor.check_all()
+        finally:
+            release.set()
+
+        assert first["status"] == second["status"] == "not_ready"
+        assert first["dependencies"]["supabase"]["status"] == DOWN
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_stale_status_is_refreshed_once_for_concurrent_probes(self):
+        calls = []
+
+        def check():
+            calls.append(1)
+            time.sleep(0.02)
+
+        monitor = DependencyMonitor(checks={"supabase": check, "chroma": lambda: None}, interval=0, timeout=1)
+
+        results = await asyncio.gather(*(monitor.status(max_age=30) for _ in range(5)))
+        assert all(result["ready"] for result in results)
+        assert len(calls) == 1
+
+        await monitor.status(max_age=30)
+        assert len(calls) == 1
@@ -0,0 +1,182 @@
+"""
+Tests para la compartición masiva de documentos (validación por conjuntos,
+upsert multi-fila y compartir con grupos)
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from src.core.exceptions import ForbiddenException, ValidationException
+from src.repositories import document_repository
+from src.repositories.document_repository import DocumentRepository
+from src.services import document_service as document_service_module
+from src.services.document_service import DocumentService
+from src.services.user_service import UserService
+
+
+class FakeQuery:
+    """Subconjunto de postgrest sobre tablas en memoria"""
+
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.filters = []
+        self.action = "select"
+        self.payload = None
+
+    def select(self, *columns, **kwargs):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def in_(self, column, values):
+        values = set(values)
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def upsert(self, records, on_conflict="", ignore_duplicates=False):
+        self.action, self.payload = "upsert", records
+        return self
+
+    def update(self, values):
+        self.action, self.payload = "update", values
+        return self
+
+    def execute(self):
+        self.db.requests += 1
+        rows = self.db.tables[self.table]
+        if self.action == "upsert":
+            existing = {(r["id_document"], r["id_user"]) for r in rows}
+            inserted = [dict(r, created_at="2025-01-01") for r in self.payload
+                        if (r["id_document"], r["id_user"]) not in existing]
+            rows.extend(inserted)
+            return SimpleNamespace(data=inserted)
+        matched = [row for row in rows if all(f(row) for f in self.filters)]
+        if self.action == "update":
+            for row in matched:
+                row.update(self.payload)
+        return SimpleNamespace(data=matched)
+
+
+class FakeSupabase:
+    def __init__(self, users, shares=()):
+        self.requests = 0
+        self.tables = {
+            "users": [{"id": i, "username": f"user{i}", "email": f"user{i}@example.com"} for i in users],
+            "documents": [{"id": 1, "uploaded_by": 1, "is_shared": False}],
+            "acceso_documentos_usuario": [
+                {"id_document": 1, "id_user": uid, "created_at": "2024-01-01"} for uid in shares
+            ],
+        }
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+class TestShareDocumentWithUsers:
+
+    def test_single_upsert_for_many_users(self, monkeypatch):
+        client = FakeSupabase(users=range(1, 502), shares=[2, 3])
+        monkeypatch.setattr(document_repository, "get_supabase_client", lambda **_: client)
+
+        result = DocumentRepository().share_document_with_users(1, list(range(2, 502)), check_document=False)
+
+        assert result["total_new_shares"] == 498
+        assert [share["id"] for share in result["already_shared"]] == [2, 3]
+        assert client.tables["documents"][0]["is_shared"] is True
+        # upsert + is_shared + accesos existentes + usuarios: constante, no O(n)
+        assert client.requests == 4
+
+
+class FakeUserRepository:
+    def __init__(self, ids, admins=()):
+        self.ids = set(ids)
+        self.admins = set(admins)
+        self.calls = 0
+
+    def get_existing_ids(self, user_ids):
+        self.calls += 1
+        return [uid for uid in user_ids if uid in self.ids]
+
+    def get(self, user_id):
+        return SimpleNamespace(id=user_id, is_admin=user_id in self.admins)
+
+
+class FakeDocumentRepository:
+    def __init__(self):
+        self.shared_with = None
+
+    def get(self, document_id):
+        return SimpleNamespace(id=document_id, uploaded_by=1, title="doc")
+
+    def share_document_with_users(self, document_id, user_ids, check_document=True):
+        self.shared_with = user_ids
+        return {"successful_shares": user_ids, "already_shared": [], "failed_shares": [],
+                "total_requested": len(user_ids), "total_already_shared": 0,
+                "total_new_shares": len(user_ids), "total_failed": 0}
+
+    def share_document_with_group(self, document_id, group_id):
+        return {"new": [4, 5], "already": [6]}
+
+
+def make_document_service(user_ids=(2, 3, 4, 5, 6), admins=()):
+    service = DocumentService.__new__(DocumentService)
+    service.document_repo = FakeDocumentRepository()
+    service.user_repo = FakeUserRepository(user_ids, admins)
+    return service
+
+
+@pytest.fixture(autouse=True)
+def no_cache_invalidation(monkeypatch):
+    monkeypatch.setattr(document_service_module, "invalidate_statistics", lambda *ids: None)
+
+
+class TestDocumentServiceSharing:
+
+    def test_unknown_users_are_reported_not_inserted(self):
+        service = make_document_service()
+
+        result = service.share_document(1, [2, 3, 99, 3], requester_id=1)
+
+        assert service.document_repo.shared_with == [2, 3]
+        assert result["failed_shares"] == [99]
+        assert result["total_requested"] == 3
+        assert service.user_repo.calls == 1
+
+    def test_large_recipient_lists_are_checked_in_blocks(self):
+        service = make_document_service(user_ids=range(2, 1202))
+
+        result = service.share_document(1, list(range(2, 1202)), requester_id=1)
+
+        assert result["total_new_shares"] == 1200
+        assert service.user_repo.calls == 3
+
+    def test_all_unknown_users_raise(self):
+        service = make_document_service()
+
+        with pytest.raises(ValidationException):
+            service.share_document(1, [98, 99], requester_id=1)
+
+    def test_group_share_requires_owner_or_admin(self):
+        service = make_document_service(admins=[7])
+
+        with pytest.raises(ForbiddenException):
+            service.share_document_with_group(1, group_id=3, requester_id=2)
+
+        result = service.share_document_with_group(1, group_id=3, requester_id=7)
+        assert result["total_new_shares"] == 2 and result["already_shared"] == [6]
+
+
+class TestValidateUserIds:
+
+    def test_set_based_validation(self):
+        service = UserService.__new__(UserService)
+        service.repository = FakeUserRepository(range(1, 1001))
+
+        result = service.validate_user_ids(list(range(990, 1011)))
+
+        assert result["valid"] == list(range(990, 1001))
+        assert result["invalid"] == list(range(1001, 1011))
+        assert service.repository.calls == 1
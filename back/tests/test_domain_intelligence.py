@@ -0,0 +1,134 @@
+"""
+Tests para la caché de MX y la detección de dominios desechables
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.services.email_validation import EmailValidationService
+from src.services.email_validation.domain_intelligence import (
+    DomainIntelligence, DomainSuffixIndex, MXLookup
+)
+
+
+class FakeResolver:
+    """Resolutor DNS falso que cuenta las consultas por dominio"""
+
+    def __init__(self, answers, delay=0.0):
+        self.answers = answers
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, domain):
+        with self._lock:
+            self.calls.append(domain)
+        time.sleep(self.delay)
+        answer = self.answers[domain]
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+def make_intelligence(resolver, **kwargs):
+    options = dict(min_ttl=0, max_ttl=3600, negative_ttl=300, workers=4)
+    options.update(kwargs)
+    return DomainIntelligence(resolver=resolver, **options)
+
+
+class TestDomainSuffixIndex:
+
+    def test_matches_domain_and_subdomains_only(self):
+        index = DomainSuffixIndex(["mailinator.com", "Yopmail.com."])
+
+        assert index.matches("mailinator.com")
+        assert index.matches("inbox.MAILINATOR.com")
+        assert index.matches("yopmail.com")
+        assert not index.matches("notmailinator.com")
+        assert not index.matches("com")
+        assert not index.matches("gmail.com")
+        assert index.size == 2
+
+    def test_validation_service_uses_suffix_matching(self):
+        service = EmailValidationService()
+
+        assert service.is_disposable_email("ana@mailinator.com")
+        assert service.is_disposable_email("ana@eu.mailinator.com")
+        assert not service.is_disposable_email("ana@gmail.com")
+        assert not service.is_disposable_email("sin-arroba")
+
+
+class TestMXCache:
+
+    @pytest.mark.asyncio
+    async def test_repeated_lookups_hit_the_cache(self):
+        resolver = FakeResolver({"example.com": MXLookup(["mx1.example.com", "mx2.example.com"], True, 600)})
+        intelligence = make_intelligence(resolver)
+
+        first = await intelligence.get_mx("example.com")
+        second = await intelligence.get_mx("EXAMPLE.com.")
+
+        assert first == second == ["mx1.example.com", "mx2.example.com"]
+        assert resolver.calls == ["example.com"]
+        assert intelligence.get_stats()["hits"] == 1
+        intelligence.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_ttl_from_dns_expires_entry(self):
+        resolver = FakeResolver({"example.com": MXLookup(["mx.example.com"], True, 0)})
+        intelligence = make_intelligence(resolver)
+
+        await intelligence.get_mx("example.com")
+        await intelligence.get_mx("example.com")
+
+        assert len(resolver.calls) == 2
+        intelligence.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_missing_domains_are_cached_negatively(self):
+        resolver = FakeResolver({"nope.invalid": MXLookup([], False)})
+        intelligence = make_intelligence(resolver)
+
+        assert not (await intelligence.lookup("nope.invalid")).domain_exists
+        assert await intelligence.get_mx("nope.invalid") == []
+        assert resolver.calls == ["nope.invalid"]
+        intelligence.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_transient_errors_are_not_cached(self):
+        resolver = FakeResolver({"example.com": TimeoutError("DNS no responde")})
+        intelligence = make_intelligence(resolver)
+
+        assert await intelligence.get_mx("example.com") == []
+        resolver.answers["example.com"] = MXLookup(["mx.example.com"], True, 600)
+        assert await intelligence.get_mx("example.com") == ["mx.example.com"]
+        assert intelligence.get_stats()["errors"] == 1
+        intelligence.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_lookups_share_one_query(self):
+        resolver = FakeResolver({"example.com": MXLookup(["mx.example.com"], True, 600)}, delay=0.05)
+        intelligence = make_intelligence(resolver)
+
+        intelligence.prefetch("example.com")
+        results = await asyncio.gather(*(intelligence.get_mx("example.com") for _ in range(20)))
+
+        assert all(result == ["mx.example.com"] for result in results)
+        assert resolver.calls == ["example.com"]
+        intelligence.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_lru_evicts_oldest_domain(self):
+        resolver = FakeResolver({
+            f"d{i}.com": MXLookup([f"mx.d{i}.com"], True, 600) for i in range(3)
+        })
+        intelligence = make_intelligence(resolver, cache_size=2)
+
+        for i in range(3):
+            await intelligence.get_mx(f"d{i}.com")
+        await intelligence.get_mx("d0.com")
+
+        assert resolver.calls == ["d0.com", "d1.com", "d2.com", "d0.com"]
+        intelligence.shutdown()
@@ -0,0 +1,225 @@
+"""
+Tests para el outbox de emails (reutilización de conexiones SMTP,
+reintentos y persistencia entre reinicios)
+"""
+import asyncio
+import socket
+import time
+
+import aiosmtplib
+import pytest
+
+from src.services.email_outbox import EmailOutbox
+
+
+class FakeSMTP:
+    """Sesión SMTP falsa: registra los envíos y falla según el guion"""
+
+    def __init__(self, server):
+        self.server = server
+        self.is_connected = False
+
+    async def connect(self):
+        self.is_connected = True
+
+    async def send_message(self, message):
+        if self.server.failures:
+            error = self.server.failures.pop(0)
+            if isinstance(error, aiosmtplib.SMTPServerDisconnected):
+                self.is_connected = False
+            raise error
+        self.server.sent.append((id(self), message["To"], message["Subject"]))
+
+    async def quit(self):
+        self.is_connected = False
+
+    def close(self):
+        self.is_connected = False
+
+
+class FakeServer:
+    def __init__(self, failures=None):
+        self.failures = list(failures or [])
+        self.sent = []
+
+    def factory(self):
+        return FakeSMTP(self)
+
+
+def make_outbox(tmp_path, server, **kwargs):
+    options = dict(pool_size=1, retry_base_seconds=0, poll_seconds=0.05, max_attempts=3)
+    options.update(kwargs)
+    return EmailOutbox(path=str(tmp_path / "outbox.sqlite3"), smtp_factory=server.factory, **options)
+
+
+def enqueue(outbox, n=1):
+    return [
+        outbox.enqueue("DocuMente <noreply@example.com>", f"user{i}@example.com", f"Asunto {i}", "<p>hola</p>", "hola")
+        for i in range(n)
+    ]
+
+
+async def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timeout esperando al outbox"
+        await asyncio.sleep(0.01)
+
+
+class TestEmailOutbox:
+
+    @pytest.mark.asyncio
+    async def test_messages_share_one_connection(self, tmp_path):
+        server = FakeServer()
+        outbox = make_outbox(tmp_path, server)
+        await outbox.start()
+
+        enqueue(outbox, 5)
+        await wait_for(lambda: len(server.sent) == 5)
+        await outbox.stop()
+
+        assert outbox.connections == 1
+        assert len({session for session, _, _ in server.sent}) == 1
+        assert [to for _, to, _ in server.sent] == [f"user{i}@example.com" for i in range(5)]
+        assert outbox.get_stats()["pending"] == 0
+
+    @pytest.mark.asyncio
+    async def test_transient_error_is_retried(self, tmp_path):
+        server = FakeServer([aiosmtplib.SMTPResponseException(451, "Inténtalo más tarde")])
+        outbox = make_outbox(tmp_path, server)
+        await outbox.start()
+
+        enqueue(outbox)
+        await wait_for(lambda: len(server.sent) == 1)
+        await outbox.stop()
+
+        assert outbox.get_stats()["failed"] == 0
+
+    @pytest.mark.asyncio
+    async def test_backoff_delays_next_attempt(self, tmp_path):
+        server = FakeServer([aiosmtplib.SMTPResponseException(421, "Ocupado")])
+        outbox = make_outbox(tmp_path, server, retry_base_seconds=60)
+        await outbox.start()
+
+        (message_id,) = enqueue(outbox)
+        await wait_for(lambda: not server.failures)
+        await asyncio.sleep(0.1)
+        await outbox.stop()
+
+        row = outbox._connection().execute(
+            "SELECT status, attempts, next_attempt_at, last_error FROM outbox WHERE id = ?", (message_id,)
+        ).fetchone()
+        assert server.sent == []
+        assert row["status"] == "pending" and row["attempts"] == 1
+        assert row["next_attempt_at"] - time.time() > 50
+        assert "Ocupado" in row["last_error"]
+
+    @pytest.mark.asyncio
+    async def test_permanent_rejection_is_not_retried(self, tmp_path):
+        server = FakeServer([aiosmtplib.SMTPResponseException(550, "Buzón inexistente")])
+        outbox = make_outbox(tmp_path, server)
+        await outbox.start()
+
+        enqueue(outbox)
+        await wait_for(lambda: outbox.get_stats()["failed"] == 1)
+        await outbox.stop()
+
+        assert server.sent == []
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_attempts(self, tmp_path):
+        server = FakeServer([aiosmtplib.SMTPResponseException(451, "Ocupado")] * 3)
+        outbox = make_outbox(tmp_path, server)
+        await outbox.start()
+
+        enqueue(outbox)
+        await wait_for(lambda: outbox.get_stats()["failed"] == 1)
+        await outbox.stop()
+
+        assert server.failures == [] and server.sent == []
+
+    @pytest.mark.asyncio
+    async def test_dropped_connection_is_reopened(self, tmp_path):
+        server = FakeServer()
+        outbox = make_outbox(tmp_path, server)
+        await outbox.start()
+
+        enqueue(outbox)
+        await wait_for(lambda: len(server.sent) == 1)
+        server.failures.append(aiosmtplib.SMTPServerDisconnected("Conexión cerrada"))
+        enqueue(outbox)
+        await wait_for(lambda: len(server.sent) == 2)
+        await outbox.stop()
+
+        # El reenvío por la conexión nueva no consume un intento
+        assert outbox.connections == 2
+        assert outbox.get_stats()["pending"] == 0
+
+    @pytest.mark.asyncio
+    async def test_pending_messages_survive_restart(self, tmp_path):
+        server = FakeServer()
+        first = make_outbox(tmp_path, server, lease_seconds=0)
+        enqueue(first, 2)
+        # Mensaje reservado por una sesión cuando se cayó el proceso (reserva caducada)
+        first._claim(1)
+
+        second = make_outbox(tmp_path, server)
+        await second.start()
+        await wait_for(lambda: len(server.sent) == 2)
+        await second.stop()
+
+        assert sorted(to for _, to, _ in server.sent) == ["user0@example.com", "user1@example.com"]
+
+    @pytest.mark.asyncio
+    async def test_other_workers_do_not_requeue_live_claims(self, tmp_path):
+        server = FakeServer()
+        sending = make_outbox(tmp_path, server)
+        enqueue(sending, 1)
+        # Otro worker del mismo fichero está enviando el mensaje
+        assert len(sending._claim(1)) == 1
+
+        other = make_outbox(tmp_path, server)
+        await other.start()
+        await asyncio.sleep(0.2)
+        await other.stop()
+
+        assert server.sent == []
+        assert other.get_stats()["sending"] == 1
+
+        await sending.stop()
+        assert sending.get_stats()["pending"] == 1
+
+
+class TestEmailOutboxWithSMTPServer:
+    """Entrega real contra un servidor SMTP local (aiosmtpd)"""
+
+    @pytest.mark.asyncio
+    async def test_delivers_through_local_server(self, tmp_path):
+        controller_module = pytest.importorskip("aiosmtpd.controller")
+
+        received = []
+
+        class Handler:
+            async def handle_DATA(self, server, session, envelope):
+                received.append((session.peer, envelope.rcpt_tos))
+                return "250 OK"
+
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        controller = controller_module.Controller(Handler(), hostname="127.0.0.1", port=port)
+        controller.start()
+        try:
+            outbox = EmailOutbox(
+                path=str(tmp_path / "outbox.sqlite3"), hostname="127.0.0.1", port=port,
+                username="", password="", pool_size=1, poll_seconds=0.05
+            )
+            await outbox.start()
+            enqueue(outbox, 3)
+            await wait_for(lambda: len(received) == 3)
+            await outbox.stop()
+        finally:
+            controller.stop()
+
+        assert outbox.connections == 1
+        assert len({peer for peer, _ in received}) == 1
@@ -0,0 +1,164 @@
+"""
+Tests para la exportación masiva por páginas de clave (ExportService)
+"""
+import csv
+import gzip
+import io
+import json
+import threading
+import time
+
+import pytest
+
+from src.core.exceptions import ValidationException
+from src.services.export_service import ExportJob, ExportService
+
+
+class FakeExportRepository:
+    """Tabla en memoria que registra cada página pedida"""
+
+    def __init__(self, rows=10, fail_after=None):
+        self.rows = [{"id": i, "id_user": i % 3, "name_chat": f"Chat {i}", "created_at": "2025-01-01"}
+                     for i in range(1, rows + 1)]
+        self.fail_after = fail_after
+        self.calls = []
+
+    def fetch_page(self, table, after_id, page_size, columns=None, ids=None):
+        self.calls.append(after_id)
+        if self.fail_after is not None and after_id >= self.fail_after:
+            raise ConnectionError("conexión perdida")
+        rows = [r for r in self.rows if r["id"] > after_id and (ids is None or r["id"] in ids)]
+        return rows[:page_size]
+
+    def count(self, table, ids=None):
+        return len(self.rows if ids is None else [r for r in self.rows if r["id"] in ids])
+
+
+class BlockingExportRepository(FakeExportRepository):
+    """Repositorio cuya primera página espera a que el test la libere"""
+
+    def __init__(self, rows=10):
+        super().__init__(rows)
+        self.gate = threading.Event()
+
+    def fetch_page(self, table, after_id, page_size, columns=None, ids=None):
+        self.gate.wait(5)
+        return super().fetch_page(table, after_id, page_size, columns, ids)
+
+
+def make_service(tmp_path, rows=10, page_size=4, **kwargs):
+    repository = FakeExportRepository(rows, **kwargs)
+    return ExportService(repository, export_dir=str(tmp_path), page_size=page_size), repository
+
+
+class TestExportStream:
+
+    def test_jsonl_uses_keyset_pages(self, tmp_path):
+        service, repository = make_service(tmp_path)
+
+        lines = b"".join(service.stream("chats", "jsonl")).decode().splitlines()
+
+        assert [json.loads(line)["id"] for line in lines] == list(range(1, 11))
+        # Tres páginas (4 + 4 + 2), cada una tras el último id de la anterior
+        assert repository.calls == [0, 4, 8]
+
+    def test_stream_is_lazy(self, tmp_path):
+        service, repository = make_service(tmp_path)
+
+        chunks = service.stream("chats", "jsonl")
+        next(chunks)
+
+        assert repository.calls == [0]
+
+    def test_csv_with_header_and_cursor(self, tmp_path):
+        service, _ = make_service(tmp_path)
+
+        data = b"".join(service.stream("chats", "csv", after_id=6)).decode()
+        rows = list(csv.DictReader(io.StringIO(data)))
+
+        assert [int(r["id"]) for r in rows] == [7, 8, 9, 10]
+        assert set(rows[0]) == {"id", "id_user", "name_chat", "created_at"}
+
+    def test_gzip_stream(self, tmp_path):
+        service, _ = make_service(tmp_path)
+
+        data = gzip.decompress(b"".join(service.stream("chats", "csv", compress=True)))
+
+        assert data.decode().splitlines()[0] == "id,id_user,name_chat,created_at"
+        assert len(data.decode().splitlines()) == 11
+
+    def test_invalid_resource_and_format(self, tmp_path):
+        service, _ = make_service(tmp_path)
+
+        with pytest.raises(ValidationException):
+            service.validate_resource("password_hashes")
+        with pytest.raises(ValidationException):
+            service.normalize_format("xml")
+        assert service.normalize_format("json") == "jsonl"
+
+
+class TestExportFile:
+
+    def test_file_export_reports_progress(self, tmp_path):
+        service, _ = make_service(tmp_path)
+        job = ExportJob(job_id="job1", resource_type="chats", format="jsonl", total_rows=10)
+
+        service.run_file_export(job)
+
+        assert job.status == "completed"
+        assert job.progress == 1.0 and job.last_id == 10
+        with open(service.file_path(job)) as f:
+            assert len(f.read().splitlines()) == 10
+        with open(tmp_path / "job1.json") as f:
+            assert json.load(f)["rows_exported"] == 10
+
+    def test_resume_after_failure_does_not_duplicate(self, tmp_path):
+        service, repository = make_service(tmp_path, fail_after=8)
+        job = ExportJob(job_id="job2", resource_type="chats", format="csv", compress=True, total_rows=10)
+
+        service.run_file_export(job)
+        assert job.status == "failed" and job.last_id == 8
+
+        # Basura escrita tras la última página confirmada
+        with open(service.file_path(job), "ab") as f:
+            f.write(b"partial")
+        repository.fail_after = None
+        service._jobs.clear()
+        resumed = service.get_job("job2")
+        service.run_file_export(resumed)
+
+        with gzip.open(service.file_path(resumed), "rt") as f:
+            rows = list(csv.DictReader(f))
+        assert resumed.status == "completed"
+        assert [int(r["id"]) for r in rows] == list(range(1, 11))
+
+    def test_start_file_export_runs_in_background(self, tmp_path):
+        service, _ = make_service(tmp_path)
+
+        job = service.start_file_export("chats", "jsonl", ids=[2, 3, 5])
+        for _ in range(200):
+            if job.status == "completed":
+                break
+            time.sleep(0.01)
+        service.shutdown()
+
+        assert job.total_rows == 3
+        assert job.status == "completed" and job.rows_exported == 3
+
+    def test_queued_job_cannot_be_resumed_twice(self, tmp_path):
+        repository = BlockingExportRepository()
+        service = ExportService(repository, export_dir=str(tmp_path), page_size=4, max_concurrent_jobs=1)
+        running = service.start_file_export("chats", "jsonl")
+        queued = service.start_file_export("chats", "csv")
+
+        with pytest.raises(ValidationException):
+            service.resume_file_export(queued.job_id)
+
+        # El cierre cancela el trabajo en cola: queda interrumpido y reanudable
+        threading.Timer(0.05, repository.gate.set).start()
+        service.shutdown()
+
+        assert running.status == "interrupted"
+        assert queued.status == "interrupted"
+        with open(tmp_path / f"{queued.job_id}.json") as f:
+            assert json.load(f)["status"] == "interrupted"
@@ -0,0 +1,167 @@
+"""
+Tests para la actualización incremental de chunks (IDs direccionados por
+contenido, diferencias y actualizaciones solo de metadatos)
+"""
+import random
+
+import chromadb
+import pytest
+
+from src.models.domain import Document
+from src.services.document_service import DocumentService
+from src.services.reindex_service import chunk_hash
+from src.utils.chromadb_connector import ChromaDBConnector
+
+
+class CountingEmbeddingFunction:
+    def __init__(self):
+        self.embedded = []
+
+    def __call__(self, input):
+        self.embedded.extend(input)
+        return [[float(len(text)), 1.0] for text in input]
+
+
+class FakeDocumentRepository:
+    def __init__(self, document):
+        self.document = document
+        self.chunk_counts = {}
+
+    def get(self, document_id):
+        return self.document.model_copy()
+
+    def update(self, document):
+        return True
+
+    def update_with_url(self, document, file_url=None):
+        self.document = document.model_copy()
+        return True
+
+    def set_chunk_count(self, document_id, chunk_count):
+        self.chunk_counts[document_id] = chunk_count
+        return True
+
+
+def make_text(sentences, seed=7):
+    rng = random.Random(seed)
+    words = "el la de que en un una por con para los las del se no es lo como más pero sus ya este".split()
+    return "".join(
+        " ".join(rng.choice(words) for _ in range(rng.randint(6, 25))).capitalize() + ". "
+        for _ in range(sentences)
+    )
+
+
+@pytest.fixture
+def embedding_function():
+    return CountingEmbeddingFunction()
+
+
+@pytest.fixture
+def connector(monkeypatch, embedding_function):
+    previous = ChromaDBConnector._instance
+    ChromaDBConnector._instance = None
+    instance = ChromaDBConnector()
+    instance._client = chromadb.EphemeralClient(
+        chromadb.config.Settings(anonymized_telemetry=False, allow_reset=True)
+    )
+    instance._client.reset()
+    monkeypatch.setattr(instance, "_embedding_function_for", lambda model: embedding_function)
+    instance.get_client().create_collection("documents")
+    yield instance
+    ChromaDBConnector._instance = previous
+
+
+@pytest.fixture
+def service(connector):
+    document = Document(id=1, title="Original", uploaded_by=3, content_type="application/pdf", content=make_text(300))
+    service = DocumentService.__new__(DocumentService)
+    service.chromadb = connector
+    service.document_repo = FakeDocumentRepository(document)
+    chunks = service._split_text_into_chunks(document.content, content_type=document.content_type)
+    ids, metadatas = service._chunk_records(document, chunks, "")
+    service._write_chunks(ids, chunks, metadatas)
+    return service
+
+
+def stored(connector):
+    result = connector.get_chunks("documents", where={"document_id": "1"}, include=["documents", "metadatas"])
+    return dict(zip(result["ids"], zip(result["documents"], result["metadatas"])))
+
+
+class TestChunker:
+
+    def test_insertion_only_changes_nearby_chunks(self):
+        service = DocumentService.__new__(DocumentService)
+        text = make_text(400)
+        middle = len(text) // 2
+        edited = text[:middle] + " Frase nueva insertada en medio del documento. " + text[middle:]
+
+        before = service._split_text_into_chunks(text)
+        after = service._split_text_into_chunks(edited)
+
+        assert max(len(chunk) for chunk in before + after) <= 1000
+        assert before[0] + "".join(chunk[100:] for chunk in before[1:]) == text
+        known = {chunk_hash(chunk) for chunk in before}
+        assert sum(chunk_hash(chunk) not in known for chunk in after) <= 3
+
+
+class TestIncrementalUpdate:
+
+    def test_small_edit_embeds_only_changed_chunks(self, service, connector, embedding_function):
+        before = stored(connector)
+        embedding_function.embedded.clear()
+        content = service.document_repo.document.content
+        middle = len(content) // 2
+        edited = content[:middle] + " Un párrafo corregido por el usuario. " + content[middle:]
+
+        service.update_document(1, content=edited)
+
+        after = stored(connector)
+        chunks = service._split_text_into_chunks(edited, content_type="application/pdf")
+        assert sorted(text for text, _ in after.values()) == sorted(chunks)
+        assert 0 < len(embedding_function.embedded) <= 3 < len(chunks)
+        assert len(set(before) & set(after)) >= len(chunks) - 3
+        assert sorted(meta["chunk_index"] for _, meta in after.values()) == list(range(len(chunks)))
+        assert service.document_repo.chunk_counts[1] == len(chunks)
+
+    def test_title_change_updates_metadata_without_embeddings(self, service, connector, embedding_function):
+        before = stored(connector)
+        embedding_function.embedded.clear()
+
+        service.update_document(1, title="Título nuevo", tags=["informe"])
+
+        after = stored(connector)
+        assert embedding_function.embedded == []
+        assert set(after) == set(before)
+        assert all(meta["title"] == "Título nuevo" and meta["tags"] == "informe" for _, meta in after.values())
+        assert all(after[cid][1]["chunk_index"] == before[cid][1]["chunk_index"] for cid in after)
+
+    def test_content_and_tags_change_updates_every_chunk(self, service, connector):
+        service.update_document(1, title="Título nuevo", tags=["informe"])
+        content = service.document_repo.document.content
+        edited = content + " Un párrafo añadido al final."
+
+        service.update_document(1, content=edited, tags=["acta", "2024"])
+
+        after = stored(connector)
+        assert len(after) == len(service._split_text_into_chunks(edited, content_type="application/pdf"))
+        assert all(meta["tags"] == "acta,2024" for _, meta in after.values())
+
+    def test_legacy_chunks_are_matched_by_text(self, connector, embedding_function):
+        document = Document(id=2, title="Antiguo", uploaded_by=3, content_type="text/plain", content=make_text(200, seed=3))
+        service = DocumentService.__new__(DocumentService)
+        service.chromadb = connector
+        chunks = service._split_text_into_chunks(document.content, content_type="text/plain")
+        connector.add_documents(
+            "documents", [f"2_{i}" for i in range(len(chunks))], chunks,
+            [{"document_id": "2", "chunk_index": i} for i in range(len(chunks))]
+        )
+        embedding_function.embedded.clear()
+
+        stats = service._sync_document_chunks(document, chunks)
+
+        assert embedding_function.embedded == []
+        assert stats == {"added": 0, "kept": len(chunks), "updated": len(chunks), "deleted": 0}
+        result = connector.get_chunks("documents", where={"document_id": "2"})
+        assert sorted(result["ids"]) == sorted(f"2_{i}" for i in range(len(chunks)))
+        assert all(meta["chunk_hash"] for meta in result["metadatas"])
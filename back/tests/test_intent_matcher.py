@@ -0,0 +1,112 @@
+"""
+Tests para el matcher precompilado de intenciones (IntentMatcher)
+y su uso en ContextDetectionService
+"""
+import json
+import os
+
+import pytest
+
+from src.services.chat.context_detection_service import ContextDetectionService
+from src.services.chat.intent_matcher import IntentMatcher, DEFAULT_PATTERNS_PATH
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return IntentMatcher(reload_interval=0)
+
+
+class TestIntentMatcher:
+    """Tests para IntentMatcher con los patrones incluidos en el código"""
+
+    @pytest.mark.parametrize("text, category", [
+        ("Hola, ¿qué tal?", "saludos"),
+        ("muchas gracias", "agradecimientos"),
+        ("Como estás", "estado"),
+        ("¿QUIÉN ERES?", "identidad"),
+        ("buenos", "saludos"),
+        ("dame una receta de paella", "comida"),
+        ("cuanto es 2 + 2", "matematicas"),
+    ])
+    def test_out_of_context(self, matcher, text, category):
+        assert matcher.match(text).out_of_context == category
+
+    def test_category_priority_follows_file_order(self, matcher):
+        # "hola" (saludos) va antes que "gracias" (agradecimientos)
+        assert matcher.match("gracias y hola").out_of_context == "saludos"
+
+    @pytest.mark.parametrize("text", [
+        "resuma el informe trimestral",
+        "qué dice el contexto del contrato",
+        "explica el documento",
+    ])
+    def test_patterns_match_from_word_start(self, matcher, text):
+        # "suma" dentro de "resuma" ya no se confunde con matemáticas
+        assert matcher.match(text).out_of_context is None
+
+    def test_document_intents(self, matcher):
+        result = matcher.match("¿Qué documentos tengo?")
+        assert result.has("document_list")
+        assert result.has("document")
+        assert result.has("document_question")
+
+        result = matcher.match("Resúmeme el contenido del pdf")
+        assert result.has("document_content")
+        assert not result.has("document_list")
+
+    def test_accent_insensitive(self, matcher):
+        assert matcher.match("que documentos tengo").has("document_list")
+        assert matcher.match("INFORMACION del tramite").has("document")
+
+    def test_text_without_matches(self, matcher):
+        result = matcher.match("la fotosíntesis en plantas")
+        assert result.labels == frozenset()
+        assert result.out_of_context is None
+
+
+class TestIntentMatcherReload:
+    """Tests para la recarga en caliente del fichero de patrones"""
+
+    def _write(self, path, data, mtime):
+        path.write_text(json.dumps(data), encoding="utf-8")
+        os.utime(path, (mtime, mtime))
+
+    def test_reload_on_file_change(self, tmp_path):
+        path = tmp_path / "patterns.json"
+        self._write(path, {"out_of_context": {"saludos": {"patterns": ["hola"], "response": "r"}}}, 1000)
+        matcher = IntentMatcher(path=str(path), reload_interval=0.001)
+        assert matcher.match("hola").out_of_context == "saludos"
+
+        self._write(path, {"out_of_context": {"despedidas": {"patterns": ["chao"], "response": "r"}}}, 2000)
+        matcher._last_check = 0
+
+        assert matcher.match("hola").out_of_context is None
+        assert matcher.match("chao").out_of_context == "despedidas"
+
+    def test_invalid_file_keeps_previous_tables(self, tmp_path):
+        path = tmp_path / "patterns.json"
+        self._write(path, {"intents": {"document": ["pdf"]}}, 1000)
+        matcher = IntentMatcher(path=str(path), reload_interval=0)
+
+        path.write_text("{no es json", encoding="utf-8")
+
+        assert matcher.reload() is False
+        assert matcher.match("un pdf").has("document")
+
+
+class TestContextDetectionService:
+    """Tests para ContextDetectionService sobre el matcher"""
+
+    def test_detect_out_of_context(self, matcher):
+        service = ContextDetectionService(matcher=matcher)
+
+        assert service.detect_out_of_context("adiós") == (True, "despedidas")
+        assert service.detect_out_of_context("¿de qué trata el documento?") == (False, None)
+
+    def test_responses_come_from_data_file(self, matcher):
+        service = ContextDetectionService(matcher=matcher)
+        with open(DEFAULT_PATTERNS_PATH, encoding="utf-8") as f:
+            data = json.load(f)
+
+        assert service.get_context_specific_response("saludos", "hola") == data["out_of_context"]["saludos"]["response"]
+        assert service.is_document_related("busca en el archivo")
@@ -0,0 +1,152 @@
+"""
+Tests para el arranque perezoso: contenedor de servicios, informe de arranque
+e imports pesados diferidos
+"""
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from src.core.service_container import ServiceContainer
+from src.core.startup_report import StartupReport
+
+BACK_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+class Expensive:
+    built = 0
+
+    def __init__(self):
+        time.sleep(0.01)
+        Expensive.built += 1
+        self.value = 42
+
+
+class TestServiceContainer:
+
+    def setup_method(self):
+        Expensive.built = 0
+
+    def test_services_are_built_on_first_use_only_once(self):
+        container = ServiceContainer()
+        container.register("expensive", Expensive)
+
+        assert not container.is_built("expensive") and Expensive.built == 0
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(container.get("expensive"))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert Expensive.built == 1
+        assert all(result is results[0] for result in results)
+        assert container.report()["built"]["expensive"] >= 10
+
+    def test_lazy_reference_builds_on_attribute_access(self):
+        container = ServiceContainer()
+        container.register("expensive", Expensive)
+        reference = container.lazy("expensive")
+
+        assert "sin construir" in repr(reference) and Expensive.built == 0
+        assert reference.value == 42 and Expensive.built == 1
+        assert container.provider("expensive")() is container.get("expensive")
+
+    def test_dotted_factories_are_imported_on_first_use(self):
+        container = ServiceContainer()
+        container.register("counter", "collections:Counter")
+
+        assert container.get("counter") == {}
+
+    def test_override_reset_and_conflicting_registration(self):
+        container = ServiceContainer()
+        container.register("expensive", Expensive)
+        container.register("expensive", Expensive)
+        fake = object()
+
+        container.override("expensive", fake)
+        assert container.get("expensive") is fake
+        container.reset("expensive")
+        assert isinstance(container.get("expensive"), Expensive)
+        with pytest.raises(ValueError):
+            container.register("expensive", dict)
+        with pytest.raises(KeyError):
+            container.get("desconocido")
+
+
+class TestStartupReport:
+
+    def test_phases_are_sorted_by_duration(self):
+        ticks = iter([0.0, 1.5, 2.0, 2.1, 3.0, 3.5, 4.0])
+        report = StartupReport(clock=lambda: next(ticks))
+
+        report.imports_done()
+        with report.phase("token_blacklist"):
+            pass
+        with report.phase("spelling_vocabulary"):
+            pass
+        data = report.finish()
+
+        assert data["imports_seconds"] == 1.5 and data["ready_seconds"] == 4.0
+        assert list(data["phases_ms"]) == ["spelling_vocabulary", "token_blacklist"]
+        assert data["phases_ms"]["spelling_vocabulary"] == pytest.approx(500)
+
+    def test_deferred_phases_are_reported_apart(self):
+        ticks = iter([0.0, 1.0, 1.2, 5.0, 5.5, 6.0])
+        report = StartupReport(clock=lambda: next(ticks))
+
+        report.imports_done()
+        with report.phase("token_blacklist"):
+            pass
+        with report.deferred_phase("vector_collection_version"):
+            pass
+        data = report.to_dict()
+
+        assert list(data["phases_ms"]) == ["token_blacklist"]
+        assert data["deferred_ms"] == {"vector_collection_version": pytest.approx(500)}
+
+
+class TestDeferredImports:
+
+    def test_importing_the_app_does_not_load_heavy_sdks_or_build_services(self):
+        code = (
+            "import json, sys\n"
+            "import src.main\n"
+            "from src.core.service_container import services\n"
+            "print(json.dumps({'modules': [m for m in ('google.generativeai', 'chromadb', 'pandas',"
+            " 'pdfplumber', 'PyPDF2', 'sentence_transformers', 'sentry_sdk', 'supabase') if m in sys.modules],"
+            " 'built': list(services.report()['built'])}))\n"
+        )
+        env = dict(os.environ, LOG_LEVEL="WARNING")
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=BACK_DIR, env=env, capture_output=True, text=True, timeout=120
+        )
+
+        assert result.returncode == 0, result.stderr[-2000:]
+        data = json.loads(result.stdout.strip().splitlines()[-1])
+        assert data == {"modules": [], "built": []}
+
+    def test_dependency_probes_do_not_load_sdks(self):
+        code = (
+            "import asyncio, json, sys\n"
+            "import src.main\n"
+            "from src.services.dependency_monitor import DependencyMonitor\n"
+            "status = asyncio.run(DependencyMonitor(interval=0).check_all())\n"
+            "print(json.dumps({'modules': [m for m in ('google.generativeai', 'chromadb', 'supabase')"
+            " if m in sys.modules], 'statuses': sorted(d['status'] for d in status['dependencies'].values())}))\n"
+        )
+        env = dict(
+            os.environ, LOG_LEVEL="WARNING", CHROMA_PORT="1", GEMINI_API_KEY="test",
+            HEALTH_CHECK_TIMEOUT_SECONDS="2"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=BACK_DIR, env=env, capture_output=True, text=True, timeout=120
+        )
+
+        assert result.returncode == 0, result.stderr[-2000:]
+        data = json.loads(result.stdout.strip().splitlines()[-1])
+        assert data == {"modules": [], "statuses": ["down", "down", "down"]}
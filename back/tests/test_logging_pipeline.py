@@ -0,0 +1,103 @@
+"""
+Tests para el pipeline de logging (cola sin bloqueo, muestreo por módulo
+y supresión de duplicados)
+"""
+import logging
+import logging.handlers
+import queue
+
+from src.core.logging_config import (
+    AppLogger, ColoredFormatter, DuplicateFilter, JsonFormatter, LazyQueueHandler, SamplingFilter, parse_sampling
+)
+
+
+def make_record(name="src.api.dependencies", level=logging.INFO, msg="hola %s", args=("ana",), lineno=10, created=0.0):
+    record = logging.LogRecord(name, level, __file__, lineno, msg, args, None)
+    record.created = created
+    return record
+
+
+class TestSamplingFilter:
+
+    def test_parse_sampling(self):
+        assert parse_sampling("a.b=0.1, c=2,roto,d=x") == {"a.b": 0.1, "c": 1.0}
+
+    def test_samples_module_and_submodules_below_warning(self):
+        sampling = SamplingFilter({"src.api": 0.1, "src.api.dependencies": 0.0}, random_func=lambda: 0.5)
+
+        assert not sampling.filter(make_record("src.api.dependencies"))
+        assert not sampling.filter(make_record("src.api.endpoints.chat"))
+        assert sampling.filter(make_record("src.services.chat"))
+        assert sampling.filter(make_record("src.api.dependencies", level=logging.WARNING))
+
+
+class TestDuplicateFilter:
+
+    def test_bursts_are_limited_per_call_site_and_window(self):
+        duplicates = DuplicateFilter(window=10, burst=2)
+
+        passed = [duplicates.filter(make_record(created=t)) for t in (0, 1, 2, 3)]
+        other_line = duplicates.filter(make_record(lineno=11, created=4))
+        after_window = make_record(created=11)
+
+        assert passed == [True, True, False, False]
+        assert other_line
+        assert duplicates.filter(after_window)
+        assert after_window.suppressed == 2
+
+    def test_critical_is_never_suppressed(self):
+        duplicates = DuplicateFilter(window=10, burst=1)
+
+        assert all(duplicates.filter(make_record(level=logging.CRITICAL)) for _ in range(3))
+
+
+class TestLazyQueueHandler:
+
+    def test_message_is_formatted_by_the_listener(self):
+        log_queue = queue.SimpleQueue()
+        handler = LazyQueueHandler(log_queue)
+        record = make_record()
+
+        handler.handle(record)
+        queued = log_queue.get_nowait()
+
+        assert queued is record
+        assert queued.args == ("ana",) and not hasattr(queued, "message")
+        assert JsonFormatter().format(queued).count("hola ana") == 1
+
+    def test_colored_formatter_leaves_record_untouched(self):
+        record = make_record()
+        record.suppressed = 3
+
+        text = ColoredFormatter("%(levelname)s %(message)s").format(record)
+
+        assert record.levelname == "INFO"
+        assert text.endswith("hola ana [3 mensajes iguales suprimidos]")
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class TestShutdown:
+
+    def test_filters_count_each_record_once_after_shutdown(self):
+        app_logger = AppLogger.__new__(AppLogger)
+        app_logger._pipelines = []
+        logger = logging.getLogger("tests.logging_shutdown")
+        logger.propagate = False
+        console, log_file = ListHandler(), ListHandler()
+        app_logger._start_pipeline(logger, [console, log_file], filters=[DuplicateFilter(window=60, burst=2)])
+
+        app_logger.shutdown()
+        for _ in range(4):
+            logger.warning("repetido")
+
+        assert len(console.records) == len(log_file.records) == 2
+        for handler in logger.handlers[:]:
+            logger.removeHandler(handler)
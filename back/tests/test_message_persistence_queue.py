@@ -0,0 +1,304 @@
+"""
+Tests para la persistencia diferida de mensajes (MessagePersistenceQueue)
+"""
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.core.exceptions import DatabaseException
+from src.services.chat.message_persistence_queue import MessagePersistenceQueue
+
+
+class FakeMessageRepository:
+    """Repositorio en memoria que registra cada insert por lotes"""
+
+    def __init__(self, fail_times=0):
+        self.batches = []
+        self.existing = []
+        self.fail_times = fail_times
+        self._next_id = 1
+
+    def create_messages(self, rows):
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            raise Exception("base de datos no disponible")
+        self.batches.append(rows)
+        messages = []
+        for row in rows:
+            messages.append(SimpleNamespace(id=self._next_id, **row))
+            self._next_id += 1
+        return messages
+
+    def find_message(self, chat_id, question, created_at):
+        for row in self.existing:
+            if (row["id_chat"], row["question"], row["created_at"]) == (chat_id, question, created_at):
+                return SimpleNamespace(id=999, **row)
+        return None
+
+
+class SlowMessageRepository(FakeMessageRepository):
+    """Repositorio cuyo insert tarda, para parar la cola a mitad de lote"""
+
+    def __init__(self, delay):
+        super().__init__()
+        self.delay = delay
+        self.started = threading.Event()
+
+    def create_messages(self, rows):
+        self.started.set()
+        time.sleep(self.delay)
+        return super().create_messages(rows)
+
+
+class RejectingMessageRepository(FakeMessageRepository):
+    """Repositorio cuya base de datos rechaza las filas de un chat (borrado)"""
+
+    def __init__(self, rejected_chat):
+        super().__init__()
+        self.rejected_chat = rejected_chat
+        self.calls = 0
+
+    def create_messages(self, rows):
+        self.calls += 1
+        if any(row["id_chat"] == self.rejected_chat for row in rows):
+            try:
+                raise ValueError("insert or update on table messages violates foreign key constraint")
+            except ValueError as e:
+                # Como MessageRepository: el error original queda en __context__
+                raise DatabaseException(f"Error al crear mensajes en lote: {str(e)}")
+        return super().create_messages(rows)
+
+
+def read_wal(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+class TestMessagePersistenceQueue:
+    """Tests para MessagePersistenceQueue"""
+
+    @pytest.mark.asyncio
+    async def test_batches_and_resolves_ids(self, tmp_path):
+        repo = FakeMessageRepository()
+        queue = MessagePersistenceQueue(
+            wal_path=tmp_path / "wal.jsonl", batch_size=3, flush_interval_ms=1000, fsync=False, repository=repo
+        )
+        await queue.start()
+
+        futures = [await queue.enqueue(1, f"pregunta {i}", "respuesta") for i in range(3)]
+        ids = await asyncio.wait_for(asyncio.gather(*futures), timeout=1)
+
+        assert ids == [1, 2, 3]
+        assert len(repo.batches) == 1
+        assert [row["question"] for row in repo.batches[0]] == ["pregunta 0", "pregunta 1", "pregunta 2"]
+        # Todo confirmado: el WAL se trunca
+        assert queue.wal_file.read_text() == ""
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_save_waits_for_the_batch_and_returns_the_row(self, tmp_path):
+        repo = FakeMessageRepository()
+        queue = MessagePersistenceQueue(
+            wal_path=tmp_path / "wal.jsonl", batch_size=2, flush_interval_ms=10000, fsync=False, repository=repo
+        )
+        await queue.start()
+
+        first, second = await asyncio.wait_for(
+            asyncio.gather(queue.save(1, "a", "respuesta a"), queue.save(1, "b", "respuesta b")), timeout=1
+        )
+        await queue.stop()
+
+        assert (first["id"], first["question"]) == (1, "a")
+        assert (second["id"], second["answer"]) == (2, "respuesta b")
+        assert second["created_at"] and len(repo.batches) == 1
+
+    @pytest.mark.asyncio
+    async def test_flushes_partial_batch_after_interval(self, tmp_path):
+        repo = FakeMessageRepository()
+        queue = MessagePersistenceQueue(
+            wal_path=tmp_path / "wal.jsonl", batch_size=50, flush_interval_ms=20, fsync=False, repository=repo
+        )
+        await queue.start()
+
+        future = await queue.enqueue(1, "hola", "respuesta")
+
+        assert await asyncio.wait_for(future, timeout=1) == 1
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_message_is_in_wal_before_insert(self, tmp_path):
+        wal_path = tmp_path / "wal.jsonl"
+        queue = MessagePersistenceQueue(
+            wal_path=wal_path, batch_size=50, flush_interval_ms=10000, fsync=False,
+            repository=FakeMessageRepository()
+        )
+        await queue.start()
+
+        await queue.enqueue(7, "pregunta", "respuesta")
+
+        records = read_wal(queue.wal_file)
+        assert records[0]["op"] == "put"
+        assert records[0]["row"]["id_chat"] == 7
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_recovers_unacknowledged_messages(self, tmp_path):
+        wal_path = tmp_path / "wal.jsonl"
+        lines = [
+            {"op": "put", "key": "a", "row": {"id_chat": 1, "question": "q1", "answer": "r", "created_at": "t1"}},
+            {"op": "put", "key": "b", "row": {"id_chat": 1, "question": "q2", "answer": "r", "created_at": "t2"}},
+            {"op": "ack", "keys": ["a"]},
+            {"op": "put", "key": "c", "row": {"id_chat": 2, "question": "q3", "answer": "r", "created_at": "t3"}},
+        ]
+        # Última línea cortada por una caída a mitad de escritura
+        wal_path.write_text("\n".join(json.dumps(line) for line in lines) + '\n{"op": "pu', encoding="utf-8")
+
+        repo = FakeMessageRepository()
+        # "c" llegó a insertarse pero la caída ocurrió antes del ack
+        repo.existing.append(lines[3]["row"])
+        queue = MessagePersistenceQueue(
+            wal_path=wal_path, batch_size=50, flush_interval_ms=10, fsync=False, repository=repo
+        )
+        await queue.start()
+        await asyncio.sleep(0.05)
+        await queue.stop()
+
+        assert [[row["question"] for row in batch] for batch in repo.batches] == [["q2"]]
+        assert queue._read_wal() == []
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_stays_in_wal_and_retries(self, tmp_path):
+        wal_path = tmp_path / "wal.jsonl"
+        repo = FakeMessageRepository(fail_times=1)
+        queue = MessagePersistenceQueue(
+            wal_path=wal_path, batch_size=1, flush_interval_ms=10, fsync=False, repository=repo
+        )
+        await queue.start()
+
+        future = await queue.enqueue(1, "pregunta", "respuesta")
+
+        assert await asyncio.wait_for(future, timeout=1) == 1
+        assert queue.get_stats()["failed_batches"] == 1
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_rejected_row_is_dead_lettered_without_blocking(self, tmp_path):
+        wal_path = tmp_path / "wal.jsonl"
+        repo = RejectingMessageRepository(rejected_chat=2)
+        queue = MessagePersistenceQueue(
+            wal_path=wal_path, batch_size=3, flush_interval_ms=10000, fsync=False, repository=repo
+        )
+        await queue.start()
+
+        futures = [await queue.enqueue(chat_id, f"pregunta {chat_id}", "respuesta") for chat_id in (1, 2, 3)]
+
+        assert await asyncio.wait_for(futures[0], timeout=1) == 1
+        assert await asyncio.wait_for(futures[2], timeout=1) == 2
+        with pytest.raises(DatabaseException):
+            await futures[1]
+        later = await queue.enqueue(4, "pregunta 4", "respuesta")
+        await queue.stop()
+
+        assert later.done() and later.result() == 3
+        assert queue.get_stats()["dead_lettered"] == 1 and queue.get_stats()["failed_batches"] == 0
+        (dead,) = read_wal(queue.dead_letter_file)
+        assert dead["row"]["id_chat"] == 2 and "foreign key" in dead["error"]
+
+        # Tras reiniciar no se vuelve a intentar
+        calls = repo.calls
+        restarted = MessagePersistenceQueue(
+            wal_path=wal_path, batch_size=3, flush_interval_ms=10000, fsync=False, repository=repo
+        )
+        await restarted.start()
+        await restarted.stop()
+        assert restarted.get_stats()["recovered"] == 0 and repo.calls == calls
+
+    @pytest.mark.asyncio
+    async def test_stop_keeps_unsaved_messages_for_next_start(self, tmp_path):
+        wal_path = tmp_path / "wal.jsonl"
+        queue = MessagePersistenceQueue(
+            wal_path=wal_path, batch_size=50, flush_interval_ms=10000, fsync=False,
+            repository=FakeMessageRepository(fail_times=100)
+        )
+        await queue.start()
+        future = await queue.enqueue(1, "pregunta", "respuesta")
+
+        await queue.stop()
+
+        assert future.cancelled()
+        assert len(queue._read_wal()) == 1
+
+    @pytest.mark.asyncio
+    async def test_stop_during_insert_does_not_insert_twice(self, tmp_path):
+        repo = SlowMessageRepository(delay=0.2)
+        queue = MessagePersistenceQueue(
+            wal_path=tmp_path / "wal.jsonl", batch_size=1, flush_interval_ms=10000, fsync=False, repository=repo
+        )
+        await queue.start()
+        future = await queue.enqueue(1, "pregunta", "respuesta")
+        await asyncio.to_thread(repo.started.wait, 1)
+
+        await queue.stop()
+
+        assert len(repo.batches) == 1
+        assert future.result() == 1
+        assert queue._read_wal() == []
+
+    @pytest.mark.asyncio
+    async def test_concurrent_messages_share_wal_fsync(self, tmp_path, monkeypatch):
+        fsyncs = []
+
+        def slow_fsync(fd):
+            fsyncs.append(threading.get_ident())
+            time.sleep(0.02)
+
+        monkeypatch.setattr("src.services.chat.message_persistence_queue.os.fsync", slow_fsync)
+        queue = MessagePersistenceQueue(
+            wal_path=tmp_path / "wal.jsonl", batch_size=50, flush_interval_ms=10000, fsync=True,
+            repository=FakeMessageRepository()
+        )
+        await queue.start()
+
+        await asyncio.gather(*(queue.enqueue(1, f"pregunta {i}", "respuesta") for i in range(20)))
+
+        # Ningún fsync en el hilo del event loop y uno por grupo, no por mensaje
+        assert threading.get_ident() not in fsyncs
+        assert 1 <= len(fsyncs) <= 3
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_workers_keep_separate_wals_and_adopt_orphans(self, tmp_path, monkeypatch):
+        wal_path = tmp_path / "wal.jsonl"
+
+        # Worker 1: la base de datos no responde, su mensaje queda pendiente
+        monkeypatch.setattr("src.services.chat.message_persistence_queue.os.getpid", lambda: 1001)
+        first = MessagePersistenceQueue(
+            wal_path=wal_path, batch_size=50, flush_interval_ms=10000, fsync=False,
+            repository=FakeMessageRepository(fail_times=100)
+        )
+        await first.start()
+        await first.enqueue(1, "pendiente", "respuesta")
+
+        # WAL de un worker que murió con un mensaje sin insertar
+        orphan = tmp_path / "wal.4242.jsonl"
+        orphan.write_text(json.dumps(
+            {"op": "put", "key": "o", "row": {"id_chat": 3, "question": "huérfano", "answer": "r", "created_at": "t"}}
+        ) + "\n", encoding="utf-8")
+
+        # Worker 2: adopta el WAL huérfano pero no el del worker 1, que sigue vivo
+        monkeypatch.setattr("src.services.chat.message_persistence_queue.os.getpid", lambda: 1002)
+        repo = FakeMessageRepository()
+        second = MessagePersistenceQueue(
+            wal_path=wal_path, batch_size=50, flush_interval_ms=10, fsync=False, repository=repo
+        )
+        await second.start()
+        await asyncio.sleep(0.05)
+        await second.stop()
+
+        assert [[row["question"] for row in batch] for batch in repo.batches] == [["huérfano"]]
+        assert not orphan.exists()
+        assert [record["row"]["question"] for record in first._read_wal()] == ["pendiente"]
+        await first.stop()
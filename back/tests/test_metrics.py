@@ -0,0 +1,127 @@
+"""
+Tests para el registro de métricas Prometheus y su instrumentación
+"""
+import threading
+
+import httpx
+import pytest
+
+from src.config.database import instrument_supabase_client
+from src.core.metrics import MetricsRegistry, metrics
+from src.utils.chromadb_connector import _TimedEmbeddingFunction
+
+
+def sample(text, line_prefix):
+    """Valor de la primera línea de la exposición que empieza por line_prefix"""
+    for line in text.splitlines():
+        if line.startswith(line_prefix):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"No hay muestra {line_prefix} en:\n{text}")
+
+
+class TestMetricsRegistry:
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram("op_seconds", "Operación", ["op"], buckets=(0.1, 1.0))
+
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.labels("query").observe(value)
+        text = registry.render()
+
+        assert "# TYPE op_seconds histogram" in text
+        assert sample(text, 'op_seconds_bucket{op="query",le="0.1"}') == 2
+        assert sample(text, 'op_seconds_bucket{op="query",le="1"}') == 3
+        assert sample(text, 'op_seconds_bucket{op="query",le="+Inf"}') == 4
+        assert sample(text, 'op_seconds_count{op="query"}') == 4
+        assert sample(text, 'op_seconds_sum{op="query"}') == pytest.approx(3.65)
+
+    def test_observations_from_many_threads_are_not_lost(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram("hot_seconds", "Camino caliente")
+        counter = registry.counter("hot_calls", "Llamadas")
+
+        def work():
+            for _ in range(5000):
+                histogram.observe(0.001)
+                counter.inc()
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        text = registry.render()
+
+        assert sample(text, "hot_seconds_count") == 40000
+        assert sample(text, "hot_calls_total") == 40000
+
+    def test_gauge_functions_run_at_scrape_and_failures_are_skipped(self):
+        registry = MetricsRegistry()
+        depth = registry.gauge("queue_depth", "Cola", ["queue"])
+        pending = [3]
+        depth.labels("emails").set_function(lambda: pending[0])
+        depth.labels("rota").set_function(lambda: 1 / 0)
+
+        pending[0] = 7
+        text = registry.render()
+
+        assert sample(text, 'queue_depth{queue="emails"}') == 7
+        assert 'queue="rota"' not in text
+
+    def test_same_name_returns_same_metric_and_conflicts_raise(self):
+        registry = MetricsRegistry()
+        first = registry.histogram("x_seconds", "X", ["model"])
+
+        assert registry.histogram("x_seconds", "X", ["model"]) is first
+        with pytest.raises(ValueError):
+            registry.counter("x_seconds", "X", ["model"])
+        with pytest.raises(ValueError):
+            first.labels("a", "b")
+
+    def test_label_values_are_escaped(self):
+        registry = MetricsRegistry()
+        registry.counter("errors", "Errores", ["route"]).labels('/a"b\\c').inc()
+
+        assert 'errors_total{route="/a\\"b\\\\c"} 1' in registry.render()
+
+    def test_unlabelled_metrics_are_exposed_before_first_observation(self):
+        registry = MetricsRegistry()
+        registry.histogram("ttft_seconds", "TTFT", buckets=(1.0,))
+
+        assert sample(registry.render(), "ttft_seconds_count") == 0
+
+
+class TestInstrumentation:
+
+    def test_supabase_latency_is_labelled_by_table(self):
+        class FakePostgrest:
+            def __init__(self):
+                self.session = httpx.Client(
+                    base_url="http://supabase.test",
+                    transport=httpx.MockTransport(lambda request: httpx.Response(200, json=[]))
+                )
+
+        class FakeClient:
+            @staticmethod
+            def _init_postgrest_client(*args, **kwargs):
+                return FakePostgrest()
+
+        client = instrument_supabase_client(FakeClient())
+        child = metrics.get("supabase_request_duration_seconds").labels("documents_test", "GET")
+        before = child.snapshot()[2]
+
+        postgrest = client._init_postgrest_client("http://supabase.test/rest/v1", {}, "public", 5)
+        postgrest.session.get("/rest/v1/documents_test", params={"select": "*"})
+
+        assert child.snapshot()[2] == before + 1
+
+    def test_timed_embedding_function_keeps_chroma_signature(self):
+        from chromadb.api.types import validate_embedding_function
+
+        function = _TimedEmbeddingFunction(lambda input: [[0.0, 1.0] for _ in input], "modelo-test")
+        child = metrics.get("embedding_duration_seconds").labels("modelo-test")
+
+        validate_embedding_function(function)
+        assert function(["a", "b"]) == [[0.0, 1.0], [0.0, 1.0]]
+        assert child.snapshot()[2] == 1
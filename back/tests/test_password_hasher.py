@@ -0,0 +1,150 @@
+"""
+Tests para el hashing de contraseñas fuera del event loop (formatos,
+rehash en el login y control de admisión)
+"""
+import asyncio
+import base64
+import hashlib
+from types import SimpleNamespace
+
+import pytest
+
+from src.core.exceptions import RateLimitException, UnauthorizedException
+from src.services.authentication_service import AuthenticationService
+from src.services.password_hasher import PasswordHasher
+from src.utils.password_utils import hash_password, needs_rehash, verify_password
+
+
+def legacy_hash(password):
+    salt = b"0123456789abcdef"
+    key = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, 100000)
+    return "$pbkdf2$" + base64.b64encode(salt + key).decode("utf-8")
+
+
+class TestPasswordUtils:
+
+    def test_hash_stores_its_iterations(self):
+        stored = hash_password("secreta", iterations=1000)
+
+        assert stored.startswith("$pbkdf2-sha256$1000$")
+        assert verify_password("secreta", stored)
+        assert not verify_password("otra", stored)
+
+    def test_legacy_hashes_still_verify_and_need_rehash(self):
+        stored = legacy_hash("secreta")
+
+        assert verify_password("secreta", stored)
+        assert needs_rehash(stored, iterations=1000)
+        assert needs_rehash(hash_password("secreta", iterations=1000), iterations=2000)
+        assert not needs_rehash(hash_password("secreta", iterations=2000), iterations=2000)
+
+
+class TestPasswordHasher:
+
+    @pytest.mark.asyncio
+    async def test_verify_and_upgrade_only_rehashes_old_parameters(self):
+        hasher = PasswordHasher(workers=2, executor_type="thread", iterations=1000)
+
+        valid, upgraded = await hasher.verify_and_upgrade("secreta", legacy_hash("secreta"))
+        assert valid and upgraded.startswith("$pbkdf2-sha256$1000$")
+        assert await hasher.verify("secreta", upgraded)
+
+        assert await hasher.verify_and_upgrade("secreta", upgraded) == (True, None)
+        assert await hasher.verify_and_upgrade("otra", upgraded) == (False, None)
+        hasher.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_full_queue_rejects_instead_of_piling_up(self):
+        hasher = PasswordHasher(workers=1, executor_type="thread", max_queue=2, iterations=200000)
+
+        results = await asyncio.gather(
+            *(hasher.hash("secreta") for _ in range(4)), return_exceptions=True
+        )
+
+        assert sum(isinstance(r, RateLimitException) for r in results) == 2
+        assert hasher.get_stats()["rejected"] == 2 and hasher.get_stats()["waiting"] == 0
+        hasher.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_process_pool(self):
+        hasher = PasswordHasher(workers=1, executor_type="process", iterations=1000)
+
+        stored = await hasher.hash("secreta")
+
+        assert await hasher.verify("secreta", stored)
+        hasher.shutdown()
+
+
+class FakeUserRepository:
+    def __init__(self):
+        self.updates = []
+
+    def update(self, user, data):
+        self.updates.append(data)
+        return True
+
+
+class TestLoginRehash:
+
+    def make_service(self, monkeypatch, stored_hash):
+        from src.services import authentication_service
+
+        user = SimpleNamespace(
+            id=1, auth_id="a", username="ana", email="ana@example.com", is_admin=False,
+            password_hash=stored_hash, reset_token=None
+        )
+        service = AuthenticationService.__new__(AuthenticationService)
+        service.repository = FakeUserRepository()
+        service.base_auth = SimpleNamespace(
+            _create_access_token=lambda data: "access", _create_refresh_token=lambda data: "refresh"
+        )
+        monkeypatch.setattr(service, "_find_login_user", lambda username: user)
+        monkeypatch.setattr(
+            authentication_service, "password_hasher",
+            PasswordHasher(workers=1, executor_type="thread", iterations=1000)
+        )
+        return service
+
+    @pytest.mark.asyncio
+    async def test_login_upgrades_legacy_hash_in_the_same_write(self, monkeypatch):
+        service = self.make_service(monkeypatch, legacy_hash("secreta"))
+
+        result = await service.handle_normal_login("ana", "secreta")
+
+        assert result["access_token"] == "access"
+        (update,) = service.repository.updates
+        assert update["refresh_token"] == "refresh"
+        assert update["password_hash"].startswith("$pbkdf2-sha256$1000$")
+        assert verify_password("secreta", update["password_hash"])
+
+    @pytest.mark.asyncio
+    async def test_wrong_password_is_rejected_without_writes(self, monkeypatch):
+        service = self.make_service(monkeypatch, legacy_hash("secreta"))
+
+        with pytest.raises(UnauthorizedException):
+            await service.handle_normal_login("ana", "otra")
+        assert service.repository.updates == []
+
+    @pytest.mark.asyncio
+    async def test_credentials_check_verifies_through_the_hasher(self, monkeypatch):
+        from src.services import authentication_service
+
+        service = self.make_service(monkeypatch, legacy_hash("secreta"))
+        user = service._find_login_user("ana")
+        service.validation_service = SimpleNamespace(
+            validate_credentials_format=lambda username, password: (username, password)
+        )
+        service.repository.get_by_username = lambda username: user
+        verified = []
+        hasher = authentication_service.password_hasher
+        original_verify = hasher.verify
+
+        async def recording_verify(password, stored_hash):
+            verified.append(password)
+            return await original_verify(password, stored_hash)
+
+        monkeypatch.setattr(hasher, "verify", recording_verify)
+
+        assert await service.verify_user_credentials("ana", "secreta") is user
+        assert await service.verify_user_credentials("ana", "otra") is None
+        assert verified == ["secreta", "otra"]
@@ -0,0 +1,128 @@
+"""
+Tests para el diagnóstico en producción: bloqueos del event loop, profiler de CPU y tracemalloc
+"""
+import asyncio
+from collections import Counter
+import threading
+import time
+import tracemalloc
+
+import pytest
+
+from src.core.exceptions import ConflictException, NotFoundException, ValidationException
+from src.services.profiling_service import (
+    LoopLagMonitor, MemorySnapshots, SamplingProfiler, collapsed_text, render_flamegraph_svg
+)
+
+
+def blocking_callback():
+    time.sleep(0.3)
+
+
+def busy_function(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+class TestLoopLagMonitor:
+
+    @pytest.mark.asyncio
+    async def test_captures_stack_of_blocking_callback(self):
+        monitor = LoopLagMonitor(threshold_ms=50, interval_ms=10, max_events=5)
+        await monitor.start()
+        try:
+            await asyncio.sleep(0.05)
+            blocking_callback()
+            await asyncio.sleep(0.05)
+        finally:
+            await monitor.stop()
+
+        events = monitor.get_events()
+        assert len(events) == 1 and monitor.stalls == 1
+        assert "in blocking_callback" in events[0]["stack"][-1]
+        assert events[0]["blocked_ms"] >= 250 and events[0]["resolved_at"] is not None
+        assert monitor.get_stats()["max_lag_ms"] >= 250
+
+    @pytest.mark.asyncio
+    async def test_idle_loop_records_nothing(self):
+        monitor = LoopLagMonitor(threshold_ms=100, interval_ms=10)
+        await monitor.start()
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+
+        assert monitor.get_events() == [] and not monitor.running
+
+
+class TestSamplingProfiler:
+
+    def test_collapsed_stacks_contain_busy_function(self):
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_function, args=(stop,), name="busy")
+        worker.start()
+        try:
+            result = SamplingProfiler(max_seconds=5).profile(0.2, 0.002, {worker.ident})
+        finally:
+            stop.set()
+            worker.join()
+
+        assert result["samples"] > 10
+        busy = sum(count for stack, count in result["stacks"].items() if "busy_function" in stack)
+        assert busy == result["samples"]
+        assert all(stack.startswith("busy;") for stack in result["stacks"])
+        assert collapsed_text(result["stacks"]).splitlines()[0].rsplit(" ", 1)[1].isdigit()
+
+    def test_limits_and_single_profile_at_a_time(self):
+        profiler = SamplingProfiler(max_seconds=1)
+
+        with pytest.raises(ValidationException):
+            profiler.profile(5)
+        profiler._busy.acquire()
+        try:
+            with pytest.raises(ConflictException):
+                profiler.profile(0.1)
+        finally:
+            profiler._busy.release()
+
+    def test_flamegraph_svg_has_one_frame_per_function(self):
+        stacks = Counter({"main;handler (a.py:1);query (b.py:5)": 3, "main;handler (a.py:1)": 1, "main;<idle>": 4})
+
+        svg = render_flamegraph_svg(stacks, title="prueba <1>")
+
+        assert svg.startswith("<svg") and "prueba &lt;1&gt; (8 muestras)" in svg
+        assert svg.count("<rect") == 4
+        assert "query (b.py:5) (3 muestras, 37.5%)" in svg
+
+
+class TestMemorySnapshots:
+
+    @pytest.fixture
+    def snapshots(self):
+        snapshots = MemorySnapshots(max_snapshots=2)
+        yield snapshots
+        snapshots.stop()
+
+    def test_diff_shows_growth_between_snapshots(self, snapshots):
+        snapshots.start(frames=5)
+        first = snapshots.take("antes")
+        retained = [bytearray(1024) for _ in range(500)]
+        second = snapshots.take("después")
+
+        diff = snapshots.diff(first["id"], second["id"])
+
+        assert diff["size_diff_kb"] >= 500
+        assert "test_profiling.py" in diff["top"][0]["location"]
+        assert diff["top"][0]["count_diff"] >= 500
+        assert len(retained) == 500
+
+    def test_requires_tracing_and_keeps_only_the_latest(self, snapshots):
+        if tracemalloc.is_tracing():
+            pytest.skip("tracemalloc activado fuera del test")
+        with pytest.raises(ValidationException):
+            snapshots.take()
+
+        snapshots.start()
+        ids = [snapshots.take()["id"] for _ in range(3)]
+
+        assert [entry["id"] for entry in snapshots.list()] == ids[1:]
+        with pytest.raises(NotFoundException):
+            snapshots.diff(ids[0], ids[2])
@@ -0,0 +1,292 @@
+"""
+Tests para la re-indexación completa en colección sombra
+"""
+import threading
+
+import pytest
+
+from src.config.settings import settings
+from src.core.exceptions import ConflictException
+from src.services.reindex_service import ReindexJob, ReindexService, content_hash
+
+
+def chunker(text, content_type=None):
+    return [text[i:i + 20] for i in range(0, len(text), 20)]
+
+
+class FakeDocumentRepository:
+    def __init__(self, documents):
+        self.documents = documents
+        self.pages = 0
+        self.on_page = None
+        self.chunk_counts = {}
+
+    def list_for_deletion(self, document_ids):
+        return [{"id": doc_id} for doc_id in document_ids if doc_id in self.documents]
+
+    def count_all(self):
+        return len(self.documents)
+
+    def set_chunk_count(self, document_id, chunk_count):
+        self.chunk_counts[document_id] = chunk_count
+
+    def list_for_reindex(self, after_id, limit, updated_since=None):
+        self.pages += 1
+        if self.on_page:
+            self.on_page(self.pages)
+        rows = [
+            dict(doc) for doc in sorted(self.documents.values(), key=lambda d: d["id"])
+            if doc["id"] > after_id and (not updated_since or doc["updated_at"] >= updated_since)
+        ]
+        return rows[:limit]
+
+
+class FakeChroma:
+    def __init__(self, model="all-MiniLM-L6-v2"):
+        self.collections = {"documents": {}}
+        self.models = {"documents": model}
+        self.metadata = {}
+        self.active = "documents"
+        self.migrating_to = None
+        self.embedded = []
+        self.lock = threading.Lock()
+
+    def get_active_collection_name(self):
+        return self.active
+
+    def set_active_collection_name(self, name):
+        previous, self.active, self.migrating_to = self.active, name, None
+        return previous
+
+    def create_version(self, embedding_model, metadata=None):
+        name = f"documents_v{len(self.collections)}"
+        self.collections[name] = {}
+        self.models[name] = embedding_model
+        self.metadata[name] = dict(metadata or {})
+        return name
+
+    def collection_model(self, name):
+        return self.models[name]
+
+    def collection_metadata(self, name):
+        return {"embedding_model": self.models[name], **self.metadata.get(name, {})}
+
+    def begin_migration(self, name):
+        self.migrating_to = name
+
+    def garbage_collect_collections(self):
+        return []
+
+    def embed(self, texts, model=None):
+        with self.lock:
+            self.embedded.extend(texts)
+        return [[float(len(text))] for text in texts]
+
+    def get_chunks(self, name, where=None, include=None):
+        wanted = set(where["document_id"]["$in"])
+        rows = [(cid, r) for cid, r in self.collections[name].items() if r["metadata"]["document_id"] in wanted]
+        include = include or ["metadatas"]
+        return {
+            "ids": [cid for cid, _ in rows],
+            "documents": [r["document"] for _, r in rows] if "documents" in include else None,
+            "embeddings": [r["embedding"] for _, r in rows] if "embeddings" in include else None,
+            "metadatas": [r["metadata"] for _, r in rows] if "metadatas" in include else None,
+        }
+
+    def iter_chunk_metadatas(self, name, page_size=1000):
+        metadatas = [r["metadata"] for r in self.collections[name].values()]
+        for start in range(0, len(metadatas), page_size):
+            page = metadatas[start:start + page_size]
+            yield [None] * len(page), page
+
+    def upsert_embeddings(self, name, document_ids, chunks, embeddings, metadatas):
+        for cid, chunk, embedding, metadata in zip(document_ids, chunks, embeddings, metadatas):
+            self.collections[name][cid] = {"document": chunk, "embedding": embedding, "metadata": metadata}
+
+    def delete_where(self, name, where):
+        wanted = set(where["document_id"]["$in"])
+        collection = self.collections[name]
+        for cid in [cid for cid, r in collection.items() if r["metadata"]["document_id"] in wanted]:
+            del collection[cid]
+
+
+def make_document(doc_id, content, updated_at="2025-01-01T00:00:00"):
+    return {"id": doc_id, "title": f"doc {doc_id}", "content": content,
+            "content_type": "text/plain", "uploaded_by": 1, "updated_at": updated_at}
+
+
+def index_in_source(chroma, doc, tags=""):
+    digest = content_hash(doc["content"], doc["content_type"])
+    for i, chunk in enumerate(chunker(doc["content"])):
+        chroma.collections["documents"][f"{doc['id']}_{i}"] = {
+            "document": chunk, "embedding": [-1.0],
+            "metadata": {"document_id": str(doc["id"]), "content_hash": digest, "tags": tags}
+        }
+
+
+@pytest.fixture
+def make_service(tmp_path):
+    def make(documents, chroma=None, page_size=2):
+        return ReindexService(
+            document_repo=FakeDocumentRepository(documents),
+            chromadb=chroma or FakeChroma(),
+            state_dir=str(tmp_path),
+            page_size=page_size,
+            workers=3,
+            embed_batch_size=2
+        )
+    return make
+
+
+class TestReindexService:
+
+    def test_unchanged_documents_are_copied_not_embedded(self, make_service):
+        documents = {i: make_document(i, f"contenido del documento número {i} " * 3) for i in range(1, 6)}
+        chroma = FakeChroma()
+        index_in_source(chroma, documents[2])
+        service = make_service(documents, chroma)
+
+        job = service.start(chunker, resume=False)
+        service._thread.join(5)
+
+        assert job.status == "completed"
+        assert chroma.active == job.target_collection
+        assert job.documents_copied == 1 and job.documents_reindexed == 4
+        target = chroma.collections[job.target_collection]
+        assert target["2_0"]["embedding"] == [-1.0]
+        assert all(not text.startswith("contenido del documento número 2 ") for text in chroma.embedded)
+        assert job.chunks_embedded == len(chroma.embedded)
+        assert job.throughput["documents_per_second"] > 0
+
+    def test_edited_documents_reuse_unchanged_chunk_embeddings(self, make_service):
+        original = make_document(1, "".join(chr(65 + i) * 20 for i in range(6)))
+        chroma = FakeChroma()
+        index_in_source(chroma, original)
+        documents = {1: make_document(1, original["content"][:-1] + "z")}
+        service = make_service(documents, chroma)
+
+        job = service.start(chunker, resume=False)
+        service._thread.join(5)
+
+        assert chroma.embedded == ["F" * 19 + "z"]
+        assert job.chunks_copied == 5 and job.chunks_embedded == 1
+        target = chroma.collections[job.target_collection]
+        assert sum(r["embedding"] == [-1.0] for r in target.values()) == 5
+
+    def test_parallel_embeddings_keep_chunk_order(self, make_service):
+        documents = {1: make_document(1, "".join(chr(65 + i) * 20 for i in range(10)))}
+        chroma = FakeChroma()
+        service = make_service(documents, chroma)
+
+        chroma.collections["documents_v1"] = {}
+        job = ReindexJob(job_id="test", source_collection="documents", target_collection="documents_v1")
+        service.run(job, chunker)
+
+        target = sorted(chroma.collections[job.target_collection].values(), key=lambda r: r["metadata"]["chunk_index"])
+        assert [r["document"] for r in target] == [chr(65 + i) * 20 for i in range(10)]
+
+    def test_interrupted_job_resumes_from_checkpoint(self, make_service):
+        documents = {i: make_document(i, f"texto suficiente del documento {i}") for i in range(1, 6)}
+        chroma = FakeChroma()
+        service = make_service(documents, chroma)
+        service.document_repo.on_page = lambda page: page == 2 and service._stopping.set()
+
+        first = service.start(chunker, resume=False)
+        service._thread.join(5)
+        service._stopping.clear()
+        assert first.status == "interrupted" and first.last_id == 4
+        assert chroma.active == "documents"
+
+        service.document_repo.on_page = None
+        service._job = None
+        resumed = service.start(chunker)
+        service._thread.join(5)
+
+        assert resumed.job_id == first.job_id and resumed.status == "completed"
+        assert chroma.active == first.target_collection
+        assert {key.split("_")[0] for key in chroma.collections[first.target_collection]} == {"1", "2", "3", "4", "5"}
+        assert resumed.documents_processed >= 5
+
+    def test_documents_changed_during_run_are_synced(self, make_service):
+        documents = {i: make_document(i, f"versión original del documento {i}") for i in range(1, 4)}
+        chroma = FakeChroma()
+        service = make_service(documents, chroma)
+
+        def edit_during_run(page):
+            if page == 2:
+                documents[1] = make_document(1, "versión editada mientras se re-indexa", "9999-01-01T00:00:00")
+
+        service.document_repo.on_page = edit_during_run
+        job = service.start(chunker, resume=False)
+        service._thread.join(5)
+
+        target = chroma.collections[job.target_collection]
+        texts = "".join(r["document"] for cid, r in sorted(target.items()) if cid.startswith("1_"))
+        assert texts == "versión editada mientras se re-indexa"
+
+    def test_documents_deleted_during_run_are_dropped_from_target(self, make_service):
+        documents = {i: make_document(i, f"versión original del documento {i}") for i in range(1, 4)}
+        chroma = FakeChroma()
+        service = make_service(documents, chroma)
+
+        def delete_during_run(page):
+            # Un worker con el registro en caché borra el documento solo de la activa
+            if page == 2:
+                del documents[1]
+
+        service.document_repo.on_page = delete_during_run
+        job = service.start(chunker, resume=False)
+        service._thread.join(5)
+
+        assert job.status == "completed" and job.documents_removed == 1
+        target = chroma.collections[job.target_collection]
+        assert target and not any(cid.startswith("1_") for cid in target)
+
+    def test_new_embedding_model_never_copies_vectors(self, make_service, monkeypatch):
+        documents = {i: make_document(i, f"contenido estable del documento {i}") for i in range(1, 4)}
+        chroma = FakeChroma()
+        for doc in documents.values():
+            index_in_source(chroma, doc)
+        monkeypatch.setattr(settings, "SENTENCE_TRANSFORMER_MODEL", "paraphrase-multilingual-MiniLM-L12-v2")
+        service = make_service(documents, chroma)
+        assert service.needs_migration()
+
+        job = service.start(chunker, resume=False)
+        assert chroma.migrating_to == job.target_collection
+        service._thread.join(5)
+
+        assert job.target_collection == "documents_v1"
+        assert chroma.models[job.target_collection] == "paraphrase-multilingual-MiniLM-L12-v2"
+        assert job.documents_copied == 0 and job.documents_reindexed == 3
+        assert all(r["embedding"] != [-1.0] for r in chroma.collections[job.target_collection].values())
+        assert chroma.active == job.target_collection and chroma.migrating_to is None
+        assert not service.needs_migration()
+
+    @pytest.mark.parametrize("model", [None, "paraphrase-multilingual-MiniLM-L12-v2"])
+    def test_rechunked_documents_keep_their_tags(self, make_service, monkeypatch, model):
+        original = make_document(1, "contenido original del documento con tags")
+        chroma = FakeChroma()
+        index_in_source(chroma, original, tags="informe,2024")
+        if model:
+            monkeypatch.setattr(settings, "SENTENCE_TRANSFORMER_MODEL", model)
+        documents = {1: make_document(1, "contenido editado del documento con tags")}
+        service = make_service(documents, chroma)
+
+        job = service.start(chunker, resume=False)
+        service._thread.join(5)
+
+        assert job.documents_reindexed == 1
+        target = chroma.collections[job.target_collection].values()
+        assert target and all(r["metadata"]["tags"] == "informe,2024" for r in target)
+
+    def test_only_one_job_at_a_time(self, make_service):
+        release = threading.Event()
+        documents = {1: make_document(1, "contenido de prueba suficiente")}
+        service = make_service(documents)
+        service.document_repo.on_page = lambda page: release.wait(5)
+
+        service.start(chunker, resume=False)
+        with pytest.raises(ConflictException):
+            service.start(chunker, resume=False)
+        release.set()
+        service._thread.join(5)
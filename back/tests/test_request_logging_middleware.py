@@ -0,0 +1,118 @@
+"""
+Tests para el middleware ASGI de registro de peticiones
+"""
+import json
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.middleware import request_logging
+from src.api.middleware.request_logging import RequestLoggingMiddleware
+from src.core.exceptions import UnauthorizedException
+from src.core.logging_config import JsonFormatter
+
+
+class FakeAppLogger:
+    def __init__(self):
+        self.requests = []
+
+    def log_request(self, method, url, status_code, duration, user_id=None, bytes_sent=None):
+        self.requests.append((method, url, status_code, bytes_sent))
+
+
+@pytest.fixture
+def access_log(monkeypatch):
+    fake = FakeAppLogger()
+    monkeypatch.setattr(request_logging, "app_logger", fake)
+    return fake
+
+
+def make_client(**options):
+    app = FastAPI()
+
+    @app.get("/api/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id}
+
+    @app.get("/api/expired")
+    async def expired():
+        raise UnauthorizedException("Token expirado")
+
+    app.add_middleware(RequestLoggingMiddleware, **options)
+    return TestClient(app, raise_server_exceptions=False)
+
+
+class TestRequestLoggingMiddleware:
+
+    def test_logs_route_template_status_and_bytes(self, access_log):
+        client = make_client(sample_rate=1)
+
+        response = client.get("/api/items/42?q=secreto")
+
+        assert response.json() == {"id": 42}
+        assert access_log.requests == [("GET", "/api/items/{item_id}", 200, len(response.content))]
+
+    def test_unmatched_paths_do_not_leak_urls(self, access_log):
+        client = make_client(sample_rate=1)
+
+        assert client.get("/wp-admin/login.php").status_code == 404
+        assert access_log.requests == [("GET", request_logging.UNMATCHED_ROUTE, 404, 22)]
+
+    def test_successful_requests_are_sampled_but_errors_always_logged(self, access_log):
+        client = make_client(sample_rate=0.1, random_func=lambda: 0.5)
+
+        client.get("/api/items/1")
+        client.get("/api/items/no-es-un-numero")
+
+        assert [status for _, _, status, _ in access_log.requests] == [422]
+
+    def test_slow_requests_are_always_logged(self, access_log):
+        client = make_client(sample_rate=0, slow_ms=0)
+
+        client.get("/api/items/1")
+
+        assert len(access_log.requests) == 1
+
+    def test_expired_token_maps_to_refresh_hint(self, access_log):
+        client = make_client(sample_rate=1)
+
+        response = client.get("/api/expired")
+
+        assert response.status_code == 401
+        assert response.json()["error_code"] == "TOKEN_EXPIRED"
+        assert response.headers["WWW-Authenticate"] == "Bearer"
+        assert access_log.requests[0][2] == 401
+
+    @pytest.mark.asyncio
+    async def test_streaming_body_is_passed_through_chunk_by_chunk(self, access_log):
+        async def streaming_app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            for chunk in (b"uno", b"dos", b"tres"):
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        middleware = RequestLoggingMiddleware(streaming_app, sample_rate=1)
+        await middleware({"type": "http", "method": "GET", "path": "/"}, None, send)
+
+        assert [m.get("body") for m in sent[1:]] == [b"uno", b"dos", b"tres", b""]
+        assert access_log.requests == [("GET", request_logging.UNMATCHED_ROUTE, 200, 10)]
+
+
+class TestJsonFormatter:
+
+    def test_fields_are_top_level_keys(self):
+        record = logging.LogRecord("http.requests", logging.INFO, __file__, 1, "%s %s", ("GET", "/api"), None)
+        record.fields = {"status": 200, "duration_ms": 1.5}
+
+        entry = json.loads(JsonFormatter().format(record))
+
+        assert entry["message"] == "GET /api"
+        assert entry["status"] == 200 and entry["duration_ms"] == 1.5
+        assert entry["level"] == "INFO" and entry["logger"] == "http.requests"
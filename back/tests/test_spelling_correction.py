@@ -0,0 +1,102 @@
+"""
+Tests para la corrección ortográfica indexada (SpellingCorrectionService y FuzzyIndex)
+"""
+from unittest.mock import patch
+
+import pytest
+
+from src.services.chat.spelling_correction_service import SpellingCorrectionService
+from src.utils.fuzzy_index import FuzzyIndex, edit_distance
+
+
+class TestFuzzyIndex:
+    """Tests para el índice de borrados y la distancia de edición"""
+
+    @pytest.mark.parametrize("a, b, distance", [
+        ("documento", "documento", 0),
+        ("documeto", "documento", 1),
+        ("pfd", "pdf", 1),            # transposición
+        ("infromacion", "informacion", 1),
+        ("contenio", "contenido", 1),
+        ("cotenio", "contenido", 2),
+    ])
+    def test_edit_distance(self, a, b, distance):
+        assert edit_distance(a, b, 2) == distance
+
+    def test_edit_distance_stops_at_limit(self):
+        assert edit_distance("archivo", "resumen", 2) == 3
+
+    def test_lookup_finds_words_within_distance(self):
+        index = FuzzyIndex(["documento", "contenido", "resumen"], max_distance=2)
+
+        assert index.lookup("docuemnto") == [("documento", 1)]
+        assert index.lookup("cotenio") == [("contenido", 2)]
+        assert index.lookup("cotenio", max_distance=1) == []
+        assert index.lookup("resumen") == [("resumen", 0)]
+
+
+class TestSpellingCorrectionService:
+    """Tests para SpellingCorrectionService"""
+
+    def setup_method(self):
+        self.service = SpellingCorrectionService()
+
+    def test_variation_is_corrected_to_canonical_form(self):
+        corrected, message = self.service.correct_spelling("resume el documeto")
+
+        assert corrected == "resume el documento"
+        assert "'documeto' → 'documento'" in message
+
+    def test_accent_folded_exact_hit(self):
+        corrected, _ = self.service.correct_spelling("Informacion del archivo")
+        assert corrected == "Información del archivo"
+
+    def test_punctuation_is_preserved(self):
+        corrected, _ = self.service.correct_spelling("¿Que dice el pfd?")
+        assert corrected == "¿Qué dice el pdf?"
+
+    def test_fuzzy_correction_against_vocabulary(self):
+        corrected, _ = self.service.correct_spelling("busca la infornacion")
+        assert corrected == "busca la información"
+
+    def test_inflections_are_not_corrected(self):
+        corrected, message = self.service.correct_spelling("mis documentos y archivos")
+
+        assert corrected == "mis documentos y archivos"
+        assert message == ""
+
+    def test_domain_vocabulary_from_document_titles(self):
+        with patch(
+            "src.repositories.document_repository.DocumentRepository.list_indexed_titles",
+            return_value=["Convenio colectivo de hostelería"]
+        ):
+            assert self.service.refresh_domain_vocabulary() == 3
+
+        corrected, _ = self.service.correct_spelling("que dice el convneio")
+        assert corrected == "qué dice el convenio"
+
+    def test_vocabulary_refresh_failure_keeps_service_usable(self):
+        with patch(
+            "src.repositories.document_repository.DocumentRepository.list_indexed_titles",
+            side_effect=Exception("sin conexión")
+        ):
+            self.service.refresh_domain_vocabulary()
+
+        assert self.service.correct_spelling("grasias")[0] == "gracias"
+
+    def test_suggestions_use_edit_distance(self):
+        assert "¿Quisiste decir 'contenido'?" in self.service.suggest_corrections("cotenio")
+
+    def test_added_terms_are_indexed_without_rebuilding(self):
+        with patch.object(self.service, "_build_indexes", side_effect=AssertionError("reconstrucción")):
+            assert self.service.add_domain_terms(["Protocolo de teletrabajo"]) == 2
+
+        corrected, _ = self.service.correct_spelling("el protcolo de teletrabajo")
+        assert corrected == "el protocolo de teletrabajo"
+
+    def test_domain_terms_cap_applies_across_texts(self):
+        with patch("src.services.chat.spelling_correction_service.MAX_DOMAIN_TERMS", 3):
+            added = self.service.add_domain_terms(["Alfa", "Beta", "Gamma", "Delta", "Epsilon"])
+
+        assert added == 3
+        assert len(self.service._domain_terms) == 3
@@ -0,0 +1,154 @@
+"""
+Tests para las estadísticas sobre contadores materializados
+(StatisticsService y StatisticsReconciler)
+"""
+import pytest
+
+from src.core.exceptions import DatabaseException
+from src.services.statistics_reconciler import StatisticsReconciler
+from src.services.statistics_service import StatisticsService
+
+
+class FakeStatisticsRepository:
+    """Repositorio en memoria con los contadores que mantendrían los triggers"""
+
+    def __init__(self, counters=None, daily=0, users=None, fail=False):
+        self.counters = counters if counters is not None else {}
+        self.daily = daily
+        self.users = users or {}
+        self.fail = fail
+        self.drift = []
+
+    def _check(self):
+        if self.fail:
+            raise DatabaseException('relation "statistics_counters" does not exist')
+
+    def get_counters(self):
+        self._check()
+        return dict(self.counters)
+
+    def get_daily_total(self, name, since):
+        self._check()
+        return self.daily
+
+    def get_user_statistics(self, user_id):
+        self._check()
+        return self.users.get(user_id)
+
+    def count_active_users(self):
+        self._check()
+        return sum(1 for stats in self.users.values() if stats["documents"] or stats["chats"])
+
+    def reconcile(self):
+        self._check()
+        return self.drift
+
+
+def make_service(repository):
+    service = StatisticsService.__new__(StatisticsService)
+    service.supabase = None
+    service.repository = repository
+    return service
+
+
+def user_row(documents=0, chats=0, shared_by_me=0, shared_with_me=0, is_admin=False):
+    return {
+        "documents": documents,
+        "chats": chats,
+        "shared_by_me": shared_by_me,
+        "shared_with_me": shared_with_me,
+        "is_admin": is_admin,
+    }
+
+
+class TestGlobalStatistics:
+    """Tests para get_global_statistics"""
+
+    def test_reads_counters(self):
+        repo = FakeStatisticsRepository({"users": 12, "documents": 40, "chats": 90}, daily=8)
+
+        assert make_service(repo).get_global_statistics() == {
+            "total_users": 12,
+            "total_documents": 40,
+            "active_chats": 8,
+        }
+
+    def test_active_chats_falls_back_to_total_without_recent_chats(self):
+        repo = FakeStatisticsRepository({"users": 1, "documents": 0, "chats": 3}, daily=0)
+
+        assert make_service(repo).get_global_statistics()["active_chats"] == 3
+
+    def test_counts_tables_when_counters_are_missing(self, monkeypatch):
+        service = make_service(FakeStatisticsRepository(fail=True))
+        live = {"total_users": 2, "total_documents": 1, "active_chats": 0}
+        monkeypatch.setattr(service, "_count_global_statistics", lambda: live)
+
+        assert service.get_global_statistics() == live
+
+    def test_empty_counters_are_not_trusted(self, monkeypatch):
+        service = make_service(FakeStatisticsRepository({}))
+        live = {"total_users": 5, "total_documents": 0, "active_chats": 0}
+        monkeypatch.setattr(service, "_count_global_statistics", lambda: live)
+
+        assert service.get_global_statistics() == live
+
+    def test_admin_statistics_from_counters(self):
+        repo = FakeStatisticsRepository(
+            {"shared_documents": 4},
+            users={1: user_row(documents=2), 2: user_row(), 3: user_row(chats=1)}
+        )
+
+        assert make_service(repo)._get_admin_statistics() == {"active_users": 2, "shared_documents": 4}
+
+
+class TestUserStatistics:
+    """Tests para get_user_statistics"""
+
+    def test_regular_user_sees_documents_shared_with_them(self):
+        repo = FakeStatisticsRepository(users={7: user_row(3, 5, shared_by_me=9, shared_with_me=2)})
+
+        assert make_service(repo).get_user_statistics(7) == {
+            "user_documents": 3,
+            "user_chats": 5,
+            "shared_documents": 2,
+        }
+
+    def test_admin_sees_their_shares(self):
+        repo = FakeStatisticsRepository(users={1: user_row(3, 5, shared_by_me=9, shared_with_me=2, is_admin=True)})
+
+        assert make_service(repo).get_user_statistics(1)["shared_documents"] == 9
+        assert make_service(repo).get_shared_documents_count(1) == 9
+
+    def test_unknown_user_has_no_statistics(self):
+        stats = make_service(FakeStatisticsRepository()).get_user_statistics(404)
+
+        assert stats == {"user_documents": 0, "user_chats": 0, "shared_documents": 0}
+
+    def test_counts_tables_when_counters_are_missing(self, monkeypatch):
+        service = make_service(FakeStatisticsRepository(fail=True))
+        live = {"user_documents": 1, "user_chats": 1, "shared_documents": 0}
+        monkeypatch.setattr(service, "_count_user_statistics", lambda user_id: live)
+
+        assert service.get_user_statistics(7) == live
+
+
+class TestStatisticsReconciler:
+    """Tests para StatisticsReconciler"""
+
+    @pytest.mark.asyncio
+    async def test_reconcile_once_counts_corrections(self):
+        repo = FakeStatisticsRepository()
+        repo.drift = [{"counter_name": "documents", "stored_value": 4, "actual_value": 5}]
+        reconciler = StatisticsReconciler(interval=60, statistics_service=make_service(repo))
+
+        assert await reconciler.reconcile_once() == 1
+        assert (reconciler.runs, reconciler.corrections) == (1, 1)
+
+    @pytest.mark.asyncio
+    async def test_disabled_with_zero_interval(self):
+        reconciler = StatisticsReconciler(interval=0, statistics_service=make_service(FakeStatisticsRepository()))
+
+        await reconciler.start()
+
+        assert reconciler._task is None
+        await reconciler.stop()
@@ -0,0 +1,163 @@
+"""
+Tests para la agrupación de fragmentos de streaming y el framing WebSocket
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from src.services.chat.stream_coalescer import StreamCoalescer
+from src.api.helpers.chat_websocket_helpers import (
+    ChatWebSocketHelpers,
+    negotiate_encoding,
+    ENCODING_JSON,
+    ENCODING_MSGPACK,
+    msgpack
+)
+
+
+class FakeClock:
+    """Reloj manual para controlar el umbral de tiempo"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeWebSocket:
+    """WebSocket mínimo que guarda los frames enviados"""
+
+    def __init__(self, encoding=ENCODING_JSON):
+        self.state = SimpleNamespace(encoding=encoding)
+        self.sent = []
+
+    async def send_text(self, data):
+        self.sent.append(data)
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+
+async def _fragments(items, delay=0.0):
+    for item in items:
+        if delay:
+            await asyncio.sleep(delay)
+        yield item
+
+
+class TestStreamCoalescer:
+    """Tests para StreamCoalescer"""
+
+    def test_flush_by_size(self):
+        """Libera el lote al superar el umbral de bytes"""
+        coalescer = StreamCoalescer(flush_bytes=10, flush_interval_ms=1000, clock=FakeClock())
+
+        assert coalescer.add("hola ") is None
+        assert coalescer.add("mundo!") == "hola mundo!"
+        assert not coalescer.has_pending
+        assert coalescer.frames_out == 1
+
+    def test_flush_by_time(self):
+        """Libera el lote cuando el primer fragmento pendiente supera el intervalo"""
+        clock = FakeClock()
+        coalescer = StreamCoalescer(flush_bytes=1000, flush_interval_ms=30, clock=clock)
+
+        assert coalescer.add("a") is None
+        clock.now = 0.031
+        assert coalescer.add("b") == "ab"
+
+    def test_full_text_and_metrics(self):
+        """Mantiene el texto completo aunque se libere en varios lotes"""
+        coalescer = StreamCoalescer(flush_bytes=4, flush_interval_ms=1000, clock=FakeClock())
+        for fragment in ["ab", "cd", "ef", "", "g"]:
+            coalescer.add(fragment)
+        coalescer.flush()
+
+        assert coalescer.full_text == "abcdefg"
+        assert coalescer.fragments_in == 4
+        assert coalescer.frames_out == 2
+
+    @pytest.mark.asyncio
+    async def test_coalesce_batches_fast_fragments(self):
+        """Fragmentos que llegan en ráfaga se agrupan en pocos frames"""
+        coalescer = StreamCoalescer(flush_bytes=64, flush_interval_ms=1000)
+        fragments = ["palabra "] * 20
+
+        batches = [b async for b in coalescer.coalesce(_fragments(fragments))]
+
+        assert "".join(batches) == "".join(fragments)
+        assert len(batches) < len(fragments)
+
+    @pytest.mark.asyncio
+    async def test_coalesce_flushes_on_timeout(self):
+        """Un fragmento no espera indefinidamente al siguiente"""
+        coalescer = StreamCoalescer(flush_bytes=1000, flush_interval_ms=10)
+
+        batches = [b async for b in coalescer.coalesce(_fragments(["a", "b"], delay=0.05))]
+
+        assert batches == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_coalesce_propagates_errors(self):
+        """Los errores del generador de origen se propagan tras liberar lo pendiente"""
+        async def failing():
+            yield "parcial"
+            raise RuntimeError("fallo")
+
+        coalescer = StreamCoalescer(flush_bytes=1000, flush_interval_ms=1000)
+        received = []
+        with pytest.raises(RuntimeError):
+            async for batch in coalescer.coalesce(failing()):
+                received.append(batch)
+
+        assert received == ["parcial"]
+
+
+class TestChatWebSocketFraming:
+    """Tests para la negociación y codificación de frames"""
+
+    def setup_method(self):
+        self.helpers = ChatWebSocketHelpers()
+
+    def test_negotiate_encoding(self):
+        assert negotiate_encoding(None) == ENCODING_JSON
+        assert negotiate_encoding("xml") == ENCODING_JSON
+        if msgpack is not None:
+            assert negotiate_encoding("MSGPACK") == ENCODING_MSGPACK
+
+    @pytest.mark.asyncio
+    async def test_json_chunk_keeps_legacy_fields(self):
+        """En JSON el chunk conserva stream_id y timestamp para clientes existentes"""
+        ws = FakeWebSocket()
+        sent = await self.helpers.send_stream_chunk(ws, "sid", "hola", 3)
+
+        frame = json.loads(ws.sent[0])
+        assert frame["type"] == "stream_chunk"
+        assert frame["data"]["stream_id"] == "sid"
+        assert frame["data"]["chunk_index"] == 3
+        assert "timestamp" in frame["data"]
+        assert sent == len(ws.sent[0].encode("utf-8"))
+
+    @pytest.mark.skipif(msgpack is None, reason="msgpack no instalado")
+    @pytest.mark.asyncio
+    async def test_msgpack_chunk_is_compact(self):
+        """Con msgpack el chunk es binario y más pequeño que el equivalente JSON"""
+        json_ws = FakeWebSocket()
+        msgpack_ws = FakeWebSocket(ENCODING_MSGPACK)
+
+        json_bytes = await self.helpers.send_stream_chunk(json_ws, "sid", "hola", 0)
+        msgpack_bytes = await self.helpers.send_stream_chunk(msgpack_ws, "sid", "hola", 0)
+
+        frame = msgpack.unpackb(msgpack_ws.sent[0], raw=False)
+        assert frame == {"type": "stream_chunk", "data": {"content": "hola", "chunk_index": 0}}
+        assert msgpack_bytes < json_bytes
+
+    def test_decode_frame(self):
+        assert self.helpers.decode_frame({"text": '{"type": "ping"}'}) == {"type": "ping"}
+        with pytest.raises(ValueError):
+            self.helpers.decode_frame({"text": "no es json"})
+        with pytest.raises(ValueError):
+            self.helpers.decode_frame({"text": "[1, 2]"})
@@ -0,0 +1,229 @@
+"""
+Tests para las trazas del chat/RAG: propagación, muestreo por cola y exportadores
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from src.core.tracing import (
+    NOOP_SPAN, JsonFileExporter, OTLPHttpExporter, Tracer, traced, tracer
+)
+from src.core.websocket_manager import WebSocketManager
+
+
+class RecordingExporter:
+    """Exportador falso que guarda las trazas exportadas"""
+
+    def __init__(self):
+        self.traces = []
+
+    def export(self, service_name, trace):
+        self.traces.append(trace)
+
+    def shutdown(self, timeout=5.0):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def no_global_export(monkeypatch):
+    """El tracer global no escribe en logs/ durante los tests"""
+    monkeypatch.setattr(tracer, "exporter", None)
+
+
+def make_tracer(**kwargs):
+    exporter = RecordingExporter()
+    options = dict(slow_ms=1000, sample_rate=0)
+    options.update(kwargs)
+    return Tracer("test", exporter=exporter, **options), exporter
+
+
+class TestSpans:
+
+    def test_children_share_trace_and_point_to_parent(self):
+        test_tracer, exporter = make_tracer(slow_ms=0)
+
+        with test_tracer.span("chat") as root:
+            with test_tracer.child_span("chroma.query") as child:
+                with test_tracer.child_span("embedding") as grandchild:
+                    pass
+
+        assert child.trace_id == grandchild.trace_id == root.trace_id
+        assert child.parent_id == root.span_id and grandchild.parent_id == child.span_id
+        assert set(root.trace.stage_timings()) == {"chroma.query", "embedding"}
+        assert exporter.traces == [root.trace]
+
+    def test_child_span_outside_a_trace_is_noop(self):
+        test_tracer, exporter = make_tracer(slow_ms=0)
+
+        with test_tracer.child_span("chroma.query") as span:
+            span.set_attribute("n_results", 5)
+
+        assert span is NOOP_SPAN
+        assert test_tracer.start_child("gemini.stream") is NOOP_SPAN
+        assert exporter.traces == []
+
+    @pytest.mark.asyncio
+    async def test_context_propagates_to_threads_and_tasks(self):
+        test_tracer, _ = make_tracer(slow_ms=0)
+
+        def in_thread():
+            with test_tracer.child_span("supabase.documents") as span:
+                return span
+
+        async def in_task():
+            with test_tracer.child_span("gemini.generate") as span:
+                return span
+
+        with test_tracer.span("chat") as root:
+            thread_span = await asyncio.to_thread(in_thread)
+            task_span = await asyncio.create_task(in_task())
+
+        assert thread_span.parent_id == root.span_id
+        assert task_span.parent_id == root.span_id
+        assert test_tracer.current_span() is None
+
+    @pytest.mark.asyncio
+    async def test_traced_decorator_supports_sync_and_async(self):
+        @traced("rag.sync")
+        def sync_stage():
+            return tracer.current_span().name
+
+        @traced("rag.async")
+        async def async_stage():
+            return tracer.current_span().name
+
+        assert sync_stage() == "rag.sync"
+        assert await async_stage() == "rag.async"
+
+
+class TestTailSampling:
+
+    def test_fast_traces_are_dropped_and_slow_ones_kept(self):
+        test_tracer, exporter = make_tracer(slow_ms=50)
+
+        with test_tracer.span("rápida"):
+            pass
+        with test_tracer.span("lenta") as slow:
+            slow.start_ns -= 100 * 1_000_000
+
+        assert [trace.spans[0].name for trace in exporter.traces] == ["lenta"]
+
+    def test_traces_with_errors_are_always_kept(self):
+        test_tracer, exporter = make_tracer(slow_ms=10_000)
+
+        with pytest.raises(RuntimeError):
+            with test_tracer.span("chat"):
+                with test_tracer.child_span("gemini.generate"):
+                    raise RuntimeError("cuota agotada")
+
+        assert len(exporter.traces) == 1
+        assert exporter.traces[0].spans[1].error == "RuntimeError: cuota agotada"
+
+    def test_random_sample_of_fast_traces(self):
+        test_tracer, exporter = make_tracer(slow_ms=10_000, sample_rate=0.5, random_func=lambda: 0.4)
+
+        with test_tracer.span("chat"):
+            pass
+
+        assert len(exporter.traces) == 1
+
+    def test_unfinished_spans_are_closed_with_the_root(self):
+        test_tracer, exporter = make_tracer(slow_ms=0)
+
+        with test_tracer.span("chat"):
+            test_tracer.start_child("supabase.users")
+
+        span = exporter.traces[0].spans[1]
+        assert span.end_ns is not None and span.attributes["incomplete"] is True
+
+
+class TestExporters:
+
+    def test_json_file_exporter_writes_one_line_per_trace(self, tmp_path):
+        path = tmp_path / "traces.jsonl"
+        exporter = JsonFileExporter(str(path))
+        test_tracer = Tracer("mentia", exporter=exporter, slow_ms=0)
+
+        with test_tracer.span("chat", chat_id=3):
+            with test_tracer.child_span("chroma.query"):
+                pass
+        exporter.shutdown()
+
+        entry = json.loads(path.read_text(encoding="utf-8"))
+        assert entry["service"] == "mentia" and entry["name"] == "chat"
+        assert [span["name"] for span in entry["spans"]] == ["chat", "chroma.query"]
+        assert entry["spans"][0]["attributes"] == {"chat_id": 3}
+
+    def test_otlp_exporter_posts_json_traces(self):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, json={})
+
+        client = httpx.Client(transport=httpx.MockTransport(handler))
+        exporter = OTLPHttpExporter("http://collector:4318/", headers={"x-api-key": "k"}, client=client)
+        test_tracer = Tracer("mentia", exporter=exporter, slow_ms=0)
+
+        with test_tracer.span("chat", stream=True):
+            with test_tracer.child_span("gemini.generate", tokens=12):
+                pass
+        exporter.shutdown()
+
+        assert str(requests[0].url) == "http://collector:4318/v1/traces"
+        assert requests[0].headers["x-api-key"] == "k"
+        body = json.loads(requests[0].content)
+        resource_spans = body["resourceSpans"][0]
+        assert resource_spans["resource"]["attributes"][0]["value"] == {"stringValue": "mentia"}
+        root, child = resource_spans["scopeSpans"][0]["spans"]
+        assert child["parentSpanId"] == root["spanId"] and "parentSpanId" not in root
+        assert len(root["traceId"]) == 32 and len(root["spanId"]) == 16
+        assert root["attributes"] == [{"key": "stream", "value": {"boolValue": True}}]
+        assert child["attributes"] == [{"key": "tokens", "value": {"intValue": "12"}}]
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.state = SimpleNamespace()
+        self.sent = []
+
+    async def send_text(self, data):
+        self.sent.append(json.loads(data))
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+
+class TestStreamStageTimings:
+
+    @pytest.mark.asyncio
+    async def test_end_stream_reports_trace_and_stage_timings(self):
+        manager = WebSocketManager()
+        websocket = FakeWebSocket()
+
+        async def fake_stream(**kwargs):
+            with tracer.child_span("rag.retrieve"):
+                await asyncio.sleep(0.01)
+            span = tracer.start_child("gemini.stream")
+            for word in ("Hola", " mundo"):
+                yield word
+            span.end()
+
+        saved = asyncio.get_running_loop().create_future()
+        saved.set_result(1)
+
+        async def fake_queue_message(**kwargs):
+            return saved
+
+        with patch.object(manager.streaming_service, "stream_ai_response", fake_stream), \
+             patch.object(manager.chat_service, "queue_message", fake_queue_message):
+            await manager._handle_chat_message(websocket, 1, 7, {"content": "hola"})
+
+        end = next(frame["data"] for frame in websocket.sent if frame["type"] == "stream_end")
+        assert len(end["trace_id"]) == 32
+        assert set(end["stage_timings_ms"]) == {"rag.retrieve", "gemini.stream"}
+        assert end["stage_timings_ms"]["rag.retrieve"] >= 10
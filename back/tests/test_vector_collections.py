@@ -0,0 +1,98 @@
+"""
+Tests para las colecciones versionadas de ChromaDB (registro, doble
+escritura durante la migración y limpieza de versiones antiguas)
+"""
+import chromadb
+import pytest
+
+from src.services.document_service import DocumentService
+from src.utils.chromadb_connector import ChromaDBConnector
+
+
+class FakeEmbeddingFunction:
+    def __call__(self, input):
+        return [[float(len(text)), 1.0] for text in input]
+
+
+@pytest.fixture
+def connector(monkeypatch):
+    previous = ChromaDBConnector._instance
+    ChromaDBConnector._instance = None
+    instance = ChromaDBConnector()
+    # Cliente en memoria aislado por test
+    instance._client = chromadb.EphemeralClient(
+        chromadb.config.Settings(anonymized_telemetry=False, allow_reset=True)
+    )
+    instance._client.reset()
+    monkeypatch.setattr(instance, "_embedding_function_for", lambda model: FakeEmbeddingFunction())
+    yield instance
+    ChromaDBConnector._instance = previous
+
+
+class TestCollectionRegistry:
+
+    def test_versions_and_cutover(self, connector):
+        connector.get_client().create_collection("documents")
+        assert connector.get_active_collection_name() == "documents"
+        assert connector.collection_model("documents") == "all-MiniLM-L6-v2"
+
+        v1 = connector.create_version("modelo-nuevo", metadata={"chunker_version": 1})
+        assert v1 == "documents_v1"
+        assert connector.collection_model(v1) == "modelo-nuevo"
+
+        connector.begin_migration(v1)
+        assert connector.get_write_collection_names() == ["documents", v1]
+        assert connector.get_active_collection_name() == "documents"
+
+        assert connector.set_active_collection_name(v1) == "documents"
+        assert connector.get_write_collection_names() == [v1]
+        registry = connector.get_collection_registry()
+        assert registry["active"] == v1 and registry["previous"] == "documents"
+        assert {c["name"]: c["embedding_model"] for c in registry["collections"]} == {
+            "documents": "all-MiniLM-L6-v2", v1: "modelo-nuevo"
+        }
+
+    def test_garbage_collection_keeps_active_previous_and_migration(self, connector):
+        connector.get_client().create_collection("documents")
+        v1 = connector.create_version("a")
+        connector.set_active_collection_name(v1)
+        v2 = connector.create_version("b")
+        connector.set_active_collection_name(v2)
+        v3 = connector.create_version("c")
+        connector.begin_migration(v3)
+
+        assert connector.garbage_collect_collections() == ["documents"]
+        assert sorted(connector.list_collection_names()) == sorted(["collection_registry", v1, v2, v3])
+
+
+class TestDualWrites:
+
+    def make_service(self, connector):
+        service = DocumentService.__new__(DocumentService)
+        service.chromadb = connector
+        return service
+
+    def test_writes_and_deletes_go_to_both_collections_during_migration(self, connector):
+        connector.get_client().create_collection("documents")
+        v1 = connector.create_version("modelo-nuevo")
+        connector.begin_migration(v1)
+        service = self.make_service(connector)
+
+        service._write_chunks(["7_0", "7_1"], ["uno", "dos"], [{"document_id": "7"}, {"document_id": "7"}])
+        for name in ("documents", v1):
+            assert sorted(connector.get_chunks(name, where={"document_id": "7"})["ids"]) == ["7_0", "7_1"]
+
+        service._delete_document_chunks(7)
+        for name in ("documents", v1):
+            assert connector.get_chunks(name, where={"document_id": "7"})["ids"] == []
+
+    def test_failure_in_new_version_does_not_fail_the_write(self, connector, monkeypatch):
+        connector.get_client().create_collection("documents")
+        v1 = connector.create_version("modelo-nuevo")
+        connector.begin_migration(v1)
+        connector.delete_collection(v1)
+        service = self.make_service(connector)
+
+        service._write_chunks(["8_0"], ["texto"], [{"document_id": "8"}])
+
+        assert connector.get_chunks("documents", where={"document_id": "8"})["ids"] == ["8_0"]
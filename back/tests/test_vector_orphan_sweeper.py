@@ -0,0 +1,149 @@
+"""
+Tests para el barrido de chunks huérfanos y la verificación por chunk_count
+"""
+from types import SimpleNamespace
+
+import chromadb
+import pytest
+
+from src.services.document_service import DocumentService
+from src.services.vector_orphan_sweeper import VectorOrphanSweeper
+from src.utils.chromadb_connector import ChromaDBConnector
+
+
+class FakeEmbeddingFunction:
+    def __call__(self, input):
+        return [[float(len(text)), 1.0] for text in input]
+
+
+class FakeDocumentRepository:
+    def __init__(self, chunk_counts):
+        self.chunk_counts = dict(chunk_counts)
+
+    def get(self, document_id):
+        if document_id not in self.chunk_counts:
+            return None
+        return SimpleNamespace(id=document_id, chunk_count=self.chunk_counts[document_id])
+
+    def set_chunk_count(self, document_id, chunk_count):
+        self.chunk_counts[document_id] = chunk_count
+        return True
+
+    def list_chunk_counts(self, after_id, limit):
+        return [
+            {"id": doc_id, "chunk_count": self.chunk_counts[doc_id]}
+            for doc_id in sorted(self.chunk_counts) if doc_id > after_id
+        ][:limit]
+
+
+@pytest.fixture
+def connector(monkeypatch):
+    previous = ChromaDBConnector._instance
+    ChromaDBConnector._instance = None
+    instance = ChromaDBConnector()
+    instance._client = chromadb.EphemeralClient(
+        chromadb.config.Settings(anonymized_telemetry=False, allow_reset=True)
+    )
+    instance._client.reset()
+    monkeypatch.setattr(instance, "_embedding_function_for", lambda model: FakeEmbeddingFunction())
+    instance.get_client().create_collection("documents")
+    yield instance
+    ChromaDBConnector._instance = previous
+
+
+def index(connector, document_id, chunks, collection="documents"):
+    connector.add_documents(
+        collection,
+        [f"{document_id}_{i}" for i in range(chunks)],
+        [f"chunk {i} del documento {document_id}" for i in range(chunks)],
+        [{"document_id": str(document_id)} for _ in range(chunks)]
+    )
+
+
+class TestVectorOrphanSweeper:
+
+    def test_deletes_orphans_backfills_and_reports_mismatches(self, connector):
+        index(connector, 1, 3)
+        index(connector, 2, 2)
+        index(connector, 3, 4)   # borrado en la BD
+        index(connector, 4, 1)   # chunk_count dice 2
+        repo = FakeDocumentRepository({1: 3, 2: None, 4: 2, 5: None})
+        sweeper = VectorOrphanSweeper(interval=0, document_repo=repo, chromadb=connector, page_size=2)
+
+        report = sweeper.sweep()
+
+        collection = report["collections"]["documents"]
+        assert collection["orphan_documents"] == 1 and collection["orphan_chunks_deleted"] == 4
+        assert connector.count_chunks("documents", {"document_id": "3"}) == 0
+        assert connector.count_chunks("documents", {"document_id": "1"}) == 3
+        assert report["chunk_count_backfilled"] == 1 and repo.chunk_counts[2] == 2
+        assert repo.chunk_counts[5] is None
+        assert report["mismatched_sample"] == [{"document_id": 4, "expected": 2, "actual": 1}]
+
+    def test_sweeps_every_write_collection_during_migration(self, connector):
+        v1 = connector.create_version("modelo-nuevo")
+        connector.begin_migration(v1)
+        index(connector, 1, 2)
+        index(connector, 9, 2, collection=v1)
+        repo = FakeDocumentRepository({1: 2})
+
+        report = VectorOrphanSweeper(interval=0, document_repo=repo, chromadb=connector).sweep()
+
+        assert report["collections"][v1]["orphan_chunks_deleted"] == 2
+        assert connector.count_chunks(v1, {"document_id": "9"}) == 0
+        assert connector.count_chunks("documents", {"document_id": "1"}) == 2
+
+    def test_empty_documents_table_deletes_nothing(self, connector):
+        index(connector, 1, 2)
+
+        report = VectorOrphanSweeper(interval=0, document_repo=FakeDocumentRepository({}), chromadb=connector).sweep()
+
+        assert report["collections"]["documents"]["orphan_chunks_deleted"] == 0
+        assert connector.count_chunks("documents", {"document_id": "1"}) == 2
+
+    def test_missing_chunk_count_column_skips_the_sweep(self, connector, monkeypatch):
+        from src.repositories import document_repository
+
+        class MissingColumnQuery:
+            def __getattr__(self, name):
+                return lambda *args, **kwargs: self
+
+            def execute(self):
+                raise Exception("{'code': '42703', 'message': 'column documents.chunk_count does not exist'}")
+
+        client = type("Client", (), {"table": lambda self, name: MissingColumnQuery()})()
+        monkeypatch.setattr(document_repository, "get_supabase_client", lambda **_: client)
+        index(connector, 1, 2)
+        repo = document_repository.DocumentRepository()
+
+        assert repo.list_chunk_counts(0, 10) is None
+        report = VectorOrphanSweeper(interval=0, document_repo=repo, chromadb=connector).sweep()
+
+        assert report["skipped"]
+        assert connector.count_chunks("documents", {"document_id": "1"}) == 2
+
+
+class TestChunkCountVerification:
+
+    def make_service(self, connector, repo):
+        service = DocumentService.__new__(DocumentService)
+        service.chromadb = connector
+        service.document_repo = repo
+        return service
+
+    def test_verify_compares_against_chunk_count(self, connector):
+        index(connector, 1, 3)
+        index(connector, 2, 2)
+        service = self.make_service(connector, FakeDocumentRepository({1: 3, 2: 5, 3: None}))
+
+        assert service.verify_document_indexed(1)
+        assert not service.verify_document_indexed(2)
+        assert not service.verify_document_indexed(3)
+
+    def test_delete_removes_every_chunk(self, connector):
+        index(connector, 1, 1500)
+        service = self.make_service(connector, FakeDocumentRepository({1: 1500}))
+
+        service._delete_document_chunks(1)
+
+        assert connector.count_chunks("documents", {"document_id": "1"}) == 0
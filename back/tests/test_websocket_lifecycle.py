@@ -0,0 +1,172 @@
+"""
+Tests para el ciclo de vida de conexiones WebSocket: rueda de temporizadores,
+heartbeats, expulsión por inactividad, límites por usuario y drenado
+"""
+import json
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from src.core.timer_wheel import TimerWheel
+from src.core.websocket_manager import WebSocketManager, WS_CLOSE_SERVICE_RESTART, settings
+
+
+class FakeWebSocket:
+    """WebSocket mínimo para probar el manager sin servidor"""
+
+    def __init__(self):
+        self.state = SimpleNamespace()
+        self.headers = {}
+        self.sent = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def close(self, code=1000, reason=None):
+        self.closed_with = code
+
+    async def send_text(self, data):
+        self.sent.append(json.loads(data))
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+    def types(self):
+        return [frame["type"] for frame in self.sent]
+
+
+class TestTimerWheel:
+    """Tests para TimerWheel"""
+
+    def test_expires_after_delay(self):
+        wheel = TimerWheel(tick_seconds=1.0, slots=8)
+        wheel.schedule("a", 3)
+
+        assert wheel.tick() == []
+        assert wheel.tick() == []
+        assert wheel.tick() == ["a"]
+        assert "a" not in wheel
+
+    def test_delay_longer_than_wheel(self):
+        """Vencimientos más largos que una vuelta completa esperan las vueltas necesarias"""
+        wheel = TimerWheel(tick_seconds=1.0, slots=4)
+        wheel.schedule("a", 10)
+
+        expired_at = [i for i in range(1, 13) if wheel.tick()]
+        assert expired_at == [10]
+
+    def test_cancel_and_reschedule(self):
+        wheel = TimerWheel(tick_seconds=1.0, slots=8)
+        wheel.schedule("a", 2)
+        wheel.schedule("a", 5)
+
+        assert len(wheel) == 1
+        assert [k for _ in range(4) for k in wheel.tick()] == []
+        assert wheel.tick() == ["a"]
+
+        wheel.schedule("b", 1)
+        assert wheel.cancel("b") is True
+        assert wheel.cancel("b") is False
+        assert wheel.tick() == []
+
+
+@pytest.fixture
+def manager():
+    ws_manager = WebSocketManager()
+    with patch.object(ws_manager.chat_service, "verify_chat_access", return_value=True), \
+         patch.object(ws_manager.chat_service, "handle_connection_event"):
+        yield ws_manager
+
+
+class TestWebSocketLifecycle:
+    """Tests para la gestión de conexiones de WebSocketManager"""
+
+    @pytest.mark.asyncio
+    async def test_idle_connection_is_evicted(self, manager):
+        ws = FakeWebSocket()
+        assert await manager.connect(ws, chat_id=1, user_id=10)
+
+        manager._states[(1, 10)].last_activity = time.monotonic() - settings.WEBSOCKET_IDLE_TIMEOUT - 1
+        await manager._check_connection((1, 10))
+
+        assert ws.closed_with is not None
+        assert manager.active_connections == 0
+        assert 1 not in manager._connections
+
+    @pytest.mark.asyncio
+    async def test_active_connection_gets_heartbeat(self, manager):
+        ws = FakeWebSocket()
+        await manager.connect(ws, chat_id=1, user_id=10)
+
+        await manager._check_connection((1, 10))
+
+        assert ws.types()[-1] == "heartbeat"
+        assert (1, 10) in manager._heartbeat_wheel
+
+    @pytest.mark.asyncio
+    async def test_streaming_connection_is_not_evicted(self, manager):
+        ws = FakeWebSocket()
+        await manager.connect(ws, chat_id=1, user_id=10)
+        state = manager._states[(1, 10)]
+        state.streaming = True
+        state.last_activity = time.monotonic() - settings.WEBSOCKET_IDLE_TIMEOUT - 1
+
+        await manager._check_connection((1, 10))
+
+        assert ws.closed_with is None
+
+    @pytest.mark.asyncio
+    async def test_per_user_limit_evicts_least_active(self, manager):
+        sockets = []
+        for chat_id in range(settings.WEBSOCKET_MAX_CONNECTIONS_PER_USER):
+            ws = FakeWebSocket()
+            await manager.connect(ws, chat_id=chat_id, user_id=10)
+            sockets.append(ws)
+        manager._states[(0, 10)].last_activity -= 100
+
+        await manager.connect(FakeWebSocket(), chat_id=99, user_id=10)
+
+        assert sockets[0].closed_with is not None
+        assert len(manager._user_connections[10]) == settings.WEBSOCKET_MAX_CONNECTIONS_PER_USER
+
+    @pytest.mark.asyncio
+    async def test_stale_disconnect_does_not_remove_new_connection(self, manager):
+        old_ws, new_ws = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(old_ws, chat_id=1, user_id=10)
+        await manager.connect(new_ws, chat_id=1, user_id=10)
+
+        # El endpoint de la conexión antigua termina después de la reconexión
+        await manager.disconnect(1, 10, old_ws)
+
+        assert manager._connections[1][10] is new_ws
+        assert manager.active_connections == 1
+
+    @pytest.mark.asyncio
+    async def test_drain_sends_reconnect_and_rejects_new(self, manager):
+        ws = FakeWebSocket()
+        await manager.connect(ws, chat_id=1, user_id=10)
+
+        await manager.stop()
+
+        assert "reconnect" in ws.types()
+        assert ws.closed_with == WS_CLOSE_SERVICE_RESTART
+        assert manager.active_connections == 0
+
+        late = FakeWebSocket()
+        assert await manager.connect(late, chat_id=2, user_id=11) is False
+        assert late.closed_with == WS_CLOSE_SERVICE_RESTART
+
+    def test_prune_rate_limits(self, manager):
+        from datetime import datetime, timedelta
+        manager._user_message_timestamps = {
+            1: [datetime.utcnow() - timedelta(minutes=5)],
+            2: [datetime.utcnow()],
+            3: []
+        }
+
+        manager._prune_rate_limits()
+
+        assert list(manager._user_message_timestamps) == [2]
@@ -0,0 +1,15 @@
+-- ===============================================
+-- NÚMERO DE CHUNKS POR DOCUMENTO
+-- ===============================================
+
+-- El backend guarda cuántos chunks escribió en ChromaDB para cada documento.
+-- Con ese dato verify_document_indexed detecta indexaciones incompletas y
+-- el barrido de huérfanos (VectorOrphanSweeper) compara ChromaDB con la BD.
+-- Los documentos existentes se rellenan en el primer barrido (NULL = desconocido).
+--
+-- El script es idempotente.
+
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS chunk_count INTEGER;
+
+COMMENT ON COLUMN documents.chunk_count IS
+    'Chunks del documento en la colección activa de ChromaDB (NULL = sin registrar)';
@@ -0,0 +1,80 @@
+-- ===============================================
+-- COMPARTICIÓN MASIVA DE DOCUMENTOS
+-- ===============================================
+
+-- Permite compartir un documento con cientos de usuarios en una sola
+-- sentencia:
+-- - índice único (id_document, id_user) en acceso_documentos_usuario para
+--   que el backend haga un upsert multi-fila con ON CONFLICT DO NOTHING
+-- - grupos de usuarios (departamentos, clases...) y la función
+--   share_document_with_group(), que expande el grupo en el servidor
+--
+-- El script es idempotente: puede ejecutarse de nuevo sin perder datos.
+
+-- ===============================================
+-- 1. UNICIDAD DE LOS ACCESOS
+-- ===============================================
+
+-- Eliminar accesos duplicados (se conserva el más antiguo)
+DELETE FROM acceso_documentos_usuario a
+USING acceso_documentos_usuario b
+WHERE a.id_document = b.id_document
+  AND a.id_user = b.id_user
+  AND a.ctid > b.ctid;
+
+CREATE UNIQUE INDEX IF NOT EXISTS acceso_documentos_usuario_document_user_key
+    ON acceso_documentos_usuario (id_document, id_user);
+
+-- ===============================================
+-- 2. GRUPOS DE USUARIOS
+-- ===============================================
+
+CREATE TABLE IF NOT EXISTS user_groups (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(100) NOT NULL UNIQUE,
+    description TEXT,
+    created_by INTEGER REFERENCES users(id) ON DELETE SET NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS user_group_members (
+    group_id INTEGER NOT NULL REFERENCES user_groups(id) ON DELETE CASCADE,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    added_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (group_id, user_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_user_group_members_user ON user_group_members (user_id);
+
+-- ===============================================
+-- 3. COMPARTIR CON UN GRUPO
+-- ===============================================
+
+-- Inserta un acceso por cada miembro del grupo (salvo el propietario) y
+-- marca el documento como compartido. Devuelve una fila por miembro con
+-- newly_shared = FALSE si ya tenía acceso.
+CREATE OR REPLACE FUNCTION share_document_with_group(p_document_id INTEGER, p_group_id INTEGER)
+RETURNS TABLE (user_id INTEGER, newly_shared BOOLEAN) AS $$
+    WITH members AS (
+        SELECT m.user_id
+        FROM user_group_members m
+        JOIN documents d ON d.id = p_document_id
+        WHERE m.group_id = p_group_id
+          AND m.user_id IS DISTINCT FROM d.uploaded_by
+    ),
+    inserted AS (
+        INSERT INTO acceso_documentos_usuario (id_document, id_user)
+        SELECT p_document_id, members.user_id FROM members
+        ON CONFLICT (id_document, id_user) DO NOTHING
+        RETURNING id_user
+    ),
+    marked AS (
+        UPDATE documents SET is_shared = TRUE
+        WHERE id = p_document_id AND EXISTS (SELECT 1 FROM inserted)
+        RETURNING id
+    )
+    SELECT members.user_id, inserted.id_user IS NOT NULL
+    FROM members
+    LEFT JOIN inserted ON inserted.id_user = members.user_id
+    ORDER BY members.user_id;
+$$ LANGUAGE sql;
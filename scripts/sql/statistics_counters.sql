@@ -0,0 +1,341 @@
+-- ===============================================
+-- CONTADORES MATERIALIZADOS DE ESTADÍSTICAS
+-- ===============================================
+
+-- Los endpoints /statistics/* leen estos contadores en lugar de contar
+-- tablas completas. Los mantienen triggers sobre users, documents, chats y
+-- acceso_documentos_usuario; reconcile_statistics() los recalcula desde
+-- cero y corrige cualquier desviación (el backend la ejecuta periódicamente).
+--
+-- El script es idempotente: puede ejecutarse de nuevo sin perder datos.
+
+-- ===============================================
+-- 1. TABLAS
+-- ===============================================
+
+-- Contadores globales: users, documents, chats, shared_documents, shares
+CREATE TABLE IF NOT EXISTS statistics_counters (
+    name VARCHAR(50) PRIMARY KEY,
+    value BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Altas por día (chats y documentos), para ventanas como "últimos 7 días"
+CREATE TABLE IF NOT EXISTS statistics_daily (
+    day DATE NOT NULL,
+    name VARCHAR(50) NOT NULL,
+    value BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, name)
+);
+
+-- Agregados por usuario
+CREATE TABLE IF NOT EXISTS user_statistics (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    documents INTEGER NOT NULL DEFAULT 0,
+    chats INTEGER NOT NULL DEFAULT 0,
+    shared_by_me INTEGER NOT NULL DEFAULT 0,     -- comparticiones de mis documentos
+    shared_with_me INTEGER NOT NULL DEFAULT 0,   -- accesos que tengo a documentos
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_user_statistics_activity
+    ON user_statistics(user_id) WHERE documents > 0 OR chats > 0;
+
+-- Solo el backend (service_role) accede a las estadísticas
+ALTER TABLE statistics_counters ENABLE ROW LEVEL SECURITY;
+ALTER TABLE statistics_daily ENABLE ROW LEVEL SECURITY;
+ALTER TABLE user_statistics ENABLE ROW LEVEL SECURITY;
+
+-- ===============================================
+-- 2. FUNCIONES AUXILIARES
+-- ===============================================
+
+CREATE OR REPLACE FUNCTION stats_bump(counter_name TEXT, delta BIGINT)
+RETURNS VOID
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+BEGIN
+    INSERT INTO statistics_counters (name, value, updated_at)
+    VALUES (counter_name, GREATEST(delta, 0), NOW())
+    ON CONFLICT (name) DO UPDATE
+        SET value = GREATEST(statistics_counters.value + delta, 0),
+            updated_at = NOW();
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION stats_bump_daily(counter_name TEXT, at_time TIMESTAMP, delta BIGINT)
+RETURNS VOID
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+BEGIN
+    INSERT INTO statistics_daily (day, name, value)
+    VALUES (COALESCE(at_time, NOW())::DATE, counter_name, GREATEST(delta, 0))
+    ON CONFLICT (day, name) DO UPDATE
+        SET value = GREATEST(statistics_daily.value + delta, 0);
+END;
+$$;
+
+-- Ajusta una columna de user_statistics (crea la fila si no existe)
+CREATE OR REPLACE FUNCTION stats_bump_user(target_user INTEGER, column_name TEXT, delta INTEGER)
+RETURNS VOID
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+BEGIN
+    IF target_user IS NULL OR NOT EXISTS (SELECT 1 FROM users WHERE id = target_user) THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO user_statistics (user_id) VALUES (target_user)
+    ON CONFLICT (user_id) DO NOTHING;
+
+    EXECUTE format(
+        'UPDATE user_statistics SET %1$I = GREATEST(%1$I + $1, 0), updated_at = NOW() WHERE user_id = $2',
+        column_name
+    ) USING delta, target_user;
+END;
+$$;
+
+-- ===============================================
+-- 3. TRIGGERS
+-- ===============================================
+
+CREATE OR REPLACE FUNCTION stats_on_users()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM stats_bump('users', 1);
+        INSERT INTO user_statistics (user_id) VALUES (NEW.id)
+        ON CONFLICT (user_id) DO NOTHING;
+        RETURN NEW;
+    END IF;
+
+    -- user_statistics se borra en cascada
+    PERFORM stats_bump('users', -1);
+    RETURN OLD;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION stats_on_documents()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    share_count INTEGER;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM stats_bump('documents', 1);
+        PERFORM stats_bump_daily('documents', NEW.created_at, 1);
+        PERFORM stats_bump_user(NEW.uploaded_by, 'documents', 1);
+        IF NEW.is_shared THEN
+            PERFORM stats_bump('shared_documents', 1);
+        END IF;
+        RETURN NEW;
+    END IF;
+
+    IF TG_OP = 'UPDATE' THEN
+        IF NEW.is_shared IS DISTINCT FROM OLD.is_shared THEN
+            PERFORM stats_bump('shared_documents', CASE WHEN NEW.is_shared THEN 1 ELSE -1 END);
+        END IF;
+        IF NEW.uploaded_by IS DISTINCT FROM OLD.uploaded_by THEN
+            PERFORM stats_bump_user(OLD.uploaded_by, 'documents', -1);
+            PERFORM stats_bump_user(NEW.uploaded_by, 'documents', 1);
+        END IF;
+        RETURN NEW;
+    END IF;
+
+    -- DELETE (BEFORE): los accesos aún existen; se descuentan aquí porque al
+    -- borrarse en cascada el documento ya no es visible para su trigger
+    SELECT COUNT(*) INTO share_count
+    FROM acceso_documentos_usuario WHERE id_document = OLD.id;
+
+    PERFORM stats_bump('documents', -1);
+    PERFORM stats_bump_user(OLD.uploaded_by, 'documents', -1);
+    IF share_count > 0 THEN
+        PERFORM stats_bump_user(OLD.uploaded_by, 'shared_by_me', -share_count);
+    END IF;
+    IF OLD.is_shared THEN
+        PERFORM stats_bump('shared_documents', -1);
+    END IF;
+    RETURN OLD;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION stats_on_chats()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM stats_bump('chats', 1);
+        PERFORM stats_bump_daily('chats', NEW.created_at, 1);
+        PERFORM stats_bump_user(NEW.id_user, 'chats', 1);
+        RETURN NEW;
+    END IF;
+
+    PERFORM stats_bump('chats', -1);
+    PERFORM stats_bump_daily('chats', OLD.created_at, -1);
+    PERFORM stats_bump_user(OLD.id_user, 'chats', -1);
+    RETURN OLD;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION stats_on_document_access()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    owner_id INTEGER;
+    access_row acceso_documentos_usuario%ROWTYPE;
+    delta INTEGER;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        access_row := NEW;
+        delta := 1;
+    ELSE
+        access_row := OLD;
+        delta := -1;
+    END IF;
+
+    PERFORM stats_bump('shares', delta);
+    PERFORM stats_bump_user(access_row.id_user, 'shared_with_me', delta);
+
+    -- Si el documento se está borrando ya no existe: su trigger lo descontó
+    SELECT uploaded_by INTO owner_id FROM documents WHERE id = access_row.id_document;
+    IF owner_id IS NOT NULL THEN
+        PERFORM stats_bump_user(owner_id, 'shared_by_me', delta);
+    END IF;
+
+    RETURN access_row;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS statistics_users ON users;
+CREATE TRIGGER statistics_users
+    AFTER INSERT OR DELETE ON users
+    FOR EACH ROW EXECUTE FUNCTION stats_on_users();
+
+DROP TRIGGER IF EXISTS statistics_documents ON documents;
+CREATE TRIGGER statistics_documents
+    AFTER INSERT OR UPDATE OF is_shared, uploaded_by ON documents
+    FOR EACH ROW EXECUTE FUNCTION stats_on_documents();
+
+DROP TRIGGER IF EXISTS statistics_documents_delete ON documents;
+CREATE TRIGGER statistics_documents_delete
+    BEFORE DELETE ON documents
+    FOR EACH ROW EXECUTE FUNCTION stats_on_documents();
+
+DROP TRIGGER IF EXISTS statistics_chats ON chats;
+CREATE TRIGGER statistics_chats
+    AFTER INSERT OR DELETE ON chats
+    FOR EACH ROW EXECUTE FUNCTION stats_on_chats();
+
+DROP TRIGGER IF EXISTS statistics_document_access ON acceso_documentos_usuario;
+CREATE TRIGGER statistics_document_access
+    AFTER INSERT OR DELETE ON acceso_documentos_usuario
+    FOR EACH ROW EXECUTE FUNCTION stats_on_document_access();
+
+-- ===============================================
+-- 4. RECONCILIADOR
+-- ===============================================
+
+-- Recalcula todos los contadores desde las tablas base y devuelve las
+-- diferencias encontradas (contadores globales y número de usuarios corregidos).
+CREATE OR REPLACE FUNCTION reconcile_statistics(daily_days INTEGER DEFAULT 30)
+RETURNS TABLE(counter_name TEXT, stored_value BIGINT, actual_value BIGINT)
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    fixed_users BIGINT;
+BEGIN
+    -- Contadores globales
+    CREATE TEMP TABLE IF NOT EXISTS _stats_actual (name TEXT PRIMARY KEY, value BIGINT) ON COMMIT DROP;
+    DELETE FROM _stats_actual;
+    INSERT INTO _stats_actual VALUES
+        ('users', (SELECT COUNT(*) FROM users)),
+        ('documents', (SELECT COUNT(*) FROM documents)),
+        ('chats', (SELECT COUNT(*) FROM chats)),
+        ('shared_documents', (SELECT COUNT(*) FROM documents WHERE is_shared)),
+        ('shares', (SELECT COUNT(*) FROM acceso_documentos_usuario));
+
+    RETURN QUERY
+    SELECT a.name::TEXT, COALESCE(c.value, 0), a.value
+    FROM _stats_actual a
+    LEFT JOIN statistics_counters c ON c.name = a.name
+    WHERE c.value IS DISTINCT FROM a.value;
+
+    INSERT INTO statistics_counters (name, value, updated_at)
+    SELECT name, value, NOW() FROM _stats_actual
+    ON CONFLICT (name) DO UPDATE
+        SET value = EXCLUDED.value, updated_at = NOW()
+        WHERE statistics_counters.value IS DISTINCT FROM EXCLUDED.value;
+
+    -- Altas por día de la ventana reciente
+    DELETE FROM statistics_daily WHERE day >= CURRENT_DATE - daily_days;
+    INSERT INTO statistics_daily (day, name, value)
+    SELECT created_at::DATE, 'chats', COUNT(*) FROM chats
+    WHERE created_at >= CURRENT_DATE - daily_days GROUP BY 1
+    UNION ALL
+    SELECT created_at::DATE, 'documents', COUNT(*) FROM documents
+    WHERE created_at >= CURRENT_DATE - daily_days GROUP BY 1;
+
+    -- Agregados por usuario
+    WITH actual AS (
+        SELECT
+            u.id AS user_id,
+            (SELECT COUNT(*) FROM documents d WHERE d.uploaded_by = u.id)::INTEGER AS documents,
+            (SELECT COUNT(*) FROM chats c WHERE c.id_user = u.id)::INTEGER AS chats,
+            (SELECT COUNT(*) FROM documents d
+             JOIN acceso_documentos_usuario adu ON adu.id_document = d.id
+             WHERE d.uploaded_by = u.id)::INTEGER AS shared_by_me,
+            (SELECT COUNT(*) FROM acceso_documentos_usuario adu
+             WHERE adu.id_user = u.id)::INTEGER AS shared_with_me
+        FROM users u
+    ),
+    upserted AS (
+        INSERT INTO user_statistics AS s (user_id, documents, chats, shared_by_me, shared_with_me, updated_at)
+        SELECT user_id, documents, chats, shared_by_me, shared_with_me, NOW() FROM actual
+        ON CONFLICT (user_id) DO UPDATE
+            SET documents = EXCLUDED.documents,
+                chats = EXCLUDED.chats,
+                shared_by_me = EXCLUDED.shared_by_me,
+                shared_with_me = EXCLUDED.shared_with_me,
+                updated_at = NOW()
+            WHERE (s.documents, s.chats, s.shared_by_me, s.shared_with_me)
+                IS DISTINCT FROM
+                  (EXCLUDED.documents, EXCLUDED.chats, EXCLUDED.shared_by_me, EXCLUDED.shared_with_me)
+        RETURNING 1
+    )
+    SELECT COUNT(*) INTO fixed_users FROM upserted;
+
+    IF fixed_users > 0 THEN
+        RETURN QUERY SELECT 'user_statistics'::TEXT, 0::BIGINT, fixed_users;
+    END IF;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION reconcile_statistics(INTEGER) TO service_role;
+GRANT ALL ON statistics_counters, statistics_daily, user_statistics TO service_role;
+
+-- ===============================================
+-- 5. CARGA INICIAL
+-- ===============================================
+
+SELECT * FROM reconcile_statistics();
+
+-- Verificación
+SELECT * FROM statistics_counters ORDER BY name;